@@ -1,16 +1,33 @@
 from dataclasses import dataclass
-from typing import Sequence
-import aiosqlite
+from typing import Optional, Sequence
 
-from pydantic_ai import Agent, Tool
+from pydantic_ai import Agent, RunContext, Tool
 from pydantic_ai.models.groq import GroqModel
+from ai_services.analytics import AnalyticsEngine
+from ai_services.prefetch import SnapshotPrefetcher
 from config.settings import Settings
+from customer_transaction_db.repository import BankingRepository
 
 
 @dataclass
 class Dependencies:
     settings: Settings
-    sqlite_db: aiosqlite.Connection   # <-- DIRECT SQLite connection (never generator)
+    repository: BankingRepository     # banking data on the configured backend
+    prefetcher: Optional[SnapshotPrefetcher] = None   # per-session customer snapshot
+    analytics: Optional[AnalyticsEngine] = None       # shared columnar transaction cache
+
+
+async def customer_snapshot_instructions(
+    ctx: RunContext[Dependencies],
+) -> Optional[str]:
+    """
+    Inject the prefetched customer snapshot into the prompt so that the
+    model can answer common questions without a tool round trip.
+    """
+    if ctx.deps.prefetcher is None:
+        return None
+    snapshot = await ctx.deps.prefetcher.get(ctx.deps.prefetcher.customer_name)
+    return snapshot.to_prompt() if snapshot is not None else None
 
 
 def create_groq_agent(
@@ -34,6 +51,7 @@ def create_groq_agent(
         model=groq_model,
         deps_type=Dependencies,
         system_prompt=system_prompt,
+        instructions=customer_snapshot_instructions,
         tools=tools,                 # <--- MOST IMPORTANT (must include all tools)
         end_strategy="early",        # clean finishing behavior
     )
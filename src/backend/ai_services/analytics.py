@@ -0,0 +1,356 @@
+import asyncio
+from collections import OrderedDict
+from datetime import date
+from typing import Any, Iterable
+
+import numpy as np
+from loguru import logger
+
+from customer_transaction_db.repository import BankingRepository
+from session_state.bus import TOOL_RESULTS_CHANNEL, EventBus
+
+EPOCH = date(1970, 1, 1)
+
+# Scale factor turning a median absolute deviation into a standard deviation
+# estimate for normally distributed data.
+MAD_TO_SIGMA = 1.4826
+
+
+def to_day(value: str | date) -> int:
+    """Days since the Unix epoch of an ISO date or `date`."""
+    if isinstance(value, str):
+        value = date.fromisoformat(value[:10])
+    return (value - EPOCH).days
+
+
+def from_day(day: int) -> date:
+    return date.fromordinal(EPOCH.toordinal() + int(day))
+
+
+class _Dictionary:
+    """Dictionary encoding of a string column."""
+
+    def __init__(self) -> None:
+        self.values: list[str] = []
+        self.codes: dict[str, int] = {}
+
+    def encode(self, value: str | None) -> int:
+        value = value or "Unknown"
+        code = self.codes.get(value)
+        if code is None:
+            code = self.codes[value] = len(self.values)
+            self.values.append(value)
+        return code
+
+
+class TransactionColumns:
+    """
+    Columnar, append-only copy of one customer's transactions.
+
+    Dates are stored as int32 days since the epoch, amounts as float64 and
+    merchants and categories as dictionary-encoded int32 codes. Columns grow
+    geometrically, so incremental appends are amortised O(1) per row.
+    """
+
+    def __init__(self, capacity: int = 256) -> None:
+        self.size = 0
+        self.last_id = 0
+        self.categories = _Dictionary()
+        self.merchants = _Dictionary()
+        self._days = np.empty(capacity, dtype=np.int32)
+        self._amounts = np.empty(capacity, dtype=np.float64)
+        self._category_codes = np.empty(capacity, dtype=np.int32)
+        self._merchant_codes = np.empty(capacity, dtype=np.int32)
+
+    @property
+    def days(self) -> np.ndarray:
+        return self._days[:self.size]
+
+    @property
+    def amounts(self) -> np.ndarray:
+        return self._amounts[:self.size]
+
+    @property
+    def category_codes(self) -> np.ndarray:
+        return self._category_codes[:self.size]
+
+    @property
+    def merchant_codes(self) -> np.ndarray:
+        return self._merchant_codes[:self.size]
+
+    def append(self, rows: Iterable[Any]) -> int:
+        """
+        Append transaction rows in id order.
+
+        Args:
+            rows: Rows with id, txn_date, amount, merchant_name and category.
+
+        Returns:
+            Number of rows appended.
+        """
+        rows = list(rows)
+        if not rows:
+            return 0
+        self._reserve(self.size + len(rows))
+        end = self.size + len(rows)
+        self._days[self.size:end] = [to_day(row["txn_date"]) for row in rows]
+        self._amounts[self.size:end] = [float(row["amount"]) for row in rows]
+        self._category_codes[self.size:end] = [
+            self.categories.encode(row["category"]) for row in rows
+        ]
+        self._merchant_codes[self.size:end] = [
+            self.merchants.encode(row["merchant_name"]) for row in rows
+        ]
+        self.size = end
+        self.last_id = max(self.last_id, max(int(row["id"]) for row in rows))
+        return len(rows)
+
+    def _reserve(self, capacity: int) -> None:
+        if capacity <= len(self._days):
+            return
+        capacity = max(capacity, 2 * len(self._days))
+        for name in ("_days", "_amounts", "_category_codes", "_merchant_codes"):
+            column = getattr(self, name)
+            grown = np.empty(capacity, dtype=column.dtype)
+            grown[:self.size] = column[:self.size]
+            setattr(self, name, grown)
+
+    def _debits_since(self, since: date) -> np.ndarray:
+        return (self.days >= to_day(since)) & (self.amounts < 0)
+
+    def spending_by_category(self, since: date) -> dict[str, float]:
+        """
+        Total debits per category since a date.
+
+        Args:
+            since: Inclusive start date.
+
+        Returns:
+            Mapping of category to total amount spent, largest first.
+        """
+        mask = self._debits_since(since)
+        totals = np.bincount(
+            self.category_codes[mask],
+            weights=-self.amounts[mask],
+            minlength=len(self.categories.values),
+        )
+        order = np.argsort(-totals, kind="stable")
+        return {
+            self.categories.values[code]: round(float(totals[code]), 2)
+            for code in order
+            if totals[code] > 0
+        }
+
+    def debits_above_average(
+        self, since: date, multiplier: float
+    ) -> tuple[float, list[dict[str, Any]]]:
+        """
+        Debits since a date larger than `multiplier` times their average.
+
+        Args:
+            since: Inclusive start date.
+            multiplier: Multiple of the average debit a debit must exceed.
+
+        Returns:
+            The threshold, 0 without debits, and the debits above it as
+            rows with txn_date, amount, merchant_name and category, in id
+            order.
+        """
+        mask = self._debits_since(since)
+        if not mask.any():
+            return 0.0, []
+        spent = -self.amounts
+        threshold = float(spent[mask].mean()) * multiplier
+        return threshold, [
+            {
+                "txn_date": from_day(self.days[i]).isoformat(),
+                "amount": float(self.amounts[i]),
+                "merchant_name": self.merchants.values[self.merchant_codes[i]],
+                "category": self.categories.values[self.category_codes[i]],
+            }
+            for i in np.flatnonzero(mask & (spent > threshold))
+        ]
+
+    def top_merchants(self, since: date, top_n: int) -> list[dict[str, Any]]:
+        """
+        Merchants with the highest total debits since a date.
+
+        Args:
+            since: Inclusive start date.
+            top_n: Number of merchants.
+
+        Returns:
+            Dicts with merchant, total_spent and transactions, largest first.
+        """
+        mask = self._debits_since(since)
+        codes = self.merchant_codes[mask]
+        size = len(self.merchants.values)
+        totals = np.bincount(codes, weights=-self.amounts[mask], minlength=size)
+        counts = np.bincount(codes, minlength=size)
+        order = np.argsort(-totals, kind="stable")[:top_n]
+        return [
+            {
+                "merchant": self.merchants.values[code],
+                "total_spent": round(float(totals[code]), 2),
+                "transactions": int(counts[code]),
+            }
+            for code in order
+            if counts[code] > 0
+        ]
+
+    def monthly_trend(self, today: date, months: int) -> list[dict[str, Any]]:
+        """
+        Debit and credit totals per calendar month, oldest first.
+
+        Args:
+            today: Any day of the last month of the window.
+            months: Number of months, including the current one.
+
+        Returns:
+            Dicts with month (YYYY-MM), spent, received and change_percent,
+            the change in spending from the previous month.
+        """
+        # Month index of every transaction: year * 12 + month - 1.
+        dates = self.days.astype("datetime64[D]")
+        month_index = dates.astype("datetime64[M]").astype(np.int64) + 1970 * 12
+        last = today.year * 12 + today.month - 1
+        first = last - months + 1
+
+        mask = (month_index >= first) & (month_index <= last)
+        offsets = month_index[mask] - first
+        amounts = self.amounts[mask]
+        spent = np.bincount(
+            offsets, weights=np.where(amounts < 0, -amounts, 0), minlength=months
+        )
+        received = np.bincount(
+            offsets, weights=np.where(amounts > 0, amounts, 0), minlength=months
+        )
+
+        previous = np.concatenate(([np.nan], spent[:-1]))
+        with np.errstate(divide="ignore", invalid="ignore"):
+            change = np.where(previous > 0, (spent - previous) / previous * 100, np.nan)
+
+        return [
+            {
+                "month": f"{(first + i) // 12:04d}-{(first + i) % 12 + 1:02d}",
+                "spent": round(float(spent[i]), 2),
+                "received": round(float(received[i]), 2),
+                "change_percent": (
+                    None if np.isnan(change[i]) else round(float(change[i]), 1)
+                ),
+            }
+            for i in range(months)
+        ]
+
+    def anomaly_scores(
+        self, since: date, min_score: float, top_n: int
+    ) -> list[dict[str, Any]]:
+        """
+        Score debits since a date against the customer's history in the
+        same category, using a robust z-score (median and MAD).
+
+        Args:
+            since: Inclusive start date of the debits scored.
+            min_score: Minimum score reported.
+            top_n: Maximum number of debits reported.
+
+        Returns:
+            Dicts with date, amount, merchant, category and score, highest
+            score first.
+        """
+        debits = self.amounts < 0
+        spent = -self.amounts
+        codes = self.category_codes
+        scores = np.zeros(self.size)
+
+        for code in np.unique(codes[debits]):
+            in_category = debits & (codes == code)
+            values = spent[in_category]
+            median = np.median(values)
+            mad = np.median(np.abs(values - median)) * MAD_TO_SIGMA
+            # A category with (almost) constant amounts falls back to the
+            # mean absolute deviation, then to a relative scale.
+            scale = mad or np.mean(np.abs(values - median)) or median or 1.0
+            scores[in_category] = (values - median) / scale
+
+        candidates = np.flatnonzero(
+            debits & (self.days >= to_day(since)) & (scores >= min_score)
+        )
+        order = candidates[np.argsort(-scores[candidates], kind="stable")][:top_n]
+        return [
+            {
+                "date": from_day(self.days[i]).isoformat(),
+                "amount": round(float(spent[i]), 2),
+                "merchant": self.merchants.values[self.merchant_codes[i]],
+                "category": self.categories.values[codes[i]],
+                "score": round(float(scores[i]), 2),
+            }
+            for i in order
+        ]
+
+
+class AnalyticsEngine:
+    """
+    Keeps the transactions of recently active customers in columnar form.
+
+    Columns are loaded on first use and extended with new rows (by id) when
+    a worker announces changed data on the tool-results channel, so repeat
+    questions cost no database round trip.
+
+    Args:
+        bus: Bus carrying `{"customer_name": ...}` change events.
+        max_customers: Number of customers kept in memory.
+    """
+
+    def __init__(self, bus: EventBus, max_customers: int = 256) -> None:
+        self.max_customers = max_customers
+        self._columns: OrderedDict[str, TransactionColumns] = OrderedDict()
+        self._stale: set[str] = set()
+        self._locks: dict[str, asyncio.Lock] = {}
+        bus.subscribe(TOOL_RESULTS_CHANNEL, self._on_invalidate)
+
+    async def columns(
+        self, repository: BankingRepository, customer_name: str
+    ) -> TransactionColumns:
+        """
+        Return up-to-date columns for a customer, loading or extending them
+        if needed.
+
+        Args:
+            repository: Banking data.
+            customer_name: Name of the customer (case-insensitive).
+        """
+        key = customer_name.lower()
+        columns = self._columns.get(key)
+        if columns is not None and key not in self._stale:
+            self._columns.move_to_end(key)
+            return columns
+
+        lock = self._locks.setdefault(key, asyncio.Lock())
+        async with lock:
+            columns = self._columns.get(key)
+            if columns is None:
+                columns = TransactionColumns()
+            elif key not in self._stale:
+                return columns
+            self._stale.discard(key)
+
+            rows = await repository.transactions_after(
+                customer_name, columns.last_id
+            )
+            added = columns.append(rows)
+            logger.debug(f"[analytics] {customer_name}: +{added} rows, {columns.size} total")
+
+            self._columns[key] = columns
+            self._columns.move_to_end(key)
+            while len(self._columns) > self.max_customers:
+                evicted, _ = self._columns.popitem(last=False)
+                self._locks.pop(evicted, None)
+        return columns
+
+    async def _on_invalidate(self, event: dict[str, Any]) -> None:
+        customer_name = event.get("customer_name")
+        if customer_name is None:
+            self._stale.update(self._columns)
+        elif customer_name.lower() in self._columns:
+            self._stale.add(customer_name.lower())
@@ -0,0 +1,72 @@
+from typing import Any, Mapping, Sequence
+
+from customer_transaction_db.repository import Row
+
+VERBOSE, COMPACT = "verbose", "compact"
+FORMATS = (VERBOSE, COMPACT)
+
+
+def compact_number(value: float) -> float | int:
+    """Round to paise and drop a zero fraction, e.g. 1299.0 -> 1299."""
+    value = round(float(value), 2)
+    return int(value) if value.is_integer() else value
+
+
+def _cell(value: Any, max_chars: int) -> Any:
+    if isinstance(value, float):
+        return compact_number(value)
+    if isinstance(value, str) and len(value) > max_chars:
+        return value[: max_chars - 1].rstrip() + "…"
+    return value
+
+
+def compact_table(
+    rows: Sequence[Row],
+    columns: Mapping[str, str],
+    max_rows: int,
+    max_chars: int = 80,
+    totals: Mapping[str, float] | None = None,
+    more_hint: str | None = None,
+    **extra: Any,
+) -> dict[str, Any]:
+    """
+    Encode rows as one list of column names and one list of values per row,
+    instead of repeating every key in every row.
+
+    Args:
+        rows: Rows to encode.
+        columns: Column name in the output, mapped to the key in a row.
+        max_rows: Rows kept; the rest are counted under "more".
+        max_chars: Longest text value; longer ones are cut with "…".
+        totals: Aggregates over all rows, kept or not.
+        more_hint: How to get the rows that were left out.
+        **extra: Further top-level fields, e.g. a continuation token.
+
+    Returns:
+        {"columns": [...], "rows": [[...], ...]} with "totals" and "more"
+        when given or needed.
+    """
+    table: dict[str, Any] = {
+        "columns": list(columns),
+        "rows": [
+            [_cell(row[key], max_chars) for key in columns.values()]
+            for row in rows[:max_rows]
+        ],
+    }
+    if totals:
+        table["totals"] = {name: compact_number(value) for name, value in totals.items()}
+    if len(rows) > max_rows:
+        more = f"{len(rows) - max_rows} more rows not shown"
+        table["more"] = f"{more}; {more_hint}" if more_hint else more
+    table.update(extra)
+    return table
+
+
+def transaction_totals(rows: Sequence[Row]) -> dict[str, float]:
+    """Count, debits and credits of signed transaction amounts."""
+    amounts = [float(row["amount"]) for row in rows]
+    return {
+        "count": len(amounts),
+        "debits": -sum(amount for amount in amounts if amount < 0),
+        "credits": sum(amount for amount in amounts if amount > 0),
+    }
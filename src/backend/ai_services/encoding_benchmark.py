@@ -0,0 +1,161 @@
+import argparse
+import asyncio
+import random
+import re
+import sys
+import tempfile
+from datetime import date, timedelta
+from pathlib import Path
+from types import SimpleNamespace
+from typing import Any, Callable
+
+import aiosqlite
+from loguru import logger
+from pydantic_core import to_json
+
+from ai_services.agent import Dependencies
+from ai_services.analytics import AnalyticsEngine
+from ai_services.encoding import FORMATS
+from ai_services import tools
+from config.settings import ToolsConfig
+from customer_transaction_db.repository import SqliteBankingRepository
+from session_state.bus import LocalEventBus
+
+# Merchants of a typical month: (merchant, category, low, high, per month).
+MERCHANTS = [
+    ("Swiggy", "Food", 150, 900, 10),
+    ("Zomato", "Food", 150, 1100, 6),
+    ("BigBasket", "Groceries", 400, 3500, 4),
+    ("Amazon", "Electronics", 300, 15000, 3),
+    ("Myntra", "Shopping", 600, 4500, 2),
+    ("Uber", "Travel", 90, 650, 8),
+    ("Rapido", "Travel", 40, 250, 6),
+    ("Indian Oil", "Fuel", 500, 3000, 3),
+    ("Airtel", "Bills", 399, 999, 1),
+    ("BESCOM", "Bills", 800, 2600, 1),
+    ("PVR Cinemas", "Entertainment", 300, 1400, 1),
+    ("Apollo Pharmacy", "Health", 120, 2200, 2),
+]
+
+_TOKEN = re.compile(r"\d{1,3}|[^\W\d_]+|[^\w\s]|\s+")
+
+# (name, tool, keyword arguments) of the calls compared.
+CALLS: list[tuple[str, Callable, dict[str, Any]]] = [
+    ("recent_transactions 10", tools.get_recent_transactions, {"last_n": 10}),
+    ("recent_transactions 25", tools.get_recent_transactions, {"last_n": 25}),
+    ("transactions_page 25", tools.get_transactions_page, {"page_size": 25}),
+    ("unusual_spending", tools.detect_unusual_spending, {}),
+    ("bank_schemes SBI", tools.get_bank_schemes, {"bank_name": "SBI"}),
+    ("spending_trend 6", tools.get_spending_trend, {"months": 6}),
+    ("top_merchants 10", tools.get_top_merchants, {"top_n": 10}),
+    ("spending_anomalies", tools.score_spending_anomalies, {"min_score": 1.0}),
+]
+
+
+def token_counter() -> tuple[str, Callable[[str], int]]:
+    """
+    Token counter: `tiktoken`'s o200k_base encoding when installed, else an
+    approximation splitting words, up to three digits, and punctuation the
+    way BPE vocabularies tend to.
+    """
+    try:
+        import tiktoken
+    except ImportError:
+        return "approximate", lambda text: len(_TOKEN.findall(text))
+    encoding = tiktoken.get_encoding("o200k_base")
+    return "o200k_base", lambda text: len(encoding.encode(text))
+
+
+async def seed_history(db_path: Path, customer_name: str, months: int, seed: int) -> None:
+    """Add `months` of realistic debits and monthly salary credits."""
+    from reset_db import reset_db
+
+    await reset_db(str(db_path))
+    rng = random.Random(seed)
+    today = date.today()
+    async with aiosqlite.connect(db_path) as db:
+        cursor = await db.execute(
+            "SELECT a.id FROM accounts a JOIN customers c ON c.id = a.customer_id "
+            "WHERE c.name = ?;",
+            (customer_name,),
+        )
+        (account_id,) = await cursor.fetchone()
+        rows = []
+        for month in range(months):
+            month_start = today - timedelta(days=30 * (month + 1))
+            rows.append(
+                (account_id, (month_start + timedelta(days=1)).isoformat(),
+                 85000.0, "credit", "Acme Corp Salary", "Salary")
+            )
+            for merchant, category, low, high, count in MERCHANTS:
+                for _ in range(count):
+                    day = month_start + timedelta(days=rng.randrange(30))
+                    amount = round(rng.uniform(low, high), 2)
+                    rows.append(
+                        (account_id, day.isoformat(), -amount, "debit", merchant, category)
+                    )
+        await db.executemany(
+            "INSERT INTO transactions "
+            "(account_id, txn_date, amount, txn_type, merchant_name, category) "
+            "VALUES (?, ?, ?, ?, ?, ?);",
+            rows,
+        )
+        await db.commit()
+
+
+async def run(months: int, seed: int) -> list[dict[str, Any]]:
+    counter_name, count_tokens = token_counter()
+    with tempfile.TemporaryDirectory() as directory:
+        db_path = Path(directory) / "transactions.db"
+        await seed_history(db_path, tools.DEFAULT_CUSTOMER, months, seed)
+
+        async with aiosqlite.connect(db_path) as sqlite_db:
+            sqlite_db.row_factory = aiosqlite.Row
+            repository = SqliteBankingRepository(sqlite_db)
+            analytics = AnalyticsEngine(bus=LocalEventBus())
+
+            results = []
+            for name, tool, kwargs in CALLS:
+                row = {"call": name, "tokenizer": counter_name}
+                for output_format in FORMATS:
+                    settings = SimpleNamespace(tools=ToolsConfig(output_format=output_format))
+                    ctx = SimpleNamespace(
+                        deps=Dependencies(
+                            settings=settings, repository=repository, analytics=analytics
+                        )
+                    )
+                    # Serialized the way tool results reach the model.
+                    text = to_json(await tool(ctx, **kwargs)).decode()
+                    row[f"{output_format}_tokens"] = count_tokens(text)
+                row["saved_percent"] = round(
+                    100 * (1 - row["compact_tokens"] / max(row["verbose_tokens"], 1)), 1
+                )
+                results.append(row)
+            return results
+
+
+def _parse_args(argv: list[str] | None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Compare prompt tokens of verbose and compact tool results."
+    )
+    parser.add_argument("--months", type=int, default=6)
+    parser.add_argument("--seed", type=int, default=7)
+    return parser.parse_args(argv)
+
+
+async def main(argv: list[str] | None = None) -> None:
+    args = _parse_args(argv)
+    logger.remove()
+    logger.add(sys.stderr, level="WARNING")
+    results = await run(args.months, args.seed)
+    print(f"{'call':<26}{'verbose':>9}{'compact':>9}{'saved':>8}")
+    for row in results:
+        print(
+            f"{row['call']:<26}{row['verbose_tokens']:>9}"
+            f"{row['compact_tokens']:>9}{row['saved_percent']:>7}%"
+        )
+    print(f"tokenizer: {results[0]['tokenizer']}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
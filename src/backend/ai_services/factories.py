@@ -1,52 +1,100 @@
+from typing import TYPE_CHECKING, Callable, Generic, TypeVar
+
+import httpx
 from groq import AsyncGroq
-from openai import AsyncOpenAI
 from pydantic_ai.models.groq import GroqModel
+from pydantic_ai.providers.groq import GroqProvider
 
 from config.settings import Settings
 
+if TYPE_CHECKING:
+    from openai import AsyncOpenAI
+
+ClientT = TypeVar("ClientT")
+
+
+class LazyClient(Generic[ClientT]):
+    """
+    Defers construction of an optional API client until it is first used.
+
+    Args:
+        factory: Callable building the client.
+    """
+
+    def __init__(self, factory: Callable[[], ClientT]) -> None:
+        self._factory = factory
+        self._client: ClientT | None = None
+
+    @property
+    def created(self) -> bool:
+        return self._client is not None
+
+    def get(self) -> ClientT:
+        if self._client is None:
+            self._client = self._factory()
+        return self._client
+
+    async def close(self) -> None:
+        if self._client is not None:
+            await self._client.close()
+            self._client = None
+
 def create_groq_client(
     settings: Settings,
+    http_client: httpx.AsyncClient | None = None,
 ) -> AsyncGroq:
     """
     Creates a client for interacting with Groq API.
 
     Args:
         settings: Application settings.
+        http_client: Shared HTTP client whose connection pool to use.
 
     Returns:
         Client for interacting with Groq API
     """
-    return AsyncGroq(api_key=settings.engine.GROQ_API_KEY)
+    return AsyncGroq(
+        api_key=settings.engine.GROQ_API_KEY,
+        http_client=http_client,
+    )
 
 
 def create_openai_client(
     settings: Settings,
-) -> AsyncOpenAI:
+) -> "AsyncOpenAI":
     """
     Creates a client for interacting with OpenAI API.
 
+    The `openai` package is imported here rather than at module level
+    because it is slow to import and rarely needed.
+
     Args:
         settings: Application settings.
 
     Returns:
         Client for interacting with OpenAI API
     """
+    from openai import AsyncOpenAI
+
     return AsyncOpenAI(api_key=settings.engine.OPENAI_API_KEY)
 
 
 def create_groq_model(
     groq_client: AsyncGroq,
+    model_name: str = "llama-3.3-70b-versatile",
 ) -> GroqModel:
     """
     Creates a Groq model for PydanticAI.
 
     Args:
-        groq_client: Client for interacting with Groq API.
-        (no longer passed into GroqModel)
+        groq_client: Client for interacting with Groq API. Sharing it with
+            STT means both reuse the same connection pool.
+        model_name: Groq model ID.
 
     Returns:
         Groq model for PydanticAI
     """
     return GroqModel(
-        model_name="llama-3.3-70b-versatile"
+        model_name=model_name,
+        provider=GroqProvider(groq_client=groq_client),
     )
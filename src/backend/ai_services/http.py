@@ -0,0 +1,143 @@
+import asyncio
+import random
+from collections import defaultdict
+from dataclasses import asdict, dataclass
+
+import httpx
+from loguru import logger
+
+from config.settings import Settings
+
+
+@dataclass
+class EndpointStats:
+    requests: int = 0
+    new_connections: int = 0
+    reused_connections: int = 0
+    retries: int = 0
+
+
+class PooledTransport(httpx.AsyncBaseTransport):
+    """
+    Keep-alive connection pool shared by every Groq call.
+
+    Retries requests that failed to connect with exponential backoff and
+    full jitter (the request never reached the server, so this is safe for
+    any method), and counts per endpoint how often a request had to open a
+    new connection instead of reusing a pooled one.
+
+    Args:
+        transport: Underlying pooled transport.
+        retries: Retries after a connection failure.
+        backoff: Base delay in seconds for the exponential backoff.
+    """
+
+    def __init__(
+        self,
+        transport: httpx.AsyncBaseTransport,
+        retries: int = 2,
+        backoff: float = 0.2,
+    ) -> None:
+        self._transport = transport
+        self.retries = retries
+        self.backoff = backoff
+        self.stats: defaultdict[str, EndpointStats] = defaultdict(EndpointStats)
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        stats = self.stats[f"{request.method} {request.url.host}{request.url.path}"]
+        stats.requests += 1
+
+        opened = False
+        inner_trace = request.extensions.get("trace")
+
+        async def trace(event_name: str, info: dict) -> None:
+            nonlocal opened
+            if event_name == "connection.connect_tcp.started":
+                opened = True
+            if inner_trace is not None:
+                await inner_trace(event_name, info)
+
+        request.extensions["trace"] = trace
+
+        for attempt in range(self.retries + 1):
+            try:
+                response = await self._transport.handle_async_request(request)
+                break
+            except (httpx.ConnectError, httpx.ConnectTimeout) as e:
+                if attempt == self.retries:
+                    raise
+                stats.retries += 1
+                delay = random.uniform(0, self.backoff * 2 ** attempt)
+                logger.warning(
+                    f"Connection to {request.url.host} failed ({e}); "
+                    f"retrying in {delay:.2f}s"
+                )
+                await asyncio.sleep(delay)
+
+        if opened:
+            stats.new_connections += 1
+        else:
+            stats.reused_connections += 1
+        return response
+
+    async def aclose(self) -> None:
+        await self._transport.aclose()
+
+    def snapshot(self) -> dict[str, dict[str, int]]:
+        return {endpoint: asdict(stats) for endpoint, stats in self.stats.items()}
+
+
+def create_pooled_transport(settings: Settings) -> PooledTransport:
+    """
+    Creates the connection pool shared by the Groq STT and LLM calls.
+
+    Args:
+        settings: Application settings.
+
+    Returns:
+        Pooled transport with connection reuse metrics.
+    """
+    config = settings.http
+    http2 = config.http2
+    if http2:
+        try:
+            import h2  # noqa: F401
+        except ImportError:
+            logger.warning("HTTP/2 requested but `h2` is not installed; using HTTP/1.1")
+            http2 = False
+
+    return PooledTransport(
+        httpx.AsyncHTTPTransport(
+            http2=http2,
+            limits=httpx.Limits(
+                max_connections=config.max_connections,
+                max_keepalive_connections=config.max_keepalive_connections,
+                keepalive_expiry=config.keepalive_expiry_seconds,
+            ),
+        ),
+        retries=config.connect_retries,
+        backoff=config.retry_backoff_seconds,
+    )
+
+
+def create_http_client(
+    settings: Settings,
+    transport: PooledTransport,
+) -> httpx.AsyncClient:
+    """
+    Creates the HTTP client shared by the Groq STT and LLM calls.
+
+    Args:
+        settings: Application settings.
+        transport: Shared pooled transport.
+
+    Returns:
+        HTTP client.
+    """
+    return httpx.AsyncClient(
+        transport=transport,
+        timeout=httpx.Timeout(
+            settings.http.read_timeout_seconds,
+            connect=settings.http.connect_timeout_seconds,
+        ),
+    )
@@ -0,0 +1,41 @@
+import base64
+import binascii
+import json
+from dataclasses import asdict, dataclass
+
+
+class InvalidPageToken(ValueError):
+    """Raised when a continuation token cannot be decoded."""
+
+
+@dataclass(frozen=True)
+class PageToken:
+    """
+    Position after the last transaction returned, plus the filters of the
+    listing so that a continuation cannot silently change them.
+    """
+
+    customer_name: str
+    txn_date: str
+    id: int
+    start_date: str | None = None
+    end_date: str | None = None
+
+    def encode(self) -> str:
+        """Opaque, URL-safe form handed to the model."""
+        data = json.dumps(asdict(self), separators=(",", ":")).encode()
+        return base64.urlsafe_b64encode(data).rstrip(b"=").decode()
+
+    @classmethod
+    def decode(cls, token: str) -> "PageToken":
+        """
+        Parse a token produced by `encode`.
+
+        Raises:
+            InvalidPageToken: If the token is malformed.
+        """
+        try:
+            data = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4))
+            return cls(**json.loads(data))
+        except (binascii.Error, ValueError, TypeError) as e:
+            raise InvalidPageToken("Invalid continuation token.") from e
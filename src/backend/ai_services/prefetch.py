@@ -0,0 +1,231 @@
+import asyncio
+import time
+import weakref
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Any
+
+from loguru import logger
+
+from customer_transaction_db.repository import BankingRepository
+from session_state.bus import TOOL_RESULTS_CHANNEL, EventBus
+
+
+@dataclass(frozen=True)
+class CustomerSnapshot:
+    """
+    Compact view of the data most turns need: balance, latest transactions
+    and a category summary of recent spending.
+    """
+
+    customer_name: str
+    balance: dict[str, Any] | None
+    recent_transactions: list[dict[str, Any]]
+    category_summary: dict[str, float]
+    summary_days: int
+    fetched_at: float
+
+    def age(self) -> float:
+        return time.monotonic() - self.fetched_at
+
+    def to_prompt(self) -> str:
+        """Render the snapshot as compact context for the model."""
+        lines = [f"Customer data snapshot for {self.customer_name} (already fetched):"]
+        if self.balance is None:
+            lines.append("- No account found.")
+        else:
+            lines.append(
+                f"- {self.balance['bank_name']} {self.balance['account_number']}: "
+                f"balance ₹{self.balance['current_balance']:,.2f}"
+            )
+        if self.recent_transactions:
+            lines.append("- Recent transactions (date|amount|merchant|category):")
+            lines.extend(
+                f"  {t['txn_date']}|{t['amount']:.2f}|{t['merchant_name']}|{t['category']}"
+                for t in self.recent_transactions
+            )
+        if self.category_summary:
+            totals = ", ".join(
+                f"{category} ₹{total:,.2f}"
+                for category, total in self.category_summary.items()
+            )
+            lines.append(f"- Spending in the last {self.summary_days} days: {totals}")
+        lines.append("Answer from this snapshot when it covers the question.")
+        return "\n".join(lines)
+
+
+async def load_customer_snapshot(
+    repository: BankingRepository,
+    customer_name: str,
+    transactions: int,
+    summary_days: int,
+) -> CustomerSnapshot:
+    """
+    Read a customer snapshot from the transaction database.
+
+    Args:
+        repository: Banking data.
+        customer_name: Name of the customer.
+        transactions: Number of recent transactions to include.
+        summary_days: Window of the category summary in days.
+
+    Returns:
+        Fresh customer snapshot.
+    """
+    since = (datetime.today() - timedelta(days=summary_days)).strftime("%Y-%m-%d")
+    balance, recent, summary = await asyncio.gather(
+        repository.account_balance(customer_name),
+        repository.recent_transactions(customer_name, transactions),
+        repository.spending_by_category(customer_name, since),
+    )
+    return CustomerSnapshot(
+        customer_name=customer_name,
+        balance=dict(balance) if balance is not None else None,
+        recent_transactions=[dict(row) for row in recent],
+        category_summary=summary,
+        summary_days=summary_days,
+        fetched_at=time.monotonic(),
+    )
+
+
+class SnapshotPrefetcher:
+    """
+    Per-session loader that fetches the customer snapshot speculatively,
+    e.g. while the user's audio is still being transcribed.
+
+    Args:
+        repository: Banking data.
+        customer_name: Customer whose data is prefetched.
+        max_age_seconds: Age after which a snapshot is refreshed.
+        transactions: Number of recent transactions to include.
+        summary_days: Window of the category summary in days.
+    """
+
+    def __init__(
+        self,
+        repository: BankingRepository,
+        customer_name: str,
+        max_age_seconds: float,
+        transactions: int,
+        summary_days: int,
+    ) -> None:
+        self.repository = repository
+        self.customer_name = customer_name
+        self.max_age_seconds = max_age_seconds
+        self.transactions = transactions
+        self.summary_days = summary_days
+        self._snapshot: CustomerSnapshot | None = None
+        self._task: asyncio.Task[CustomerSnapshot] | None = None
+
+    def _is_fresh(self) -> bool:
+        return self._snapshot is not None and self._snapshot.age() < self.max_age_seconds
+
+    def refresh(self) -> None:
+        """Start loading a snapshot in the background unless one is fresh."""
+        if self._is_fresh() or (self._task is not None and not self._task.done()):
+            return
+        self._task = asyncio.create_task(self._load())
+        # Failures are logged in `_load`; mark them retrieved.
+        self._task.add_done_callback(lambda t: t.cancelled() or t.exception())
+
+    def invalidate(self) -> None:
+        """Drop the current snapshot, e.g. after the customer's data changed."""
+        self._snapshot = None
+        if self._task is not None and not self._task.done():
+            self._task.cancel()
+        self._task = None
+
+    async def get(self, customer_name: str) -> CustomerSnapshot | None:
+        """
+        Return a valid snapshot for `customer_name`, waiting for an
+        in-flight prefetch if there is one.
+
+        Args:
+            customer_name: Customer the caller needs data for.
+
+        Returns:
+            The snapshot, or None if it does not cover this customer or is
+            unavailable.
+        """
+        if customer_name.lower() != self.customer_name.lower():
+            return None
+        # `invalidate` may cancel and replace the task while we wait.
+        task = self._task
+        if task is not None and not task.done():
+            try:
+                await asyncio.shield(task)
+            except asyncio.CancelledError:
+                current = asyncio.current_task()
+                if current is not None and current.cancelling():
+                    raise
+                return None
+            except Exception:
+                return None
+            if task.cancelled():
+                return None
+        return self._snapshot if self._is_fresh() else None
+
+    def current(self) -> CustomerSnapshot | None:
+        """Return the snapshot if it is already loaded and fresh, without waiting."""
+        return self._snapshot if self._is_fresh() else None
+
+    async def _load(self) -> CustomerSnapshot:
+        started = time.perf_counter()
+        try:
+            snapshot = await load_customer_snapshot(
+                self.repository,
+                self.customer_name,
+                self.transactions,
+                self.summary_days,
+            )
+        except Exception as e:
+            logger.error(f"❌ ERROR prefetching snapshot for {self.customer_name}: {e}")
+            raise
+        self._snapshot = snapshot
+        logger.debug(
+            f"[prefetch] Snapshot for {self.customer_name} loaded in "
+            f"{(time.perf_counter() - started) * 1000:.1f} ms"
+        )
+        return snapshot
+
+
+class PrefetchHub:
+    """
+    Creates per-session prefetchers and invalidates them when a worker
+    announces that a customer's data changed on the tool-results channel.
+    """
+
+    def __init__(
+        self,
+        bus: EventBus,
+        max_age_seconds: float,
+        transactions: int,
+        summary_days: int,
+    ) -> None:
+        self.max_age_seconds = max_age_seconds
+        self.transactions = transactions
+        self.summary_days = summary_days
+        self._prefetchers: weakref.WeakSet[SnapshotPrefetcher] = weakref.WeakSet()
+        bus.subscribe(TOOL_RESULTS_CHANNEL, self._on_invalidate)
+
+    def create(
+        self, repository: BankingRepository, customer_name: str
+    ) -> SnapshotPrefetcher:
+        prefetcher = SnapshotPrefetcher(
+            repository=repository,
+            customer_name=customer_name,
+            max_age_seconds=self.max_age_seconds,
+            transactions=self.transactions,
+            summary_days=self.summary_days,
+        )
+        self._prefetchers.add(prefetcher)
+        return prefetcher
+
+    async def _on_invalidate(self, event: dict[str, Any]) -> None:
+        # Changes made by this worker matter too, so `origin` is not checked.
+        customer_name = event.get("customer_name")
+        for prefetcher in list(self._prefetchers):
+            if customer_name is None or (
+                prefetcher.customer_name.lower() == customer_name.lower()
+            ):
+                prefetcher.invalidate()
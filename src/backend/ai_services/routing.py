@@ -0,0 +1,182 @@
+import re
+from dataclasses import dataclass
+
+from loguru import logger
+from pydantic_ai import Agent
+from pydantic_ai.messages import ModelMessage
+from pydantic_ai.models import Model
+
+from ai_services.agent import Dependencies
+from ai_services.speculation import StreamingAgentRun
+
+SMALL, LARGE = "small", "large"
+
+
+def _words(pattern: str) -> re.Pattern[str]:
+    return re.compile(rf"\b({pattern})\b", re.IGNORECASE)
+
+
+# Keywords of the questions each tool answers, matched as whole words; a turn
+# that touches several groups likely needs several tool calls.
+TOOL_KEYWORDS = {
+    "balance": _words(r"balances?|how much money|accounts?"),
+    "transactions": _words(r"transactions?|recent|last|history|payments?"),
+    "spending": _words(r"spend|spends|spent|spending|categor(?:y|ies)"),
+    "unusual": _words(r"unusual|suspicious|anomal(?:y|ies|ous)|fraud|strange"),
+    "schemes": _words(r"schemes?|fixed deposits?|fds?|interest|loans?|offers?"),
+    "trend": _words(r"trends?|month over month|compared|increase[ds]?|decrease[ds]?"),
+    "merchants": _words(r"merchants?|where do i|most at|top"),
+}
+
+# Phrases that call for reasoning rather than a lookup.
+REASONING = re.compile(
+    r"\b(why|compare|comparison|versus|vs|explain|analy[sz]e|should i|advice"
+    r"|recommend|plan|budget|save more|predict|forecast|what if|better)\b",
+    re.IGNORECASE,
+)
+
+
+@dataclass(frozen=True)
+class RouteDecision:
+    tier: str
+    score: float
+    expected_tools: int
+
+
+def expected_tool_count(transcript: str) -> int:
+    """Number of tool groups the transcript mentions."""
+    return sum(
+        pattern.search(transcript) is not None for pattern in TOOL_KEYWORDS.values()
+    )
+
+
+def score_turn(transcript: str, history_length: int) -> tuple[float, int]:
+    """
+    Complexity of a turn in [0, 1].
+
+    Args:
+        transcript: User utterance.
+        history_length: Messages in the conversation so far.
+
+    Returns:
+        The score and the number of tools the turn is expected to need.
+    """
+    words = len(transcript.split())
+    tools = expected_tool_count(transcript)
+
+    score = 0.0
+    score += 0.5 * len(set(m.lower() for m in REASONING.findall(transcript)))
+    score += 0.3 * max(tools - 1, 0)
+    score += min(max(words - 12, 0) / 40, 0.3)
+    score += min(history_length / 60, 0.2)
+    return min(score, 1.0), tools
+
+
+@dataclass
+class TierStats:
+    turns: int = 0
+    escalations: int = 0
+    failures: int = 0
+    first_delta_ms: float = 0.0
+    total_ms: float = 0.0
+    timed_turns: int = 0
+
+    def snapshot(self) -> dict[str, float]:
+        timed = self.timed_turns or 1
+        return {
+            "turns": self.turns,
+            "escalations": self.escalations,
+            "failures": self.failures,
+            "avg_first_delta_ms": round(self.first_delta_ms / timed, 1),
+            "avg_total_ms": round(self.total_ms / timed, 1),
+        }
+
+
+class ModelRouter:
+    """
+    Sends simple turns to a small, fast model and complex ones to the large
+    model. Small-tier runs escalate to the large model when they fail before
+    speaking or open with an unsure reply.
+
+    Args:
+        small_model: Fast model for simple lookups.
+        large_model: Model for complex turns and escalations.
+        threshold: Score from which a turn goes to the large model.
+        enabled: If False, every turn uses the large model.
+    """
+
+    def __init__(
+        self,
+        small_model: Model,
+        large_model: Model,
+        threshold: float,
+        enabled: bool = True,
+    ) -> None:
+        self.small_model = small_model
+        self.large_model = large_model
+        self.threshold = threshold
+        self.enabled = enabled
+        self.stats = {SMALL: TierStats(), LARGE: TierStats()}
+
+    def route(self, transcript: str, history_length: int) -> RouteDecision:
+        score, tools = score_turn(transcript, history_length)
+        tier = LARGE if not self.enabled or score >= self.threshold else SMALL
+        return RouteDecision(tier=tier, score=score, expected_tools=tools)
+
+    def start(
+        self,
+        agent: Agent[Dependencies],
+        user_prompt: str,
+        message_history: list[ModelMessage],
+        deps: Dependencies,
+    ) -> StreamingAgentRun:
+        """
+        Route a turn and start its agent run.
+
+        Args:
+            agent: Agent to run.
+            user_prompt: Prompt for this turn.
+            message_history: Conversation so far.
+            deps: Agent dependencies.
+
+        Returns:
+            The started run.
+        """
+        decision = self.route(user_prompt, len(message_history))
+        small = decision.tier == SMALL
+        run = StreamingAgentRun(
+            agent=agent,
+            user_prompt=user_prompt,
+            message_history=message_history,
+            deps=deps,
+            model=self.small_model if small else self.large_model,
+            fallback_model=self.large_model if small else None,
+        ).start()
+        run.add_done_callback(lambda run: self._record(decision, run))
+        return run
+
+    def snapshot(self) -> dict[str, dict[str, float]]:
+        return {tier: stats.snapshot() for tier, stats in self.stats.items()}
+
+    def _record(self, decision: RouteDecision, run: StreamingAgentRun) -> None:
+        if run.cancelled:
+            # Discarded speculation; accounted for by the speculator.
+            return
+        stats = self.stats[decision.tier]
+        stats.turns += 1
+        stats.escalations += run.escalated
+        if run.failed or run.first_delta_at is None:
+            stats.failures += 1
+            logger.info(f"[router] tier={decision.tier} run failed without output")
+            return
+
+        first_delta_ms = (run.first_delta_at - run.started_at) * 1000
+        total_ms = (run.finished_at - run.started_at) * 1000
+        stats.first_delta_ms += first_delta_ms
+        stats.total_ms += total_ms
+        stats.timed_turns += 1
+        logger.info(
+            f"[router] tier={decision.tier} score={decision.score:.2f} "
+            f"tools={decision.expected_tools} escalated={run.escalated} "
+            f"first_delta={first_delta_ms:.0f} ms total={total_ms:.0f} ms"
+        )
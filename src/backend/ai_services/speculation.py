@@ -0,0 +1,436 @@
+import asyncio
+import re
+import time
+from dataclasses import dataclass
+from difflib import SequenceMatcher
+from typing import Any, AsyncIterable, AsyncIterator, Callable
+
+from loguru import logger
+from pydantic_ai import Agent, RunContext
+from pydantic_ai.messages import (
+    AgentStreamEvent,
+    FunctionToolCallEvent,
+    FunctionToolResultEvent,
+    ModelMessage,
+    ModelRequest,
+    RetryPromptPart,
+    ToolReturnPart,
+)
+from pydantic_ai.models import Model
+
+from ai_services.agent import Dependencies
+
+_END = object()
+_WORD = re.compile(r"\w+")
+
+# Openings of replies in which a model admits it cannot answer.
+LOW_CONFIDENCE = re.compile(
+    r"\b(i'?m not sure|i am not sure|i don'?t know|i do not know|i'?m unable"
+    r"|i am unable|i can'?t (?:help|answer|determine)|i cannot"
+    r"|(?:could|can) you (?:please )?clarify|unclear)\b",
+    re.IGNORECASE,
+)
+
+
+def transcript_similarity(a: str, b: str) -> float:
+    """
+    Word-level similarity of two transcripts in [0, 1], ignoring case and
+    punctuation.
+    """
+    return SequenceMatcher(
+        None, _WORD.findall(a.lower()), _WORD.findall(b.lower())
+    ).ratio()
+
+
+def is_low_confidence(text: str) -> bool:
+    """Whether a reply opening admits uncertainty or inability to answer."""
+    return LOW_CONFIDENCE.search(text) is not None
+
+
+def completed_tool_calls(messages: list[ModelMessage]) -> list[ModelMessage]:
+    """
+    Leading messages of a run up to the last request returning tool results,
+    i.e. the tool calls that completed; empty if none did.
+    """
+    for end in range(len(messages), 0, -1):
+        message = messages[end - 1]
+        if isinstance(message, ModelRequest) and any(
+            isinstance(part, (ToolReturnPart, RetryPromptPart)) and part.tool_call_id
+            for part in message.parts
+        ):
+            return messages[:end]
+    return []
+
+
+@dataclass(frozen=True)
+class ToolActivity:
+    """
+    A tool call starting or ending during an agent run.
+
+    Attributes:
+        phase: "start" or "end".
+        name: Name of the tool.
+        call_id: Id pairing the start and the end of one call.
+        args: Arguments of the call, at the start.
+        ms: Duration of the call, at the end.
+        ok: Whether the call returned a result, at the end.
+    """
+
+    phase: str
+    name: str
+    call_id: str
+    args: dict[str, Any] | None = None
+    ms: float | None = None
+    ok: bool = True
+
+
+class StreamingAgentRun:
+    """
+    Runs `agent.run_stream` in a background task and buffers the text deltas
+    until a consumer reads them, so that generation can start before the
+    caller knows whether it wants the output.
+
+    With a `fallback_model`, output of the first model is held back until
+    `confidence_chars` characters are known. The run switches to the
+    fallback if the first model fails before that point or its opening
+    reads as unsure (see `is_low_confidence`). Tool calls the first model
+    completed are not made again: the fallback continues from their results.
+
+    Tool calls are reported as `ToolActivity` items by `events()` as they
+    start and end, in order with the text. While output is held back, so are
+    they; on escalation those of calls the fallback does not reuse are
+    dropped, as they are made again.
+
+    Once the run finished, `messages` holds the messages it added to the
+    conversation, including tool calls and their results.
+
+    Args:
+        agent: Agent to run.
+        user_prompt: Prompt for this turn.
+        message_history: Conversation so far.
+        deps: Agent dependencies.
+        model: Model for this run; the agent's default if None.
+        fallback_model: Model to escalate to.
+        confidence_chars: Output held back while the run may still escalate.
+    """
+
+    def __init__(
+        self,
+        agent: Agent[Dependencies],
+        user_prompt: str,
+        message_history: list[ModelMessage],
+        deps: Dependencies,
+        model: Model | None = None,
+        fallback_model: Model | None = None,
+        confidence_chars: int = 48,
+    ) -> None:
+        self.agent = agent
+        self.user_prompt = user_prompt
+        self.message_history = message_history
+        self.deps = deps
+        self.model = model
+        self.fallback_model = fallback_model
+        self.confidence_chars = confidence_chars
+        self.text = ""
+        self.total_tokens = 0
+        self.escalated = False
+        self.started_at = 0.0
+        self.first_delta_at: float | None = None
+        self.finished_at: float | None = None
+        self.messages: list[ModelMessage] = []
+        self._queue: asyncio.Queue = asyncio.Queue()
+        self._tool_started: dict[str, float] = {}
+        self._holding = False
+        self._held: list[str | ToolActivity] = []
+        self._reused: list[ModelMessage] = []
+        self._task: asyncio.Task | None = None
+
+    def start(self) -> "StreamingAgentRun":
+        self.started_at = time.perf_counter()
+        self._task = asyncio.create_task(self._run())
+        return self
+
+    @property
+    def cancelled(self) -> bool:
+        return self._task is not None and self._task.cancelled()
+
+    @property
+    def failed(self) -> bool:
+        return (
+            self._task is not None
+            and self._task.done()
+            and not self._task.cancelled()
+            and self._task.exception() is not None
+        )
+
+    def add_done_callback(self, callback: Callable[["StreamingAgentRun"], None]) -> None:
+        """Call `callback` with this run once it finished, failed or was cancelled."""
+        self._task.add_done_callback(lambda _: callback(self))
+
+    async def events(self) -> AsyncIterator[str | ToolActivity]:
+        """
+        Yield buffered text deltas and tool activity, then live ones until
+        the run finishes.
+
+        Raises:
+            Exception: Whatever the agent run raised.
+        """
+        while True:
+            item = await self._queue.get()
+            if item is _END:
+                break
+            yield item
+        await self._task
+
+    async def deltas(self) -> AsyncIterator[str]:
+        """
+        Yield buffered text deltas, then live ones until the run finishes.
+
+        Raises:
+            Exception: Whatever the agent run raised.
+        """
+        async for item in self.events():
+            if isinstance(item, str):
+                yield item
+
+    async def cancel(self) -> int:
+        """
+        Abort the run.
+
+        Returns:
+            Tokens spent on the run so far. When the provider has not
+            reported usage yet, output tokens are estimated from the text.
+        """
+        if self._task is not None and not self._task.done():
+            self._task.cancel()
+            try:
+                await self._task
+            except (asyncio.CancelledError, Exception):
+                pass
+        return self.total_tokens or len(self.text) // 4
+
+    async def _run(self) -> None:
+        try:
+            if await self._stream(self.model, hold=self.fallback_model is not None):
+                self.escalated = True
+                await self._stream(self.fallback_model, hold=False)
+        finally:
+            self.finished_at = time.perf_counter()
+            self._queue.put_nowait(_END)
+
+    async def _stream(self, model: Model | None, hold: bool) -> bool:
+        """Stream one model; returns True if the run should escalate."""
+        held = ""
+        self._holding, self._held = hold, []
+        try:
+            async with self.agent.run_stream(
+                user_prompt=None if self._reused else self.user_prompt,
+                message_history=[*self.message_history, *self._reused],
+                deps=self.deps,
+                model=model,
+                event_stream_handler=self._on_events,
+            ) as result:
+                try:
+                    async for delta in result.stream_text(delta=True):
+                        if hold:
+                            held += delta
+                            self._held.append(delta)
+                            if len(held) < self.confidence_chars:
+                                continue
+                            if is_low_confidence(held):
+                                logger.info(f"Escalating unsure reply: '{held}'")
+                                self._abandon(result.new_messages())
+                                return True
+                            hold = False
+                            self._release()
+                            continue
+                        self._publish(delta)
+                    self.messages = [*self._reused, *result.new_messages()]
+                finally:
+                    # Abandoned attempts were paid for too.
+                    self.total_tokens += result.usage.total_tokens or 0
+        except Exception as e:
+            if not hold:
+                raise
+            logger.warning(f"Escalating after failed run: {e}")
+            self._abandon([])
+            return True
+
+        if hold:
+            if not held.strip() or is_low_confidence(held):
+                logger.info(f"Escalating unsure reply: '{held}'")
+                self._abandon(self.messages)
+                self.messages = []
+                return True
+            self._release()
+        return False
+
+    def _release(self) -> None:
+        """Publish the held output of the attempt being kept."""
+        held, self._holding, self._held = self._held, False, []
+        for item in held:
+            if isinstance(item, str):
+                self._publish(item)
+            else:
+                self._queue.put_nowait(item)
+
+    def _abandon(self, messages: list[ModelMessage]) -> None:
+        """
+        Drop the held output of an attempt being escalated, keeping the tool
+        calls it completed for the fallback to continue from.
+        """
+        self._reused = completed_tool_calls(messages)
+        reused_calls = {
+            part.tool_call_id
+            for message in self._reused
+            if isinstance(message, ModelRequest)
+            for part in message.parts
+            if isinstance(part, (ToolReturnPart, RetryPromptPart))
+        }
+        held, self._holding, self._held = self._held, False, []
+        for item in held:
+            if isinstance(item, ToolActivity) and item.call_id in reused_calls:
+                self._queue.put_nowait(item)
+
+    async def _on_events(
+        self,
+        ctx: RunContext[Dependencies],
+        events: AsyncIterable[AgentStreamEvent],
+    ) -> None:
+        async for event in events:
+            if isinstance(event, FunctionToolCallEvent):
+                part = event.part
+                self._tool_started[part.tool_call_id] = time.perf_counter()
+                try:
+                    args = part.args_as_dict()
+                except ValueError:
+                    args = None
+                self._emit(
+                    ToolActivity("start", part.tool_name, part.tool_call_id, args=args)
+                )
+            elif isinstance(event, FunctionToolResultEvent):
+                part = event.part
+                started = self._tool_started.pop(part.tool_call_id, None)
+                ms = (time.perf_counter() - started) * 1000 if started else None
+                self._emit(
+                    ToolActivity(
+                        "end",
+                        part.tool_name or "",
+                        part.tool_call_id,
+                        ms=round(ms, 1) if ms is not None else None,
+                        ok=not isinstance(part, RetryPromptPart),
+                    )
+                )
+
+    def _emit(self, activity: ToolActivity) -> None:
+        if self._holding:
+            self._held.append(activity)
+        else:
+            self._queue.put_nowait(activity)
+
+    def _publish(self, delta: str) -> None:
+        if self.first_delta_at is None:
+            self.first_delta_at = time.perf_counter()
+        self.text += delta
+        self._queue.put_nowait(delta)
+
+
+@dataclass
+class SpeculationStats:
+    attempts: int = 0
+    hits: int = 0
+    misses: int = 0
+    wasted_tokens: int = 0
+
+    @property
+    def hit_rate(self) -> float:
+        resolved = self.hits + self.misses
+        return self.hits / resolved if resolved else 0.0
+
+    def snapshot(self) -> dict[str, float]:
+        return {
+            "attempts": self.attempts,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hit_rate, 3),
+            "wasted_tokens": self.wasted_tokens,
+        }
+
+
+class Speculator:
+    """
+    Starts the agent on a stable partial transcript and decides, once the
+    final transcript is known, whether the speculative output can be used.
+
+    A partial is stable when it is at least `threshold` similar to the
+    previous partial. The speculative run is kept if the final transcript
+    is at least `threshold` similar to the prompt it was started with.
+
+    Args:
+        start_run: Builds and starts an agent run for a prompt.
+        threshold: Similarity threshold in [0, 1].
+        stats: Shared speculation metrics.
+    """
+
+    def __init__(
+        self,
+        start_run: Callable[[str], StreamingAgentRun],
+        threshold: float,
+        stats: SpeculationStats,
+    ) -> None:
+        self.start_run = start_run
+        self.threshold = threshold
+        self.stats = stats
+        self._previous_partial = ""
+        self._run: StreamingAgentRun | None = None
+
+    def on_partial(self, transcript: str) -> None:
+        """Feed an interim transcript of the utterance in progress."""
+        transcript = transcript.strip()
+        if not transcript or self._run is not None:
+            return
+        stable = (
+            transcript_similarity(self._previous_partial, transcript) >= self.threshold
+        )
+        self._previous_partial = transcript
+        if stable:
+            logger.info(f"Speculatively starting agent on partial: '{transcript}'")
+            self.stats.attempts += 1
+            self._run = self.start_run(transcript)
+
+    async def resolve(self, final_transcript: str) -> StreamingAgentRun | None:
+        """
+        Settle the speculation for this utterance.
+
+        Args:
+            final_transcript: Confirmed transcript.
+
+        Returns:
+            The speculative run if it can be used, else None.
+        """
+        run, self._run = self._run, None
+        self._previous_partial = ""
+        if run is None:
+            return None
+
+        similarity = transcript_similarity(run.user_prompt, final_transcript)
+        if similarity >= self.threshold:
+            self.stats.hits += 1
+            logger.info(f"Speculation hit (similarity {similarity:.2f})")
+            return run
+
+        self.stats.misses += 1
+        self.stats.wasted_tokens += await run.cancel()
+        logger.info(f"Speculation miss (similarity {similarity:.2f}); restarting")
+        return None
+
+    async def cancel(self) -> None:
+        """
+        Discard any speculative run, e.g. when the connection closes or the
+        turn is answered without the agent; it counts as a miss.
+        """
+        run, self._run = self._run, None
+        self._previous_partial = ""
+        if run is not None:
+            self.stats.misses += 1
+            self.stats.wasted_tokens += await run.cancel()
@@ -1,32 +1,88 @@
-from typing import List, Dict, Optional, Any
-from datetime import datetime, timedelta
+from typing import List, Dict, Optional, Any, Sequence
+from datetime import date, datetime, timedelta
 from loguru import logger
 from pydantic_ai import RunContext
 
 from ai_services.agent import Dependencies
+from ai_services.analytics import TransactionColumns
+from ai_services.encoding import COMPACT, compact_table, transaction_totals
+from ai_services.pagination import PageToken
+from ai_services.prefetch import CustomerSnapshot
+from customer_transaction_db.repository import Row
 
 DEFAULT_CUSTOMER = "Shivamani"
 
+# Compact columns, mapped to the keys of a transaction row.
+TRANSACTION_COLUMNS = {
+    "date": "txn_date",
+    "amount": "amount",
+    "merchant": "merchant_name",
+    "category": "category",
+}
+
+
+async def _snapshot(
+    ctx: RunContext[Dependencies], customer_name: str
+) -> Optional[CustomerSnapshot]:
+    if ctx.deps.prefetcher is None:
+        return None
+    return await ctx.deps.prefetcher.get(customer_name)
+
+
+def _format_transaction(row: Any) -> Dict[str, Any]:
+    amt = float(row["amount"])
+    return {
+        "date": row["txn_date"],
+        "amount_inr": f"₹{abs(amt):,.2f}",
+        "direction": "debit" if amt < 0 else "credit",
+        "merchant": row["merchant_name"],
+        "category": row["category"],
+    }
+
+
+def _compact(ctx: RunContext[Dependencies]) -> bool:
+    return ctx.deps.settings.tools.output_format == COMPACT
+
+
+def _table(
+    ctx: RunContext[Dependencies],
+    rows: Any,
+    columns: Dict[str, str],
+    **kwargs: Any,
+) -> Dict[str, Any]:
+    """Compact encoding of tool rows; amounts are in INR."""
+    tools = ctx.deps.settings.tools
+    return compact_table(
+        rows,
+        columns,
+        max_rows=tools.compact_max_rows,
+        max_chars=tools.compact_max_chars,
+        currency="INR",
+        **kwargs,
+    )
+
+
+async def _columns(
+    ctx: RunContext[Dependencies], customer_name: str
+) -> TransactionColumns:
+    if ctx.deps.analytics is None:
+        raise RuntimeError("The analytics engine is not configured.")
+    return await ctx.deps.analytics.columns(ctx.deps.repository, customer_name)
+
 
 async def get_account_balance(
     ctx: RunContext[Dependencies],
     customer_name: str = DEFAULT_CUSTOMER,
 ) -> Dict[str, Any]:
     try:
-        sqlite_db = ctx.deps.sqlite_db
-
-        query = """
-            SELECT account_number, bank_name, currency, current_balance
-            FROM account_balances
-            WHERE LOWER(customer_name) = LOWER(?)
-            LIMIT 1;
-        """
-
-        logger.debug(f"[get_account_balance] Executing query for {customer_name}")
-
-        cursor = await sqlite_db.execute(query, (customer_name,))
-        row = await cursor.fetchone()
-        await cursor.close()
+        row: Optional[Row]
+        snapshot = await _snapshot(ctx, customer_name)
+        if snapshot is not None:
+            logger.debug(f"[get_account_balance] Served from snapshot for {customer_name}")
+            row = snapshot.balance
+        else:
+            logger.debug(f"[get_account_balance] Executing query for {customer_name}")
+            row = await ctx.deps.repository.account_balance(customer_name)
 
         if not row:
             return {"message": f"No account found for {customer_name}."}
@@ -47,83 +103,137 @@ async def get_recent_transactions(
     ctx: RunContext[Dependencies],
     last_n: int = 10,
     customer_name: str = DEFAULT_CUSTOMER,
-) -> List[Dict[str, Any]]:
+) -> List[Dict[str, Any]] | Dict[str, Any]:
     try:
-        sqlite_db = ctx.deps.sqlite_db
-
-        query = """
-            SELECT t.txn_date, t.amount, t.txn_type,
-                   t.merchant_name, t.category
-            FROM transactions t
-            JOIN accounts a ON a.id = t.account_id
-            JOIN customers c ON c.id = a.customer_id
-            WHERE LOWER(c.name) = LOWER(?)
-            ORDER BY t.txn_date DESC
-            LIMIT ?;
-        """
-
-        params = (customer_name, last_n)
-        logger.debug(f"[get_recent_transactions] Executing: Params={params}")
-
-        cursor = await sqlite_db.execute(query, params)
-        rows = await cursor.fetchall()
-        await cursor.close()
-
-        results: List[Dict[str, Any]] = []
-        for row in rows:
-            amt = float(row["amount"])
-            results.append(
-                {
-                    "date": row["txn_date"],
-                    "amount_inr": f"₹{abs(amt):,.2f}",
-                    "direction": "debit" if amt < 0 else "credit",
-                    "merchant": row["merchant_name"],
-                    "category": row["category"],
-                }
+        last_n = max(1, min(last_n, ctx.deps.settings.tools.max_page_size))
+        rows: Sequence[Row]
+        snapshot = await _snapshot(ctx, customer_name)
+        if snapshot is not None and last_n <= len(snapshot.recent_transactions):
+            logger.debug(f"[get_recent_transactions] Served from snapshot: last_n={last_n}")
+            rows = snapshot.recent_transactions[:last_n]
+        else:
+            logger.debug(
+                f"[get_recent_transactions] Executing: Params={(customer_name, last_n)}"
+            )
+            rows = await ctx.deps.repository.recent_transactions(
+                customer_name, last_n
             )
 
-        return results
+        if _compact(ctx):
+            return _table(
+                ctx,
+                rows,
+                TRANSACTION_COLUMNS,
+                totals=transaction_totals(rows),
+                more_hint="list them with get_transactions_page",
+            )
+        return [_format_transaction(row) for row in rows]
 
     except Exception as e:
         logger.error(f"❌ ERROR in get_recent_transactions: {e}")
         return []
 
 
+async def get_transactions_page(
+    ctx: RunContext[Dependencies],
+    customer_name: str = DEFAULT_CUSTOMER,
+    page_size: int = 10,
+    start_date: Optional[str] = None,
+    end_date: Optional[str] = None,
+    continuation_token: Optional[str] = None,
+) -> Dict[str, Any]:
+    """
+    List transactions newest first, one page at a time.
+
+    To continue a listing ("and the ten before that"), pass the
+    `next_token` of the previous call as `continuation_token`; the date
+    filters of the first call are kept. Dates are YYYY-MM-DD and inclusive.
+    """
+    try:
+        page_size = max(1, min(page_size, ctx.deps.settings.tools.max_page_size))
+        if _compact(ctx):
+            # Rows cut from a compact page would be skipped by the token.
+            page_size = min(page_size, ctx.deps.settings.tools.compact_max_rows)
+        before = None
+        if continuation_token:
+            token = PageToken.decode(continuation_token)
+            customer_name = token.customer_name
+            start_date, end_date = token.start_date, token.end_date
+            before = (token.txn_date, token.id)
+
+        logger.debug(
+            f"[get_transactions_page] Executing: "
+            f"Params={(customer_name, page_size, before, start_date, end_date)}"
+        )
+        # One extra row tells whether another page exists.
+        rows = await ctx.deps.repository.transactions_page(
+            customer_name,
+            page_size + 1,
+            before=before,
+            start_date=start_date,
+            end_date=end_date,
+        )
+
+        next_token = None
+        if len(rows) > page_size:
+            rows = rows[:page_size]
+            next_token = PageToken(
+                customer_name=customer_name,
+                txn_date=rows[-1]["txn_date"],
+                id=rows[-1]["id"],
+                start_date=start_date,
+                end_date=end_date,
+            ).encode()
+
+        if _compact(ctx):
+            return _table(
+                ctx,
+                rows,
+                TRANSACTION_COLUMNS,
+                totals=transaction_totals(rows),
+                next_token=next_token,
+            )
+        return {
+            "transactions": [_format_transaction(row) for row in rows],
+            "next_token": next_token,
+        }
+
+    except Exception as e:
+        logger.error(f"❌ ERROR in get_transactions_page: {e}")
+        return {"error": str(e)}
+
+
 async def summarize_spending(
     ctx: RunContext[Dependencies],
     customer_name: str = DEFAULT_CUSTOMER,
     time_period: str = "this month",
 ) -> Dict[str, float]:
     try:
-        sqlite_db = ctx.deps.sqlite_db
         today = datetime.today()
 
         if "week" in time_period.lower():
-            start = today - timedelta(days=7)
+            days = 7
         else:
-            start = today - timedelta(days=30)
+            days = 30
 
-        start_str = start.strftime("%Y-%m-%d")
+        snapshot = await _snapshot(ctx, customer_name)
+        if snapshot is not None and snapshot.summary_days == days:
+            logger.debug(f"[summarize_spending] Served from snapshot: days={days}")
+            return dict(snapshot.category_summary)
 
-        query = """
-            SELECT t.category, SUM(ABS(t.amount)) AS total_spent
-            FROM transactions t
-            JOIN accounts a ON a.id = t.account_id
-            JOIN customers c ON a.customer_id = c.id
-            WHERE LOWER(c.name) = LOWER(?)
-              AND t.amount < 0
-              AND t.txn_date >= ?
-            GROUP BY t.category;
-        """
+        start = today - timedelta(days=days)
+        if ctx.deps.analytics is not None:
+            columns = await _columns(ctx, customer_name)
+            logger.debug(f"[summarize_spending] Computing for {customer_name}: since={start.date()}")
+            return columns.spending_by_category(start.date())
 
-        params = (customer_name, start_str)
-        logger.debug(f"[summarize_spending] Executing: Params={params}")
+        start_str = start.strftime("%Y-%m-%d")
 
-        cursor = await sqlite_db.execute(query, params)
-        rows = await cursor.fetchall()
-        await cursor.close()
+        logger.debug(f"[summarize_spending] Executing: Params={(customer_name, start_str)}")
 
-        return {row["category"]: float(row["total_spent"]) for row in rows}
+        return await ctx.deps.repository.spending_by_category(
+            customer_name, start_str
+        )
 
     except Exception as e:
         logger.error(f"❌ ERROR in summarize_spending: {e}")
@@ -134,49 +244,52 @@ async def detect_unusual_spending(
     ctx: RunContext[Dependencies],
     customer_name: str = DEFAULT_CUSTOMER,
     threshold_multiplier: float = 1.5,
-) -> List[Dict[str, Any]]:
+) -> List[Dict[str, Any]] | Dict[str, Any]:
     try:
-        sqlite_db = ctx.deps.sqlite_db
+        repository = ctx.deps.repository
         start = datetime.today() - timedelta(days=30)
         start_str = start.strftime("%Y-%m-%d")
 
-        avg_query = """
-            SELECT AVG(ABS(t.amount))
-            FROM transactions t
-            JOIN accounts a ON t.account_id = a.id
-            JOIN customers c ON a.customer_id = c.id
-            WHERE LOWER(c.name) = LOWER(?)
-              AND t.amount < 0
-              AND t.txn_date >= ?;
-        """
-
-        cursor = await sqlite_db.execute(avg_query, (customer_name, start_str))
-        avg_row = await cursor.fetchone()
-        await cursor.close()
-
-        avg_val = float(avg_row[0]) if avg_row and avg_row[0] else 0
-        if avg_val == 0:
-            return []
-
-        threshold = avg_val * threshold_multiplier
-
-        query = """
-            SELECT t.txn_date, t.amount, t.merchant_name, t.category
-            FROM transactions t
-            JOIN accounts a ON a.id = t.account_id
-            JOIN customers c ON a.customer_id = c.id
-            WHERE LOWER(c.name) = LOWER(?)
-              AND t.amount < 0
-              AND ABS(t.amount) > ?
-              AND t.txn_date >= ?;
-        """
-
-        params = (customer_name, threshold, start_str)
-        logger.debug(f"[detect_unusual_spending] Executing: Params={params}")
-
-        cursor2 = await sqlite_db.execute(query, params)
-        rows = await cursor2.fetchall()
-        await cursor2.close()
+        rows: Sequence[Row]
+        if ctx.deps.analytics is not None:
+            columns = await _columns(ctx, customer_name)
+            logger.debug(f"[detect_unusual_spending] Computing for {customer_name}: since={start_str}")
+            threshold, rows = columns.debits_above_average(
+                start.date(), threshold_multiplier
+            )
+            if threshold == 0:
+                return []
+        else:
+            avg_val = await repository.average_debit(customer_name, start_str)
+            if avg_val == 0:
+                return []
+
+            threshold = avg_val * threshold_multiplier
+
+            params = (customer_name, threshold, start_str)
+            logger.debug(f"[detect_unusual_spending] Executing: Params={params}")
+
+            rows = await repository.debits_above(*params)
+
+        if _compact(ctx):
+            debits = [
+                {**row, "spent": abs(float(row["amount"]))} for row in rows
+            ]
+            return _table(
+                ctx,
+                debits,
+                {
+                    "date": "txn_date",
+                    "spent": "spent",
+                    "merchant": "merchant_name",
+                    "category": "category",
+                },
+                totals={
+                    "count": len(debits),
+                    "spent": sum(row["spent"] for row in debits),
+                    "threshold": threshold,
+                },
+            )
 
         results: List[Dict[str, Any]] = []
         for row in rows:
@@ -200,20 +313,22 @@ async def detect_unusual_spending(
 async def get_bank_schemes(
     ctx: RunContext[Dependencies],
     bank_name: str,
-) -> List[Dict[str, Any]]:
+) -> List[Dict[str, Any]] | Dict[str, Any]:
     try:
-        sqlite_db = ctx.deps.sqlite_db
-
-        query = """
-            SELECT scheme_name, description, interest_rate, min_amount
-            FROM bank_schemes
-            WHERE LOWER(bank_name) = LOWER(?);
-        """
-
         logger.debug(f"[get_bank_schemes] Executing for {bank_name}")
-        cursor = await sqlite_db.execute(query, (bank_name,))
-        rows = await cursor.fetchall()
-        await cursor.close()
+        rows = await ctx.deps.repository.bank_schemes(bank_name)
+
+        if _compact(ctx):
+            return _table(
+                ctx,
+                rows,
+                {
+                    "scheme": "scheme_name",
+                    "rate_pct": "interest_rate",
+                    "min_amount": "min_amount",
+                    "description": "description",
+                },
+            )
 
         schemes: List[Dict[str, Any]] = []
         for row in rows:
@@ -231,3 +346,273 @@ async def get_bank_schemes(
     except Exception as e:
         logger.error(f"❌ ERROR in get_bank_schemes: {e}")
         return []
+
+
+async def get_spending_trend(
+    ctx: RunContext[Dependencies],
+    customer_name: str = DEFAULT_CUSTOMER,
+    months: int = 6,
+) -> List[Dict[str, Any]] | Dict[str, Any]:
+    """
+    Month-by-month spending and income, with the change in spending from
+    the previous month.
+    """
+    try:
+        columns = await _columns(ctx, customer_name)
+        months = max(1, min(months, 36))
+        logger.debug(f"[get_spending_trend] Computing for {customer_name}: months={months}")
+
+        trend = columns.monthly_trend(date.today(), months)
+        if _compact(ctx):
+            return _table(
+                ctx,
+                trend,
+                {
+                    "month": "month",
+                    "spent": "spent",
+                    "received": "received",
+                    "change_pct": "change_percent",
+                },
+                totals={
+                    "spent": sum(month["spent"] for month in trend),
+                    "received": sum(month["received"] for month in trend),
+                },
+            )
+
+        return [
+            {
+                "month": month["month"],
+                "spent_inr": f"₹{month['spent']:,.2f}",
+                "received_inr": f"₹{month['received']:,.2f}",
+                "change_percent": month["change_percent"],
+            }
+            for month in trend
+        ]
+
+    except Exception as e:
+        logger.error(f"❌ ERROR in get_spending_trend: {e}")
+        return []
+
+
+async def get_top_merchants(
+    ctx: RunContext[Dependencies],
+    customer_name: str = DEFAULT_CUSTOMER,
+    days: int = 30,
+    top_n: int = 5,
+) -> List[Dict[str, Any]] | Dict[str, Any]:
+    """
+    Merchants where the customer spent the most in the last `days` days.
+    """
+    try:
+        columns = await _columns(ctx, customer_name)
+        since = date.today() - timedelta(days=days)
+        logger.debug(f"[get_top_merchants] Computing for {customer_name}: since={since}")
+
+        merchants = columns.top_merchants(since, top_n)
+        if _compact(ctx):
+            return _table(
+                ctx,
+                merchants,
+                {
+                    "merchant": "merchant",
+                    "spent": "total_spent",
+                    "count": "transactions",
+                },
+            )
+
+        return [
+            {
+                "merchant": merchant["merchant"],
+                "total_spent_inr": f"₹{merchant['total_spent']:,.2f}",
+                "transactions": merchant["transactions"],
+            }
+            for merchant in merchants
+        ]
+
+    except Exception as e:
+        logger.error(f"❌ ERROR in get_top_merchants: {e}")
+        return []
+
+
+async def score_spending_anomalies(
+    ctx: RunContext[Dependencies],
+    customer_name: str = DEFAULT_CUSTOMER,
+    days: int = 30,
+    min_score: float = 2.0,
+    top_n: int = 5,
+) -> List[Dict[str, Any]] | Dict[str, Any]:
+    """
+    Recent debits that are unusually large for their category, scored by
+    how many deviations they sit above the customer's typical amount.
+    """
+    try:
+        columns = await _columns(ctx, customer_name)
+        since = date.today() - timedelta(days=days)
+        logger.debug(f"[score_spending_anomalies] Computing for {customer_name}: since={since}")
+
+        anomalies = columns.anomaly_scores(since, min_score, top_n)
+        if _compact(ctx):
+            return _table(
+                ctx,
+                anomalies,
+                {
+                    "date": "date",
+                    "spent": "amount",
+                    "merchant": "merchant",
+                    "category": "category",
+                    "score": "score",
+                },
+            )
+
+        return [
+            {
+                "date": anomaly["date"],
+                "amount_inr": f"₹{anomaly['amount']:,.2f}",
+                "merchant": anomaly["merchant"],
+                "category": anomaly["category"],
+                "anomaly_score": anomaly["score"],
+            }
+            for anomaly in anomalies
+        ]
+
+    except Exception as e:
+        logger.error(f"❌ ERROR in score_spending_anomalies: {e}")
+        return []
+
+
+async def search_transactions(
+    ctx: RunContext[Dependencies],
+    query: str,
+    customer_name: str = DEFAULT_CUSTOMER,
+    start_date: Optional[str] = None,
+    limit: int = 10,
+) -> List[Dict[str, Any]] | Dict[str, Any]:
+    """
+    Transactions whose merchant or category matches `query` (e.g. "swiggy",
+    "food"), best match first. `start_date` is YYYY-MM-DD and inclusive.
+    """
+    try:
+        limit = max(1, min(limit, ctx.deps.settings.tools.max_page_size))
+        logger.debug(
+            f"[search_transactions] Executing: Params={(customer_name, query, start_date, limit)}"
+        )
+        rows = await ctx.deps.repository.search_transactions(
+            customer_name, query, limit, since=start_date
+        )
+
+        if _compact(ctx):
+            return _table(
+                ctx,
+                rows,
+                TRANSACTION_COLUMNS,
+                totals=transaction_totals(rows),
+                more_hint="use get_merchant_spending for totals",
+            )
+        return [_format_transaction(row) for row in rows]
+
+    except Exception as e:
+        logger.error(f"❌ ERROR in search_transactions: {e}")
+        return []
+
+
+async def get_merchant_spending(
+    ctx: RunContext[Dependencies],
+    query: str,
+    customer_name: str = DEFAULT_CUSTOMER,
+    start_date: Optional[str] = None,
+) -> List[Dict[str, Any]] | Dict[str, Any]:
+    """
+    Amount spent and received per merchant matching `query` (e.g. "how much
+    on Swiggy" -> "swiggy"), with the number and dates of the transactions.
+    `start_date` is YYYY-MM-DD and inclusive.
+    """
+    try:
+        logger.debug(
+            f"[get_merchant_spending] Executing: Params={(customer_name, query, start_date)}"
+        )
+        rows = await ctx.deps.repository.merchant_spending(
+            customer_name, query, since=start_date
+        )
+
+        if _compact(ctx):
+            return _table(
+                ctx,
+                rows,
+                {
+                    "merchant": "merchant_name",
+                    "category": "category",
+                    "spent": "spent",
+                    "received": "received",
+                    "count": "transactions",
+                    "first": "first_date",
+                    "last": "last_date",
+                },
+                totals={
+                    "spent": sum(float(row["spent"]) for row in rows),
+                    "received": sum(float(row["received"]) for row in rows),
+                    "count": sum(row["transactions"] for row in rows),
+                },
+            )
+
+        return [
+            {
+                "merchant": row["merchant_name"],
+                "category": row["category"],
+                "total_spent_inr": f"₹{float(row['spent']):,.2f}",
+                "total_received_inr": f"₹{float(row['received']):,.2f}",
+                "transactions": row["transactions"],
+                "first_date": row["first_date"],
+                "last_date": row["last_date"],
+            }
+            for row in rows
+        ]
+
+    except Exception as e:
+        logger.error(f"❌ ERROR in get_merchant_spending: {e}")
+        return []
+
+
+async def search_bank_schemes(
+    ctx: RunContext[Dependencies],
+    query: str,
+    bank_name: Optional[str] = None,
+    limit: int = 5,
+) -> List[Dict[str, Any]] | Dict[str, Any]:
+    """
+    Schemes whose name or description matches `query` (e.g. "senior citizen",
+    "fixed deposit"), best match first, of any bank unless `bank_name` is given.
+    """
+    try:
+        limit = max(1, min(limit, ctx.deps.settings.tools.max_page_size))
+        logger.debug(f"[search_bank_schemes] Executing: Params={(query, bank_name, limit)}")
+        rows = await ctx.deps.repository.search_bank_schemes(
+            query, limit, bank_name=bank_name
+        )
+
+        if _compact(ctx):
+            return _table(
+                ctx,
+                rows,
+                {
+                    "bank": "bank_name",
+                    "scheme": "scheme_name",
+                    "rate_pct": "interest_rate",
+                    "min_amount": "min_amount",
+                    "description": "description",
+                },
+            )
+
+        return [
+            {
+                "bank_name": row["bank_name"],
+                "scheme_name": row["scheme_name"],
+                "description": row["description"],
+                "interest_rate_percent": row["interest_rate"],
+                "minimum_amount_inr": f"₹{row['min_amount'] or 0:,.2f}",
+            }
+            for row in rows
+        ]
+
+    except Exception as e:
+        logger.error(f"❌ ERROR in search_bank_schemes: {e}")
+        return []
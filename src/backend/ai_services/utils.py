@@ -1,3 +1,5 @@
+from typing import Iterable, Mapping
+
 from pydantic_ai.messages import (
     ModelMessage,
     ModelRequest,
@@ -6,29 +8,40 @@ from pydantic_ai.messages import (
     UserPromptPart,
 )
 
+from session_state.stores import Message
+
+
+def _to_model_message(msg: Mapping[str, str] | Message) -> ModelMessage | None:
+    if msg["sender"] == "user":
+        return ModelRequest(parts=[UserPromptPart(content=msg["content"])])
+    if msg["sender"] == "agent":
+        return ModelResponse(parts=[TextPart(content=msg["content"])])
+    return None
+
 
 def format_messages_for_agent(
-    conversation_history: list[dict[str, str]],
+    conversation_history: Iterable[Mapping[str, str] | Message],
 ) -> list[ModelMessage]:
     """
     Format the conversation history for the PydanticAI agent.
 
+    The agent form of a `Message` is cached on it, so each message is
+    converted once per session rather than on every turn.
+
     Args:
-        conversation_history: List of dictionaries containing the conversation history.
+        conversation_history: Messages or dictionaries with sender and content.
 
     Returns:
         List of ModelMessage objects containing the conversation history.
     """
     messages: list[ModelMessage] = []
     for msg in conversation_history:
-        if msg["sender"] == "user":
-            messages.append(
-                ModelRequest(parts=[UserPromptPart(content=msg["content"])])
-            )
-        elif msg["sender"] == "agent":
-            messages.append(
-                ModelResponse(parts=[TextPart(content=msg["content"])])
-            )
+        if isinstance(msg, Message):
+            if msg.model_message is None:
+                msg.model_message = _to_model_message(msg)
+            model_message = msg.model_message
         else:
-            continue
+            model_message = _to_model_message(msg)
+        if model_message is not None:
+            messages.append(model_message)
     return messages
@@ -0,0 +1,298 @@
+import json
+import struct
+from collections import deque
+from dataclasses import dataclass
+from enum import IntEnum
+from typing import Callable, Iterator
+
+from fastapi import WebSocket
+from loguru import logger
+
+from api.outbound import OutboundQueue
+from nlp_processor.audio_codecs import ffmpeg_available, pcm16_to_wav
+
+# Binary protocol for `/voice_stream`.
+#
+# The first message of a connection may be a hello: HELLO_MAGIC followed by a
+# UTF-8 JSON object. Clients that do not send one are served with the legacy
+# protocol (one complete audio file per message in, raw MP3 slices out).
+#
+#   client -> server: {"send": ["pcm16", "opus"], "receive": ["opus", "mp3"],
+#                      "sample_rate": 16000}
+#   server -> client: {"send": "pcm16", "receive": "mp3", "sample_rate": 16000}
+#
+# After the hello every binary message carries one or more frames, each
+# prefixed with FRAME_HEADER: frame type, codec id, sequence number and
+# payload length. An END frame closes an utterance (inbound) or a reply
+# (outbound).
+
+HELLO_MAGIC = b"FVX1"
+FRAME_HEADER = struct.Struct("!BBII")
+SUPPORTED_SAMPLE_RATES = (8000, 16000, 24000, 48000)
+
+
+class FrameType(IntEnum):
+    AUDIO = 1
+    END = 2
+
+
+class Codec(IntEnum):
+    MP3 = 1
+    PCM16 = 2
+    OPUS = 3
+
+
+CODEC_NAMES = {"mp3": Codec.MP3, "pcm16": Codec.PCM16, "opus": Codec.OPUS}
+
+INBOUND_CODECS = ("pcm16", "opus")
+
+# Name Groq sees for an inbound utterance, which selects the decoder.
+INBOUND_FILE_NAMES = {"pcm16": "audio.wav", "opus": "audio.ogg"}
+
+
+class ProtocolError(Exception):
+    """Raised when a client violates the framed audio protocol."""
+
+
+@dataclass(frozen=True)
+class NegotiatedAudio:
+    inbound_codec: str
+    outbound_codec: str
+    sample_rate: int
+
+
+@dataclass(frozen=True)
+class Utterance:
+    audio: bytes
+    file_name: str
+
+
+def outbound_codecs() -> tuple[str, ...]:
+    """Codecs the server can produce for TTS output."""
+    if ffmpeg_available():
+        return ("mp3", "pcm16", "opus")
+    return ("mp3",)
+
+
+def encode_frame(
+    frame_type: FrameType, codec: Codec, seq: int, payload: bytes = b""
+) -> bytes:
+    """
+    Encode a single protocol frame.
+
+    Args:
+        frame_type: Kind of frame.
+        codec: Codec of the payload.
+        seq: Sequence number of the frame in its direction.
+        payload: Frame payload.
+
+    Returns:
+        Header followed by the payload.
+    """
+    return FRAME_HEADER.pack(frame_type, codec, seq, len(payload)) + payload
+
+
+def decode_frames(message: bytes) -> Iterator[tuple[FrameType, Codec, int, bytes]]:
+    """
+    Decode every frame contained in a websocket message.
+
+    Args:
+        message: Binary websocket message.
+
+    Yields:
+        Tuples of (frame type, codec, sequence number, payload).
+
+    Raises:
+        ProtocolError: If the message is truncated or malformed.
+    """
+    offset = 0
+    while offset < len(message):
+        if offset + FRAME_HEADER.size > len(message):
+            raise ProtocolError("Truncated frame header")
+        frame_type, codec, seq, length = FRAME_HEADER.unpack_from(message, offset)
+        offset += FRAME_HEADER.size
+        if offset + length > len(message):
+            raise ProtocolError("Truncated frame payload")
+        try:
+            frame = (FrameType(frame_type), Codec(codec), seq)
+        except ValueError as e:
+            raise ProtocolError(str(e)) from e
+        yield *frame, message[offset:offset + length]
+        offset += length
+
+
+def negotiate(hello: dict) -> NegotiatedAudio:
+    """
+    Pick codecs and sample rate from a client hello.
+
+    Each direction uses the first codec from the client's preference list
+    that the server supports.
+
+    Args:
+        hello: Decoded hello payload sent by the client.
+
+    Returns:
+        The negotiated audio parameters.
+
+    Raises:
+        ProtocolError: If no common codec or sample rate exists.
+    """
+    sample_rate = int(hello.get("sample_rate", 16000))
+    if sample_rate not in SUPPORTED_SAMPLE_RATES:
+        raise ProtocolError(f"Unsupported sample rate: {sample_rate}")
+
+    inbound = next(
+        (c for c in hello.get("send", []) if c in INBOUND_CODECS), None
+    )
+    available = outbound_codecs()
+    outbound = next(
+        (c for c in hello.get("receive", ["mp3"]) if c in available), None
+    )
+    if inbound is None or outbound is None:
+        raise ProtocolError("No common audio codec")
+
+    return NegotiatedAudio(
+        inbound_codec=inbound,
+        outbound_codec=outbound,
+        sample_rate=sample_rate,
+    )
+
+
+class AudioChannel:
+    """
+    Audio transport for a single `/voice_stream` websocket.
+
+    Handles codec negotiation, reassembly of inbound utterances and framing
+    of outbound TTS audio.
+
+    Args:
+        websocket: Connection to receive from.
+        outbound: Queue to send through; the websocket itself if None.
+    """
+
+    def __init__(
+        self, websocket: WebSocket, outbound: OutboundQueue | None = None
+    ) -> None:
+        self.websocket = websocket
+        # Sends go through the outbound queue when there is one.
+        self.outbound = outbound or websocket
+        self.negotiated: NegotiatedAudio | None = None
+        self._first_message = True
+        self._pending: deque[tuple[FrameType, Codec, int, bytes]] = deque()
+        self._recv_seq = 0
+        self._send_seq = 0
+        self._utterance_bytes = 0
+
+    @property
+    def buffered_bytes(self) -> int:
+        """Inbound audio held for the utterance being received."""
+        return self._utterance_bytes + sum(len(frame[3]) for frame in self._pending)
+
+    async def receive_utterance(
+        self,
+        on_partial: Callable[[Utterance], None] | None = None,
+        partial_every_ms: int = 1000,
+    ) -> Utterance:
+        """
+        Wait for the next complete utterance from the client.
+
+        Args:
+            on_partial: Called with the audio received so far every
+                `partial_every_ms` of speech. Only PCM16 prefixes are
+                decodable on their own, so other codecs never trigger it.
+            partial_every_ms: Interval between partial utterances.
+
+        Returns:
+            Audio ready to be transcribed.
+
+        Raises:
+            ProtocolError: If the client sends malformed frames.
+        """
+        parts: list[bytes] = []
+        since_partial = 0
+
+        while True:
+            while self._pending:
+                frame_type, _, seq, payload = self._pending.popleft()
+                if seq != self._recv_seq:
+                    logger.warning(
+                        f"Inbound audio frame out of sequence: "
+                        f"expected {self._recv_seq}, got {seq}"
+                    )
+                self._recv_seq = seq + 1
+
+                if frame_type == FrameType.AUDIO:
+                    parts.append(payload)
+                    self._utterance_bytes += len(payload)
+                    since_partial += len(payload)
+                    if (
+                        on_partial is not None
+                        and self.negotiated.inbound_codec == "pcm16"
+                        and since_partial
+                        >= self.negotiated.sample_rate * 2 * partial_every_ms // 1000
+                    ):
+                        since_partial = 0
+                        on_partial(self._build_utterance(b"".join(parts)))
+                elif parts:
+                    self._utterance_bytes = 0
+                    return self._build_utterance(b"".join(parts))
+
+            message = await self.websocket.receive_bytes()
+
+            if self._first_message:
+                self._first_message = False
+                if message.startswith(HELLO_MAGIC):
+                    await self._negotiate(message[len(HELLO_MAGIC):])
+                    continue
+
+            if self.negotiated is None:
+                return Utterance(audio=message, file_name="audio.wav")
+
+            self._pending.extend(decode_frames(message))
+
+    async def send_audio(self, chunk: bytes) -> None:
+        """Send one chunk of TTS audio to the client."""
+        if self.negotiated is None:
+            await self.outbound.send_bytes(chunk)
+            return
+        await self.outbound.send_bytes(
+            self._next_frame(FrameType.AUDIO, chunk)
+        )
+
+    async def end_audio(self) -> None:
+        """Mark the end of a reply; a no-op for legacy clients."""
+        if self.negotiated is not None:
+            await self.outbound.send_bytes(self._next_frame(FrameType.END))
+
+    def _next_frame(self, frame_type: FrameType, payload: bytes = b"") -> bytes:
+        codec = CODEC_NAMES[self.negotiated.outbound_codec]
+        frame = encode_frame(frame_type, codec, self._send_seq, payload)
+        self._send_seq += 1
+        return frame
+
+    def _build_utterance(self, audio: bytes) -> Utterance:
+        codec = self.negotiated.inbound_codec
+        if codec == "pcm16":
+            audio = pcm16_to_wav(audio, self.negotiated.sample_rate)
+        return Utterance(audio=audio, file_name=INBOUND_FILE_NAMES[codec])
+
+    async def _negotiate(self, payload: bytes) -> None:
+        try:
+            self.negotiated = negotiate(json.loads(payload))
+        except (ProtocolError, ValueError, TypeError, AttributeError) as e:
+            await self.outbound.send_bytes(
+                HELLO_MAGIC + json.dumps({"error": str(e)}).encode()
+            )
+            raise ProtocolError(f"Audio negotiation failed: {e}") from e
+
+        logger.info(f"Negotiated audio transport: {self.negotiated}")
+        await self.outbound.send_bytes(
+            HELLO_MAGIC
+            + json.dumps(
+                {
+                    "send": self.negotiated.inbound_codec,
+                    "receive": self.negotiated.outbound_codec,
+                    "sample_rate": self.negotiated.sample_rate,
+                }
+            ).encode()
+        )
@@ -1,16 +1,25 @@
-from typing import AsyncIterator, cast
+from typing import AsyncIterator, NamedTuple, cast
 from uuid import uuid4
 
-from fastapi import WebSocket
+from fastapi import Depends, WebSocket
+from loguru import logger
 from groq import AsyncGroq
 from psycopg import AsyncConnection
 from psycopg_pool import AsyncConnectionPool
 from pydantic import UUID4
 from pydantic_ai import Agent
 
+from api.audio_protocol import AudioChannel
+from api.outbound import OutboundQueue
 from config.settings import get_settings
+from nlp_processor.speech_to_text import Transcriber
 from nlp_processor.text_to_speech import TextToSpeech
 from ai_services.agent import Dependencies
+from ai_services.routing import ModelRouter
+from ai_services.tools import DEFAULT_CUSTOMER
+from session_state.memory import MemoryAccountant
+from session_state.registry import SessionRegistry
+from session_state.tokens import verify_session_token
 
 
 async def get_db_conn(websocket: WebSocket) -> AsyncIterator[AsyncConnection]:
@@ -23,25 +32,71 @@ async def get_db_conn(websocket: WebSocket) -> AsyncIterator[AsyncConnection]:
         yield conn
 
 
-async def get_conversation_id() -> UUID4:
+class ConversationRef(NamedTuple):
+    id: UUID4
+    resumed: bool  # named by a verified session token
+
+
+async def get_conversation_id(websocket: WebSocket) -> ConversationRef:
     """
-    Generate unique conversation ID.
+    Resume the conversation named by a valid `session_token` query
+    parameter, or generate a unique conversation ID.
     """
-    return uuid4()
+    token = websocket.query_params.get("session_token")
+    if token:
+        conversation_id = verify_session_token(
+            token, get_settings().session.secret_key
+        )
+        if conversation_id is not None:
+            return ConversationRef(conversation_id, resumed=True)
+        logger.warning("Rejected invalid or expired session token")
+    return ConversationRef(uuid4(), resumed=False)
+
+
+async def get_session_registry(websocket: WebSocket) -> SessionRegistry:
+    """
+    Returns the session registry stored in app state.
+    """
+    return websocket.state.session_registry
 
 
 async def get_agent_dependencies(websocket: WebSocket) -> Dependencies:
     """
     Pass correct dependencies to the Agent.
-    - Uses SQLite connection created in lifespan.py
+    - Uses the banking repository created in lifespan.py
     - Uses Settings
+    - Gives the session its own customer snapshot prefetcher
+    - Shares the columnar analytics engine
     """
+    settings = get_settings()
+    repository = websocket.state.banking_repository
+    prefetcher = None
+    if settings.prefetch.enabled:
+        prefetcher = websocket.state.prefetch_hub.create(
+            repository=repository, customer_name=DEFAULT_CUSTOMER
+        )
     return Dependencies(
-        settings=get_settings(),
-        sqlite_db=websocket.app.state.sqlite_db,  # ✅ CORRECT FIX
+        settings=settings,
+        repository=repository,
+        prefetcher=prefetcher,
+        analytics=websocket.state.analytics_engine,
     )
 
 
+async def get_model_router(websocket: WebSocket) -> ModelRouter:
+    """
+    Returns the model router stored in app state.
+    """
+    return websocket.state.model_router
+
+
+async def get_memory_accountant(websocket: WebSocket) -> MemoryAccountant:
+    """
+    Returns the per-session memory accountant stored in app state.
+    """
+    return websocket.state.memory_accountant
+
+
 async def get_groq_client(websocket: WebSocket) -> AsyncGroq:
     """
     Returns the Groq client stored in app state.
@@ -49,6 +104,13 @@ async def get_groq_client(websocket: WebSocket) -> AsyncGroq:
     return websocket.state.groq_client
 
 
+async def get_transcriber(websocket: WebSocket) -> Transcriber:
+    """
+    Returns the speech-to-text engine stored in app state.
+    """
+    return websocket.state.transcriber
+
+
 async def get_agent(websocket: WebSocket) -> Agent:
     """
     Returns the Groq Agent instance.
@@ -61,3 +123,35 @@ async def get_tts_handler(websocket: WebSocket) -> TextToSpeech:
     Returns Text-to-Speech handler (no OpenAI or Groq required).
     """
     return TextToSpeech()
+
+
+async def get_outbound_queue(websocket: WebSocket) -> AsyncIterator[OutboundQueue]:
+    """
+    Yields the outbound queue of this websocket and drains it on teardown.
+    """
+    settings = get_settings()
+    metrics = websocket.state.outbound_metrics
+    outbound = OutboundQueue(
+        websocket,
+        policy=settings.outbound.policy,
+        max_messages=settings.outbound.max_messages,
+        max_bytes=settings.outbound.max_bytes,
+        batch_bytes=settings.outbound.batch_bytes,
+    ).start()
+    metrics.track(outbound)
+    try:
+        yield outbound
+    finally:
+        await outbound.aclose()
+        metrics.release(outbound)
+        logger.info(f"Outbound stats: {outbound.stats.snapshot()}")
+
+
+async def get_audio_channel(
+    websocket: WebSocket,
+    outbound: OutboundQueue = Depends(get_outbound_queue),
+) -> AudioChannel:
+    """
+    Returns the audio transport for this websocket.
+    """
+    return AudioChannel(websocket, outbound=outbound)
@@ -0,0 +1,140 @@
+import json
+import time
+from typing import Any
+
+from fastapi import WebSocket
+
+from ai_services.speculation import ToolActivity
+from api.outbound import OutboundQueue
+
+# JSON event protocol for `/voice_stream`, opted into with `?events=1`.
+#
+# Every event is one text message holding a JSON object with
+#
+#   type     one of EVENT_TYPES
+#   seq      position of the event on the connection, from 0
+#   turn     number of the turn, from 1; 0 before the first
+#   ts       server wall clock, milliseconds since the epoch
+#   turn_ms  milliseconds since the turn's audio was received
+#
+# and the fields of its type:
+#
+#   session     token                   resumption token (`?resumable=1`)
+#   turn_start  audio_bytes             an utterance was received
+#   transcript  text, final             interim and final transcripts
+#   delta       text                    reply text as it is generated
+#   tool_start  name, call_id, args     a tool call started
+#   tool_end    name, call_id, ms, ok   a tool call returned
+#   audio       index, bytes            one chunk of reply audio was queued
+#   reply       text, audio_chunks      the turn is complete
+#
+# A turn without speech ends with an empty final `transcript` and `reply`.
+#
+# Audio itself stays binary; an `audio` event precedes each chunk. As the
+# markers separate the chunks, the outbound queue (api/outbound.py) sends
+# every chunk of an events connection on its own instead of batching them,
+# and its `coalesce` policy falls back to `block` for them. Clients without
+# `?events=1` get the legacy "Session:", "Client:" and "Agent:" text messages
+# instead.
+
+EVENT_TYPES = (
+    "session",
+    "turn_start",
+    "transcript",
+    "delta",
+    "tool_start",
+    "tool_end",
+    "audio",
+    "reply",
+)
+
+
+class EventStream:
+    """
+    Structured events of one `/voice_stream` connection.
+
+    Args:
+        outbound: Queue to send through.
+        enabled: Whether the client asked for events; legacy text messages
+            are sent otherwise.
+    """
+
+    def __init__(self, outbound: OutboundQueue | WebSocket, enabled: bool) -> None:
+        self.outbound = outbound
+        self.enabled = enabled
+        self.seq = 0
+        self.turn = 0
+        self._turn_started = time.perf_counter()
+        self._audio_chunks = 0
+
+    async def emit(self, type: str, **fields: Any) -> None:
+        """Send one event; nothing when events are disabled."""
+        if not self.enabled:
+            return
+        event = {
+            "type": type,
+            "seq": self.seq,
+            "turn": self.turn,
+            "ts": round(time.time() * 1000, 1),
+            "turn_ms": round((time.perf_counter() - self._turn_started) * 1000, 1),
+            **fields,
+        }
+        self.seq += 1
+        await self.outbound.send_text(json.dumps(event, default=str))
+
+    async def session(self, token: str) -> None:
+        if self.enabled:
+            await self.emit("session", token=token)
+        else:
+            await self.outbound.send_text(f"Session: {token}")
+
+    async def begin_turn(self, audio_bytes: int) -> None:
+        self.turn += 1
+        self._turn_started = time.perf_counter()
+        self._audio_chunks = 0
+        await self.emit("turn_start", audio_bytes=audio_bytes)
+
+    async def partial_transcript(self, text: str) -> None:
+        await self.emit("transcript", text=text, final=False)
+
+    async def final_transcript(self, text: str) -> None:
+        if self.enabled:
+            await self.emit("transcript", text=text, final=True)
+        else:
+            await self.outbound.send_text(f"Client: {text}")
+
+    async def no_speech(self) -> None:
+        """Close a turn whose audio held no speech."""
+        await self.emit("transcript", text="", final=True)
+        await self.emit("reply", text="", audio_chunks=0)
+
+    async def delta(self, text: str) -> None:
+        await self.emit("delta", text=text)
+
+    async def tool(self, activity: ToolActivity) -> None:
+        if activity.phase == "start":
+            await self.emit(
+                "tool_start",
+                name=activity.name,
+                call_id=activity.call_id,
+                args=activity.args,
+            )
+        else:
+            await self.emit(
+                "tool_end",
+                name=activity.name,
+                call_id=activity.call_id,
+                ms=activity.ms,
+                ok=activity.ok,
+            )
+
+    async def audio(self, chunk: bytes) -> None:
+        """Mark the audio chunk about to be sent."""
+        await self.emit("audio", index=self._audio_chunks, bytes=len(chunk))
+        self._audio_chunks += 1
+
+    async def reply(self, text: str) -> None:
+        if self.enabled:
+            await self.emit("reply", text=text, audio_chunks=self._audio_chunks)
+        else:
+            await self.outbound.send_text(f"Agent: {text}")
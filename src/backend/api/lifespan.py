@@ -1,20 +1,49 @@
 from contextlib import asynccontextmanager
+from datetime import timedelta
+from pathlib import Path
 from typing import AsyncIterator, TypedDict
+import asyncio
+import importlib
 import os
 import aiosqlite
 
 from fastapi import FastAPI
 from groq import AsyncGroq
 from loguru import logger
-from openai import AsyncOpenAI
 from psycopg_pool import AsyncConnectionPool
 from pydantic_ai import Agent, Tool
 
-from config.settings import get_settings
+from api.loop_monitor import LoopMonitor
+from api.outbound import OutboundMetrics
+from api.startup import StartupProfile
+from config.settings import Settings, get_settings
 from convo_history_db.actions import create_main_table
+from customer_transaction_db.factories import create_banking_repository
+from customer_transaction_db.singleflight import SingleFlight
+from customer_transaction_db.ingest import TransactionWriter
+from customer_transaction_db.repository import BankingRepository
+from customer_transaction_db.schema import configure_connection, ensure_schema
+from nlp_processor.factories import create_transcriber
+from nlp_processor.speech_to_text import Transcriber
 from convo_history_db.connection import create_db_connection_pool
+from convo_history_db.partitions import maintain_partitions
 from ai_services.agent import Dependencies, create_groq_agent
+from ai_services.analytics import AnalyticsEngine
+from ai_services.prefetch import PrefetchHub
+from ai_services.routing import ModelRouter
+from ai_services.speculation import SpeculationStats
+from session_state.bus import EventBus
+from session_state.memory import MemoryAccountant
+from session_state.factories import create_event_bus, create_shared_session_store
+from session_state.registry import SessionRegistry
+from session_state.stores import InMemorySessionStore, SessionStore
+from ai_services.http import (
+    PooledTransport,
+    create_http_client,
+    create_pooled_transport,
+)
 from ai_services.factories import (
+    LazyClient,
     create_groq_client,
     create_groq_model,
     create_openai_client,
@@ -22,50 +51,181 @@ from ai_services.factories import (
 from ai_services.tools import (
     get_account_balance,
     get_recent_transactions,
+    get_transactions_page,
     summarize_spending,
     detect_unusual_spending,
     get_bank_schemes,
+    get_spending_trend,
+    get_top_merchants,
+    score_spending_anomalies,
+    search_transactions,
+    get_merchant_spending,
+    search_bank_schemes,
 )
 
+BASE_DIR = os.path.dirname(os.path.dirname(__file__))
+SYSTEM_PROMPT_PATH = os.path.join(BASE_DIR, "project_info", "agent_system_prompt.md")
+SQLITE_PATH = os.path.join(BASE_DIR, "customer_transaction_db", "transactions.db")
+
 
 class State(TypedDict):
     pool: AsyncConnectionPool
     groq_client: AsyncGroq
-    openai_client: AsyncOpenAI
     groq_agent: Agent[Dependencies]
     sqlite_db: aiosqlite.Connection
+    banking_repository: BankingRepository
+    transcriber: Transcriber
+    session_registry: SessionRegistry
+    event_bus: EventBus
+    http_transport: PooledTransport
+    prefetch_hub: PrefetchHub
+    analytics_engine: AnalyticsEngine
+    model_router: ModelRouter
+    outbound_metrics: OutboundMetrics
+    memory_accountant: MemoryAccountant
+    speculation_stats: SpeculationStats
+    transaction_writer: TransactionWriter
+
+
+async def _load_system_prompt() -> str:
+    return await asyncio.to_thread(
+        Path(SYSTEM_PROMPT_PATH).read_text, encoding="utf-8"
+    )
+
+
+async def _open_sqlite() -> aiosqlite.Connection:
+    sqlite_db = await aiosqlite.connect(SQLITE_PATH)
+    sqlite_db.row_factory = aiosqlite.Row
+    await configure_connection(sqlite_db)
+    await ensure_schema(sqlite_db)
+    return sqlite_db
+
+
+async def _open_history_db(
+    settings: Settings,
+    pool: AsyncConnectionPool,
+) -> tuple[SessionStore | None, EventBus]:
+    await pool.open()
+    await create_main_table(pool, months_ahead=settings.messages.partitions_ahead)
+
+    shared_session_store = create_shared_session_store(settings=settings, pool=pool)
+    event_bus = create_event_bus(settings=settings, pool=pool)
+    if shared_session_store is not None:
+        await shared_session_store.open()
+    await event_bus.open()
+    return shared_session_store, event_bus
+
+
+async def _warm_groq(groq_client: AsyncGroq, connections: int) -> None:
+    """Open pooled connections to Groq so the first call skips the TLS handshake."""
+    await asyncio.gather(*(groq_client.models.list() for _ in range(connections)))
+
+
+async def _keep_groq_warm(groq_client: AsyncGroq, interval: float) -> None:
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            await groq_client.models.list()
+        except Exception as e:
+            logger.warning(f"Groq keep-alive request failed: {e}")
+
+
+async def _warm_up(
+    profile: StartupProfile,
+    settings: Settings,
+    banking_repository: BankingRepository,
+    groq_client: AsyncGroq,
+) -> None:
+    """
+    Work that makes the first call faster but is not needed to serve it.
+    """
+    results = await asyncio.gather(
+        profile.timed(
+            "warm_tts", asyncio.to_thread(importlib.import_module, "gtts")
+        ),
+        profile.timed("warm_banking_db", banking_repository.ping()),
+        profile.timed(
+            "warm_groq",
+            _warm_groq(groq_client, settings.http.warm_connections),
+        ),
+        return_exceptions=True,
+    )
+    for result in results:
+        if isinstance(result, Exception):
+            logger.warning(f"Warm-up step failed: {result}")
+    profile.mark_ready()
+
+    if settings.http.keepalive_ping_seconds > 0:
+        await _keep_groq_warm(groq_client, settings.http.keepalive_ping_seconds)
 
 
 @asynccontextmanager
 async def app_lifespan(app: FastAPI) -> AsyncIterator[State]:
     settings = get_settings()
+    profile = StartupProfile()
+    app.state.startup_profile = profile
 
-    BASE_DIR = os.path.dirname(os.path.dirname(__file__))
-    SYSTEM_PROMPT_PATH = os.path.join(
-        BASE_DIR, "project_info", "agent_system_prompt.md"
-    )
-
-    system_prompt = open(SYSTEM_PROMPT_PATH, "r", encoding="utf-8").read()
+    # Started first so that stalls during startup are seen too.
+    loop_monitor = None
+    if settings.loop_monitor.enabled:
+        loop_monitor = LoopMonitor(
+            interval_ms=settings.loop_monitor.interval_ms,
+            threshold_ms=settings.loop_monitor.threshold_ms,
+        ).start()
+    app.state.loop_monitor = loop_monitor
 
     pool = create_db_connection_pool(settings=settings)
+    http_transport = create_pooled_transport(settings=settings)
+    http_client = create_http_client(settings=settings, transport=http_transport)
+    groq_client = create_groq_client(settings=settings, http_client=http_client)
+    groq_model = create_groq_model(
+        groq_client=groq_client, model_name=settings.routing.large_model
+    )
+    model_router = ModelRouter(
+        small_model=create_groq_model(
+            groq_client=groq_client, model_name=settings.routing.small_model
+        ),
+        large_model=groq_model,
+        threshold=settings.routing.threshold,
+        enabled=settings.routing.enabled,
+    )
 
-    openai_client = create_openai_client(settings=settings)
-    groq_client = create_groq_client(settings=settings)
-    groq_model = create_groq_model(groq_client=groq_client)
+    transcriber = create_transcriber(settings=settings, groq_client=groq_client)
 
-    SQLITE_PATH = os.path.join(
-        BASE_DIR, "customer_transaction_db", "transactions.db"
+    # Not used by the voice pipeline; built only if something asks for it.
+    openai_client = LazyClient(lambda: create_openai_client(settings=settings))
+
+    # Independent I/O-bound resources are opened concurrently.
+    system_prompt, (shared_session_store, event_bus), sqlite_db, _ = (
+        await asyncio.gather(
+            profile.timed("system_prompt", _load_system_prompt()),
+            profile.timed("history_db", _open_history_db(settings, pool)),
+            profile.timed("sqlite_db", _open_sqlite()),
+            profile.timed("stt", transcriber.start()),
+        )
     )
 
-    sqlite_db = await aiosqlite.connect(SQLITE_PATH)
-    sqlite_db.row_factory = aiosqlite.Row
+    single_flight = SingleFlight(
+        max_keys=settings.banking.single_flight_max_keys, bus=event_bus
+    )
+    banking_repository = create_banking_repository(
+        settings=settings, sqlite_db=sqlite_db, pool=pool, single_flight=single_flight
+    )
+    await profile.timed("banking_db", banking_repository.open())
 
     tools = [
         Tool(function=get_account_balance, takes_ctx=True),
         Tool(function=get_recent_transactions, takes_ctx=True),
+        Tool(function=get_transactions_page, takes_ctx=True),
         Tool(function=summarize_spending, takes_ctx=True),
         Tool(function=detect_unusual_spending, takes_ctx=True),
         Tool(function=get_bank_schemes, takes_ctx=True),
+        Tool(function=get_spending_trend, takes_ctx=True),
+        Tool(function=get_top_merchants, takes_ctx=True),
+        Tool(function=score_spending_anomalies, takes_ctx=True),
+        Tool(function=search_transactions, takes_ctx=True),
+        Tool(function=get_merchant_spending, takes_ctx=True),
+        Tool(function=search_bank_schemes, takes_ctx=True),
     ]
 
     groq_agent = create_groq_agent(
@@ -74,23 +234,100 @@ async def app_lifespan(app: FastAPI) -> AsyncIterator[State]:
         system_prompt=system_prompt,
     )
 
-    await pool.open()
-    await create_main_table(pool)
+    prefetch_hub = PrefetchHub(
+        bus=event_bus,
+        max_age_seconds=settings.prefetch.max_age_seconds,
+        transactions=settings.prefetch.transactions,
+        summary_days=settings.prefetch.summary_days,
+    )
+
+    analytics_engine = AnalyticsEngine(
+        bus=event_bus, max_customers=settings.analytics.max_customers
+    )
+
+    session_registry = SessionRegistry(
+        local=InMemorySessionStore(
+            max_sessions=settings.session.max_sessions,
+            ttl_seconds=settings.session.idle_ttl_seconds,
+        ),
+        shared=shared_session_store,
+        bus=event_bus,
+        history_lookback=timedelta(days=settings.messages.history_lookback_days),
+    )
+
+    speculation_stats = SpeculationStats()
+    outbound_metrics = OutboundMetrics()
+    memory_accountant = MemoryAccountant(
+        soft_cap_bytes=settings.memory.soft_cap_bytes,
+        hard_cap_bytes=settings.memory.hard_cap_bytes,
+    )
+
+    # Opened after `_open_sqlite`, which has migrated the schema.
+    transaction_writer = await TransactionWriter(
+        db_path=SQLITE_PATH,
+        bus=event_bus,
+        batch_rows=settings.ingest.batch_rows,
+        max_pending_batches=settings.ingest.max_pending_batches,
+    ).start()
 
     app.state.sqlite_db = sqlite_db
+    app.state.banking_repository = banking_repository
     app.state.groq_agent = groq_agent
     app.state.groq_client = groq_client
+    app.state.transcriber = transcriber
     app.state.openai_client = openai_client
+    app.state.http_transport = http_transport
+    app.state.speculation_stats = speculation_stats
+    app.state.model_router = model_router
+    app.state.outbound_metrics = outbound_metrics
+    app.state.memory_accountant = memory_accountant
+    app.state.transaction_writer = transaction_writer
+    app.state.single_flight = single_flight
+
+    warm_up = asyncio.create_task(
+        _warm_up(profile, settings, banking_repository, groq_client)
+    )
+
+    partition_maintenance = asyncio.create_task(
+        maintain_partitions(
+            pool=pool,
+            months_ahead=settings.messages.partitions_ahead,
+            retention_months=settings.messages.retention_months,
+            archive_dir=settings.messages.archive_dir,
+            interval_seconds=settings.messages.maintenance_interval_seconds,
+        )
+    )
 
     yield {
         "pool": pool,
         "groq_client": groq_client,
-        "openai_client": openai_client,
         "groq_agent": groq_agent,
         "sqlite_db": sqlite_db,
+        "banking_repository": banking_repository,
+        "transcriber": transcriber,
+        "session_registry": session_registry,
+        "event_bus": event_bus,
+        "http_transport": http_transport,
+        "prefetch_hub": prefetch_hub,
+        "analytics_engine": analytics_engine,
+        "model_router": model_router,
+        "outbound_metrics": outbound_metrics,
+        "memory_accountant": memory_accountant,
+        "speculation_stats": speculation_stats,
+        "transaction_writer": transaction_writer,
     }
 
+    warm_up.cancel()
+    partition_maintenance.cancel()
+    await transaction_writer.aclose()
+    await transcriber.aclose()
+    await event_bus.close()
+    if shared_session_store is not None:
+        await shared_session_store.close()
     await sqlite_db.close()
     await pool.close()
     await openai_client.close()
     await groq_client.close()
+    await http_client.aclose()
+    if loop_monitor is not None:
+        await loop_monitor.stop()
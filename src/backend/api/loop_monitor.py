@@ -0,0 +1,233 @@
+import asyncio
+import bisect
+import sys
+import threading
+import time
+import traceback
+from dataclasses import dataclass
+
+import logfire
+from loguru import logger
+
+# Upper bounds of the lag histogram buckets, in milliseconds.
+BUCKETS_MS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000)
+
+_lag_histogram = logfire.metric_histogram(
+    "event_loop.lag", unit="ms", description="Delay of the loop monitor heartbeat"
+)
+_blocked_counter = logfire.metric_counter(
+    "event_loop.blocked", description="Callbacks that held the loop past the threshold"
+)
+
+
+class LagHistogram:
+    """
+    Bucketed distribution of loop lag samples.
+    """
+
+    def __init__(self, buckets_ms: tuple[float, ...] = BUCKETS_MS) -> None:
+        self.buckets_ms = buckets_ms
+        self.counts = [0] * (len(buckets_ms) + 1)  # last bucket: above all bounds
+        self.samples = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+
+    def record(self, lag_ms: float) -> None:
+        self.counts[bisect.bisect_left(self.buckets_ms, lag_ms)] += 1
+        self.samples += 1
+        self.total_ms += lag_ms
+        self.max_ms = max(self.max_ms, lag_ms)
+
+    def quantile(self, q: float) -> float:
+        """Upper bound of the bucket holding the q-quantile."""
+        if not self.samples:
+            return 0.0
+        rank = q * self.samples
+        seen = 0
+        for bound, count in zip(self.buckets_ms, self.counts):
+            seen += count
+            if seen >= rank:
+                return float(bound)
+        return self.max_ms
+
+    def snapshot(self) -> dict:
+        labels = [f"le_{bound}ms" for bound in self.buckets_ms] + ["inf"]
+        return {
+            "samples": self.samples,
+            "avg_ms": round(self.total_ms / self.samples, 2) if self.samples else 0.0,
+            "p50_ms": self.quantile(0.5),
+            "p99_ms": self.quantile(0.99),
+            "max_ms": round(self.max_ms, 1),
+            "buckets": dict(zip(labels, self.counts)),
+        }
+
+
+@dataclass
+class Offender:
+    """A code location found running while the loop was blocked."""
+
+    location: str
+    stack: list[str]
+    count: int = 0
+    total_ms: float = 0.0
+    max_ms: float = 0.0
+
+    def snapshot(self) -> dict:
+        return {
+            "location": self.location,
+            "count": self.count,
+            "total_ms": round(self.total_ms, 1),
+            "max_ms": round(self.max_ms, 1),
+            "stack": self.stack,
+        }
+
+
+@dataclass
+class _Stall:
+    offender: Offender
+    started_at: float
+
+
+def _location(stack: traceback.StackSummary) -> str:
+    # The innermost frame of our own code, rather than of a library it called.
+    for frame in reversed(stack):
+        if "site-packages" not in frame.filename and "/lib/python" not in frame.filename:
+            return f"{frame.filename}:{frame.lineno} in {frame.name}"
+    frame = stack[-1]
+    return f"{frame.filename}:{frame.lineno} in {frame.name}"
+
+
+class LoopMonitor:
+    """
+    Measures event loop lag and names the code that blocks the loop.
+
+    A heartbeat task sleeps for `interval_ms` and records how late it wakes
+    up. A watchdog thread checks the heartbeat; when it has not run for
+    `threshold_ms`, the loop thread is stuck in a callback and its current
+    stack is captured through `sys._current_frames`. Stacks are grouped by
+    the innermost frame outside third-party packages into top offenders.
+
+    Args:
+        interval_ms: Heartbeat period.
+        threshold_ms: Blocking time that triggers a stack capture.
+        stack_depth: Frames kept per captured stack.
+        max_offenders: Distinct offenders kept.
+    """
+
+    def __init__(
+        self,
+        interval_ms: float = 50,
+        threshold_ms: float = 100,
+        stack_depth: int = 12,
+        max_offenders: int = 50,
+    ) -> None:
+        self.interval = interval_ms / 1000
+        self.threshold = threshold_ms / 1000
+        self.stack_depth = stack_depth
+        self.max_offenders = max_offenders
+        self.histogram = LagHistogram()
+        self.offenders: dict[str, Offender] = {}
+        self._lock = threading.Lock()
+        self._last_beat = time.perf_counter()
+        self._stall: _Stall | None = None
+        self._loop_thread_id: int | None = None
+        self._heartbeat: asyncio.Task | None = None
+        self._watchdog: threading.Thread | None = None
+        self._stopped = threading.Event()
+
+    def start(self) -> "LoopMonitor":
+        self._loop_thread_id = threading.get_ident()
+        self._last_beat = time.perf_counter()
+        self._heartbeat = asyncio.create_task(self._beat())
+        self._watchdog = threading.Thread(
+            target=self._watch, name="loop-monitor", daemon=True
+        )
+        self._watchdog.start()
+        return self
+
+    async def stop(self) -> None:
+        self._stopped.set()
+        if self._heartbeat is not None:
+            self._heartbeat.cancel()
+            try:
+                await self._heartbeat
+            except asyncio.CancelledError:
+                pass
+        if self._watchdog is not None:
+            await asyncio.to_thread(self._watchdog.join, 1)
+
+    async def _beat(self) -> None:
+        while True:
+            expected = time.perf_counter() + self.interval
+            await asyncio.sleep(self.interval)
+            now = time.perf_counter()
+            lag_ms = max(0.0, (now - expected) * 1000)
+            with self._lock:
+                self._last_beat = now
+                stall, self._stall = self._stall, None
+                self.histogram.record(lag_ms)
+                if stall is not None:
+                    self._finish(stall, now)
+            _lag_histogram.record(lag_ms)
+
+    def _finish(self, stall: _Stall, now: float) -> None:
+        blocked_ms = (now - stall.started_at) * 1000
+        offender = stall.offender
+        offender.count += 1
+        offender.total_ms += blocked_ms
+        offender.max_ms = max(offender.max_ms, blocked_ms)
+        _blocked_counter.add(1)
+        logfire.warn(
+            "Event loop blocked for {blocked_ms:.0f} ms in {location}",
+            blocked_ms=blocked_ms,
+            location=offender.location,
+            stack=offender.stack,
+        )
+        logger.warning(
+            f"Event loop blocked for {blocked_ms:.0f} ms in {offender.location}"
+        )
+
+    def _watch(self) -> None:
+        period = min(self.interval, self.threshold) / 2
+        while not self._stopped.wait(period):
+            with self._lock:
+                if self._stall is not None:
+                    continue
+                since_beat = time.perf_counter() - self._last_beat
+                if since_beat < self.interval + self.threshold:
+                    continue
+                frame = sys._current_frames().get(self._loop_thread_id)
+                if frame is None:
+                    continue
+                self._stall = _Stall(
+                    offender=self._offender(frame),
+                    started_at=self._last_beat + self.interval,
+                )
+
+    def _offender(self, frame) -> Offender:
+        stack = traceback.extract_stack(frame, limit=self.stack_depth)
+        location = _location(stack)
+        offender = self.offenders.get(location)
+        if offender is None:
+            if len(self.offenders) >= self.max_offenders:
+                # Make room by forgetting the least costly offender.
+                cheapest = min(self.offenders.values(), key=lambda o: o.total_ms)
+                del self.offenders[cheapest.location]
+            offender = Offender(
+                location=location,
+                stack=[line.rstrip() for line in stack.format()],
+            )
+            self.offenders[location] = offender
+        return offender
+
+    def snapshot(self, top: int = 10) -> dict:
+        with self._lock:
+            offenders = sorted(
+                self.offenders.values(), key=lambda o: o.total_ms, reverse=True
+            )
+            return {
+                "interval_ms": self.interval * 1000,
+                "threshold_ms": self.threshold * 1000,
+                "lag": self.histogram.snapshot(),
+                "top_offenders": [offender.snapshot() for offender in offenders[:top]],
+            }
@@ -0,0 +1,301 @@
+import asyncio
+import time
+import weakref
+from collections import deque
+from dataclasses import dataclass
+
+from fastapi import WebSocket
+from loguru import logger
+
+BLOCK, COALESCE, DROP_AND_CLOSE = "block", "coalesce", "drop_and_close"
+POLICIES = (BLOCK, COALESCE, DROP_AND_CLOSE)
+
+# Close code for clients that cannot keep up ("Try Again Later").
+SLOW_CONSUMER_CLOSE_CODE = 1013
+
+
+class SlowConsumerError(ConnectionError):
+    """Raised to the producer once a slow client has been disconnected."""
+
+
+@dataclass
+class _Message:
+    payload: bytes | str  # binary or text; "" for a close
+    enqueued_at: float
+    close_code: int | None = None
+
+    @property
+    def size(self) -> int:
+        return len(self.payload)
+
+
+@dataclass
+class SendStats:
+    messages: int = 0
+    sends: int = 0
+    bytes: int = 0
+    coalesced: int = 0
+    blocked_ms: float = 0.0
+    lag_ms_total: float = 0.0
+    max_lag_ms: float = 0.0
+    slow_consumer_closes: int = 0
+
+    def snapshot(self) -> dict[str, float]:
+        return {
+            "messages": self.messages,
+            "sends": self.sends,
+            "bytes": self.bytes,
+            "coalesced": self.coalesced,
+            "blocked_ms": round(self.blocked_ms, 1),
+            "avg_lag_ms": round(self.lag_ms_total / self.sends, 1) if self.sends else 0.0,
+            "max_lag_ms": round(self.max_lag_ms, 1),
+            "slow_consumer_closes": self.slow_consumer_closes,
+        }
+
+    def merge(self, other: "SendStats") -> None:
+        for name in (
+            "messages", "sends", "bytes", "coalesced", "blocked_ms",
+            "lag_ms_total", "slow_consumer_closes",
+        ):
+            setattr(self, name, getattr(self, name) + getattr(other, name))
+        self.max_lag_ms = max(self.max_lag_ms, other.max_lag_ms)
+
+
+class OutboundQueue:
+    """
+    Bounded outbound queue of one websocket, drained by a sender task so
+    that producing audio never waits on the network.
+
+    Consecutive binary messages are sent as one websocket message of up to
+    `batch_bytes`. Framed audio is self-delimiting and legacy MP3 slices
+    concatenate into valid MP3, so batching is transparent to clients.
+
+    When `max_messages` are queued, or `max_bytes` of payload, the policy
+    decides what happens to the next message:
+
+    - block: the producer waits for the client to catch up.
+    - coalesce: binary data is merged into the last queued binary message,
+      so the number of pending sends stays bounded; the producer only waits
+      once `max_bytes` is exceeded. Binary data queued after a text message,
+      e.g. audio after its JSON event marker, waits as with block.
+    - drop_and_close: pending data is discarded and the connection closed
+      with code 1013; the producer gets `SlowConsumerError`.
+
+    Args:
+        websocket: Connection to send on.
+        policy: One of POLICIES.
+        max_messages: Queued messages before the policy applies.
+        max_bytes: Queued payload bytes before the policy applies.
+        batch_bytes: Largest binary message built by batching.
+    """
+
+    def __init__(
+        self,
+        websocket: WebSocket,
+        policy: str = BLOCK,
+        max_messages: int = 64,
+        max_bytes: int = 1024 * 1024,
+        batch_bytes: int = 32 * 1024,
+    ) -> None:
+        if policy not in POLICIES:
+            raise ValueError(f"Unknown outbound policy {policy!r}; expected one of {POLICIES}")
+        self.websocket = websocket
+        self.policy = policy
+        self.max_messages = max_messages
+        self.max_bytes = max_bytes
+        self.batch_bytes = batch_bytes
+        self.stats = SendStats()
+        self._queue: deque[_Message] = deque()
+        self._queued_bytes = 0
+        self._readable = asyncio.Event()
+        self._writable = asyncio.Event()
+        self._writable.set()
+        self._drained = asyncio.Event()
+        self._drained.set()
+        self._error: BaseException | None = None
+        self._sender: asyncio.Task | None = None
+
+    def start(self) -> "OutboundQueue":
+        self._sender = asyncio.create_task(self._send_loop())
+        return self
+
+    @property
+    def pending(self) -> int:
+        return len(self._queue)
+
+    @property
+    def queued_bytes(self) -> int:
+        return self._queued_bytes
+
+    async def send_bytes(self, data: bytes) -> None:
+        await self._put(_Message(data, time.perf_counter()))
+
+    async def send_text(self, data: str) -> None:
+        await self._put(_Message(data, time.perf_counter()))
+
+    async def close(self, code: int = 1000) -> None:
+        """Close the websocket once everything queued before has been sent."""
+        await self._put(
+            _Message("", time.perf_counter(), close_code=code), bounded=False
+        )
+
+    async def flush(self) -> None:
+        """Wait until the queue has been sent."""
+        await self._drained.wait()
+        self._raise_if_failed()
+
+    async def aclose(self) -> None:
+        """Send what is queued and stop the sender task."""
+        if self._sender is None:
+            return
+        if self._error is None:
+            try:
+                await asyncio.wait_for(self._drained.wait(), timeout=5)
+            except asyncio.TimeoutError:
+                logger.warning(f"Dropping {self.pending} unsent messages on close")
+        self._sender.cancel()
+        try:
+            await self._sender
+        except (asyncio.CancelledError, Exception):
+            pass
+
+    def _raise_if_failed(self) -> None:
+        if self._error is not None:
+            raise self._error
+
+    def _is_full(self) -> bool:
+        return (
+            len(self._queue) >= self.max_messages
+            or self._queued_bytes >= self.max_bytes
+        )
+
+    async def _put(self, message: _Message, bounded: bool = True) -> None:
+        self._raise_if_failed()
+
+        if bounded and self._is_full():
+            if self.policy == DROP_AND_CLOSE:
+                await self._drop_and_close()
+                self._raise_if_failed()
+            tail = self._queue[-1] if self._queue else None
+            if (
+                self.policy == COALESCE
+                and isinstance(message.payload, bytes)
+                and self._queued_bytes < self.max_bytes
+                and tail is not None
+                and isinstance(tail.payload, bytes)
+            ):
+                tail.payload += message.payload
+                self._queued_bytes += message.size
+                self.stats.messages += 1
+                self.stats.coalesced += 1
+                return
+
+            started = time.perf_counter()
+            while self._is_full():
+                self._writable.clear()
+                await self._writable.wait()
+                self._raise_if_failed()
+            self.stats.blocked_ms += (time.perf_counter() - started) * 1000
+
+        self._queue.append(message)
+        self._queued_bytes += message.size
+        self.stats.messages += 1
+        self._drained.clear()
+        self._readable.set()
+
+    async def _drop_and_close(self) -> None:
+        dropped = len(self._queue)
+        self._queue.clear()
+        self._queued_bytes = 0
+        self.stats.slow_consumer_closes += 1
+        self._error = SlowConsumerError(
+            f"Client fell {dropped} messages behind; connection closed"
+        )
+        logger.warning(f"Closing slow consumer: {self._error}")
+        self._drained.set()
+        self._writable.set()
+        try:
+            await self.websocket.close(code=SLOW_CONSUMER_CLOSE_CODE)
+        except Exception:
+            pass
+
+    def _next_batch(self) -> _Message:
+        first = self._queue.popleft()
+        if not isinstance(first.payload, bytes):
+            return first
+
+        parts = [first.payload]
+        size = first.size
+        while self._queue:
+            payload = self._queue[0].payload
+            if not isinstance(payload, bytes) or size + len(payload) > self.batch_bytes:
+                break
+            self._queue.popleft()
+            parts.append(payload)
+            size += len(payload)
+        return _Message(b"".join(parts), first.enqueued_at)
+
+    async def _send_loop(self) -> None:
+        try:
+            while True:
+                if not self._queue:
+                    self._drained.set()
+                    self._readable.clear()
+                    await self._readable.wait()
+                    continue
+
+                message = self._next_batch()
+                size = message.size
+                self._queued_bytes -= size
+                self._writable.set()
+
+                if message.close_code is not None:
+                    await self.websocket.close(code=message.close_code)
+                elif isinstance(message.payload, bytes):
+                    await self.websocket.send_bytes(message.payload)
+                else:
+                    await self.websocket.send_text(message.payload)
+
+                lag_ms = (time.perf_counter() - message.enqueued_at) * 1000
+                self.stats.sends += 1
+                self.stats.bytes += size
+                self.stats.lag_ms_total += lag_ms
+                self.stats.max_lag_ms = max(self.stats.max_lag_ms, lag_ms)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            # The client is gone; producers learn about it on their next put.
+            if self._error is None:
+                self._error = e
+            self._queue.clear()
+            self._queued_bytes = 0
+            self._drained.set()
+            self._writable.set()
+
+
+class OutboundMetrics:
+    """
+    Send statistics of live connections and totals of closed ones.
+    """
+
+    def __init__(self) -> None:
+        self.closed = SendStats()
+        self._live: weakref.WeakSet[OutboundQueue] = weakref.WeakSet()
+
+    def track(self, queue: OutboundQueue) -> None:
+        self._live.add(queue)
+
+    def release(self, queue: OutboundQueue) -> None:
+        self._live.discard(queue)
+        self.closed.merge(queue.stats)
+
+    def snapshot(self) -> dict:
+        live = list(self._live)
+        return {
+            "connections": len(live),
+            "pending_messages": sum(queue.pending for queue in live),
+            "max_live_lag_ms": max(
+                (queue.stats.max_lag_ms for queue in live), default=0.0
+            ),
+            "closed": self.closed.snapshot(),
+        }
@@ -0,0 +1,254 @@
+import asyncio
+import json
+import struct
+import time
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Iterator
+
+from loguru import logger
+from pydantic import UUID4
+from pydantic_ai.messages import (
+    ModelMessage,
+    ToolCallPart,
+    ToolReturnPart,
+)
+
+MAGIC = b"FVXREC1\n"
+
+# Record kinds.
+SESSION, TURN = 1, 2
+
+# kind, length of the JSON metadata, length of the binary payload
+_HEADER = struct.Struct("<BII")
+
+STAGES = ("stt_ms", "first_delta_ms", "first_audio_ms", "llm_ms", "tts_ms", "turn_ms")
+
+
+class RecordingError(ValueError):
+    """Raised for files that are not session recordings."""
+
+
+@dataclass
+class RecordedTurn:
+    """
+    One recorded turn of a `/voice_stream` session.
+
+    Offsets of `deltas` are milliseconds after the transcript was known.
+    `speech` lists the synthesized segments with the size and wait time of
+    each of their parts.
+    """
+
+    at_ms: float
+    file_name: str
+    audio: bytes
+    transcript: str = ""
+    deltas: list[tuple[float, str]] = field(default_factory=list)
+    tools: list[dict[str, Any]] = field(default_factory=list)
+    speech: list[dict[str, Any]] = field(default_factory=list)
+    reply: str = ""
+    timings: dict[str, float] = field(default_factory=dict)
+
+    def meta(self) -> dict[str, Any]:
+        return {
+            "at_ms": self.at_ms,
+            "file_name": self.file_name,
+            "transcript": self.transcript,
+            "deltas": self.deltas,
+            "tools": self.tools,
+            "speech": self.speech,
+            "reply": self.reply,
+            "timings": self.timings,
+        }
+
+    @classmethod
+    def from_record(cls, meta: dict[str, Any], audio: bytes) -> "RecordedTurn":
+        return cls(
+            at_ms=meta["at_ms"],
+            file_name=meta["file_name"],
+            audio=audio,
+            transcript=meta["transcript"],
+            deltas=[(offset, text) for offset, text in meta["deltas"]],
+            tools=meta["tools"],
+            speech=meta["speech"],
+            reply=meta["reply"],
+            timings=meta["timings"],
+        )
+
+
+def encode_record(kind: int, meta: dict[str, Any], payload: bytes = b"") -> bytes:
+    encoded = json.dumps(meta, separators=(",", ":"), default=str).encode()
+    return _HEADER.pack(kind, len(encoded), len(payload)) + encoded + payload
+
+
+def read_records(path: Path) -> Iterator[tuple[int, dict[str, Any], bytes]]:
+    """
+    Yield the (kind, metadata, payload) records of a session file.
+
+    A record cut short by a crash ends the file.
+
+    Raises:
+        RecordingError: If the file is not a session recording.
+    """
+    with open(path, "rb") as file:
+        if file.read(len(MAGIC)) != MAGIC:
+            raise RecordingError(f"{path} is not a session recording")
+        while len(header := file.read(_HEADER.size)) == _HEADER.size:
+            kind, meta_length, payload_length = _HEADER.unpack(header)
+            meta = file.read(meta_length)
+            payload = file.read(payload_length)
+            if len(meta) < meta_length or len(payload) < payload_length:
+                logger.warning(f"Ignoring truncated record at the end of {path}")
+                return
+            yield kind, json.loads(meta), payload
+
+
+def read_session(path: Path) -> list[RecordedTurn]:
+    """Turns of a session file, in the order they were recorded."""
+    return [
+        RecordedTurn.from_record(meta, payload)
+        for kind, meta, payload in read_records(path)
+        if kind == TURN
+    ]
+
+
+def tool_calls(messages: list[ModelMessage]) -> list[dict[str, Any]]:
+    """
+    Tool calls of an agent run with their arguments, results and the time
+    from the model's request to the result.
+    """
+    calls: dict[str, dict[str, Any]] = {}
+    requested_at: dict[str, datetime | None] = {}
+    for message in messages:
+        for part in message.parts:
+            if isinstance(part, ToolCallPart):
+                requested_at[part.tool_call_id] = message.timestamp
+                calls[part.tool_call_id] = {
+                    "name": part.tool_name,
+                    "args": part.args_as_dict(),
+                    "result": None,
+                    "ms": None,
+                }
+            elif isinstance(part, ToolReturnPart) and part.tool_call_id in calls:
+                call = calls[part.tool_call_id]
+                call["result"] = part.content
+                requested = requested_at[part.tool_call_id]
+                if requested is not None:
+                    elapsed = part.timestamp - requested
+                    call["ms"] = round(elapsed.total_seconds() * 1000, 1)
+    return list(calls.values())
+
+
+class SessionRecorder:
+    """
+    Times the stages of each turn of a `/voice_stream` session and, given a
+    `path`, appends the turn to a session recording.
+
+    A turn starts when an utterance arrives. Stage timings are milliseconds:
+    `stt_ms` until the transcript is known, then `first_delta_ms`,
+    `first_audio_ms` and `llm_ms` (last delta) counted from the transcript,
+    `tts_ms` spent waiting for synthesized speech and `turn_ms` overall.
+
+    A recording is a magic line followed by length-prefixed records: one
+    per connection, then one per turn holding its metadata as JSON and the
+    inbound audio as raw bytes. A turn is written once it ended, so a
+    recording only ever grows by complete turns.
+
+    Args:
+        conversation_id: Conversation of the session.
+        path: Session file to append to; None only times turns.
+    """
+
+    def __init__(self, conversation_id: UUID4, path: Path | None = None) -> None:
+        self.conversation_id = conversation_id
+        self.path = path
+        self.turns = 0
+        self._opened_at = time.perf_counter()
+        self._pending = [
+            encode_record(
+                SESSION,
+                {"conversation_id": str(conversation_id), "started_at": time.time()},
+            )
+        ]
+        self._turn: RecordedTurn | None = None
+        self._started_at = 0.0
+        self._transcribed_at = 0.0
+
+    def _elapsed_ms(self, since: float) -> float:
+        return round((time.perf_counter() - since) * 1000, 1)
+
+    def begin_turn(self, audio: bytes, file_name: str) -> None:
+        self._started_at = time.perf_counter()
+        self._turn = RecordedTurn(
+            at_ms=self._elapsed_ms(self._opened_at),
+            file_name=file_name,
+            audio=audio if self.path is not None else b"",
+        )
+
+    def transcribed(self, transcript: str) -> None:
+        self._transcribed_at = time.perf_counter()
+        turn = self._turn
+        if turn is None:
+            return
+        turn.transcript = transcript
+        turn.timings["stt_ms"] = self._elapsed_ms(self._started_at)
+
+    def delta(self, text: str) -> None:
+        turn = self._turn
+        if turn is None:
+            return
+        offset = self._elapsed_ms(self._transcribed_at)
+        turn.timings.setdefault("first_delta_ms", offset)
+        turn.timings["llm_ms"] = offset
+        turn.deltas.append((offset, text))
+
+    def speech(self, text: str, index: int, nbytes: int, seconds: float) -> None:
+        """`TextToSpeech.on_speech` hook."""
+        turn = self._turn
+        if turn is None:
+            return
+        turn.timings.setdefault("first_audio_ms", self._elapsed_ms(self._transcribed_at))
+        turn.timings["tts_ms"] = turn.timings.get("tts_ms", 0.0) + round(seconds * 1000, 1)
+        if index == 0:
+            turn.speech.append({"text": text, "parts": []})
+        turn.speech[-1]["parts"].append((nbytes, round(seconds * 1000, 1)))
+
+    def tools(self, messages: list[ModelMessage]) -> None:
+        if self._turn is not None:
+            self._turn.tools = tool_calls(messages)
+
+    async def end_turn(self, reply: str) -> dict[str, float]:
+        """
+        Finish the turn and append it to the recording.
+
+        Returns:
+            Stage timings of the turn.
+        """
+        turn, self._turn = self._turn, None
+        assert turn is not None, "end_turn() without begin_turn()"
+        turn.reply = reply
+        turn.timings["turn_ms"] = self._elapsed_ms(self._started_at)
+        self.turns += 1
+        logger.info(f"Turn timings: {turn.timings}")
+
+        if self.path is not None:
+            self._pending.append(encode_record(TURN, turn.meta(), turn.audio))
+            records, self._pending = b"".join(self._pending), []
+            try:
+                await asyncio.to_thread(self._append, records)
+            except OSError as e:
+                logger.error(f"❌ ERROR in session recording: {e}")
+                self.path = None
+        return turn.timings
+
+    def _append(self, records: bytes) -> None:
+        path = self.path
+        assert path is not None
+        new = not path.exists()
+        if new:
+            path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, "ab") as file:
+            if new:
+                file.write(MAGIC)
+            file.write(records)
@@ -0,0 +1,203 @@
+import argparse
+import asyncio
+import json
+from collections import deque
+from pathlib import Path
+from types import SimpleNamespace
+from typing import Any, AsyncIterator
+
+from pydantic_ai import Agent
+from pydantic_ai.messages import ModelMessage
+from pydantic_ai.models.function import AgentInfo, FunctionModel
+
+from ai_services.speculation import StreamingAgentRun
+from ai_services.utils import format_messages_for_agent
+from api.recorder import STAGES, RecordedTurn, SessionRecorder, read_session
+from nlp_processor.speech_to_text import GroqTranscriber
+from nlp_processor.text_to_speech import TextToSpeech
+from session_state.stores import Message
+
+# A silent MPEG-1 Layer III frame (128 kbps, 44.1 kHz) to stand in for audio.
+_MP3_FRAME = bytes([0xFF, 0xFB, 0x90, 0x64]) + bytes(413)
+
+
+async def _pause(ms: float, speed: float) -> None:
+    if speed > 0 and ms > 0:
+        await asyncio.sleep(ms / 1000 / speed)
+
+
+def _silence(nbytes: int) -> bytes:
+    return (_MP3_FRAME * (nbytes // len(_MP3_FRAME) + 1))[:nbytes]
+
+
+class RecordedTranscriptions:
+    """Stands in for `AsyncGroq.audio.transcriptions` with a recorded turn."""
+
+    def __init__(self, turn: RecordedTurn, speed: float) -> None:
+        self.turn = turn
+        self.speed = speed
+
+    async def create(self, **kwargs: Any) -> SimpleNamespace:
+        await _pause(self.turn.timings.get("stt_ms", 0.0), self.speed)
+        return SimpleNamespace(text=self.turn.transcript)
+
+
+class RecordedSpeech(TextToSpeech):
+    """Speaks the recorded parts of each segment instead of calling gTTS."""
+
+    def __init__(self, turn: RecordedTurn, pacing: float) -> None:
+        super().__init__()
+        self.pacing = pacing
+        self._segments = deque(turn.speech)
+
+    async def _synthesize(self, text: str) -> AsyncIterator[bytes]:
+        # Segments are matched in order; the segmenter may cut differently
+        # than when the session was recorded.
+        segment = self._segments.popleft() if self._segments else {"parts": []}
+        for nbytes, ms in segment["parts"]:
+            await _pause(ms, self.pacing)
+            yield _silence(nbytes)
+
+
+def recorded_agent(turn: RecordedTurn, speed: float) -> Agent:
+    """An agent whose model streams the recorded deltas at their offsets."""
+
+    async def stream(
+        messages: list[ModelMessage], info: AgentInfo
+    ) -> AsyncIterator[str]:
+        previous = 0.0
+        for offset, text in turn.deltas:
+            await _pause(offset - previous, speed)
+            previous = offset
+            yield text
+
+    return Agent(FunctionModel(stream_function=stream))
+
+
+async def replay_turn(
+    turn: RecordedTurn, history: list[Message], speed: float
+) -> dict[str, float]:
+    """
+    Run a recorded turn through STT, the agent run and TTS framing with
+    recorded responses standing in for Groq and gTTS.
+
+    Returns:
+        Stage timings of the replayed turn.
+    """
+    recorder = SessionRecorder(conversation_id=None)
+    tts_handler = RecordedSpeech(turn, speed)
+    tts_handler.on_speech = recorder.speech
+    transcriber = GroqTranscriber(
+        api_client=SimpleNamespace(
+            audio=SimpleNamespace(transcriptions=RecordedTranscriptions(turn, speed))
+        ),
+        model_name="whisper-large-v3-turbo",
+    )
+
+    recorder.begin_turn(turn.audio, turn.file_name)
+    transcription = await transcriber.transcribe(turn.audio, turn.file_name)
+    recorder.transcribed(transcription)
+
+    reply = ""
+    async with tts_handler:
+        if turn.deltas:
+            agent_run = StreamingAgentRun(
+                agent=recorded_agent(turn, speed),
+                user_prompt=transcription,
+                message_history=format_messages_for_agent(history),
+                deps=None,
+            ).start()
+            async for message in agent_run.deltas():
+                reply += message
+                recorder.delta(message)
+                async for _ in tts_handler.feed(text=message):
+                    pass
+            recorder.tools(agent_run.messages)
+        else:
+            # A canned reply, like the greeting, is spoken without the agent.
+            reply = turn.reply
+            async for _ in tts_handler.feed(text=reply):
+                pass
+        async for _ in tts_handler.flush():
+            pass
+
+    history.append(Message("user", transcription))
+    history.append(Message("agent", reply))
+    return await recorder.end_turn(reply)
+
+
+async def replay_session(
+    path: Path, speed: float = 1.0
+) -> list[tuple[dict[str, float], dict[str, float]]]:
+    """
+    Replay a session recording, keeping the recorded gaps between turns.
+
+    Args:
+        path: Session file.
+        speed: Pacing relative to the recording, e.g. 10 for ten times
+            faster; 0 replays without waiting.
+
+    Returns:
+        Recorded and replayed stage timings of each turn.
+    """
+    history: list[Message] = []
+    results = []
+    previous_end = None
+    for turn in read_session(path):
+        if previous_end is not None and turn.at_ms > previous_end:
+            await _pause(turn.at_ms - previous_end, speed)
+        previous_end = turn.at_ms + turn.timings.get("turn_ms", 0.0)
+        results.append((turn.timings, await replay_turn(turn, history, speed)))
+    return results
+
+
+def diff_timings(
+    recorded: dict[str, float], replayed: dict[str, float], speed: float
+) -> dict[str, dict[str, float]]:
+    """
+    Compare the stages of a turn.
+
+    `delta_ms` is the replayed time above the recorded time scaled to the
+    replay speed, i.e. what the pipeline itself added or saved; with speed
+    0 it is simply the replayed time.
+    """
+    diff = {}
+    for stage in STAGES:
+        if stage not in recorded and stage not in replayed:
+            continue
+        before = recorded.get(stage, 0.0)
+        after = replayed.get(stage, 0.0)
+        scaled = before / speed if speed > 0 else 0.0
+        diff[stage] = {
+            "recorded_ms": before,
+            "replayed_ms": after,
+            "delta_ms": round(after - scaled, 1),
+        }
+    return diff
+
+
+def _parse_args(argv: list[str] | None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Replay recorded /voice_stream sessions and diff stage timings."
+    )
+    parser.add_argument("sessions", type=Path, nargs="+")
+    parser.add_argument(
+        "--speed", type=float, default=1.0,
+        help="pacing relative to the recording; 0 replays without waiting",
+    )
+    return parser.parse_args(argv)
+
+
+async def main(argv: list[str] | None = None) -> None:
+    args = _parse_args(argv)
+    for path in args.sessions:
+        results = await replay_session(path, speed=args.speed)
+        report = [
+            diff_timings(recorded, replayed, args.speed)
+            for recorded, replayed in results
+        ]
+        print(json.dumps({"session": str(path), "turns": report}, indent=2))
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,54 @@
+import time
+from typing import Any, Awaitable, TypeVar
+
+from loguru import logger
+
+T = TypeVar("T")
+
+# Set when this module is first imported, which happens while `server.py`
+# is still importing its dependencies.
+PROCESS_IMPORT_STARTED = time.perf_counter()
+
+
+class StartupProfile:
+    """
+    Records how long each startup stage takes and whether warm-up finished.
+    """
+
+    def __init__(self) -> None:
+        self.started = time.perf_counter()
+        self.stages: dict[str, float] = {
+            "imports": self.started - PROCESS_IMPORT_STARTED,
+        }
+        self.ready = False
+
+    async def timed(self, stage: str, awaitable: Awaitable[T]) -> T:
+        """
+        Await `awaitable` and record its duration under `stage`.
+
+        Args:
+            stage: Name of the startup stage.
+            awaitable: Work performed by the stage.
+
+        Returns:
+            Result of the awaitable.
+        """
+        started = time.perf_counter()
+        try:
+            return await awaitable
+        finally:
+            self.stages[stage] = time.perf_counter() - started
+
+    def mark_ready(self) -> None:
+        self.ready = True
+        self.stages["total"] = time.perf_counter() - self.started
+        logger.info(f"Warm-up complete: {self.as_dict()}")
+
+    def as_dict(self) -> dict[str, Any]:
+        return {
+            "ready": self.ready,
+            "stages_ms": {
+                stage: round(seconds * 1000, 1)
+                for stage, seconds in self.stages.items()
+            },
+        }
@@ -1,7 +1,9 @@
 import os
+import secrets
 
 from functools import lru_cache
 
+from pydantic import PrivateAttr
 from pydantic_settings import BaseSettings
 
 
@@ -35,6 +37,61 @@ class DatabaseConfig(BaseSettings):
         )
 
 
+class MessagesConfig(BaseSettings):
+    """
+    Monthly partitions of the conversation history table.
+
+    Attributes:
+        partitions_ahead: Future monthly partitions kept ready.
+        retention_months: Months kept online, including the current one;
+            0 keeps everything.
+        archive_dir: Directory for compressed archives of expired partitions;
+            retention does not run while unset. Use durable storage, not
+            a container's local disk.
+        maintenance_interval_seconds: Interval of the partition and retention job.
+        history_lookback_days: Age of the oldest message replayed when a
+            conversation is rebuilt from Postgres.
+    """
+
+    partitions_ahead: int = int(os.getenv("MESSAGES_PARTITIONS_AHEAD", "3"))
+    retention_months: int = int(os.getenv("MESSAGES_RETENTION_MONTHS", "0"))
+    archive_dir: str = os.getenv("MESSAGES_ARCHIVE_DIR", "")
+    maintenance_interval_seconds: float = float(
+        os.getenv("MESSAGES_MAINTENANCE_INTERVAL_SECONDS", "21600")
+    )
+    history_lookback_days: int = int(os.getenv("MESSAGES_HISTORY_LOOKBACK_DAYS", "31"))
+
+
+class ExportConfig(BaseSettings):
+    """
+    Bulk export of conversation history.
+
+    Attributes:
+        api_token: Bearer token required by the HTTP export endpoint; the
+            endpoint is disabled while unset.
+        page_rows: Rows read per COPY statement.
+    """
+
+    api_token: str = os.getenv("EXPORT_API_TOKEN", "")
+    page_rows: int = int(os.getenv("EXPORT_PAGE_ROWS", "10000"))
+
+
+class IngestConfig(BaseSettings):
+    """
+    Ingestion of transaction feeds into the customer database.
+
+    Attributes:
+        api_token: Bearer token required by the HTTP ingestion endpoint;
+            the endpoint is disabled while unset.
+        batch_rows: Records written per SQLite transaction.
+        max_pending_batches: Batches queued for the writer before feeds wait.
+    """
+
+    api_token: str = os.getenv("INGEST_API_TOKEN", "")
+    batch_rows: int = int(os.getenv("INGEST_BATCH_ROWS", "10000"))
+    max_pending_batches: int = int(os.getenv("INGEST_MAX_PENDING_BATCHES", "4"))
+
+
 class EngineConfig(BaseSettings):
     """
     API keys for external services.
@@ -48,17 +105,330 @@ class EngineConfig(BaseSettings):
     OPENAI_API_KEY: str = os.environ["OPENAI_API_KEY"]
 
 
+class SessionConfig(BaseSettings):
+    """
+    Conversation session resumption.
+
+    Attributes:
+        secret_key: HMAC key for session tokens. Must be identical on every
+            server instance; a random per-process key is used when unset,
+            which a shared store refuses.
+        shared_secret: Whether `secret_key` was configured rather than
+            generated for this process.
+        token_ttl_seconds: Lifetime of an issued session token.
+        max_sessions: Number of warm sessions kept in memory.
+        idle_ttl_seconds: Idle time after which a warm session is dropped.
+        store: Shared session store, one of "memory" (this process only),
+            "sqlite" (workers on one host) or "postgres" (any node). Shared
+            stores need the "postgres" bus and a `secret_key`.
+        store_path: Database file for the "sqlite" store.
+        bus: Invalidation bus, "local" or "postgres" (LISTEN/NOTIFY).
+    """
+
+    secret_key: str = os.getenv("SESSION_SECRET_KEY", "")
+    token_ttl_seconds: int = int(os.getenv("SESSION_TOKEN_TTL_SECONDS", "86400"))
+    max_sessions: int = int(os.getenv("SESSION_MAX_SESSIONS", "1000"))
+    idle_ttl_seconds: int = int(os.getenv("SESSION_IDLE_TTL_SECONDS", "1800"))
+    store: str = os.getenv("SESSION_STORE", "memory")
+    store_path: str = os.getenv("SESSION_STORE_PATH", "session_state.db")
+    bus: str = os.getenv("SESSION_BUS", "local")
+
+    _generated_key: bool = PrivateAttr(default=False)
+
+    def model_post_init(self, context: object) -> None:
+        if not self.secret_key:
+            self.secret_key = secrets.token_hex(32)
+            self._generated_key = True
+
+    @property
+    def shared_secret(self) -> bool:
+        return not self._generated_key
+
+
+class MemoryConfig(BaseSettings):
+    """
+    Per-session memory caps of live `/voice_stream` sessions.
+
+    Attributes:
+        soft_cap_bytes: Usage above which the session history is compacted.
+        hard_cap_bytes: Usage above which the session is disconnected.
+    """
+
+    soft_cap_bytes: int = int(os.getenv("SESSION_MEMORY_SOFT_CAP_BYTES", str(1024 * 1024)))
+    hard_cap_bytes: int = int(os.getenv("SESSION_MEMORY_HARD_CAP_BYTES", str(8 * 1024 * 1024)))
+
+
+class SttConfig(BaseSettings):
+    """
+    Speech-to-text engine.
+
+    Attributes:
+        engine: "groq" (one API request per utterance) or "local" (a local
+            model, batched across sessions in worker processes).
+        model: Groq transcription model.
+        local_engine: "module:factory" path of the local batch engine.
+        local_model: Model loaded by the local engine.
+        batch_window_ms: Time the local engine waits for more utterances
+            to batch after the first one.
+        max_batch: Largest local batch.
+        workers: Worker processes of the local engine.
+        hedge_enabled: Hedge and retry Groq requests.
+        hedge_quantile: Latency quantile after which a duplicate Groq
+            request is sent.
+        hedge_min_samples: Latencies needed before the quantile is used.
+        hedge_initial_delay_ms: Hedge delay until then.
+        timeout_seconds: Limit of a single Groq request.
+        max_retries: Retries of a failed Groq request.
+        retry_budget_ratio: Hedges and retries allowed per request.
+        retry_budget_max_tokens: Hedges and retries saved up while idle.
+        max_retry_after_seconds: Longest `retry-after` delay waited for.
+    """
+
+    engine: str = os.getenv("STT_ENGINE", "groq")
+    model: str = os.getenv("STT_MODEL", "whisper-large-v3-turbo")
+    local_engine: str = os.getenv("STT_LOCAL_ENGINE", "nlp_processor.stt_batching:load_whisper")
+    local_model: str = os.getenv("STT_LOCAL_MODEL", "openai/whisper-base")
+    batch_window_ms: float = float(os.getenv("STT_BATCH_WINDOW_MS", "20"))
+    max_batch: int = int(os.getenv("STT_MAX_BATCH", "8"))
+    workers: int = int(os.getenv("STT_WORKERS", "1"))
+    hedge_enabled: bool = os.getenv("STT_HEDGE_ENABLED", "true").lower() == "true"
+    hedge_quantile: float = float(os.getenv("STT_HEDGE_QUANTILE", "0.95"))
+    hedge_min_samples: int = int(os.getenv("STT_HEDGE_MIN_SAMPLES", "20"))
+    hedge_initial_delay_ms: float = float(os.getenv("STT_HEDGE_INITIAL_DELAY_MS", "1500"))
+    timeout_seconds: float = float(os.getenv("STT_TIMEOUT_SECONDS", "15"))
+    max_retries: int = int(os.getenv("STT_MAX_RETRIES", "2"))
+    retry_budget_ratio: float = float(os.getenv("STT_RETRY_BUDGET_RATIO", "0.1"))
+    retry_budget_max_tokens: float = float(os.getenv("STT_RETRY_BUDGET_MAX_TOKENS", "10"))
+    max_retry_after_seconds: float = float(os.getenv("STT_MAX_RETRY_AFTER_SECONDS", "5"))
+
+
+class RecorderConfig(BaseSettings):
+    """
+    Capture of `/voice_stream` sessions for offline replay (`api.replay`).
+
+    Attributes:
+        enabled: Record every session.
+        directory: Directory of the session files, one per conversation.
+    """
+
+    enabled: bool = os.getenv("RECORDER_ENABLED", "false").lower() == "true"
+    directory: str = os.getenv("RECORDER_DIR", "recordings")
+
+
+class HttpConfig(BaseSettings):
+    """
+    Shared HTTP connection pool for Groq (STT and LLM).
+
+    Attributes:
+        http2: Multiplex requests over HTTP/2 when `h2` is installed.
+        max_connections: Upper bound on open connections.
+        max_keepalive_connections: Idle connections kept in the pool.
+        keepalive_expiry_seconds: How long an idle connection is kept.
+        connect_timeout_seconds: Timeout for establishing a connection.
+        read_timeout_seconds: Timeout for reading a response.
+        connect_retries: Retries after a failed connection attempt.
+        retry_backoff_seconds: Base delay of the jittered exponential backoff.
+        warm_connections: Connections opened at startup.
+        keepalive_ping_seconds: Interval of a background request that keeps
+            the pool warm while idle; 0 disables it.
+    """
+
+    http2: bool = os.getenv("HTTP_HTTP2", "true").lower() == "true"
+    max_connections: int = int(os.getenv("HTTP_MAX_CONNECTIONS", "50"))
+    max_keepalive_connections: int = int(os.getenv("HTTP_MAX_KEEPALIVE_CONNECTIONS", "20"))
+    keepalive_expiry_seconds: float = float(os.getenv("HTTP_KEEPALIVE_EXPIRY_SECONDS", "120"))
+    connect_timeout_seconds: float = float(os.getenv("HTTP_CONNECT_TIMEOUT_SECONDS", "5"))
+    read_timeout_seconds: float = float(os.getenv("HTTP_READ_TIMEOUT_SECONDS", "30"))
+    connect_retries: int = int(os.getenv("HTTP_CONNECT_RETRIES", "2"))
+    retry_backoff_seconds: float = float(os.getenv("HTTP_RETRY_BACKOFF_SECONDS", "0.2"))
+    warm_connections: int = int(os.getenv("HTTP_WARM_CONNECTIONS", "1"))
+    keepalive_ping_seconds: float = float(os.getenv("HTTP_KEEPALIVE_PING_SECONDS", "0"))
+
+
+class OutboundConfig(BaseSettings):
+    """
+    Per-connection outbound websocket queue.
+
+    Attributes:
+        policy: Handling of clients that fall behind, one of "block",
+            "coalesce" or "drop_and_close".
+        max_messages: Queued messages before the policy applies.
+        max_bytes: Queued bytes before the policy applies.
+        batch_bytes: Largest binary message built from queued audio.
+    """
+
+    policy: str = os.getenv("OUTBOUND_POLICY", "block")
+    max_messages: int = int(os.getenv("OUTBOUND_MAX_MESSAGES", "64"))
+    max_bytes: int = int(os.getenv("OUTBOUND_MAX_BYTES", str(1024 * 1024)))
+    batch_bytes: int = int(os.getenv("OUTBOUND_BATCH_BYTES", str(32 * 1024)))
+
+
+class BankingConfig(BaseSettings):
+    """
+    Backend of the customer, account, transaction and scheme data.
+
+    Attributes:
+        backend: "sqlite" (customer_transaction_db/transactions.db) or
+            "postgres" (the server of the conversation history database).
+        schema_name: Postgres schema holding the banking tables.
+        prepare_statements: Prepare Postgres statements on first use;
+            disable behind a transaction-mode connection pooler.
+        single_flight: Run identical concurrent reads once and share the
+            result among their callers, across sessions.
+        single_flight_max_keys: Distinct reads with metrics of their own.
+    """
+
+    backend: str = os.getenv("BANKING_BACKEND", "sqlite")
+    schema_name: str = os.getenv("BANKING_PG_SCHEMA", "banking")
+    prepare_statements: bool = (
+        os.getenv("BANKING_PREPARE_STATEMENTS", "true").lower() == "true"
+    )
+    single_flight: bool = os.getenv("BANKING_SINGLE_FLIGHT", "true").lower() == "true"
+    single_flight_max_keys: int = int(os.getenv("BANKING_SINGLE_FLIGHT_MAX_KEYS", "256"))
+
+
+class ToolsConfig(BaseSettings):
+    """
+    Limits of agent tools.
+
+    Attributes:
+        max_page_size: Most transactions a tool returns in one call.
+        output_format: "verbose" (a dict per row with formatted amounts)
+            or "compact" (column names once, rows as value lists, plain
+            amounts and pre-computed totals).
+        compact_max_rows: Rows a compact result shows; the rest are
+            counted with a hint on how to get them.
+        compact_max_chars: Longest text value of a compact result.
+    """
+
+    max_page_size: int = int(os.getenv("TOOLS_MAX_PAGE_SIZE", "25"))
+    output_format: str = os.getenv("TOOLS_OUTPUT_FORMAT", "verbose")
+    compact_max_rows: int = int(os.getenv("TOOLS_COMPACT_MAX_ROWS", "15"))
+    compact_max_chars: int = int(os.getenv("TOOLS_COMPACT_MAX_CHARS", "80"))
+
+
+class PrefetchConfig(BaseSettings):
+    """
+    Speculative customer snapshot loaded while audio is transcribed.
+
+    Attributes:
+        enabled: Whether sessions prefetch a snapshot.
+        max_age_seconds: Age after which the snapshot is reloaded.
+        transactions: Number of recent transactions in the snapshot.
+        summary_days: Window of the category spending summary.
+    """
+
+    enabled: bool = os.getenv("PREFETCH_ENABLED", "true").lower() == "true"
+    max_age_seconds: float = float(os.getenv("PREFETCH_MAX_AGE_SECONDS", "60"))
+    transactions: int = int(os.getenv("PREFETCH_TRANSACTIONS", "10"))
+    summary_days: int = int(os.getenv("PREFETCH_SUMMARY_DAYS", "30"))
+
+
+class RoutingConfig(BaseSettings):
+    """
+    Routing of turns between a small and a large Groq model.
+
+    Attributes:
+        enabled: If False, every turn uses the large model.
+        small_model: Fast model for simple lookups.
+        large_model: Model for complex turns and escalations.
+        threshold: Complexity score in [0, 1] from which a turn goes to the
+            large model.
+    """
+
+    enabled: bool = os.getenv("ROUTING_ENABLED", "true").lower() == "true"
+    small_model: str = os.getenv("ROUTING_SMALL_MODEL", "llama-3.1-8b-instant")
+    large_model: str = os.getenv("ROUTING_LARGE_MODEL", "llama-3.3-70b-versatile")
+    threshold: float = float(os.getenv("ROUTING_THRESHOLD", "0.5"))
+
+
+class AnalyticsConfig(BaseSettings):
+    """
+    In-memory columnar analytics over customer transactions.
+
+    Attributes:
+        max_customers: Customers whose transactions are kept in memory.
+    """
+
+    max_customers: int = int(os.getenv("ANALYTICS_MAX_CUSTOMERS", "256"))
+
+
+class LoopMonitorConfig(BaseSettings):
+    """
+    Event loop lag monitor and blocking-call detector.
+
+    Attributes:
+        enabled: Whether the monitor runs; it adds a heartbeat task and a
+            watchdog thread.
+        interval_ms: Heartbeat period.
+        threshold_ms: Blocking time after which the stack of the loop
+            thread is captured.
+    """
+
+    enabled: bool = os.getenv("LOOP_MONITOR_ENABLED", "false").lower() == "true"
+    interval_ms: float = float(os.getenv("LOOP_MONITOR_INTERVAL_MS", "50"))
+    threshold_ms: float = float(os.getenv("LOOP_MONITOR_THRESHOLD_MS", "100"))
+
+
+class SpeculationConfig(BaseSettings):
+    """
+    Speculative agent start on interim transcripts (PCM16 clients only).
+
+    Attributes:
+        enabled: Whether to transcribe partial audio and speculate.
+        partial_every_ms: Audio received between interim transcriptions.
+        similarity_threshold: Word similarity in [0, 1] above which a partial
+            counts as stable and a speculative answer is kept.
+    """
+
+    enabled: bool = os.getenv("SPECULATION_ENABLED", "false").lower() == "true"
+    partial_every_ms: int = int(os.getenv("SPECULATION_PARTIAL_EVERY_MS", "1000"))
+    similarity_threshold: float = float(os.getenv("SPECULATION_SIMILARITY_THRESHOLD", "0.85"))
+
+
 class Settings(BaseSettings):
     """
     Application settings.
 
     Attributes:
         database: Configuration for the database.
+        messages: Partitioning and retention of conversation history.
+        export: Bulk export of conversation history.
+        ingest: Transaction feed ingestion.
         engine: API keys.
+        session: Session resumption settings.
+        memory: Per-session memory caps.
+        recorder: Session capture for replay.
+        stt: Speech-to-text engine.
+        http: Shared HTTP connection pool.
+        outbound: Outbound websocket queue.
+        banking: Backend of the banking data.
+        tools: Limits of agent tools.
+        prefetch: Customer snapshot prefetching.
+        speculation: Speculative agent start on partial transcripts.
+        loop_monitor: Event loop lag monitor.
+        analytics: Columnar transaction analytics.
+        routing: Small/large model routing.
     """
 
     database: DatabaseConfig = DatabaseConfig()
+    messages: MessagesConfig = MessagesConfig()
+    export: ExportConfig = ExportConfig()
+    ingest: IngestConfig = IngestConfig()
     engine: EngineConfig = EngineConfig()
+    session: SessionConfig = SessionConfig()
+    memory: MemoryConfig = MemoryConfig()
+    recorder: RecorderConfig = RecorderConfig()
+    stt: SttConfig = SttConfig()
+    http: HttpConfig = HttpConfig()
+    outbound: OutboundConfig = OutboundConfig()
+    banking: BankingConfig = BankingConfig()
+    tools: ToolsConfig = ToolsConfig()
+    prefetch: PrefetchConfig = PrefetchConfig()
+    speculation: SpeculationConfig = SpeculationConfig()
+    loop_monitor: LoopMonitorConfig = LoopMonitorConfig()
+    analytics: AnalyticsConfig = AnalyticsConfig()
+    routing: RoutingConfig = RoutingConfig()
 
 
 @lru_cache
@@ -1,31 +1,71 @@
+from datetime import datetime
+
 from loguru import logger
 from psycopg import AsyncConnection
 from psycopg_pool import AsyncConnectionPool
 from pydantic import UUID4
 
+from convo_history_db.partitions import (
+    is_partitioned,
+    ensure_partitions,
+    migrate_unpartitioned_messages,
+)
+
 
-async def create_main_table(pool: AsyncConnectionPool) -> None:
+async def create_main_table(pool: AsyncConnectionPool, months_ahead: int = 3) -> None:
     """
     Create the main table IF it does not exist.
 
+    `messages` is range-partitioned by month on `timestamp`; the partitions
+    for the current month and the next `months_ahead` months are created as
+    well. A plain table left by an earlier release is migrated in place.
+
     Args:
         pool: Connection pool to the database.
+        months_ahead: Number of future monthly partitions to prepare.
     """
     logger.info("Executing query to create the main table `messages`...")
     query = (
         """
         CREATE TABLE IF NOT EXISTS messages (
-            id SERIAL PRIMARY KEY,
+            id SERIAL,
             conversation_id UUID NOT NULL,
             sender VARCHAR(10) NOT NULL,
-            timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            content TEXT NOT NULL
-        );
+            timestamp TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+            content TEXT NOT NULL,
+            PRIMARY KEY (id, timestamp)
+        ) PARTITION BY RANGE (timestamp);
         """
     )
+    indexes = (
+        "CREATE INDEX IF NOT EXISTS messages_conversation_idx "
+        "ON messages (conversation_id, timestamp);",
+        # Keyset order of exports (convo_history_db/export.py).
+        "CREATE INDEX IF NOT EXISTS messages_export_idx "
+        "ON messages (timestamp, id);",
+    )
     async with pool.connection() as conn:
+        partitioned = await is_partitioned(conn)
         async with conn.cursor() as cur:
+            if partitioned is False:
+                logger.info("Migrating `messages` to a partitioned table...")
+                await cur.execute("ALTER TABLE messages RENAME TO messages_unpartitioned;")
+                # Index names are unique per schema; free the primary key's.
+                await cur.execute(
+                    "ALTER INDEX IF EXISTS messages_pkey "
+                    "RENAME TO messages_unpartitioned_pkey;"
+                )
+                await cur.execute(
+                    "ALTER SEQUENCE IF EXISTS messages_id_seq "
+                    "RENAME TO messages_unpartitioned_id_seq;"
+                )
             await cur.execute(query=query)
+            for index in indexes:
+                await cur.execute(query=index)
+        if partitioned is False:
+            await migrate_unpartitioned_messages(conn)
+
+    await ensure_partitions(pool, months_ahead)
 
 
 async def store_message(
@@ -53,7 +93,9 @@ async def store_message(
 
 
 async def get_conversation_history(
-    conn: AsyncConnection, conversation_id: UUID4
+    conn: AsyncConnection,
+    conversation_id: UUID4,
+    since: datetime | None = None,
 ) -> list[dict[str, str]]:
     """
     Retrieve the conversation history for a given conversation.
@@ -61,6 +103,8 @@ async def get_conversation_history(
     Args:
         conn: Asynchronous database connection.
         conversation_id: Unique identifier for the conversation.
+        since: Ignore messages older than this. Bounding the time range lets
+            Postgres skip every partition outside it.
 
     Returns:
         List of dictionaries containing the sender and content of each message.
@@ -70,9 +114,10 @@ async def get_conversation_history(
         "SELECT sender, content "
         "FROM messages "
         "WHERE conversation_id = %s "
+        "AND timestamp >= %s "
         "ORDER BY timestamp ASC;"
     )
-    params = (conversation_id,)
+    params = (conversation_id, since or datetime.min)
     async with conn.cursor() as cur:
         await cur.execute(query=query, params=params)
         rows = await cur.fetchall()
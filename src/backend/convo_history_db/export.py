@@ -0,0 +1,447 @@
+import argparse
+import asyncio
+import csv
+import io
+import json
+import os
+from dataclasses import dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import Any, AsyncIterator
+from uuid import UUID
+
+from loguru import logger
+from psycopg import AsyncConnection, sql
+from psycopg_pool import AsyncConnectionPool
+
+# Bulk export of `messages`.
+#
+# Rows are read with `COPY (SELECT ...) TO STDOUT (FORMAT BINARY)` in pages
+# ordered by the keyset (timestamp, id). Every page is a short statement of
+# its own, so no transaction or snapshot is held for the whole export and
+# memory is bounded by the page size. The key of the last exported row is
+# the checkpoint from which an interrupted export resumes.
+
+COLUMNS = ("id", "conversation_id", "sender", "timestamp", "content")
+COLUMN_TYPES = ("int4", "uuid", "varchar", "timestamp", "text")
+FORMATS = ("ndjson", "csv", "parquet")
+MEDIA_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv",
+    "parquet": "application/vnd.apache.parquet",
+}
+
+Row = tuple[int, UUID, str, datetime, str]
+
+
+class ExportError(Exception):
+    """Raised for invalid export requests."""
+
+
+@dataclass(frozen=True)
+class ExportQuery:
+    """
+    Messages to export.
+
+    Attributes:
+        start: Inclusive lower bound of `timestamp`.
+        end: Exclusive upper bound of `timestamp`.
+        conversation_ids: Restrict to these conversations; empty for all.
+    """
+
+    start: datetime | None = None
+    end: datetime | None = None
+    conversation_ids: tuple[UUID, ...] = ()
+
+
+@dataclass
+class Checkpoint:
+    """
+    Position of an export: the key of the last exported row, the number of
+    rows and, for file exports, the size of the output at that point.
+    """
+
+    timestamp: datetime | None = None
+    id: int = 0
+    rows: int = 0
+    offset: int = 0
+    parts: int = 0
+
+    def advance(self, page: list[Row]) -> None:
+        self.id, self.timestamp = page[-1][0], page[-1][3]
+        self.rows += len(page)
+
+    def to_json(self) -> str:
+        return json.dumps(
+            {
+                "timestamp": self.timestamp.isoformat() if self.timestamp else None,
+                "id": self.id,
+                "rows": self.rows,
+                "offset": self.offset,
+                "parts": self.parts,
+            }
+        )
+
+    @classmethod
+    def from_json(cls, data: str) -> "Checkpoint":
+        values = json.loads(data)
+        if values.get("timestamp"):
+            values["timestamp"] = datetime.fromisoformat(values["timestamp"])
+        return cls(**values)
+
+
+def _page_select(query: ExportQuery, checkpoint: Checkpoint, page_rows: int):
+    """
+    SELECT of the next page, walking `messages_export_idx` (timestamp, id).
+    """
+    conditions = [sql.SQL("TRUE")]
+    params: list[Any] = []
+    if query.start is not None:
+        conditions.append(sql.SQL("timestamp >= %s"))
+        params.append(query.start)
+    if query.end is not None:
+        conditions.append(sql.SQL("timestamp < %s"))
+        params.append(query.end)
+    if query.conversation_ids:
+        conditions.append(sql.SQL("conversation_id = ANY(%s)"))
+        params.append(list(query.conversation_ids))
+    if checkpoint.timestamp is not None:
+        # The plain bound lets Postgres prune the partitions before the
+        # checkpoint, which it cannot do from the row comparison.
+        conditions.append(sql.SQL("timestamp >= %s"))
+        conditions.append(sql.SQL("(timestamp, id) > (%s, %s)"))
+        params.extend([checkpoint.timestamp, checkpoint.timestamp, checkpoint.id])
+
+    statement = sql.SQL(
+        "SELECT {columns} FROM messages WHERE {conditions} "
+        "ORDER BY timestamp, id LIMIT {limit}"
+    ).format(
+        columns=sql.SQL(", ").join(map(sql.Identifier, COLUMNS)),
+        conditions=sql.SQL(" AND ").join(conditions),
+        limit=sql.Literal(page_rows),
+    )
+    return statement, params
+
+
+def _page_query(query: ExportQuery, checkpoint: Checkpoint, page_rows: int):
+    select, params = _page_select(query, checkpoint, page_rows)
+    return sql.SQL("COPY ({select}) TO STDOUT (FORMAT BINARY)").format(select=select), params
+
+
+async def fetch_page(
+    conn: AsyncConnection,
+    query: ExportQuery,
+    checkpoint: Checkpoint,
+    page_rows: int,
+) -> list[Row]:
+    """
+    Read the next page of messages after `checkpoint` through COPY.
+
+    Args:
+        conn: Asynchronous database connection.
+        query: Messages to export.
+        checkpoint: Key of the last row already exported.
+        page_rows: Maximum rows in the page.
+
+    Returns:
+        Rows in (timestamp, id) order; empty once the export is complete.
+    """
+    statement, params = _page_query(query, checkpoint, page_rows)
+    async with conn.cursor() as cur:
+        async with cur.copy(statement, params) as copy:
+            copy.set_types(COLUMN_TYPES)
+            return [row async for row in copy.rows()]
+
+
+async def iter_pages(
+    pool: AsyncConnectionPool,
+    query: ExportQuery,
+    checkpoint: Checkpoint,
+    page_rows: int = 10_000,
+) -> AsyncIterator[list[Row]]:
+    """
+    Yield pages of messages, advancing `checkpoint` past each page as it
+    is yielded. Callers that persist the checkpoint must do so only after
+    the page itself is stored.
+
+    A connection is only borrowed from the pool while a page is read.
+    """
+    while True:
+        async with pool.connection() as conn:
+            page = await fetch_page(conn, query, checkpoint, page_rows)
+        if not page:
+            return
+        checkpoint.advance(page)
+        yield page
+
+
+def _record(row: Row) -> dict[str, Any]:
+    return {
+        "id": row[0],
+        "conversation_id": str(row[1]),
+        "sender": row[2],
+        "timestamp": row[3].isoformat(),
+        "content": row[4],
+    }
+
+
+class NdjsonEncoder:
+    def header(self) -> bytes:
+        return b""
+
+    def encode(self, page: list[Row]) -> bytes:
+        return "".join(
+            json.dumps(_record(row), ensure_ascii=False) + "\n" for row in page
+        ).encode()
+
+    def footer(self) -> bytes:
+        return b""
+
+
+class CsvEncoder:
+    def header(self) -> bytes:
+        return self._write([COLUMNS])
+
+    def encode(self, page: list[Row]) -> bytes:
+        return self._write(
+            (row[0], row[1], row[2], row[3].isoformat(), row[4]) for row in page
+        )
+
+    def footer(self) -> bytes:
+        return b""
+
+    @staticmethod
+    def _write(rows) -> bytes:
+        buffer = io.StringIO()
+        csv.writer(buffer).writerows(rows)
+        return buffer.getvalue().encode()
+
+
+class _ChunkSink(io.RawIOBase):
+    """Write-only stream whose content is handed out in chunks; the
+    position keeps counting so Parquet footer offsets stay correct."""
+
+    def __init__(self) -> None:
+        self._chunks: list[bytes] = []
+        self._position = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        self._position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._position
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+class ParquetEncoder:
+    """
+    Writes one Parquet row group per page into a single stream.
+
+    Requires the optional `pyarrow` dependency.
+    """
+
+    def __init__(self) -> None:
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError as e:
+            raise ExportError("Parquet export requires `pyarrow`.") from e
+
+        self._pa = pa
+        self._schema = pa.schema(
+            [
+                ("id", pa.int32()),
+                ("conversation_id", pa.string()),
+                ("sender", pa.string()),
+                ("timestamp", pa.timestamp("us")),
+                ("content", pa.string()),
+            ]
+        )
+        self._sink = _ChunkSink()
+        self._writer = pq.ParquetWriter(self._sink, self._schema, compression="zstd")
+
+    def header(self) -> bytes:
+        return self._sink.drain()
+
+    def encode(self, page: list[Row]) -> bytes:
+        columns = list(zip(*page))
+        columns[1] = [str(value) for value in columns[1]]
+        arrays = [
+            self._pa.array(column, type=field.type)
+            for column, field in zip(columns, self._schema)
+        ]
+        self._writer.write_table(
+            self._pa.Table.from_arrays(arrays, schema=self._schema)
+        )
+        return self._sink.drain()
+
+    def footer(self) -> bytes:
+        self._writer.close()
+        return self._sink.drain()
+
+
+def create_encoder(fmt: str) -> NdjsonEncoder | CsvEncoder | ParquetEncoder:
+    """
+    Encoder for an export format.
+
+    Raises:
+        ExportError: If the format is unknown or its dependency is missing.
+    """
+    if fmt == "ndjson":
+        return NdjsonEncoder()
+    if fmt == "csv":
+        return CsvEncoder()
+    if fmt == "parquet":
+        return ParquetEncoder()
+    raise ExportError(f"Unknown export format {fmt!r}; expected one of {FORMATS}.")
+
+
+async def stream_export(
+    pool: AsyncConnectionPool,
+    query: ExportQuery,
+    fmt: str,
+    checkpoint: Checkpoint | None = None,
+    page_rows: int = 10_000,
+) -> AsyncIterator[bytes]:
+    """
+    Stream an export as encoded bytes, one chunk per page.
+
+    Args:
+        pool: Connection pool to the conversation history database.
+        query: Messages to export.
+        fmt: One of FORMATS.
+        checkpoint: Resume after this row; advanced as pages are produced.
+        page_rows: Rows read per COPY statement.
+
+    Yields:
+        Encoded chunks, including format header and footer.
+    """
+    encoder = create_encoder(fmt)
+    checkpoint = checkpoint or Checkpoint()
+    # A resumed Parquet stream is a new file and needs its header again.
+    if checkpoint.timestamp is None or fmt == "parquet":
+        yield encoder.header()
+    async for page in iter_pages(pool, query, checkpoint, page_rows):
+        yield encoder.encode(page)
+    yield encoder.footer()
+
+
+async def export_to_path(
+    pool: AsyncConnectionPool,
+    query: ExportQuery,
+    fmt: str,
+    output: Path,
+    checkpoint_path: Path,
+    page_rows: int = 10_000,
+) -> Checkpoint:
+    """
+    Export to a file (NDJSON/CSV) or a directory of part files (Parquet),
+    saving a checkpoint after every page so that a rerun continues where
+    an interrupted one stopped.
+
+    Args:
+        pool: Connection pool to the conversation history database.
+        query: Messages to export.
+        fmt: One of FORMATS.
+        output: Output file, or directory for Parquet.
+        checkpoint_path: JSON file holding the checkpoint.
+        page_rows: Rows read per COPY statement.
+
+    Returns:
+        The final checkpoint.
+    """
+    checkpoint = Checkpoint()
+    if checkpoint_path.exists():
+        checkpoint = Checkpoint.from_json(checkpoint_path.read_text())
+        logger.info(f"Resuming export after {checkpoint.rows} rows")
+
+    def save() -> None:
+        partial = checkpoint_path.with_suffix(".tmp")
+        partial.write_text(checkpoint.to_json())
+        partial.replace(checkpoint_path)
+
+    if fmt == "parquet":
+        output.mkdir(parents=True, exist_ok=True)
+        async for page in iter_pages(pool, query, checkpoint, page_rows):
+            encoder = ParquetEncoder()
+            data = encoder.header() + encoder.encode(page) + encoder.footer()
+            part = output / f"part-{checkpoint.parts:05d}.parquet"
+            await asyncio.to_thread(part.write_bytes, data)
+            checkpoint.parts += 1
+            await asyncio.to_thread(save)
+        return checkpoint
+
+    encoder = create_encoder(fmt)
+    with open(output, "r+b" if output.exists() else "wb") as file:
+        # Drop anything written after the last checkpoint.
+        file.truncate(checkpoint.offset)
+        file.seek(checkpoint.offset)
+        if checkpoint.offset == 0:
+            file.write(encoder.header())
+        async for page in iter_pages(pool, query, checkpoint, page_rows):
+            data = encoder.encode(page)
+            await asyncio.to_thread(_write_durably, file, data)
+            checkpoint.offset = file.tell()
+            await asyncio.to_thread(save)
+        file.write(encoder.footer())
+    return checkpoint
+
+
+def _write_durably(file, data: bytes) -> None:
+    file.write(data)
+    file.flush()
+    os.fsync(file.fileno())
+
+
+def _parse_args(argv: list[str] | None = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Export conversation history from Postgres."
+    )
+    parser.add_argument("output", type=Path, help="Output file (directory for parquet).")
+    parser.add_argument("--format", choices=FORMATS, default="ndjson")
+    parser.add_argument("--start", type=datetime.fromisoformat, help="Inclusive start time.")
+    parser.add_argument("--end", type=datetime.fromisoformat, help="Exclusive end time.")
+    parser.add_argument(
+        "--conversation", type=UUID, action="append", default=[],
+        help="Conversation ID to export; repeatable.",
+    )
+    parser.add_argument(
+        "--checkpoint", type=Path,
+        help="Checkpoint file (default: <output>.checkpoint.json).",
+    )
+    parser.add_argument("--page-rows", type=int, default=10_000)
+    return parser.parse_args(argv)
+
+
+async def main(argv: list[str] | None = None) -> None:
+    from config.settings import get_settings
+    from convo_history_db.connection import create_db_connection_pool
+
+    args = _parse_args(argv)
+    query = ExportQuery(
+        start=args.start, end=args.end, conversation_ids=tuple(args.conversation)
+    )
+    checkpoint_path = args.checkpoint or Path(f"{args.output}.checkpoint.json")
+
+    pool = create_db_connection_pool(settings=get_settings())
+    await pool.open()
+    try:
+        checkpoint = await export_to_path(
+            pool, query, args.format, args.output, checkpoint_path, args.page_rows
+        )
+    finally:
+        await pool.close()
+    print(f"Exported {checkpoint.rows} messages to {args.output}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,311 @@
+import asyncio
+import gzip
+import re
+from datetime import date
+from pathlib import Path
+
+from loguru import logger
+from psycopg import AsyncConnection, sql
+from psycopg_pool import AsyncConnectionPool
+
+# `messages` is range-partitioned by month on `timestamp`. Partitions are
+# named after the month they hold, e.g. `messages_y2026m10` covers
+# [2026-10-01, 2026-11-01).
+
+PARTITION_NAME = re.compile(r"^messages_y(\d{4})m(\d{2})$")
+
+# Archive writes are handed to a thread in blocks of this size.
+ARCHIVE_FLUSH_BYTES = 1 << 20
+
+# Advisory lock key serialising the retention job across workers.
+RETENTION_LOCK_ID = 0x66766D73
+
+
+def add_months(month: date, months: int) -> date:
+    """
+    First day of the month `months` after the month of `month`.
+
+    Args:
+        month: Any day of the starting month.
+        months: Number of months to move, may be negative.
+
+    Returns:
+        First day of the resulting month.
+    """
+    index = month.year * 12 + month.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(month: date) -> str:
+    """Name of the partition holding `month`."""
+    return f"messages_y{month.year:04d}m{month.month:02d}"
+
+
+def partition_month(name: str) -> date | None:
+    """
+    Month held by a partition, parsed from its name.
+
+    Returns:
+        First day of the month, or None if `name` is not a monthly partition.
+    """
+    match = PARTITION_NAME.match(name)
+    if match is None:
+        return None
+    return date(int(match.group(1)), int(match.group(2)), 1)
+
+
+def expired_partitions(
+    names: list[str], today: date, retention_months: int
+) -> list[str]:
+    """
+    Partitions that only hold messages older than the retention window.
+
+    Args:
+        names: Names of the attached partitions.
+        today: Current date on the database server.
+        retention_months: Number of months kept, including the current one.
+
+    Returns:
+        Expired partition names, oldest first.
+    """
+    oldest_kept = add_months(today, 1 - retention_months)
+    expired = [
+        (month, name)
+        for name in names
+        if (month := partition_month(name)) is not None and month < oldest_kept
+    ]
+    return [name for _, name in sorted(expired)]
+
+
+async def _database_today(conn: AsyncConnection) -> date:
+    # Partition bounds compare against `timestamp`, which defaults to the
+    # server's clock; use it rather than ours.
+    async with conn.cursor() as cur:
+        await cur.execute("SELECT LOCALTIMESTAMP::date;")
+        row = await cur.fetchone()
+    return row[0]
+
+
+async def is_partitioned(conn: AsyncConnection) -> bool | None:
+    """
+    Whether `messages` is a partitioned table.
+
+    Returns:
+        None if the table does not exist yet.
+    """
+    async with conn.cursor() as cur:
+        await cur.execute(
+            "SELECT relkind FROM pg_class "
+            "WHERE oid = to_regclass('messages');"
+        )
+        row = await cur.fetchone()
+    if row is None:
+        return None
+    return row[0] == "p"
+
+
+async def _create_partition(conn: AsyncConnection, month: date) -> None:
+    query = sql.SQL(
+        "CREATE TABLE IF NOT EXISTS {name} PARTITION OF messages "
+        "FOR VALUES FROM ({start}) TO ({end});"
+    ).format(
+        name=sql.Identifier(partition_name(month)),
+        start=sql.Literal(month),
+        end=sql.Literal(add_months(month, 1)),
+    )
+    async with conn.cursor() as cur:
+        await cur.execute(query)
+
+
+async def list_partitions(conn: AsyncConnection) -> list[str]:
+    """
+    Names of the partitions currently attached to `messages`.
+
+    Args:
+        conn: Asynchronous database connection.
+    """
+    async with conn.cursor() as cur:
+        await cur.execute(
+            "SELECT c.relname FROM pg_inherits i "
+            "JOIN pg_class c ON c.oid = i.inhrelid "
+            "WHERE i.inhparent = 'messages'::regclass "
+            "ORDER BY c.relname;"
+        )
+        rows = await cur.fetchall()
+    return [row[0] for row in rows]
+
+
+async def migrate_unpartitioned_messages(conn: AsyncConnection) -> None:
+    """
+    Convert a plain `messages` table from an earlier release into the
+    partitioned layout, keeping message ids.
+
+    The caller must have created the partitioned table as `messages` after
+    renaming the old one to `messages_unpartitioned`.
+    """
+    async with conn.cursor() as cur:
+        await cur.execute(
+            "SELECT date_trunc('month', MIN(timestamp))::date "
+            "FROM messages_unpartitioned;"
+        )
+        (first_month,) = await cur.fetchone()
+
+    if first_month is not None:
+        month, today = first_month, await _database_today(conn)
+        while month <= today:
+            await _create_partition(conn, month)
+            month = add_months(month, 1)
+
+    async with conn.cursor() as cur:
+        await cur.execute(
+            "INSERT INTO messages (id, conversation_id, sender, timestamp, content) "
+            "SELECT id, conversation_id, sender, "
+            "COALESCE(timestamp, CURRENT_TIMESTAMP), content "
+            "FROM messages_unpartitioned;"
+        )
+        logger.info(f"Moved {cur.rowcount} messages into the partitioned table")
+        await cur.execute(
+            "SELECT setval(pg_get_serial_sequence('messages', 'id'), "
+            "COALESCE(MAX(id), 0) + 1, false) FROM messages;"
+        )
+        await cur.execute("DROP TABLE messages_unpartitioned;")
+
+
+async def ensure_partitions(pool: AsyncConnectionPool, months_ahead: int) -> None:
+    """
+    Create the partitions for the current month and the next `months_ahead`
+    months, so inserts never miss a partition.
+
+    Args:
+        pool: Connection pool to the database.
+        months_ahead: Number of future months to prepare.
+    """
+    async with pool.connection() as conn:
+        today = await _database_today(conn)
+        for offset in range(months_ahead + 1):
+            await _create_partition(conn, add_months(today, offset))
+    logger.info(
+        f"Partitions of `messages` ready through "
+        f"{partition_name(add_months(today, months_ahead))}"
+    )
+
+
+async def _archive_to_file(conn: AsyncConnection, name: str, path: Path) -> int:
+    copy = sql.SQL("COPY {name} TO STDOUT WITH (FORMAT csv, HEADER true);").format(
+        name=sql.Identifier(name)
+    )
+    partial = path.with_suffix(path.suffix + ".part")
+    archive = await asyncio.to_thread(gzip.open, partial, "wb")
+    written = 0
+    try:
+        buffer = bytearray()
+        async with conn.cursor() as cur:
+            async with cur.copy(copy) as stream:
+                async for block in stream:
+                    buffer += block
+                    if len(buffer) >= ARCHIVE_FLUSH_BYTES:
+                        written += await asyncio.to_thread(archive.write, bytes(buffer))
+                        buffer.clear()
+        written += await asyncio.to_thread(archive.write, bytes(buffer))
+    finally:
+        await asyncio.to_thread(archive.close)
+    await asyncio.to_thread(partial.replace, path)
+    return written
+
+
+async def _archive_expired(
+    conn: AsyncConnection, directory: Path, retention_months: int
+) -> list[Path]:
+    today = await _database_today(conn)
+    expired = expired_partitions(await list_partitions(conn), today, retention_months)
+    await conn.commit()
+
+    archived = []
+    for name in expired:
+        path = directory / f"{name}.csv.gz"
+        written = await _archive_to_file(conn, name, path)
+        await conn.commit()
+        async with conn.cursor() as cur:
+            await cur.execute(
+                sql.SQL("ALTER TABLE messages DETACH PARTITION {name};").format(
+                    name=sql.Identifier(name)
+                )
+            )
+            await cur.execute(
+                sql.SQL("DROP TABLE {name};").format(name=sql.Identifier(name))
+            )
+        await conn.commit()
+        logger.info(f"Archived partition {name} ({written} bytes) to {path}")
+        archived.append(path)
+    return archived
+
+
+async def apply_retention(
+    pool: AsyncConnectionPool,
+    retention_months: int,
+    archive_dir: str,
+) -> list[Path]:
+    """
+    Archive and drop partitions older than the retention window.
+
+    Each expired partition is copied to `<archive_dir>/<partition>.csv.gz`
+    first, then detached and dropped in one transaction. Old months receive
+    no new messages, so nothing is lost between the two steps. Workers
+    serialise on an advisory lock; a worker that finds it taken skips the run.
+
+    Args:
+        pool: Connection pool to the database.
+        retention_months: Months kept online, including the current one.
+            Zero or less disables retention.
+        archive_dir: Directory for the compressed archives. Retention does
+            not run without one.
+
+    Returns:
+        Paths of the archives written.
+    """
+    if retention_months <= 0:
+        return []
+    if not archive_dir:
+        logger.warning(
+            "Retention of `messages` is set but no archive directory is; "
+            "skipping it"
+        )
+        return []
+
+    directory = Path(archive_dir)
+    await asyncio.to_thread(directory.mkdir, parents=True, exist_ok=True)
+
+    async with pool.connection() as conn:
+        async with conn.cursor() as cur:
+            await cur.execute("SELECT pg_try_advisory_lock(%s);", (RETENTION_LOCK_ID,))
+            (locked,) = await cur.fetchone()
+        await conn.commit()
+        if not locked:
+            return []
+        try:
+            return await _archive_expired(conn, directory, retention_months)
+        finally:
+            await conn.rollback()
+            async with conn.cursor() as cur:
+                await cur.execute("SELECT pg_advisory_unlock(%s);", (RETENTION_LOCK_ID,))
+            await conn.commit()
+
+
+async def maintain_partitions(
+    pool: AsyncConnectionPool,
+    months_ahead: int,
+    retention_months: int,
+    archive_dir: str,
+    interval_seconds: float,
+) -> None:
+    """
+    Periodically prepare upcoming partitions and apply retention, so a
+    long-running server keeps working across month boundaries.
+    """
+    while True:
+        try:
+            await ensure_partitions(pool, months_ahead)
+            await apply_retention(pool, retention_months, archive_dir)
+        except Exception as e:
+            logger.error(f"❌ ERROR maintaining `messages` partitions: {e}")
+        await asyncio.sleep(interval_seconds)
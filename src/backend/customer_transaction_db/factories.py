@@ -0,0 +1,43 @@
+import aiosqlite
+from psycopg_pool import AsyncConnectionPool
+
+from config.settings import Settings
+from customer_transaction_db.postgres import PostgresBankingRepository
+from customer_transaction_db.repository import (
+    BankingRepository,
+    SqliteBankingRepository,
+)
+from customer_transaction_db.singleflight import SingleFlight, SingleFlightRepository
+
+
+def create_banking_repository(
+    settings: Settings,
+    sqlite_db: aiosqlite.Connection,
+    pool: AsyncConnectionPool,
+    single_flight: SingleFlight | None = None,
+) -> BankingRepository:
+    """
+    Creates the repository the agent tools read banking data from.
+
+    Args:
+        settings: Application settings.
+        sqlite_db: Connection to the customer transaction database.
+        pool: Connection pool to the Postgres server.
+        single_flight: Coalescer of identical concurrent reads; used when
+            `settings.banking.single_flight` is set.
+
+    Returns:
+        Repository on the configured backend.
+    """
+    repository: BankingRepository
+    if settings.banking.backend == "postgres":
+        repository = PostgresBankingRepository(
+            pool=pool,
+            schema=settings.banking.schema_name,
+            prepare=settings.banking.prepare_statements,
+        )
+    else:
+        repository = SqliteBankingRepository(sqlite_db=sqlite_db)
+    if single_flight is not None and settings.banking.single_flight:
+        return SingleFlightRepository(repository, single_flight)
+    return repository
@@ -0,0 +1,528 @@
+import argparse
+import asyncio
+import csv
+import json
+import math
+import time
+from dataclasses import dataclass, field
+from datetime import date
+from pathlib import Path
+from typing import Any, AsyncIterable, AsyncIterator, Mapping
+
+import aiosqlite
+from loguru import logger
+
+from customer_transaction_db.schema import configure_connection, ensure_schema
+from session_state.bus import TOOL_RESULTS_CHANNEL, EventBus
+
+FORMATS = ("ndjson", "csv")
+FIELDS = (
+    "external_id", "account_number", "txn_date", "amount", "txn_type",
+    "merchant_name", "category",
+)
+
+# Lines handed to the parser thread at a time.
+PARSE_LINES = 2_000
+# Above this many customers in one batch, every cache is invalidated at once.
+MAX_INVALIDATIONS = 100
+# Rejection messages kept in a report.
+MAX_ERRORS = 20
+
+_INSERT = """
+    INSERT INTO transactions (
+        account_id, txn_date, amount, txn_type,
+        merchant_name, category, external_id
+    ) VALUES (?, ?, ?, ?, ?, ?, ?)
+    ON CONFLICT (external_id) DO NOTHING;
+"""
+
+
+class IngestError(ValueError):
+    """Raised for a feed that cannot be read at all."""
+
+
+class InvalidRecord(ValueError):
+    """A feed record that fails validation; the rest of the feed continues."""
+
+
+@dataclass(frozen=True, slots=True)
+class TransactionRecord:
+    external_id: str
+    account_number: str
+    txn_date: str
+    amount: float  # negative for debits
+    txn_type: str
+    merchant_name: str | None
+    category: str | None
+
+
+def _text(fields: Mapping[str, Any], name: str) -> str | None:
+    value = fields.get(name)
+    if value is None:
+        return None
+    value = str(value).strip()
+    return value or None
+
+
+def parse_record(fields: Mapping[str, Any]) -> TransactionRecord:
+    """
+    Validate one feed record.
+
+    `amount` may be signed, or unsigned with `txn_type` "debit" or "credit";
+    when both are given the type wins.
+
+    Args:
+        fields: Record keyed by FIELDS; unknown keys are ignored.
+
+    Raises:
+        InvalidRecord: If a field is missing or malformed.
+    """
+    external_id = _text(fields, "external_id")
+    account_number = _text(fields, "account_number")
+    if external_id is None or account_number is None:
+        raise InvalidRecord("external_id and account_number are required")
+
+    try:
+        txn_date = date.fromisoformat(_text(fields, "txn_date") or "").isoformat()
+    except ValueError:
+        raise InvalidRecord(f"{external_id}: txn_date must be YYYY-MM-DD") from None
+
+    try:
+        amount = float(fields.get("amount", ""))
+    except (TypeError, ValueError):
+        raise InvalidRecord(f"{external_id}: amount is not a number") from None
+    if not math.isfinite(amount) or amount == 0:
+        raise InvalidRecord(f"{external_id}: amount must be finite and non-zero")
+
+    txn_type = (_text(fields, "txn_type") or "").lower()
+    if txn_type == "debit":
+        amount = -abs(amount)
+    elif txn_type == "credit":
+        amount = abs(amount)
+    elif txn_type:
+        raise InvalidRecord(f"{external_id}: txn_type must be debit or credit")
+    else:
+        txn_type = "debit" if amount < 0 else "credit"
+
+    return TransactionRecord(
+        external_id=external_id,
+        account_number=account_number,
+        txn_date=txn_date,
+        amount=amount,
+        txn_type=txn_type,
+        merchant_name=_text(fields, "merchant_name"),
+        category=_text(fields, "category"),
+    )
+
+
+class RecordParser:
+    """
+    Incremental parser of NDJSON or CSV lines into records.
+
+    Stateful across `feed` calls: it remembers the CSV header, the line
+    number, and a CSV record whose quoted field continues on the next line.
+
+    Args:
+        fmt: One of FORMATS.
+    """
+
+    def __init__(self, fmt: str) -> None:
+        if fmt not in FORMATS:
+            raise IngestError(f"Unknown format {fmt!r}; expected one of {FORMATS}")
+        self.fmt = fmt
+        self.line_number = 0
+        self._header: list[str] | None = None
+        self._pending: list[str] = []
+
+    def feed(self, lines: list[str]) -> list[TransactionRecord | InvalidRecord]:
+        results: list[TransactionRecord | InvalidRecord] = []
+        for line in lines:
+            self.line_number += 1
+            if self.fmt == "csv":
+                # A record is complete once its quotes balance; escaped
+                # quotes come in pairs and do not change the parity.
+                self._pending.append(line)
+                record = "\n".join(self._pending)
+                if record.count('"') % 2:
+                    continue
+                self._pending = []
+                line = record
+            if not line.strip():
+                continue
+            if self.fmt == "csv" and self._header is None:
+                self._read_header(line)
+                continue
+            try:
+                results.append(parse_record(self._fields(line)))
+            except InvalidRecord as e:
+                results.append(InvalidRecord(f"line {self.line_number}: {e}"))
+        return results
+
+    def close(self) -> list[InvalidRecord]:
+        """Report a CSV record left open at the end of the feed."""
+        if self._pending:
+            self._pending = []
+            return [InvalidRecord(f"line {self.line_number}: unterminated quote")]
+        return []
+
+    def _fields(self, line: str) -> Mapping[str, Any]:
+        if self.fmt == "ndjson":
+            try:
+                fields = json.loads(line)
+            except json.JSONDecodeError:
+                raise InvalidRecord("not valid JSON") from None
+            if not isinstance(fields, dict):
+                raise InvalidRecord("expected a JSON object")
+            return fields
+
+        header = self._header
+        assert header is not None, "the CSV header is read first"
+        values = next(csv.reader([line]))
+        if len(values) != len(header):
+            raise InvalidRecord(f"expected {len(header)} fields, got {len(values)}")
+        return dict(zip(header, values))
+
+    def _read_header(self, line: str) -> None:
+        self._header = [name.strip() for name in next(csv.reader([line]))]
+        missing = {"external_id", "account_number", "txn_date", "amount"} - set(self._header)
+        if missing:
+            raise IngestError(f"CSV header lacks {sorted(missing)}")
+
+
+async def parse_stream(
+    chunks: AsyncIterable[bytes], fmt: str
+) -> AsyncIterator[TransactionRecord | InvalidRecord]:
+    """
+    Parse a feed arriving in arbitrary byte chunks.
+
+    Lines are parsed in a worker thread, PARSE_LINES at a time, so that a
+    large feed does not hold up the event loop.
+
+    Args:
+        chunks: UTF-8 feed content.
+        fmt: One of FORMATS.
+
+    Yields:
+        Valid records, and InvalidRecord for lines that were rejected.
+    """
+    parser = RecordParser(fmt)
+    tail = b""
+    lines: list[str] = []
+    async for chunk in chunks:
+        parts = (tail + chunk).split(b"\n")
+        tail = parts.pop()
+        lines.extend(part.decode("utf-8").rstrip("\r") for part in parts)
+        if len(lines) >= PARSE_LINES:
+            for item in await asyncio.to_thread(parser.feed, lines):
+                yield item
+            lines = []
+    if tail:
+        lines.append(tail.decode("utf-8").rstrip("\r"))
+    for item in await asyncio.to_thread(parser.feed, lines):
+        yield item
+    for item in parser.close():
+        yield item
+
+
+@dataclass
+class IngestReport:
+    received: int = 0
+    inserted: int = 0
+    duplicates: int = 0
+    rejected: int = 0
+    errors: list[str] = field(default_factory=list)
+
+    def reject(self, reason: str, count: int = 1) -> None:
+        self.rejected += count
+        if len(self.errors) < MAX_ERRORS:
+            self.errors.append(reason)
+
+    def merge(self, other: "IngestReport") -> None:
+        self.inserted += other.inserted
+        self.duplicates += other.duplicates
+        self.rejected += other.rejected
+        self.errors.extend(other.errors[: MAX_ERRORS - len(self.errors)])
+
+    def as_dict(self) -> dict[str, Any]:
+        return {
+            "received": self.received,
+            "inserted": self.inserted,
+            "duplicates": self.duplicates,
+            "rejected": self.rejected,
+            "errors": self.errors,
+        }
+
+
+@dataclass
+class WriterStats:
+    batches: int = 0
+    inserted: int = 0
+    duplicates: int = 0
+    rejected: int = 0
+    failed_batches: int = 0
+    write_ms_total: float = 0.0
+    max_write_ms: float = 0.0
+
+    def snapshot(self) -> dict[str, float]:
+        return {
+            "batches": self.batches,
+            "inserted": self.inserted,
+            "duplicates": self.duplicates,
+            "rejected": self.rejected,
+            "failed_batches": self.failed_batches,
+            "avg_write_ms": round(self.write_ms_total / self.batches, 1) if self.batches else 0.0,
+            "max_write_ms": round(self.max_write_ms, 1),
+        }
+
+
+class TransactionWriter:
+    """
+    The only writer of ingested transactions: batches from every feed are
+    queued to one task that commits each batch as a single transaction on
+    a dedicated WAL-mode connection.
+
+    Readers keep using their own connections and see a batch once it has
+    committed. The balance view and the indexes are maintained by SQLite
+    inside that transaction; caches of the affected customers are then
+    invalidated through TOOL_RESULTS_CHANNEL.
+
+    Args:
+        db_path: Customer transaction database.
+        bus: Bus announcing the changed customers.
+        batch_rows: Records per transaction.
+        max_pending_batches: Queued batches before producers wait.
+    """
+
+    def __init__(
+        self,
+        db_path: str,
+        bus: EventBus,
+        batch_rows: int = 10_000,
+        max_pending_batches: int = 4,
+    ) -> None:
+        self.db_path = db_path
+        self.bus = bus
+        self.batch_rows = batch_rows
+        self.stats = WriterStats()
+        self._queue: asyncio.Queue[
+            tuple[list[TransactionRecord], asyncio.Future[IngestReport]]
+        ] = asyncio.Queue(maxsize=max_pending_batches)
+        self._db: aiosqlite.Connection | None = None
+        self._writer: asyncio.Task | None = None
+        # account_number -> (account_id, customer_name)
+        self._accounts: dict[str, tuple[int, str]] = {}
+
+    async def start(self) -> "TransactionWriter":
+        # Autocommit mode, so that batches control their own transactions.
+        self._db = await aiosqlite.connect(self.db_path, isolation_level=None)
+        await configure_connection(self._db)
+        await ensure_schema(self._db)
+        self._writer = asyncio.create_task(self._write_loop())
+        return self
+
+    async def aclose(self) -> None:
+        """Write what is queued and close the connection."""
+        if self._writer is not None:
+            await self._queue.join()
+            self._writer.cancel()
+            try:
+                await self._writer
+            except asyncio.CancelledError:
+                pass
+        if self._db is not None:
+            await self._db.close()
+
+    async def submit(
+        self, records: list[TransactionRecord]
+    ) -> asyncio.Future[IngestReport]:
+        """
+        Queue a batch, waiting while the queue is full.
+
+        Returns:
+            Future resolved with the batch's report once it has committed.
+        """
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((records, future))
+        return future
+
+    async def ingest(
+        self, chunks: AsyncIterable[bytes], fmt: str
+    ) -> IngestReport:
+        """
+        Parse, validate and write a whole feed.
+
+        Parsing continues while earlier batches are being written; a batch
+        that fails is counted as rejected and the feed continues.
+
+        Args:
+            chunks: UTF-8 feed content.
+            fmt: One of FORMATS.
+        """
+        report = IngestReport()
+        pending: list[tuple[int, asyncio.Future[IngestReport]]] = []
+        batch: list[TransactionRecord] = []
+        async for item in parse_stream(chunks, fmt):
+            report.received += 1
+            if isinstance(item, InvalidRecord):
+                report.reject(str(item))
+                continue
+            batch.append(item)
+            if len(batch) >= self.batch_rows:
+                pending.append((len(batch), await self.submit(batch)))
+                batch = []
+        if batch:
+            pending.append((len(batch), await self.submit(batch)))
+
+        for size, future in pending:
+            try:
+                report.merge(await future)
+            except Exception as e:
+                report.reject(f"batch of {size} records failed: {e}", count=size)
+        return report
+
+    async def _write_loop(self) -> None:
+        while True:
+            records, future = await self._queue.get()
+            try:
+                result = await self._write_batch(records)
+            except Exception as e:
+                logger.error(f"❌ ERROR in TransactionWriter: {e}")
+                self.stats.failed_batches += 1
+                if not future.done():
+                    future.set_exception(e)
+            else:
+                if not future.done():
+                    future.set_result(result)
+            finally:
+                self._queue.task_done()
+
+    async def _resolve_accounts(self, numbers: set[str]) -> None:
+        db = self._db
+        assert db is not None, "the writer has been started"
+        missing = list(numbers - self._accounts.keys())
+        # Stay under SQLite's bound parameter limit.
+        for start in range(0, len(missing), 500):
+            chunk = missing[start:start + 500]
+            cursor = await db.execute(
+                f"""
+                SELECT a.account_number, a.id, c.name
+                FROM accounts a
+                JOIN customers c ON c.id = a.customer_id
+                WHERE a.account_number IN ({", ".join("?" * len(chunk))});
+                """,
+                chunk,
+            )
+            for number, account_id, customer_name in await cursor.fetchall():
+                self._accounts[number] = (account_id, customer_name)
+            await cursor.close()
+
+    async def _write_batch(self, records: list[TransactionRecord]) -> IngestReport:
+        db = self._db
+        assert db is not None, "the writer has been started"
+        started = time.perf_counter()
+        report = IngestReport()
+        await self._resolve_accounts({record.account_number for record in records})
+
+        rows = []
+        customers: set[str] = set()
+        for record in records:
+            account = self._accounts.get(record.account_number)
+            if account is None:
+                report.reject(f"{record.external_id}: unknown account {record.account_number}")
+                continue
+            rows.append((
+                account[0], record.txn_date, record.amount, record.txn_type,
+                record.merchant_name, record.category, record.external_id,
+            ))
+            customers.add(account[1])
+
+        if rows:
+            await db.execute("BEGIN IMMEDIATE;")
+            try:
+                # rowcount leaves out the search index rows the triggers write.
+                cursor = await db.executemany(_INSERT, rows)
+                report.inserted = cursor.rowcount
+                await cursor.close()
+                await db.execute("COMMIT;")
+            except BaseException:
+                await db.execute("ROLLBACK;")
+                raise
+        report.duplicates = len(rows) - report.inserted
+
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        self.stats.batches += 1
+        self.stats.inserted += report.inserted
+        self.stats.duplicates += report.duplicates
+        self.stats.rejected += report.rejected
+        self.stats.write_ms_total += elapsed_ms
+        self.stats.max_write_ms = max(self.stats.max_write_ms, elapsed_ms)
+        logger.debug(
+            f"[ingest] batch of {len(records)}: +{report.inserted} rows, "
+            f"{report.duplicates} duplicates, {report.rejected} rejected in {elapsed_ms:.0f} ms"
+        )
+
+        if report.inserted:
+            await self._invalidate(customers)
+        return report
+
+    async def _invalidate(self, customers: set[str]) -> None:
+        try:
+            if len(customers) > MAX_INVALIDATIONS:
+                await self.bus.publish(TOOL_RESULTS_CHANNEL, {"source": "ingest"})
+                return
+            for customer_name in customers:
+                await self.bus.publish(
+                    TOOL_RESULTS_CHANNEL,
+                    {"customer_name": customer_name, "source": "ingest"},
+                )
+        except Exception as e:
+            # The rows are committed; caches still expire on their own.
+            logger.error(f"❌ ERROR in TransactionWriter invalidation: {e}")
+
+
+async def read_file(path: Path, chunk_bytes: int = 1024 * 1024) -> AsyncIterator[bytes]:
+    with open(path, "rb") as f:
+        while chunk := await asyncio.to_thread(f.read, chunk_bytes):
+            yield chunk
+
+
+def _parse_args(argv: list[str] | None = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Ingest an NDJSON or CSV transaction feed."
+    )
+    parser.add_argument("feed", type=Path, help="Feed file.")
+    parser.add_argument(
+        "--format", choices=FORMATS,
+        help="Feed format (default: from the file extension).",
+    )
+    parser.add_argument("--db", default="customer_transaction_db/transactions.db")
+    parser.add_argument("--batch-rows", type=int, default=10_000)
+    return parser.parse_args(argv)
+
+
+async def main(argv: list[str] | None = None) -> None:
+    from config.settings import get_settings
+    from convo_history_db.connection import create_db_connection_pool
+    from session_state.factories import create_event_bus
+
+    args = _parse_args(argv)
+    fmt = args.format or ("csv" if args.feed.suffix.lower() == ".csv" else "ndjson")
+
+    # Running servers learn about the new rows only through a shared bus.
+    settings = get_settings()
+    pool = create_db_connection_pool(settings=settings)
+    if settings.session.bus == "postgres":
+        await pool.open()
+    bus = create_event_bus(settings=settings, pool=pool)
+
+    writer = await TransactionWriter(args.db, bus, batch_rows=args.batch_rows).start()
+    try:
+        report = await writer.ingest(read_file(args.feed), fmt)
+    finally:
+        await writer.aclose()
+        await pool.close()
+    print(json.dumps(report.as_dict(), indent=2))
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,439 @@
+import argparse
+import asyncio
+import re
+from typing import Any, Sequence
+
+import aiosqlite
+from loguru import logger
+from psycopg.rows import dict_row
+from psycopg_pool import AsyncConnectionPool
+
+from customer_transaction_db.repository import Row
+from customer_transaction_db.search import search_terms, tsquery
+
+# Tables are created in a schema of their own so that they cannot collide
+# with the conversation history tables on the same server.
+DEFAULT_SCHEMA = "banking"
+
+_SCHEMA_NAME = re.compile(r"^[a-z_][a-z0-9_]*$")
+
+# Ordered so that every table exists before the tables referencing it.
+TABLES = ("customers", "accounts", "transactions", "bank_schemes")
+
+
+def _schema_statements(schema: str) -> list[str]:
+    return [
+        f"CREATE SCHEMA IF NOT EXISTS {schema};",
+        f"""
+        CREATE TABLE IF NOT EXISTS {schema}.customers (
+            id BIGINT GENERATED BY DEFAULT AS IDENTITY PRIMARY KEY,
+            name TEXT NOT NULL UNIQUE
+        );
+        """,
+        f"""
+        CREATE INDEX IF NOT EXISTS customers_lower_name_idx
+        ON {schema}.customers (LOWER(name));
+        """,
+        f"""
+        CREATE TABLE IF NOT EXISTS {schema}.accounts (
+            id BIGINT GENERATED BY DEFAULT AS IDENTITY PRIMARY KEY,
+            customer_id BIGINT NOT NULL REFERENCES {schema}.customers (id) ON DELETE CASCADE,
+            bank_name TEXT NOT NULL,
+            account_number TEXT NOT NULL UNIQUE,
+            account_type TEXT NOT NULL DEFAULT 'savings',
+            opening_balance DOUBLE PRECISION NOT NULL DEFAULT 0.0,
+            currency TEXT NOT NULL DEFAULT 'INR',
+            created_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP::text
+        );
+        """,
+        f"""
+        CREATE INDEX IF NOT EXISTS accounts_customer_idx
+        ON {schema}.accounts (customer_id);
+        """,
+        f"""
+        CREATE TABLE IF NOT EXISTS {schema}.transactions (
+            id BIGINT GENERATED BY DEFAULT AS IDENTITY PRIMARY KEY,
+            account_id BIGINT NOT NULL REFERENCES {schema}.accounts (id) ON DELETE CASCADE,
+            txn_date DATE NOT NULL,
+            amount DOUBLE PRECISION NOT NULL,
+            txn_type TEXT NOT NULL,
+            merchant_name TEXT,
+            category TEXT,
+            external_id TEXT UNIQUE
+        );
+        """,
+        f"""
+        CREATE INDEX IF NOT EXISTS transactions_account_date_idx
+        ON {schema}.transactions (account_id, txn_date DESC, id DESC);
+        """,
+        # Generated search vectors stay in step with every write; merchant
+        # and scheme names weigh more than categories and descriptions.
+        f"""
+        ALTER TABLE {schema}.transactions
+        ADD COLUMN IF NOT EXISTS search tsvector GENERATED ALWAYS AS (
+            setweight(to_tsvector('simple', COALESCE(merchant_name, '')), 'A')
+            || setweight(to_tsvector('simple', COALESCE(category, '')), 'B')
+        ) STORED;
+        """,
+        f"""
+        CREATE INDEX IF NOT EXISTS transactions_search_idx
+        ON {schema}.transactions USING GIN (search);
+        """,
+        f"""
+        CREATE TABLE IF NOT EXISTS {schema}.bank_schemes (
+            id BIGINT GENERATED BY DEFAULT AS IDENTITY PRIMARY KEY,
+            bank_name TEXT NOT NULL,
+            scheme_name TEXT NOT NULL,
+            description TEXT,
+            interest_rate DOUBLE PRECISION,
+            min_amount DOUBLE PRECISION,
+            currency TEXT NOT NULL DEFAULT 'INR'
+        );
+        """,
+        f"""
+        ALTER TABLE {schema}.bank_schemes
+        ADD COLUMN IF NOT EXISTS search tsvector GENERATED ALWAYS AS (
+            setweight(to_tsvector('simple', scheme_name), 'A')
+            || setweight(to_tsvector('simple', COALESCE(description, '')), 'B')
+        ) STORED;
+        """,
+        f"""
+        CREATE INDEX IF NOT EXISTS bank_schemes_search_idx
+        ON {schema}.bank_schemes USING GIN (search);
+        """,
+        f"""
+        CREATE OR REPLACE VIEW {schema}.account_balances AS
+        SELECT
+            a.id AS account_id,
+            c.name AS customer_name,
+            a.bank_name,
+            a.account_number,
+            a.currency,
+            a.opening_balance + COALESCE(SUM(t.amount), 0) AS current_balance
+        FROM {schema}.accounts a
+        JOIN {schema}.customers c ON c.id = a.customer_id
+        LEFT JOIN {schema}.transactions t ON t.account_id = a.id
+        GROUP BY a.id, c.name;
+        """,
+    ]
+
+
+class PostgresBankingRepository:
+    """
+    Repository over banking tables on Postgres, read through the shared
+    async connection pool so that a turn's queries can run concurrently.
+
+    Statements are prepared on first use on each pooled connection
+    (`prepare=True`) instead of after psycopg's default five executions.
+    Disable `prepare` behind a transaction-mode connection pooler, which
+    cannot keep prepared statements per client.
+
+    Args:
+        pool: Connection pool to the Postgres server.
+        schema: Schema holding the banking tables.
+        prepare: Whether to prepare statements server-side.
+    """
+
+    def __init__(
+        self,
+        pool: AsyncConnectionPool,
+        schema: str = DEFAULT_SCHEMA,
+        prepare: bool = True,
+    ) -> None:
+        if not _SCHEMA_NAME.match(schema):
+            raise ValueError(f"Invalid schema name {schema!r}")
+        self.pool = pool
+        self.schema = schema
+        self.prepare = prepare
+        s = schema
+        self._balance = f"""
+            SELECT account_number, bank_name, currency, current_balance
+            FROM {s}.account_balances
+            WHERE LOWER(customer_name) = LOWER(%s)
+            LIMIT 1;
+        """
+        self._recent = f"""
+            SELECT t.txn_date::text AS txn_date, t.amount, t.txn_type,
+                   t.merchant_name, t.category
+            FROM {s}.transactions t
+            JOIN {s}.accounts a ON a.id = t.account_id
+            JOIN {s}.customers c ON c.id = a.customer_id
+            WHERE LOWER(c.name) = LOWER(%s)
+            ORDER BY t.txn_date DESC, t.id DESC
+            LIMIT %s;
+        """
+        self._by_category = f"""
+            SELECT t.category, SUM(ABS(t.amount)) AS total_spent
+            FROM {s}.transactions t
+            JOIN {s}.accounts a ON a.id = t.account_id
+            JOIN {s}.customers c ON c.id = a.customer_id
+            WHERE LOWER(c.name) = LOWER(%s)
+              AND t.amount < 0
+              AND t.txn_date >= %s::date
+            GROUP BY t.category;
+        """
+        self._average_debit = f"""
+            SELECT AVG(ABS(t.amount)) AS average
+            FROM {s}.transactions t
+            JOIN {s}.accounts a ON a.id = t.account_id
+            JOIN {s}.customers c ON c.id = a.customer_id
+            WHERE LOWER(c.name) = LOWER(%s)
+              AND t.amount < 0
+              AND t.txn_date >= %s::date;
+        """
+        self._debits_above = f"""
+            SELECT t.txn_date::text AS txn_date, t.amount,
+                   t.merchant_name, t.category
+            FROM {s}.transactions t
+            JOIN {s}.accounts a ON a.id = t.account_id
+            JOIN {s}.customers c ON c.id = a.customer_id
+            WHERE LOWER(c.name) = LOWER(%s)
+              AND t.amount < 0
+              AND ABS(t.amount) > %s
+              AND t.txn_date >= %s::date;
+        """
+        self._schemes = f"""
+            SELECT scheme_name, description, interest_rate, min_amount
+            FROM {s}.bank_schemes
+            WHERE LOWER(bank_name) = LOWER(%s);
+        """
+        self._after = f"""
+            SELECT t.id, t.txn_date::text AS txn_date, t.amount,
+                   t.merchant_name, t.category
+            FROM {s}.transactions t
+            JOIN {s}.accounts a ON a.id = t.account_id
+            JOIN {s}.customers c ON c.id = a.customer_id
+            WHERE LOWER(c.name) = LOWER(%s)
+              AND t.id > %s
+            ORDER BY t.id;
+        """
+        matching = f"""
+            FROM {s}.transactions t
+            CROSS JOIN to_tsquery('simple', %s) AS q
+            JOIN {s}.accounts a ON a.id = t.account_id
+            JOIN {s}.customers c ON c.id = a.customer_id
+            WHERE t.search @@ q
+              AND LOWER(c.name) = LOWER(%s)
+              AND t.txn_date >= COALESCE(%s::date, '-infinity'::date)
+        """
+        self._search = f"""
+            SELECT t.id, t.txn_date::text AS txn_date, t.amount, t.txn_type,
+                   t.merchant_name, t.category
+            {matching}
+            ORDER BY ts_rank(t.search, q) DESC, t.txn_date DESC, t.id DESC
+            LIMIT %s;
+        """
+        self._merchant_spending = f"""
+            SELECT t.merchant_name, t.category,
+                   COUNT(*) AS transactions,
+                   SUM(CASE WHEN t.amount < 0 THEN -t.amount ELSE 0 END) AS spent,
+                   SUM(CASE WHEN t.amount > 0 THEN t.amount ELSE 0 END) AS received,
+                   MIN(t.txn_date)::text AS first_date,
+                   MAX(t.txn_date)::text AS last_date
+            {matching}
+            GROUP BY t.merchant_name, t.category
+            ORDER BY MAX(ts_rank(t.search, q)) DESC, spent DESC;
+        """
+        self._search_schemes = f"""
+            SELECT s.bank_name, s.scheme_name, s.description,
+                   s.interest_rate, s.min_amount
+            FROM {s}.bank_schemes s
+            CROSS JOIN to_tsquery('simple', %s) AS q
+            WHERE s.search @@ q
+              AND (%s::text IS NULL OR LOWER(s.bank_name) = LOWER(%s))
+            ORDER BY ts_rank(s.search, q) DESC
+            LIMIT %s;
+        """
+
+    async def _fetch(self, query: str, params: Sequence[Any]) -> Sequence[Row]:
+        async with self.pool.connection() as conn:
+            async with conn.cursor(row_factory=dict_row) as cursor:
+                await cursor.execute(query, params, prepare=self.prepare)
+                return await cursor.fetchall()
+
+    async def open(self) -> None:
+        async with self.pool.connection() as conn:
+            for statement in _schema_statements(self.schema):
+                await conn.execute(statement)
+
+    async def ping(self) -> None:
+        await self._fetch("SELECT 1;", ())
+
+    async def account_balance(self, customer_name: str) -> Row | None:
+        rows = await self._fetch(self._balance, (customer_name,))
+        return rows[0] if rows else None
+
+    async def recent_transactions(
+        self, customer_name: str, limit: int
+    ) -> Sequence[Row]:
+        return await self._fetch(self._recent, (customer_name, limit))
+
+    async def spending_by_category(
+        self, customer_name: str, since: str
+    ) -> dict[str, float]:
+        rows = await self._fetch(self._by_category, (customer_name, since))
+        return {row["category"]: float(row["total_spent"]) for row in rows}
+
+    async def average_debit(self, customer_name: str, since: str) -> float:
+        rows = await self._fetch(self._average_debit, (customer_name, since))
+        return float(rows[0]["average"]) if rows and rows[0]["average"] else 0
+
+    async def debits_above(
+        self, customer_name: str, threshold: float, since: str
+    ) -> Sequence[Row]:
+        return await self._fetch(
+            self._debits_above, (customer_name, threshold, since)
+        )
+
+    async def bank_schemes(self, bank_name: str) -> Sequence[Row]:
+        return await self._fetch(self._schemes, (bank_name,))
+
+    async def transactions_after(
+        self, customer_name: str, after_id: int
+    ) -> Sequence[Row]:
+        return await self._fetch(self._after, (customer_name, after_id))
+
+    async def search_transactions(
+        self, customer_name: str, text: str, limit: int, since: str | None = None
+    ) -> Sequence[Row]:
+        terms = search_terms(text)
+        if not terms:
+            return []
+        return await self._fetch(
+            self._search, (tsquery(terms), customer_name, since, limit)
+        )
+
+    async def merchant_spending(
+        self, customer_name: str, text: str, since: str | None = None
+    ) -> Sequence[Row]:
+        terms = search_terms(text)
+        if not terms:
+            return []
+        return await self._fetch(
+            self._merchant_spending, (tsquery(terms), customer_name, since)
+        )
+
+    async def search_bank_schemes(
+        self, text: str, limit: int, bank_name: str | None = None
+    ) -> Sequence[Row]:
+        terms = search_terms(text)
+        if not terms:
+            return []
+        return await self._fetch(
+            self._search_schemes, (tsquery(terms), bank_name, bank_name, limit)
+        )
+
+    async def transactions_page(
+        self,
+        customer_name: str,
+        limit: int,
+        before: tuple[str, int] | None = None,
+        start_date: str | None = None,
+        end_date: str | None = None,
+    ) -> Sequence[Row]:
+        s = self.schema
+        conditions = ["LOWER(c.name) = LOWER(%s)"]
+        params: list = [customer_name]
+        if before is not None:
+            conditions.append("(t.txn_date, t.id) < (%s::date, %s)")
+            params.extend(before)
+        if start_date is not None:
+            conditions.append("t.txn_date >= %s::date")
+            params.append(start_date)
+        if end_date is not None:
+            conditions.append("t.txn_date <= %s::date")
+            params.append(end_date)
+        params.append(limit)
+
+        # At most eight distinct statements, each prepared once.
+        query = f"""
+            SELECT t.id, t.txn_date::text AS txn_date, t.amount, t.txn_type,
+                   t.merchant_name, t.category
+            FROM {s}.transactions t
+            JOIN {s}.accounts a ON a.id = t.account_id
+            JOIN {s}.customers c ON c.id = a.customer_id
+            WHERE {" AND ".join(conditions)}
+            ORDER BY t.txn_date DESC, t.id DESC
+            LIMIT %s;
+        """
+        return await self._fetch(query, params)
+
+
+async def copy_from_sqlite(
+    pool: AsyncConnectionPool,
+    sqlite_db: aiosqlite.Connection,
+    schema: str = DEFAULT_SCHEMA,
+) -> dict[str, int]:
+    """
+    Replace the banking tables on Postgres with the content of the SQLite
+    database, keeping ids, in one transaction.
+
+    Args:
+        pool: Connection pool to the Postgres server.
+        sqlite_db: Connection to the customer transaction database.
+        schema: Schema holding the banking tables.
+
+    Returns:
+        Number of rows copied per table.
+    """
+    await PostgresBankingRepository(pool, schema=schema).open()
+    copied: dict[str, int] = {}
+    async with pool.connection() as conn:
+        async with conn.transaction():
+            await conn.execute(
+                f"TRUNCATE {', '.join(f'{schema}.{table}' for table in TABLES)};"
+            )
+            for table in TABLES:
+                cursor = await sqlite_db.execute(f"SELECT * FROM {table};")
+                columns = [column[0] for column in cursor.description]
+                rows = list(await cursor.fetchall())
+                await cursor.close()
+
+                async with conn.cursor() as pg_cursor:
+                    async with pg_cursor.copy(
+                        f"COPY {schema}.{table} ({', '.join(columns)}) FROM STDIN"
+                    ) as copy:
+                        for row in rows:
+                            await copy.write_row(tuple(row))
+                    # Continue the identity after the copied ids.
+                    await pg_cursor.execute(
+                        f"""
+                        SELECT setval(
+                            pg_get_serial_sequence('{schema}.{table}', 'id'),
+                            COALESCE((SELECT MAX(id) FROM {schema}.{table}), 0) + 1,
+                            false
+                        );
+                        """
+                    )
+                copied[table] = len(rows)
+    logger.info(f"Copied banking data to Postgres: {copied}")
+    return copied
+
+
+def _parse_args(argv: list[str] | None = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Copy the customer transaction database to Postgres."
+    )
+    parser.add_argument("--sqlite", default="customer_transaction_db/transactions.db")
+    parser.add_argument("--schema", default=DEFAULT_SCHEMA)
+    return parser.parse_args(argv)
+
+
+async def main(argv: list[str] | None = None) -> None:
+    from config.settings import get_settings
+    from convo_history_db.connection import create_db_connection_pool
+
+    args = _parse_args(argv)
+    pool = create_db_connection_pool(settings=get_settings())
+    await pool.open()
+    sqlite_db = await aiosqlite.connect(args.sqlite)
+    try:
+        copied = await copy_from_sqlite(pool, sqlite_db, schema=args.schema)
+    finally:
+        await sqlite_db.close()
+        await pool.close()
+    print(f"Copied {copied} to schema {args.schema}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,422 @@
+import aiosqlite
+
+from customer_transaction_db.search import fts5_query, search_terms
+
+
+async def fetch_account_balance(
+    sqlite_db: aiosqlite.Connection,
+    customer_name: str,
+) -> aiosqlite.Row | None:
+    """
+    Fetch the account and current balance of a customer.
+
+    Args:
+        sqlite_db: Connection to the customer transaction database.
+        customer_name: Name of the customer (case-insensitive).
+
+    Returns:
+        Row with account_number, bank_name, currency and current_balance,
+        or None if the customer has no account.
+    """
+    query = """
+        SELECT account_number, bank_name, currency, current_balance
+        FROM account_balances
+        WHERE LOWER(customer_name) = LOWER(?)
+        LIMIT 1;
+    """
+    cursor = await sqlite_db.execute(query, (customer_name,))
+    row = await cursor.fetchone()
+    await cursor.close()
+    return row
+
+
+async def fetch_recent_transactions(
+    sqlite_db: aiosqlite.Connection,
+    customer_name: str,
+    limit: int,
+) -> list[aiosqlite.Row]:
+    """
+    Fetch the most recent transactions of a customer, newest first.
+
+    Args:
+        sqlite_db: Connection to the customer transaction database.
+        customer_name: Name of the customer (case-insensitive).
+        limit: Maximum number of transactions.
+
+    Returns:
+        Rows with txn_date, amount, txn_type, merchant_name and category.
+    """
+    query = """
+        SELECT t.txn_date, t.amount, t.txn_type,
+               t.merchant_name, t.category
+        FROM transactions t
+        JOIN accounts a ON a.id = t.account_id
+        JOIN customers c ON c.id = a.customer_id
+        WHERE LOWER(c.name) = LOWER(?)
+        ORDER BY t.txn_date DESC, t.id DESC
+        LIMIT ?;
+    """
+    cursor = await sqlite_db.execute(query, (customer_name, limit))
+    rows = await cursor.fetchall()
+    await cursor.close()
+    return list(rows)
+
+
+async def fetch_spending_by_category(
+    sqlite_db: aiosqlite.Connection,
+    customer_name: str,
+    since: str,
+) -> dict[str, float]:
+    """
+    Total debits per category since a date.
+
+    Args:
+        sqlite_db: Connection to the customer transaction database.
+        customer_name: Name of the customer (case-insensitive).
+        since: Inclusive start date, formatted YYYY-MM-DD.
+
+    Returns:
+        Mapping of category to total amount spent.
+    """
+    query = """
+        SELECT t.category, SUM(ABS(t.amount)) AS total_spent
+        FROM transactions t
+        JOIN accounts a ON a.id = t.account_id
+        JOIN customers c ON a.customer_id = c.id
+        WHERE LOWER(c.name) = LOWER(?)
+          AND t.amount < 0
+          AND t.txn_date >= ?
+        GROUP BY t.category;
+    """
+    cursor = await sqlite_db.execute(query, (customer_name, since))
+    rows = await cursor.fetchall()
+    await cursor.close()
+    return {row["category"]: float(row["total_spent"]) for row in rows}
+
+
+async def fetch_average_debit(
+    sqlite_db: aiosqlite.Connection,
+    customer_name: str,
+    since: str,
+) -> float:
+    """
+    Average debit amount since a date.
+
+    Args:
+        sqlite_db: Connection to the customer transaction database.
+        customer_name: Name of the customer (case-insensitive).
+        since: Inclusive start date, formatted YYYY-MM-DD.
+
+    Returns:
+        Average absolute debit, or 0 if there were none.
+    """
+    query = """
+        SELECT AVG(ABS(t.amount))
+        FROM transactions t
+        JOIN accounts a ON t.account_id = a.id
+        JOIN customers c ON a.customer_id = c.id
+        WHERE LOWER(c.name) = LOWER(?)
+          AND t.amount < 0
+          AND t.txn_date >= ?;
+    """
+    cursor = await sqlite_db.execute(query, (customer_name, since))
+    row = await cursor.fetchone()
+    await cursor.close()
+    return float(row[0]) if row and row[0] else 0
+
+
+async def fetch_debits_above(
+    sqlite_db: aiosqlite.Connection,
+    customer_name: str,
+    threshold: float,
+    since: str,
+) -> list[aiosqlite.Row]:
+    """
+    Debits larger than a threshold since a date.
+
+    Args:
+        sqlite_db: Connection to the customer transaction database.
+        customer_name: Name of the customer (case-insensitive).
+        threshold: Minimum absolute amount (exclusive).
+        since: Inclusive start date, formatted YYYY-MM-DD.
+
+    Returns:
+        Rows with txn_date, amount, merchant_name and category.
+    """
+    query = """
+        SELECT t.txn_date, t.amount, t.merchant_name, t.category
+        FROM transactions t
+        JOIN accounts a ON a.id = t.account_id
+        JOIN customers c ON a.customer_id = c.id
+        WHERE LOWER(c.name) = LOWER(?)
+          AND t.amount < 0
+          AND ABS(t.amount) > ?
+          AND t.txn_date >= ?;
+    """
+    cursor = await sqlite_db.execute(query, (customer_name, threshold, since))
+    rows = await cursor.fetchall()
+    await cursor.close()
+    return list(rows)
+
+
+async def fetch_bank_schemes(
+    sqlite_db: aiosqlite.Connection,
+    bank_name: str,
+) -> list[aiosqlite.Row]:
+    """
+    Schemes offered by a bank.
+
+    Args:
+        sqlite_db: Connection to the customer transaction database.
+        bank_name: Name of the bank (case-insensitive).
+
+    Returns:
+        Rows with scheme_name, description, interest_rate and min_amount.
+    """
+    query = """
+        SELECT scheme_name, description, interest_rate, min_amount
+        FROM bank_schemes
+        WHERE LOWER(bank_name) = LOWER(?);
+    """
+    cursor = await sqlite_db.execute(query, (bank_name,))
+    rows = await cursor.fetchall()
+    await cursor.close()
+    return list(rows)
+
+
+async def fetch_transactions_after(
+    sqlite_db: aiosqlite.Connection,
+    customer_name: str,
+    after_id: int,
+) -> list[aiosqlite.Row]:
+    """
+    All transactions of a customer with an id above `after_id`, in id order.
+
+    Args:
+        sqlite_db: Connection to the customer transaction database.
+        customer_name: Name of the customer (case-insensitive).
+        after_id: Highest transaction id already seen; 0 for all.
+
+    Returns:
+        Rows with id, txn_date, amount, merchant_name and category.
+    """
+    query = """
+        SELECT t.id, t.txn_date, t.amount, t.merchant_name, t.category
+        FROM transactions t
+        JOIN accounts a ON a.id = t.account_id
+        JOIN customers c ON c.id = a.customer_id
+        WHERE LOWER(c.name) = LOWER(?)
+          AND t.id > ?
+        ORDER BY t.id;
+    """
+    cursor = await sqlite_db.execute(query, (customer_name, after_id))
+    rows = await cursor.fetchall()
+    await cursor.close()
+    return list(rows)
+
+
+async def fetch_transactions_page(
+    sqlite_db: aiosqlite.Connection,
+    customer_name: str,
+    limit: int,
+    before: tuple[str, int] | None = None,
+    start_date: str | None = None,
+    end_date: str | None = None,
+) -> list[aiosqlite.Row]:
+    """
+    One page of a customer's transactions, newest first, using the keyset
+    (txn_date, id) so that later pages never re-read earlier rows.
+
+    Args:
+        sqlite_db: Connection to the customer transaction database.
+        customer_name: Name of the customer (case-insensitive).
+        limit: Maximum number of rows.
+        before: (txn_date, id) of the last row of the previous page.
+        start_date: Inclusive start date, formatted YYYY-MM-DD.
+        end_date: Inclusive end date, formatted YYYY-MM-DD.
+
+    Returns:
+        Rows with id, txn_date, amount, txn_type, merchant_name and category.
+    """
+    conditions = ["LOWER(c.name) = LOWER(?)"]
+    params: list = [customer_name]
+    if before is not None:
+        conditions.append("(t.txn_date, t.id) < (?, ?)")
+        params.extend(before)
+    if start_date is not None:
+        conditions.append("t.txn_date >= ?")
+        params.append(start_date)
+    if end_date is not None:
+        conditions.append("t.txn_date <= ?")
+        params.append(end_date)
+    params.append(limit)
+
+    query = f"""
+        SELECT t.id, t.txn_date, t.amount, t.txn_type,
+               t.merchant_name, t.category
+        FROM transactions t
+        JOIN accounts a ON a.id = t.account_id
+        JOIN customers c ON c.id = a.customer_id
+        WHERE {" AND ".join(conditions)}
+        ORDER BY t.txn_date DESC, t.id DESC
+        LIMIT ?;
+    """
+    cursor = await sqlite_db.execute(query, params)
+    rows = await cursor.fetchall()
+    await cursor.close()
+    return list(rows)
+
+
+async def fetch_search_transactions(
+    sqlite_db: aiosqlite.Connection,
+    customer_name: str,
+    text: str,
+    limit: int,
+    since: str | None = None,
+) -> list[aiosqlite.Row]:
+    """
+    A customer's transactions whose merchant or category matches a search
+    text, best match first, through the `transactions_fts` index.
+
+    Args:
+        sqlite_db: Connection to the customer transaction database.
+        customer_name: Name of the customer (case-insensitive).
+        text: Search text, e.g. "swiggy" or "food delivery".
+        limit: Maximum number of rows.
+        since: Inclusive start date, formatted YYYY-MM-DD.
+
+    Returns:
+        Rows with id, txn_date, amount, txn_type, merchant_name and category;
+        none when the text has no searchable word.
+    """
+    terms = search_terms(text)
+    if not terms:
+        return []
+    params: list = [fts5_query(terms), customer_name]
+    since_condition = ""
+    if since is not None:
+        since_condition = "AND t.txn_date >= ?"
+        params.append(since)
+    params.append(limit)
+
+    # Merchant matches rank above category matches.
+    query = f"""
+        SELECT t.id, t.txn_date, t.amount, t.txn_type,
+               t.merchant_name, t.category
+        FROM transactions_fts
+        JOIN transactions t ON t.id = transactions_fts.rowid
+        JOIN accounts a ON a.id = t.account_id
+        JOIN customers c ON c.id = a.customer_id
+        WHERE transactions_fts MATCH ?
+          AND LOWER(c.name) = LOWER(?)
+          {since_condition}
+        ORDER BY bm25(transactions_fts, 2.0, 1.0), t.txn_date DESC, t.id DESC
+        LIMIT ?;
+    """
+    cursor = await sqlite_db.execute(query, params)
+    rows = await cursor.fetchall()
+    await cursor.close()
+    return list(rows)
+
+
+async def fetch_merchant_spending(
+    sqlite_db: aiosqlite.Connection,
+    customer_name: str,
+    text: str,
+    since: str | None = None,
+) -> list[aiosqlite.Row]:
+    """
+    Totals per merchant of a customer's transactions matching a search text,
+    best match first, so that "how much on Swiggy" needs no list of rows.
+
+    Args:
+        sqlite_db: Connection to the customer transaction database.
+        customer_name: Name of the customer (case-insensitive).
+        text: Search text, e.g. "swiggy" or "food delivery".
+        since: Inclusive start date, formatted YYYY-MM-DD.
+
+    Returns:
+        Rows with merchant_name, category, transactions, spent, received,
+        first_date and last_date.
+    """
+    terms = search_terms(text)
+    if not terms:
+        return []
+    params: list = [fts5_query(terms), customer_name]
+    since_condition = ""
+    if since is not None:
+        since_condition = "AND t.txn_date >= ?"
+        params.append(since)
+
+    # bm25() cannot be aggregated directly, so matches are ranked first.
+    query = f"""
+        WITH matches AS MATERIALIZED (
+            SELECT rowid AS id, bm25(transactions_fts, 2.0, 1.0) AS rank
+            FROM transactions_fts
+            WHERE transactions_fts MATCH ?
+        )
+        SELECT t.merchant_name, t.category,
+               COUNT(*) AS transactions,
+               SUM(CASE WHEN t.amount < 0 THEN -t.amount ELSE 0 END) AS spent,
+               SUM(CASE WHEN t.amount > 0 THEN t.amount ELSE 0 END) AS received,
+               MIN(t.txn_date) AS first_date,
+               MAX(t.txn_date) AS last_date
+        FROM matches m
+        JOIN transactions t ON t.id = m.id
+        JOIN accounts a ON a.id = t.account_id
+        JOIN customers c ON c.id = a.customer_id
+        WHERE LOWER(c.name) = LOWER(?)
+          {since_condition}
+        GROUP BY t.merchant_name, t.category
+        ORDER BY MIN(m.rank), spent DESC;
+    """
+    cursor = await sqlite_db.execute(query, params)
+    rows = await cursor.fetchall()
+    await cursor.close()
+    return list(rows)
+
+
+async def fetch_search_bank_schemes(
+    sqlite_db: aiosqlite.Connection,
+    text: str,
+    limit: int,
+    bank_name: str | None = None,
+) -> list[aiosqlite.Row]:
+    """
+    Schemes whose name or description matches a search text, best match
+    first, through the `bank_schemes_fts` index.
+
+    Args:
+        sqlite_db: Connection to the customer transaction database.
+        text: Search text, e.g. "senior citizen deposit".
+        limit: Maximum number of rows.
+        bank_name: Only schemes of this bank (case-insensitive).
+
+    Returns:
+        Rows with bank_name, scheme_name, description, interest_rate and
+        min_amount.
+    """
+    terms = search_terms(text)
+    if not terms:
+        return []
+    params: list = [fts5_query(terms)]
+    bank_condition = ""
+    if bank_name is not None:
+        bank_condition = "AND LOWER(s.bank_name) = LOWER(?)"
+        params.append(bank_name)
+    params.append(limit)
+
+    query = f"""
+        SELECT s.bank_name, s.scheme_name, s.description,
+               s.interest_rate, s.min_amount
+        FROM bank_schemes_fts
+        JOIN bank_schemes s ON s.id = bank_schemes_fts.rowid
+        WHERE bank_schemes_fts MATCH ?
+          {bank_condition}
+        ORDER BY bm25(bank_schemes_fts, 3.0, 1.0)
+        LIMIT ?;
+    """
+    cursor = await sqlite_db.execute(query, params)
+    rows = await cursor.fetchall()
+    await cursor.close()
+    return list(rows)
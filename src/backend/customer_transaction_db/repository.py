@@ -0,0 +1,215 @@
+from typing import Any, Iterable, Protocol, Sequence, runtime_checkable
+
+import aiosqlite
+
+from customer_transaction_db import queries
+
+
+class Row(Protocol):
+    """
+    A result row, read by column name: a dict from Postgres, an
+    `aiosqlite.Row` from SQLite. `dict(row)` copies it.
+    """
+
+    def __getitem__(self, key: str, /) -> Any: ...
+
+    def keys(self) -> Iterable[str]: ...
+
+
+@runtime_checkable
+class BankingRepository(Protocol):
+    """
+    Read access to customers, accounts, transactions and bank schemes.
+
+    Customer and bank names match case-insensitively. Dates are passed and
+    returned as YYYY-MM-DD strings and amounts as floats, negative for
+    debits, whatever the backend stores.
+    """
+
+    async def open(self) -> None:
+        """Prepare the backend, e.g. create missing tables. Idempotent."""
+
+    async def ping(self) -> None:
+        """Run a trivial query, warming up a connection."""
+
+    async def account_balance(self, customer_name: str) -> Row | None:
+        """
+        Row with account_number, bank_name, currency and current_balance,
+        or None if the customer has no account.
+        """
+
+    async def recent_transactions(
+        self, customer_name: str, limit: int
+    ) -> Sequence[Row]:
+        """
+        Latest transactions, newest first, with txn_date, amount, txn_type,
+        merchant_name and category.
+        """
+
+    async def spending_by_category(
+        self, customer_name: str, since: str
+    ) -> dict[str, float]:
+        """Total debits per category since an inclusive date."""
+
+    async def average_debit(self, customer_name: str, since: str) -> float:
+        """Average absolute debit since an inclusive date; 0 if none."""
+
+    async def debits_above(
+        self, customer_name: str, threshold: float, since: str
+    ) -> Sequence[Row]:
+        """
+        Debits larger than `threshold` since an inclusive date, with
+        txn_date, amount, merchant_name and category.
+        """
+
+    async def bank_schemes(self, bank_name: str) -> Sequence[Row]:
+        """
+        Schemes of a bank with scheme_name, description, interest_rate and
+        min_amount.
+        """
+
+    async def transactions_after(
+        self, customer_name: str, after_id: int
+    ) -> Sequence[Row]:
+        """
+        Transactions with an id above `after_id`, in id order, with id,
+        txn_date, amount, merchant_name and category.
+        """
+
+    async def transactions_page(
+        self,
+        customer_name: str,
+        limit: int,
+        before: tuple[str, int] | None = None,
+        start_date: str | None = None,
+        end_date: str | None = None,
+    ) -> Sequence[Row]:
+        """
+        One page of transactions, newest first, keyed on (txn_date, id),
+        with id, txn_date, amount, txn_type, merchant_name and category.
+        """
+
+    async def search_transactions(
+        self, customer_name: str, text: str, limit: int, since: str | None = None
+    ) -> Sequence[Row]:
+        """
+        Transactions whose merchant or category matches a search text, best
+        match first, with id, txn_date, amount, txn_type, merchant_name and
+        category.
+        """
+
+    async def merchant_spending(
+        self, customer_name: str, text: str, since: str | None = None
+    ) -> Sequence[Row]:
+        """
+        Totals per merchant of the transactions matching a search text, best
+        match first, with merchant_name, category, transactions, spent,
+        received, first_date and last_date.
+        """
+
+    async def search_bank_schemes(
+        self, text: str, limit: int, bank_name: str | None = None
+    ) -> Sequence[Row]:
+        """
+        Schemes whose name or description matches a search text, best match
+        first, with bank_name, scheme_name, description, interest_rate and
+        min_amount.
+        """
+
+
+class SqliteBankingRepository:
+    """
+    Repository over the customer transaction SQLite database.
+
+    Statements are parameterised with fixed text, so sqlite3's per-connection
+    statement cache compiles each of them once and reuses it.
+
+    Args:
+        sqlite_db: Connection to the customer transaction database.
+    """
+
+    def __init__(self, sqlite_db: aiosqlite.Connection) -> None:
+        self.sqlite_db = sqlite_db
+
+    async def open(self) -> None:
+        # The schema is migrated where the connection is opened.
+        pass
+
+    async def ping(self) -> None:
+        cursor = await self.sqlite_db.execute("SELECT 1;")
+        await cursor.close()
+
+    async def account_balance(self, customer_name: str) -> Row | None:
+        return await queries.fetch_account_balance(self.sqlite_db, customer_name)
+
+    async def recent_transactions(
+        self, customer_name: str, limit: int
+    ) -> Sequence[Row]:
+        return await queries.fetch_recent_transactions(
+            self.sqlite_db, customer_name, limit
+        )
+
+    async def spending_by_category(
+        self, customer_name: str, since: str
+    ) -> dict[str, float]:
+        return await queries.fetch_spending_by_category(
+            self.sqlite_db, customer_name, since
+        )
+
+    async def average_debit(self, customer_name: str, since: str) -> float:
+        return await queries.fetch_average_debit(self.sqlite_db, customer_name, since)
+
+    async def debits_above(
+        self, customer_name: str, threshold: float, since: str
+    ) -> Sequence[Row]:
+        return await queries.fetch_debits_above(
+            self.sqlite_db, customer_name, threshold, since
+        )
+
+    async def bank_schemes(self, bank_name: str) -> Sequence[Row]:
+        return await queries.fetch_bank_schemes(self.sqlite_db, bank_name)
+
+    async def transactions_after(
+        self, customer_name: str, after_id: int
+    ) -> Sequence[Row]:
+        return await queries.fetch_transactions_after(
+            self.sqlite_db, customer_name, after_id
+        )
+
+    async def transactions_page(
+        self,
+        customer_name: str,
+        limit: int,
+        before: tuple[str, int] | None = None,
+        start_date: str | None = None,
+        end_date: str | None = None,
+    ) -> Sequence[Row]:
+        return await queries.fetch_transactions_page(
+            self.sqlite_db,
+            customer_name,
+            limit,
+            before=before,
+            start_date=start_date,
+            end_date=end_date,
+        )
+
+    async def search_transactions(
+        self, customer_name: str, text: str, limit: int, since: str | None = None
+    ) -> Sequence[Row]:
+        return await queries.fetch_search_transactions(
+            self.sqlite_db, customer_name, text, limit, since=since
+        )
+
+    async def merchant_spending(
+        self, customer_name: str, text: str, since: str | None = None
+    ) -> Sequence[Row]:
+        return await queries.fetch_merchant_spending(
+            self.sqlite_db, customer_name, text, since=since
+        )
+
+    async def search_bank_schemes(
+        self, text: str, limit: int, bank_name: str | None = None
+    ) -> Sequence[Row]:
+        return await queries.fetch_search_bank_schemes(
+            self.sqlite_db, text, limit, bank_name=bank_name
+        )
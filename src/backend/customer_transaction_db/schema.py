@@ -0,0 +1,114 @@
+import aiosqlite
+
+# Columns added after the original schema, as (table, column, definition).
+# `reset_db` creates them for new databases; `ensure_schema` adds them to
+# existing ones at startup.
+COLUMNS = (
+    # Identifier assigned by the upstream feed, used to dedupe ingestion.
+    ("transactions", "external_id", "TEXT"),
+)
+
+INDEXES = (
+    # Keyset pagination and date-range filters on an account's history.
+    """
+    CREATE INDEX IF NOT EXISTS idx_transactions_account_date
+    ON transactions (account_id, txn_date DESC, id DESC);
+    """,
+    # NULLs are distinct, so rows created without a feed id never conflict.
+    """
+    CREATE UNIQUE INDEX IF NOT EXISTS idx_transactions_external_id
+    ON transactions (external_id);
+    """,
+)
+
+# Full-text indexes as (index table, content table, indexed columns). The
+# FTS5 tables only hold the index; the text stays in the content table and
+# triggers keep the index in step with every insert, update and delete.
+SEARCH_TABLES = (
+    ("transactions_fts", "transactions", ("merchant_name", "category")),
+    ("bank_schemes_fts", "bank_schemes", ("scheme_name", "description")),
+)
+
+
+def _search_statements(index: str, table: str, columns: tuple[str, ...]) -> list[str]:
+    names = ", ".join(columns)
+    new = ", ".join(f"new.{column}" for column in columns)
+    old = ", ".join(f"old.{column}" for column in columns)
+    delete = f"INSERT INTO {index} ({index}, rowid, {names}) VALUES ('delete', old.id, {old});"
+    insert = f"INSERT INTO {index} (rowid, {names}) VALUES (new.id, {new});"
+    return [
+        f"""
+        CREATE VIRTUAL TABLE IF NOT EXISTS {index} USING fts5(
+            {names}, content='{table}', content_rowid='id',
+            tokenize='unicode61 remove_diacritics 2'
+        );
+        """,
+        f"""
+        CREATE TRIGGER IF NOT EXISTS {index}_insert AFTER INSERT ON {table}
+        BEGIN {insert} END;
+        """,
+        f"""
+        CREATE TRIGGER IF NOT EXISTS {index}_delete AFTER DELETE ON {table}
+        BEGIN {delete} END;
+        """,
+        f"""
+        CREATE TRIGGER IF NOT EXISTS {index}_update AFTER UPDATE OF {names} ON {table}
+        BEGIN {delete} {insert} END;
+        """,
+    ]
+
+
+SEARCH_INDEXES = tuple(
+    statement for spec in SEARCH_TABLES for statement in _search_statements(*spec)
+)
+
+
+async def configure_connection(sqlite_db: aiosqlite.Connection) -> None:
+    """
+    Per-connection settings shared by readers and the ingestion writer.
+
+    WAL lets readers keep serving from the last committed snapshot while a
+    writer commits, instead of waiting on the database lock.
+
+    Args:
+        sqlite_db: Connection to the customer transaction database.
+    """
+    await sqlite_db.execute("PRAGMA journal_mode = WAL;")
+    await sqlite_db.execute("PRAGMA synchronous = NORMAL;")
+    await sqlite_db.execute("PRAGMA busy_timeout = 5000;")
+    await sqlite_db.execute("PRAGMA foreign_keys = ON;")
+
+
+async def ensure_schema(sqlite_db: aiosqlite.Connection) -> None:
+    """
+    Add any missing column or index to the customer transaction database.
+
+    A full-text index created here is built from the existing rows.
+
+    Args:
+        sqlite_db: Connection to the customer transaction database.
+    """
+    for table, column, definition in COLUMNS:
+        cursor = await sqlite_db.execute(f"PRAGMA table_info({table});")
+        existing = {row[1] for row in await cursor.fetchall()}
+        await cursor.close()
+        if column not in existing:
+            await sqlite_db.execute(
+                f"ALTER TABLE {table} ADD COLUMN {column} {definition};"
+            )
+    for statement in INDEXES:
+        await sqlite_db.execute(statement)
+
+    cursor = await sqlite_db.execute(
+        "SELECT name FROM sqlite_master WHERE type = 'table';"
+    )
+    existing = {row[0] for row in await cursor.fetchall()}
+    await cursor.close()
+    for statement in SEARCH_INDEXES:
+        await sqlite_db.execute(statement)
+    for index, _, _ in SEARCH_TABLES:
+        if index not in existing:
+            await sqlite_db.execute(
+                f"INSERT INTO {index} ({index}) VALUES ('rebuild');"
+            )
+    await sqlite_db.commit()
@@ -0,0 +1,39 @@
+import re
+
+_WORD = re.compile(r"\w+")
+
+# Words that carry no meaning in a search of merchants or schemes.
+STOPWORDS = frozenset(
+    "a an and any at by did do for from how i in is me much my of on or the "
+    "to what which with".split()
+)
+
+# Terms used from one search text.
+MAX_TERMS = 8
+
+
+def search_terms(text: str) -> list[str]:
+    """
+    Lower-cased words of a search text without stopwords, with a plural
+    "s" removed so that prefix matching finds both forms
+    ("citizens" -> "citizen").
+    """
+    terms = []
+    for word in _WORD.findall(text.lower()):
+        if word in STOPWORDS:
+            continue
+        if len(word) > 3 and word.endswith("s") and not word.endswith("ss"):
+            word = word[:-1]
+        if word not in terms:
+            terms.append(word)
+    return terms[:MAX_TERMS]
+
+
+def fts5_query(terms: list[str]) -> str:
+    """SQLite FTS5 query matching any term as a prefix."""
+    return " OR ".join(f'"{term}"*' for term in terms)
+
+
+def tsquery(terms: list[str]) -> str:
+    """Postgres tsquery matching any term as a prefix."""
+    return " | ".join(f"{term}:*" for term in terms)
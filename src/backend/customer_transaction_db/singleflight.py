@@ -0,0 +1,312 @@
+import asyncio
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Hashable, Sequence, TypeVar
+
+from loguru import logger
+
+from customer_transaction_db.repository import BankingRepository, Row
+from session_state.bus import TOOL_RESULTS_CHANNEL, EventBus
+
+T = TypeVar("T")
+
+
+@dataclass
+class FlightStats:
+    calls: int = 0
+    executions: int = 0
+    coalesced: int = 0
+    errors: int = 0
+    total_ms: float = 0.0
+    max_waiters: int = 0
+
+    def snapshot(self) -> dict[str, float]:
+        return {
+            "calls": self.calls,
+            "executions": self.executions,
+            "coalesced": self.coalesced,
+            "coalesce_rate": round(self.coalesced / self.calls, 3) if self.calls else 0.0,
+            "errors": self.errors,
+            "avg_ms": round(self.total_ms / self.executions, 1) if self.executions else 0.0,
+            "max_waiters": self.max_waiters,
+        }
+
+
+@dataclass
+class _Flight:
+    task: asyncio.Task
+    customer: str | None
+    waiters: int = 0
+
+
+class SingleFlight:
+    """
+    Collapses identical concurrent calls into one execution.
+
+    The first caller of a key starts the call; callers of the same key
+    arriving while it runs wait for, and share, its result or error.
+    Nothing is kept once the call finished, so a result is never older than
+    the call it came from. A waiter that is cancelled does not cancel the
+    call for the others.
+
+    When a bus is given, a change event for a customer detaches that
+    customer's calls in flight: callers arriving after the change start a
+    fresh call instead of sharing one that may have read the old rows.
+
+    Args:
+        max_keys: Keys with metrics of their own, least recently used
+            evicted; totals cover every key.
+        bus: Bus carrying `{"customer_name": ...}` change events.
+    """
+
+    def __init__(self, max_keys: int = 256, bus: EventBus | None = None) -> None:
+        self.max_keys = max_keys
+        self.totals = FlightStats()
+        self.detached = 0
+        self._keys: OrderedDict[str, FlightStats] = OrderedDict()
+        self._flights: dict[Hashable, _Flight] = {}
+        if bus is not None:
+            bus.subscribe(TOOL_RESULTS_CHANNEL, self._on_invalidate)
+
+    @property
+    def in_flight(self) -> int:
+        return len(self._flights)
+
+    async def do(
+        self,
+        key: tuple,
+        call: Callable[[], Awaitable[T]],
+        customer: str | None = None,
+    ) -> T:
+        """
+        Run `call`, or join the run of the same `key` already in flight.
+
+        Args:
+            key: Identifies the call, e.g. a method name and its arguments;
+                its parts joined with ":" name it in the metrics.
+            call: Coroutine function making the call.
+            customer: Customer whose data the call reads (lower case).
+
+        Returns:
+            The result of the call, shared by every caller of the flight.
+
+        Raises:
+            Exception: Whatever the call raised.
+        """
+        stats = self._stats(key)
+        stats.calls += 1
+        self.totals.calls += 1
+
+        flight = self._flights.get(key)
+        if flight is None:
+            flight = _Flight(
+                asyncio.create_task(self._execute(call, stats)), customer
+            )
+            self._flights[key] = flight
+            flight.task.add_done_callback(lambda task: self._land(key, flight))
+        else:
+            stats.coalesced += 1
+            self.totals.coalesced += 1
+
+        flight.waiters += 1
+        stats.max_waiters = max(stats.max_waiters, flight.waiters)
+        self.totals.max_waiters = max(self.totals.max_waiters, flight.waiters)
+        return await asyncio.shield(flight.task)
+
+    async def _execute(self, call: Callable[[], Awaitable[T]], stats: FlightStats) -> T:
+        started = time.perf_counter()
+        stats.executions += 1
+        self.totals.executions += 1
+        try:
+            return await call()
+        except Exception:
+            stats.errors += 1
+            self.totals.errors += 1
+            raise
+        finally:
+            elapsed_ms = (time.perf_counter() - started) * 1000
+            stats.total_ms += elapsed_ms
+            self.totals.total_ms += elapsed_ms
+
+    def _land(self, key: Hashable, flight: _Flight) -> None:
+        if self._flights.get(key) is flight:
+            del self._flights[key]
+        # Every waiter may have been cancelled; the error is counted already.
+        if not flight.task.cancelled():
+            flight.task.exception()
+
+    def _stats(self, key: tuple) -> FlightStats:
+        label = ":".join(str(part) for part in key)
+        stats = self._keys.get(label)
+        if stats is None:
+            stats = self._keys[label] = FlightStats()
+            while len(self._keys) > self.max_keys:
+                self._keys.popitem(last=False)
+        else:
+            self._keys.move_to_end(label)
+        return stats
+
+    async def _on_invalidate(self, event: dict[str, Any]) -> None:
+        customer_name = event.get("customer_name")
+        for key, flight in list(self._flights.items()):
+            if customer_name is None or flight.customer == customer_name.lower():
+                del self._flights[key]
+                self.detached += 1
+                logger.debug(f"[single_flight] Detached {key} after a change")
+
+    def snapshot(self, top: int = 10) -> dict[str, Any]:
+        """Totals, and the `top` keys that coalesced the most calls."""
+        busiest = sorted(
+            self._keys.items(),
+            key=lambda item: (item[1].coalesced, item[1].calls),
+            reverse=True,
+        )[:top]
+        return {
+            **self.totals.snapshot(),
+            "in_flight": self.in_flight,
+            "detached": self.detached,
+            "keys": {label: stats.snapshot() for label, stats in busiest},
+        }
+
+
+class SingleFlightRepository:
+    """
+    BankingRepository whose identical concurrent reads run once.
+
+    Customer and bank names match case-insensitively, so they are part of a
+    key in lower case. Callers share the returned rows and must not modify
+    them.
+
+    Args:
+        repository: Repository to read from.
+        flight: Coalescer of the calls, shared by every session.
+    """
+
+    def __init__(self, repository: BankingRepository, flight: SingleFlight) -> None:
+        self.repository = repository
+        self.flight = flight
+
+    async def open(self) -> None:
+        await self.repository.open()
+
+    async def ping(self) -> None:
+        await self.repository.ping()
+
+    async def account_balance(self, customer_name: str) -> Row | None:
+        customer = customer_name.lower()
+        return await self.flight.do(
+            ("account_balance", customer),
+            lambda: self.repository.account_balance(customer_name),
+            customer=customer,
+        )
+
+    async def recent_transactions(
+        self, customer_name: str, limit: int
+    ) -> Sequence[Row]:
+        customer = customer_name.lower()
+        return await self.flight.do(
+            ("recent_transactions", customer, limit),
+            lambda: self.repository.recent_transactions(customer_name, limit),
+            customer=customer,
+        )
+
+    async def spending_by_category(
+        self, customer_name: str, since: str
+    ) -> dict[str, float]:
+        customer = customer_name.lower()
+        return await self.flight.do(
+            ("spending_by_category", customer, since),
+            lambda: self.repository.spending_by_category(customer_name, since),
+            customer=customer,
+        )
+
+    async def average_debit(self, customer_name: str, since: str) -> float:
+        customer = customer_name.lower()
+        return await self.flight.do(
+            ("average_debit", customer, since),
+            lambda: self.repository.average_debit(customer_name, since),
+            customer=customer,
+        )
+
+    async def debits_above(
+        self, customer_name: str, threshold: float, since: str
+    ) -> Sequence[Row]:
+        customer = customer_name.lower()
+        return await self.flight.do(
+            ("debits_above", customer, threshold, since),
+            lambda: self.repository.debits_above(customer_name, threshold, since),
+            customer=customer,
+        )
+
+    async def bank_schemes(self, bank_name: str) -> Sequence[Row]:
+        return await self.flight.do(
+            ("bank_schemes", bank_name.lower()),
+            lambda: self.repository.bank_schemes(bank_name),
+        )
+
+    async def transactions_after(
+        self, customer_name: str, after_id: int
+    ) -> Sequence[Row]:
+        customer = customer_name.lower()
+        return await self.flight.do(
+            ("transactions_after", customer, after_id),
+            lambda: self.repository.transactions_after(customer_name, after_id),
+            customer=customer,
+        )
+
+    async def transactions_page(
+        self,
+        customer_name: str,
+        limit: int,
+        before: tuple[str, int] | None = None,
+        start_date: str | None = None,
+        end_date: str | None = None,
+    ) -> Sequence[Row]:
+        customer = customer_name.lower()
+        return await self.flight.do(
+            ("transactions_page", customer, limit, before, start_date, end_date),
+            lambda: self.repository.transactions_page(
+                customer_name,
+                limit,
+                before=before,
+                start_date=start_date,
+                end_date=end_date,
+            ),
+            customer=customer,
+        )
+
+    async def search_transactions(
+        self, customer_name: str, text: str, limit: int, since: str | None = None
+    ) -> Sequence[Row]:
+        customer = customer_name.lower()
+        return await self.flight.do(
+            ("search_transactions", customer, text.lower(), limit, since),
+            lambda: self.repository.search_transactions(
+                customer_name, text, limit, since=since
+            ),
+            customer=customer,
+        )
+
+    async def merchant_spending(
+        self, customer_name: str, text: str, since: str | None = None
+    ) -> Sequence[Row]:
+        customer = customer_name.lower()
+        return await self.flight.do(
+            ("merchant_spending", customer, text.lower(), since),
+            lambda: self.repository.merchant_spending(customer_name, text, since=since),
+            customer=customer,
+        )
+
+    async def search_bank_schemes(
+        self, text: str, limit: int, bank_name: str | None = None
+    ) -> Sequence[Row]:
+        return await self.flight.do(
+            (
+                "search_bank_schemes",
+                text.lower(),
+                limit,
+                bank_name.lower() if bank_name is not None else None,
+            ),
+            lambda: self.repository.search_bank_schemes(text, limit, bank_name=bank_name),
+        )
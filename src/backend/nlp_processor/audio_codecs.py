@@ -0,0 +1,210 @@
+import asyncio
+import io
+import shutil
+import wave
+from functools import lru_cache
+from typing import Iterable, Iterator
+
+PCM16_SAMPLE_WIDTH = 2
+
+# Layer III bitrates in kbps, indexed by the 4-bit bitrate field.
+_MP3_BITRATES_V1 = (0, 32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320)
+_MP3_BITRATES_V2 = (0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160)
+
+# Sample rates keyed by the 2-bit MPEG version field (3 = MPEG1, 2 = MPEG2, 0 = MPEG2.5).
+_MP3_SAMPLE_RATES = {
+    3: (44100, 48000, 32000),
+    2: (22050, 24000, 16000),
+    0: (11025, 12000, 8000),
+}
+
+_FFMPEG_OUTPUT_ARGS = {
+    "pcm16": ("-f", "s16le", "-acodec", "pcm_s16le"),
+    "opus": ("-c:a", "libopus", "-f", "ogg"),
+}
+
+
+def pcm16_to_wav(pcm: bytes, sample_rate: int, channels: int = 1) -> bytes:
+    """
+    Wrap raw little-endian 16-bit PCM in a WAV container.
+
+    Args:
+        pcm: Raw PCM samples.
+        sample_rate: Sample rate of the PCM data in Hz.
+        channels: Number of interleaved channels.
+
+    Returns:
+        WAV file bytes.
+    """
+    with io.BytesIO() as buffer:
+        with wave.open(buffer, "wb") as wav:
+            wav.setnchannels(channels)
+            wav.setsampwidth(PCM16_SAMPLE_WIDTH)
+            wav.setframerate(sample_rate)
+            wav.writeframes(pcm)
+        return buffer.getvalue()
+
+
+def _mp3_frame_length(header: bytes) -> int | None:
+    """Return the byte length of the Layer III frame starting with `header`."""
+    if len(header) < 4 or header[0] != 0xFF or (header[1] & 0xE0) != 0xE0:
+        return None
+
+    version = (header[1] >> 3) & 0x03
+    layer = (header[1] >> 1) & 0x03
+    bitrate_index = header[2] >> 4
+    sample_rate_index = (header[2] >> 2) & 0x03
+    padding = (header[2] >> 1) & 0x01
+
+    if version == 1 or layer != 1 or sample_rate_index == 3:
+        return None
+    if bitrate_index in (0, 15):
+        return None
+
+    bitrates = _MP3_BITRATES_V1 if version == 3 else _MP3_BITRATES_V2
+    bitrate = bitrates[bitrate_index] * 1000
+    sample_rate = _MP3_SAMPLE_RATES[version][sample_rate_index]
+    coefficient = 144 if version == 3 else 72
+
+    return coefficient * bitrate // sample_rate + padding
+
+
+def iter_mp3_frames(data: bytes) -> Iterator[bytes]:
+    """
+    Split an MP3 stream into independently decodable frames.
+
+    A leading ID3v2 tag is kept attached to the first frame. If the stream
+    cannot be parsed the remainder is yielded as a single piece.
+
+    Args:
+        data: Complete MP3 stream.
+
+    Yields:
+        MP3 frames in stream order.
+    """
+    offset = 0
+    prefix = b""
+
+    if data[:3] == b"ID3" and len(data) >= 10:
+        size = 0
+        for byte in data[6:10]:
+            size = (size << 7) | (byte & 0x7F)
+        offset = 10 + size
+        prefix = data[:offset]
+
+    while offset < len(data):
+        length = _mp3_frame_length(data[offset:offset + 4])
+        if length is None or offset + length > len(data):
+            yield prefix + data[offset:]
+            return
+        yield prefix + data[offset:offset + length]
+        prefix = b""
+        offset += length
+
+    if prefix:
+        yield prefix
+
+
+def iter_ogg_pages(data: bytes) -> Iterator[bytes]:
+    """
+    Split an Ogg stream into pages.
+
+    Args:
+        data: Complete Ogg stream.
+
+    Yields:
+        Ogg pages in stream order.
+    """
+    offset = 0
+    while offset < len(data):
+        if data[offset:offset + 4] != b"OggS" or offset + 27 > len(data):
+            yield data[offset:]
+            return
+        segment_count = data[offset + 26]
+        table_end = offset + 27 + segment_count
+        length = 27 + segment_count + sum(data[offset + 27:table_end])
+        yield data[offset:offset + length]
+        offset += length
+
+
+def iter_pcm16_frames(
+    data: bytes,
+    sample_rate: int,
+    frame_ms: int = 20,
+    channels: int = 1,
+) -> Iterator[bytes]:
+    """
+    Split raw 16-bit PCM into fixed-duration frames.
+
+    Args:
+        data: Raw PCM samples.
+        sample_rate: Sample rate of the PCM data in Hz.
+        frame_ms: Frame duration in milliseconds.
+        channels: Number of interleaved channels.
+
+    Yields:
+        PCM frames; the last one may be shorter.
+    """
+    frame_bytes = sample_rate * channels * PCM16_SAMPLE_WIDTH * frame_ms // 1000
+    for offset in range(0, len(data), frame_bytes):
+        yield data[offset:offset + frame_bytes]
+
+
+def group_frames(frames: Iterable[bytes], max_bytes: int) -> Iterator[bytes]:
+    """
+    Pack consecutive frames into chunks of at most `max_bytes`.
+
+    A single frame larger than `max_bytes` is yielded on its own.
+
+    Args:
+        frames: Codec frames in stream order.
+        max_bytes: Upper bound for the size of a chunk.
+
+    Yields:
+        Chunks that always end on a frame boundary.
+    """
+    chunk = bytearray()
+    for frame in frames:
+        if chunk and len(chunk) + len(frame) > max_bytes:
+            yield bytes(chunk)
+            chunk.clear()
+        chunk += frame
+    if chunk:
+        yield bytes(chunk)
+
+
+@lru_cache
+def ffmpeg_available() -> bool:
+    """Whether an `ffmpeg` binary is available for transcoding."""
+    return shutil.which("ffmpeg") is not None
+
+
+async def transcode_mp3(data: bytes, codec: str, sample_rate: int) -> bytes:
+    """
+    Transcode MP3 audio to mono PCM16 or Ogg Opus using ffmpeg.
+
+    Args:
+        data: MP3 stream.
+        codec: Target codec, "pcm16" or "opus".
+        sample_rate: Target sample rate in Hz.
+
+    Returns:
+        Transcoded audio.
+
+    Raises:
+        RuntimeError: If ffmpeg fails.
+    """
+    process = await asyncio.create_subprocess_exec(
+        "ffmpeg", "-hide_banner", "-loglevel", "error",
+        "-i", "pipe:0",
+        "-ac", "1", "-ar", str(sample_rate),
+        *_FFMPEG_OUTPUT_ARGS[codec],
+        "pipe:1",
+        stdin=asyncio.subprocess.PIPE,
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.PIPE,
+    )
+    output, error = await process.communicate(data)
+    if process.returncode != 0:
+        raise RuntimeError(f"ffmpeg transcoding to {codec} failed: {error.decode()}")
+    return output
@@ -0,0 +1,50 @@
+from groq import AsyncGroq
+
+from config.settings import Settings
+from nlp_processor.hedging import Hedger, RetryBudget
+from nlp_processor.speech_to_text import GroqTranscriber, Transcriber
+from nlp_processor.stt_batching import BatchingTranscriber
+
+
+def create_transcriber(settings: Settings, groq_client: AsyncGroq) -> Transcriber:
+    """
+    Creates the speech-to-text engine shared by all sessions.
+
+    Args:
+        settings: Application settings.
+        groq_client: Groq API client.
+
+    Returns:
+        Transcriber for the configured engine; call `start` before use.
+    """
+    config = settings.stt
+    if config.engine == "local":
+        return BatchingTranscriber(
+            engine=config.local_engine,
+            model_name=config.local_model,
+            window_ms=config.batch_window_ms,
+            max_batch=config.max_batch,
+            workers=config.workers,
+        )
+    if not config.hedge_enabled:
+        return GroqTranscriber(api_client=groq_client, model_name=config.model)
+
+    hedger = Hedger(
+        quantile=config.hedge_quantile,
+        min_samples=config.hedge_min_samples,
+        initial_delay_ms=config.hedge_initial_delay_ms,
+        timeout_seconds=config.timeout_seconds,
+        max_retries=config.max_retries,
+        backoff_seconds=settings.http.retry_backoff_seconds,
+        max_retry_after_seconds=config.max_retry_after_seconds,
+        budget=RetryBudget(
+            ratio=config.retry_budget_ratio,
+            max_tokens=config.retry_budget_max_tokens,
+        ),
+    )
+    # Retries are left to the hedger, which keeps them within the budget.
+    return GroqTranscriber(
+        api_client=groq_client.with_options(max_retries=0),
+        model_name=config.model,
+        hedger=hedger,
+    )
@@ -0,0 +1,292 @@
+import asyncio
+import random
+import time
+from collections import deque
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Awaitable, Callable, TypeVar
+
+import groq
+import httpx
+import logfire
+import numpy as np
+from loguru import logger
+
+T = TypeVar("T")
+
+_hedge_counter = logfire.metric_counter(
+    "stt.hedges", description="Duplicate STT requests sent after the hedge delay"
+)
+_hedge_win_counter = logfire.metric_counter(
+    "stt.hedge_wins", description="Hedged STT requests that answered first"
+)
+_retry_counter = logfire.metric_counter(
+    "stt.retries", description="STT requests retried after a failure"
+)
+
+
+def is_retryable(error: BaseException) -> bool:
+    """Failures that may succeed when the request is sent again."""
+    if isinstance(error, (groq.APIConnectionError, httpx.TransportError, TimeoutError)):
+        return True
+    status = getattr(error, "status_code", None)
+    return status is not None and (status in (408, 409, 429) or status >= 500)
+
+
+def retry_after_seconds(error: BaseException) -> float | None:
+    """
+    Delay asked for by the `retry-after-ms` or `retry-after` header of a
+    failed response, in seconds or as an HTTP date.
+    """
+    response = getattr(error, "response", None)
+    if not isinstance(response, httpx.Response):
+        return None
+    headers = response.headers
+    try:
+        if "retry-after-ms" in headers:
+            return max(0.0, float(headers["retry-after-ms"]) / 1000)
+        if "retry-after" in headers:
+            value = headers["retry-after"]
+            try:
+                return max(0.0, float(value))
+            except ValueError:
+                at = parsedate_to_datetime(value)
+                return max(0.0, (at - datetime.now(timezone.utc)).total_seconds())
+    except (TypeError, ValueError):
+        pass
+    return None
+
+
+class LatencyTracker:
+    """
+    Sliding window of request latencies.
+
+    Args:
+        window: Latencies kept.
+    """
+
+    def __init__(self, window: int = 200) -> None:
+        self.samples: deque[float] = deque(maxlen=window)
+
+    def record(self, seconds: float) -> None:
+        self.samples.append(seconds)
+
+    def quantile(self, q: float) -> float | None:
+        if not self.samples:
+            return None
+        return float(np.quantile(np.fromiter(self.samples, dtype=np.float64), q))
+
+
+class RetryBudget:
+    """
+    Caps hedges and retries to a fraction of the requests.
+
+    Each request earns `ratio` tokens, up to `max_tokens`; a hedge or a
+    retry spends one. During an outage the budget runs dry and extra
+    requests stop, instead of multiplying the load on a struggling server.
+
+    Args:
+        ratio: Extra requests allowed per request.
+        max_tokens: Tokens saved up while things go well.
+    """
+
+    def __init__(self, ratio: float = 0.1, max_tokens: float = 10.0) -> None:
+        self.ratio = ratio
+        self.max_tokens = max_tokens
+        self.tokens = max_tokens
+
+    def deposit(self) -> None:
+        self.tokens = min(self.max_tokens, self.tokens + self.ratio)
+
+    def withdraw(self) -> bool:
+        if self.tokens < 1:
+            return False
+        self.tokens -= 1
+        return True
+
+
+@dataclass
+class HedgeStats:
+    requests: int = 0
+    hedges: int = 0
+    hedge_wins: int = 0
+    retries: int = 0
+    budget_exhausted: int = 0
+    rate_limited: int = 0
+    failures: int = 0
+
+    def snapshot(self) -> dict[str, float]:
+        return {
+            "requests": self.requests,
+            "hedges": self.hedges,
+            "hedge_wins": self.hedge_wins,
+            "hedge_rate": round(self.hedges / self.requests, 3) if self.requests else 0.0,
+            "win_rate": round(self.hedge_wins / self.hedges, 3) if self.hedges else 0.0,
+            "retries": self.retries,
+            "budget_exhausted": self.budget_exhausted,
+            "rate_limited": self.rate_limited,
+            "failures": self.failures,
+        }
+
+
+class Hedger:
+    """
+    Sends a request again when the first attempt is slower than usual.
+
+    Once an attempt has been pending for the `quantile` of recent latencies
+    (`initial_delay_ms` until `min_samples` are known), a duplicate is sent;
+    whichever answers first wins and the other is cancelled. Failed
+    attempts are retried after the server's `retry-after` delay or a
+    jittered backoff. Hedges and retries draw on a shared `RetryBudget`.
+    A rate-limited response also holds back new requests and hedges until
+    its `retry-after` delay has passed.
+
+    Args:
+        quantile: Latency quantile after which to hedge.
+        min_samples: Latencies needed before the quantile is trusted.
+        initial_delay_ms: Hedge delay until then.
+        timeout_seconds: Limit of a single attempt.
+        max_retries: Retries after failed attempts.
+        backoff_seconds: Base delay of the retry backoff.
+        max_retry_after_seconds: Longest server-requested delay honoured;
+            a longer one fails the request.
+        budget: Shared budget of hedges and retries.
+    """
+
+    def __init__(
+        self,
+        quantile: float = 0.95,
+        min_samples: int = 20,
+        initial_delay_ms: float = 1500,
+        timeout_seconds: float = 15,
+        max_retries: int = 2,
+        backoff_seconds: float = 0.2,
+        max_retry_after_seconds: float = 5,
+        budget: RetryBudget | None = None,
+    ) -> None:
+        self.quantile = quantile
+        self.min_samples = min_samples
+        self.initial_delay = initial_delay_ms / 1000
+        self.timeout = timeout_seconds
+        self.max_retries = max_retries
+        self.backoff = backoff_seconds
+        self.max_retry_after = max_retry_after_seconds
+        self.budget = budget or RetryBudget()
+        self.latency = LatencyTracker()
+        self.stats = HedgeStats()
+        self._paused_until = 0.0
+
+    def hedge_delay(self) -> float:
+        if len(self.latency.samples) < self.min_samples:
+            return self.initial_delay
+        return self.latency.quantile(self.quantile)
+
+    async def _attempt(self, request: Callable[[], Awaitable[T]]) -> tuple[T, float]:
+        started = time.perf_counter()
+        async with asyncio.timeout(self.timeout):
+            result = await request()
+        return result, time.perf_counter() - started
+
+    def _pause(self, seconds: float) -> None:
+        self._paused_until = max(self._paused_until, time.perf_counter() + seconds)
+
+    async def call(self, request: Callable[[], Awaitable[T]]) -> T:
+        """
+        Run `request`, hedging and retrying it as needed.
+
+        Raises:
+            Exception: The last failure once retries are exhausted.
+        """
+        paused = self._paused_until - time.perf_counter()
+        if paused > 0:
+            await asyncio.sleep(min(paused, self.max_retry_after))
+
+        self.stats.requests += 1
+        self.budget.deposit()
+        pending = {asyncio.create_task(self._attempt(request))}
+        hedge_at = time.perf_counter() + self.hedge_delay()
+        hedged = False
+        hedge = None
+        retries = 0
+
+        try:
+            while True:
+                wait = None if hedged else max(0.0, hedge_at - time.perf_counter())
+                done, pending = await asyncio.wait(
+                    pending, timeout=wait, return_when=asyncio.FIRST_COMPLETED
+                )
+
+                if not done:
+                    hedged = True
+                    hedge = self._hedge(request)
+                    if hedge is not None:
+                        pending.add(hedge)
+                    continue
+
+                for task in done:
+                    if task.exception() is None:
+                        result, seconds = task.result()
+                        self.latency.record(seconds)
+                        if task is hedge:
+                            self.stats.hedge_wins += 1
+                            _hedge_win_counter.add(1)
+                        return result
+                    error = task.exception()
+
+                if pending:
+                    # Another attempt is still running; it may yet answer.
+                    continue
+
+                delay = self._retry_delay(error, retries)
+                if delay is None:
+                    self.stats.failures += 1
+                    raise error
+                retries += 1
+                self.stats.retries += 1
+                _retry_counter.add(1)
+                logger.warning(f"Retrying transcription in {delay:.2f}s after: {error}")
+                await asyncio.sleep(delay)
+                # Retries are not hedged.
+                pending = {asyncio.create_task(self._attempt(request))}
+                hedged = True
+        finally:
+            for task in pending:
+                task.cancel()
+
+    def _hedge(self, request: Callable[[], Awaitable[T]]) -> asyncio.Task | None:
+        if self._paused_until > time.perf_counter():
+            return None
+        if not self.budget.withdraw():
+            self.stats.budget_exhausted += 1
+            return None
+        self.stats.hedges += 1
+        _hedge_counter.add(1)
+        return asyncio.create_task(self._attempt(request))
+
+    def _retry_delay(self, error: BaseException, retries: int) -> float | None:
+        """Delay before retrying a failed request, or None to give up."""
+        if not is_retryable(error) or retries >= self.max_retries:
+            return None
+        retry_after = retry_after_seconds(error)
+        if getattr(error, "status_code", None) == 429:
+            self.stats.rate_limited += 1
+            if retry_after is not None:
+                if retry_after > self.max_retry_after:
+                    self._pause(retry_after)
+                    return None
+                self._pause(retry_after)
+        if not self.budget.withdraw():
+            self.stats.budget_exhausted += 1
+            return None
+        if retry_after is not None:
+            return min(retry_after, self.max_retry_after)
+        return random.uniform(0, self.backoff * 2 ** retries)
+
+    def snapshot(self) -> dict[str, float]:
+        delay = self.hedge_delay()
+        return {
+            **self.stats.snapshot(),
+            "hedge_delay_ms": round(delay * 1000, 1),
+            "retry_tokens": round(self.budget.tokens, 2),
+        }
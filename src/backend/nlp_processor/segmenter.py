@@ -0,0 +1,165 @@
+ABBREVIATIONS = frozenset(
+    {
+        "mr", "mrs", "ms", "dr", "prof", "sr", "jr", "st", "no", "nos", "vs",
+        "rs", "inr", "approx", "dept", "govt", "ltd", "pvt", "co", "inc",
+        "a/c", "acct", "e.g", "i.e", "a.m", "p.m", "jan", "feb", "mar", "apr",
+        "jun", "jul", "aug", "sep", "sept", "oct", "nov", "dec",
+    }
+)
+
+SENTENCE_ENDS = frozenset(".!?…")
+HARD_ENDS = frozenset(";\n")
+CLOSERS = frozenset("\"')]”’")
+
+# Boundary kinds, from strongest to weakest.
+SENTENCE, CLAUSE, SPACE = 0, 1, 2
+
+# Returned when the next character is needed to classify a boundary.
+_NEED_MORE = object()
+
+
+class TextSegmenter:
+    """
+    Incremental segmenter that turns streamed LLM text deltas into chunks
+    worth one TTS request each.
+
+    Chunks end on sentence boundaries. Decimal points ("₹1,234.50"),
+    thousands separators, times ("10:30") and common abbreviations ("Rs.",
+    "e.g.") are not boundaries. The first chunk of a reply is emitted at
+    the first sentence end, or at a clause boundary once it reaches
+    `first_chunk_chars`, so that audio starts quickly. Later chunks collect
+    whole sentences up to `min_chunk_chars` and are only split inside a
+    sentence once they exceed `max_chunk_chars`.
+
+    Each character is scanned once and the pending text never exceeds
+    `max_chunk_chars` plus one delta, so the total cost is linear in the
+    length of the stream.
+
+    Args:
+        first_chunk_chars: Size limit of the first chunk.
+        min_chunk_chars: Size later chunks grow to before a sentence end
+            emits them.
+        max_chunk_chars: Size limit of later chunks.
+    """
+
+    def __init__(
+        self,
+        first_chunk_chars: int = 60,
+        min_chunk_chars: int = 120,
+        max_chunk_chars: int = 300,
+    ) -> None:
+        self.first_chunk_chars = first_chunk_chars
+        self.min_chunk_chars = min_chunk_chars
+        self.max_chunk_chars = max_chunk_chars
+        self.reset()
+
+    def reset(self) -> None:
+        """Start a new reply; its first chunk will be short again."""
+        self._text = ""
+        self._scanned = 0
+        self._first = True
+        # Position just after the latest boundary of each kind, or 0.
+        self._last = [0, 0, 0]
+
+    def push(self, delta: str) -> list[str]:
+        """
+        Feed the next text delta.
+
+        Args:
+            delta: Text appended to the stream.
+
+        Returns:
+            Chunks completed by this delta, in order.
+        """
+        self._text += delta
+        chunks: list[str] = []
+
+        while self._scanned < len(self._text):
+            i = self._scanned
+            kind = self._boundary_at(i)
+            if kind is _NEED_MORE:
+                break
+            self._scanned = i + 1
+            if kind is not None:
+                self._last[kind] = i + 1
+
+            min_chars, max_chars = (
+                (1, self.first_chunk_chars)
+                if self._first
+                else (self.min_chunk_chars, self.max_chunk_chars)
+            )
+            if kind == SENTENCE and i + 1 >= min_chars:
+                self._emit(i + 1, chunks)
+            elif kind == CLAUSE and self._first and i + 1 >= max_chars:
+                self._emit(i + 1, chunks)
+            elif i + 1 >= max_chars:
+                end = next((p for p in self._last if p > 0), i + 1)
+                self._emit(end, chunks)
+
+        return chunks
+
+    def flush(self) -> list[str]:
+        """
+        End the reply and return whatever text is still pending.
+        """
+        chunk = self._text.strip()
+        self.reset()
+        return [chunk] if any(c.isalnum() for c in chunk) else []
+
+    def _emit(self, end: int, chunks: list[str]) -> None:
+        chunk = self._text[:end].strip()
+        if not any(c.isalnum() for c in chunk):
+            # Nothing to speak yet (e.g. a lone "1."); keep it for the next chunk.
+            return
+        chunks.append(chunk)
+        self._first = False
+        self._text = self._text[end:]
+        self._scanned -= end
+        self._last = [max(p - end, 0) for p in self._last]
+
+    def _boundary_at(self, i: int) -> int | object | None:
+        text = self._text
+        char = text[i]
+
+        if char in HARD_ENDS:
+            return SENTENCE
+        if char.isspace():
+            return SPACE
+        if char not in SENTENCE_ENDS and char not in CLOSERS and char not in ",:":
+            return None
+
+        # Everything else depends on the following character.
+        if i + 1 >= len(text):
+            return _NEED_MORE
+        following = text[i + 1]
+
+        if char in CLOSERS:
+            if i > 0 and text[i - 1] in SENTENCE_ENDS and not following.isalnum():
+                return SENTENCE
+            return None
+        if char in ",:":
+            # "1,234" and "10:30" are numbers, not clauses.
+            if following.isdigit():
+                return None
+            return SENTENCE if char == ":" and following == "\n" else CLAUSE
+        if following in CLOSERS:
+            return None
+        if char != ".":
+            return SENTENCE
+        if not following.isspace():
+            return None
+        return None if self._is_abbreviation(i) else SENTENCE
+
+    def _is_abbreviation(self, dot: int) -> bool:
+        start = dot
+        while start > 0 and not self._text[start - 1].isspace():
+            start -= 1
+        word = self._text[start:dot].lower().lstrip("(\"'")
+        # Single letters are initials ("S. Ragipani"); a number opening a
+        # line is a list marker ("1. Amazon").
+        return (
+            word in ABBREVIATIONS
+            or (len(word) == 1 and word.isalpha())
+            or (word.isdigit() and (start == 0 or self._text[start - 1] == "\n"))
+        )
+
@@ -1,7 +1,10 @@
 from io import BytesIO
+from typing import Awaitable, Protocol
 
 from groq import AsyncGroq
 
+from nlp_processor.hedging import Hedger
+
 
 async def transcribe_audio_data(
     audio_data: bytes,
@@ -9,6 +12,7 @@ async def transcribe_audio_data(
     model_name: str,
     temperature: float = 0.0,
     language: str = "en",
+    file_name: str = "audio.wav",
 ) -> str:
     """
     Transcribe audio to text using the Groq model
@@ -19,12 +23,13 @@ async def transcribe_audio_data(
         model_name: Name of the Groq model to use
         temperature: Temperature for sampling
         language: Language of the audio
+        file_name: File name whose extension tells Groq the container format
 
     Returns:
         Transcribed text
     """
     with BytesIO(initial_bytes=audio_data) as audio_stream:
-        audio_stream.name = "audio.wav"
+        audio_stream.name = file_name
         response = await api_client.audio.transcriptions.create(
             model=model_name,
             file=audio_stream,
@@ -33,3 +38,65 @@ async def transcribe_audio_data(
         )
         text = response.text.strip()
         return text
+
+
+class Transcriber(Protocol):
+    """Speech-to-text engine shared by all sessions."""
+
+    async def start(self) -> None:
+        """Prepare the engine, e.g. load models."""
+
+    async def transcribe(self, audio: bytes, file_name: str) -> str:
+        """Transcribe one utterance; the file name tells its container."""
+
+    def snapshot(self) -> dict:
+        """Runtime metrics."""
+
+    async def aclose(self) -> None:
+        """Release the engine."""
+
+
+class GroqTranscriber:
+    """
+    Transcribes each utterance with a request to Groq, hedged and retried
+    by `hedger` if given.
+
+    Args:
+        api_client: Groq API client; its own retries should be disabled
+            when hedging.
+        model_name: Name of the Groq model to use.
+        hedger: Hedging and retry policy.
+    """
+
+    def __init__(
+        self, api_client: AsyncGroq, model_name: str, hedger: Hedger | None = None
+    ) -> None:
+        self.api_client = api_client
+        self.model_name = model_name
+        self.hedger = hedger
+
+    async def start(self) -> None:
+        pass
+
+    async def transcribe(self, audio: bytes, file_name: str) -> str:
+        def request() -> Awaitable[str]:
+            return transcribe_audio_data(
+                audio_data=audio,
+                api_client=self.api_client,
+                model_name=self.model_name,
+                file_name=file_name,
+            )
+
+        if self.hedger is None:
+            return await request()
+        return await self.hedger.call(request)
+
+    def snapshot(self) -> dict:
+        snapshot = {"engine": "groq", "model": self.model_name}
+        if self.hedger is not None:
+            snapshot["hedging"] = self.hedger.snapshot()
+        return snapshot
+
+    async def aclose(self) -> None:
+        # The client is shared with the agent and closed with it.
+        pass
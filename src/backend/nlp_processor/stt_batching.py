@@ -0,0 +1,339 @@
+import asyncio
+import importlib
+import io
+import multiprocessing
+import subprocess
+import time
+import wave
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from typing import Callable
+
+import numpy as np
+from loguru import logger
+
+# Sample rate Whisper-style models are trained on.
+SAMPLE_RATE = 16_000
+
+# Transcribes a zero-padded (batch, samples) float32 array given the length
+# of each row, returning one text per row.
+BatchEngine = Callable[[np.ndarray, np.ndarray], list[str]]
+
+# The engine of this worker process, loaded once by `_init_worker`.
+_engine: BatchEngine | None = None
+
+
+def decode_audio(data: bytes, file_name: str) -> np.ndarray:
+    """
+    Decode an utterance to mono float32 samples at `SAMPLE_RATE`.
+
+    16 kHz mono PCM16 WAV is read directly; anything else goes through
+    ffmpeg.
+
+    Raises:
+        ValueError: If the audio cannot be decoded.
+    """
+    if data[:4] == b"RIFF":
+        with wave.open(io.BytesIO(data)) as wav:
+            if (
+                wav.getframerate() == SAMPLE_RATE
+                and wav.getnchannels() == 1
+                and wav.getsampwidth() == 2
+            ):
+                pcm = np.frombuffer(wav.readframes(wav.getnframes()), dtype="<i2")
+                return pcm.astype(np.float32) / 32768.0
+
+    try:
+        process = subprocess.run(
+            [
+                "ffmpeg", "-hide_banner", "-loglevel", "error",
+                "-i", "pipe:0",
+                "-ac", "1", "-ar", str(SAMPLE_RATE), "-f", "f32le",
+                "pipe:1",
+            ],
+            input=data,
+            capture_output=True,
+        )
+    except FileNotFoundError as e:
+        raise ValueError(f"Decoding {file_name} requires ffmpeg") from e
+    if process.returncode != 0:
+        raise ValueError(f"Cannot decode {file_name}: {process.stderr.decode()}")
+    return np.frombuffer(process.stdout, dtype="<f4")
+
+
+def pad_batch(samples: list[np.ndarray]) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Stack utterances into a zero-padded (batch, longest) array.
+
+    Returns:
+        The padded batch and the length of each utterance.
+    """
+    lengths = np.array([len(row) for row in samples], dtype=np.int64)
+    batch = np.zeros((len(samples), int(lengths.max(initial=0))), dtype=np.float32)
+    for row, audio in zip(batch, samples):
+        row[: len(audio)] = audio
+    return batch, lengths
+
+
+def load_engine(spec: str, model_name: str) -> BatchEngine:
+    """
+    Build the engine named by `spec`, a "module:factory" path. The factory
+    is called with the model name.
+    """
+    module_name, _, factory = spec.partition(":")
+    return getattr(importlib.import_module(module_name), factory)(model_name)
+
+
+def load_whisper(model_name: str) -> BatchEngine:
+    """
+    Whisper through Hugging Face `transformers`, batched on the CPU.
+
+    Requires the optional `transformers` and `torch` dependencies.
+    """
+    import torch
+    from transformers import WhisperForConditionalGeneration, WhisperProcessor
+
+    processor = WhisperProcessor.from_pretrained(model_name)
+    model = WhisperForConditionalGeneration.from_pretrained(model_name).eval()
+    english_only = model_name.endswith(".en")
+
+    def transcribe(batch: np.ndarray, lengths: np.ndarray) -> list[str]:
+        features = processor(
+            [row[:length] for row, length in zip(batch, lengths)],
+            sampling_rate=SAMPLE_RATE,
+            return_tensors="pt",
+        ).input_features
+        with torch.inference_mode():
+            if english_only:
+                tokens = model.generate(features)
+            else:
+                tokens = model.generate(features, language="en", task="transcribe")
+        return [
+            text.strip()
+            for text in processor.batch_decode(tokens, skip_special_tokens=True)
+        ]
+
+    return transcribe
+
+
+def _init_worker(spec: str, model_name: str) -> None:
+    global _engine
+    _engine = load_engine(spec, model_name)
+
+
+def _ready() -> bool:
+    return _engine is not None
+
+
+def _transcribe_batch(
+    utterances: list[tuple[bytes, str]],
+) -> list[tuple[str | None, str | None]]:
+    """Runs in a worker: (text, error) for each utterance of a batch."""
+    results: list[tuple[str | None, str | None]] = [(None, None)] * len(utterances)
+    decoded, rows = [], []
+    for index, (data, file_name) in enumerate(utterances):
+        try:
+            decoded.append(decode_audio(data, file_name))
+            rows.append(index)
+        except ValueError as e:
+            results[index] = (None, str(e))
+    if decoded:
+        batch, lengths = pad_batch(decoded)
+        for index, text in zip(rows, _engine(batch, lengths)):
+            results[index] = (text, None)
+    return results
+
+
+@dataclass
+class _Pending:
+    audio: bytes
+    file_name: str
+    future: asyncio.Future
+    queued_at: float = field(default_factory=time.perf_counter)
+
+
+def _cancel_all(batch: list[_Pending]) -> None:
+    for pending in batch:
+        if not pending.future.done():
+            pending.future.cancel()
+
+
+@dataclass
+class BatchStats:
+    batches: int = 0
+    utterances: int = 0
+    largest_batch: int = 0
+    failures: int = 0
+    queue_ms: float = 0.0
+    inference_ms: float = 0.0
+
+    def snapshot(self) -> dict[str, float]:
+        batches = self.batches or 1
+        return {
+            "batches": self.batches,
+            "utterances": self.utterances,
+            "avg_batch_size": round(self.utterances / batches, 2),
+            "largest_batch": self.largest_batch,
+            "failures": self.failures,
+            "avg_queue_ms": round(self.queue_ms / (self.utterances or 1), 1),
+            "avg_inference_ms": round(self.inference_ms / batches, 1),
+        }
+
+
+class BatchingTranscriber:
+    """
+    Transcribes utterances of all sessions with a local engine in batches.
+
+    Utterances queue up until `window_ms` after the first one arrived or
+    until `max_batch` are waiting, whichever comes first. Each batch is
+    decoded, padded and transcribed with one inference call in a worker
+    process, and every caller gets its own text back. At most one batch
+    per worker runs at a time; while all workers are busy new utterances
+    keep queueing, so batches grow with load instead of queueing up in
+    the pool.
+
+    Args:
+        engine: "module:factory" path of the `BatchEngine` factory.
+        model_name: Model the factory loads in each worker.
+        window_ms: Time to wait for more utterances after the first.
+        max_batch: Largest batch.
+        workers: Worker processes.
+    """
+
+    def __init__(
+        self,
+        engine: str,
+        model_name: str,
+        window_ms: float = 20,
+        max_batch: int = 8,
+        workers: int = 1,
+    ) -> None:
+        self.engine = engine
+        self.model_name = model_name
+        self.window = window_ms / 1000
+        self.max_batch = max_batch
+        self.workers = workers
+        self.stats = BatchStats()
+        self._queue: asyncio.Queue[_Pending] = asyncio.Queue()
+        self._slots = asyncio.Semaphore(workers)
+        self._executor: ProcessPoolExecutor | None = None
+        self._scheduler: asyncio.Task | None = None
+        self._running: set[asyncio.Task] = set()
+
+    async def start(self) -> None:
+        """Start the worker processes and load the engine in each of them."""
+        # Spawned rather than forked: the server process runs threads.
+        self._executor = ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker,
+            initargs=(self.engine, self.model_name),
+        )
+        loop = asyncio.get_running_loop()
+        await asyncio.gather(
+            *(loop.run_in_executor(self._executor, _ready) for _ in range(self.workers))
+        )
+        self._scheduler = asyncio.create_task(self._schedule())
+
+    async def transcribe(self, audio: bytes, file_name: str) -> str:
+        """
+        Raises:
+            ValueError: If the audio cannot be decoded.
+        """
+        future = asyncio.get_running_loop().create_future()
+        self._queue.put_nowait(_Pending(audio, file_name, future))
+        return await future
+
+    async def _schedule(self) -> None:
+        batch: list[_Pending] = []
+        try:
+            await self._schedule_batches(batch)
+        except asyncio.CancelledError:
+            # The batch being gathered has left the queue.
+            _cancel_all(batch)
+            raise
+
+    async def _schedule_batches(self, batch: list[_Pending]) -> None:
+        while True:
+            batch.clear()
+            batch.append(await self._queue.get())
+            deadline = time.perf_counter() + self.window
+            while len(batch) < self.max_batch:
+                remaining = deadline - time.perf_counter()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), remaining))
+                except TimeoutError:
+                    break
+
+            await self._slots.acquire()
+            # Utterances that arrived while every worker was busy join in.
+            while len(batch) < self.max_batch and not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+            # Callers that gave up, e.g. cancelled interim transcriptions.
+            ready = [pending for pending in batch if not pending.future.done()]
+            if not ready:
+                self._slots.release()
+                continue
+
+            task = asyncio.create_task(self._run(ready))
+            self._running.add(task)
+            task.add_done_callback(self._running.discard)
+
+    async def _run(self, batch: list[_Pending]) -> None:
+        started = time.perf_counter()
+        self.stats.batches += 1
+        self.stats.utterances += len(batch)
+        self.stats.largest_batch = max(self.stats.largest_batch, len(batch))
+        self.stats.queue_ms += sum((started - p.queued_at) * 1000 for p in batch)
+        try:
+            results = await asyncio.get_running_loop().run_in_executor(
+                self._executor,
+                _transcribe_batch,
+                [(pending.audio, pending.file_name) for pending in batch],
+            )
+        except asyncio.CancelledError:
+            # Shutting down: callers must not wait for a result that never comes.
+            _cancel_all(batch)
+            raise
+        except Exception as e:
+            self.stats.failures += 1
+            logger.error(f"❌ ERROR in batched transcription: {e}")
+            for pending in batch:
+                if not pending.future.done():
+                    pending.future.set_exception(e)
+            return
+        finally:
+            self.stats.inference_ms += (time.perf_counter() - started) * 1000
+            self._slots.release()
+
+        for pending, (text, error) in zip(batch, results):
+            if pending.future.done():
+                continue
+            if error is not None:
+                pending.future.set_exception(ValueError(error))
+            else:
+                pending.future.set_result(text)
+
+    def snapshot(self) -> dict:
+        return {
+            "engine": "local",
+            "queued": self._queue.qsize(),
+            "window_ms": self.window * 1000,
+            "max_batch": self.max_batch,
+            "workers": self.workers,
+            **self.stats.snapshot(),
+        }
+
+    async def aclose(self) -> None:
+        if self._scheduler is not None:
+            self._scheduler.cancel()
+        for task in list(self._running):
+            task.cancel()
+        while not self._queue.empty():
+            pending = self._queue.get_nowait()
+            if not pending.future.done():
+                pending.future.cancel()
+        if self._executor is not None:
+            await asyncio.to_thread(self._executor.shutdown, True, cancel_futures=True)
@@ -1,6 +1,20 @@
-import io
-from typing import AsyncIterator
-from gtts import gTTS
+import asyncio
+import time
+from typing import AsyncIterator, Callable
+
+from nlp_processor.audio_codecs import (
+    group_frames,
+    iter_mp3_frames,
+    iter_ogg_pages,
+    iter_pcm16_frames,
+    transcode_mp3,
+)
+from nlp_processor.segmenter import TextSegmenter
+
+# Called with a segment, the index of one of its parts, the part's size in
+# bytes and the seconds spent waiting for it.
+SpeechHook = Callable[[str, int, int, float], None]
+
 
 class TextToSpeech:
     def __init__(
@@ -8,46 +22,74 @@ class TextToSpeech:
         voice: str = "en",
         response_format: str = "mp3",
         speed: float = 1.0,
-        buffer_size: int = 128,
-        sentence_endings: tuple[str, ...] = ("?", "!", ";", ":", "\n"),
+        first_chunk_chars: int = 60,
+        min_chunk_chars: int = 120,
+        max_chunk_chars: int = 300,
         chunk_size: int = 1024 * 5,
+        sample_rate: int = 24000,
+        frame_ms: int = 20,
     ) -> None:
         self.voice = voice
         self.response_format = response_format
         self.speed = speed
-        self.buffer_size = buffer_size
-        self.sentence_endings = sentence_endings
         self.chunk_size = chunk_size
-        self._buffer = ""
+        self.sample_rate = sample_rate
+        self.frame_ms = frame_ms
+        self.on_speech: SpeechHook | None = None
+        self._segmenter = TextSegmenter(
+            first_chunk_chars=first_chunk_chars,
+            min_chunk_chars=min_chunk_chars,
+            max_chunk_chars=max_chunk_chars,
+        )
 
     async def __aenter__(self) -> "TextToSpeech":
         return self
 
     async def feed(self, text: str) -> AsyncIterator[bytes]:
-        self._buffer += text
-        if len(self._buffer) >= self.buffer_size or any(
-            self._buffer.endswith(se) for se in self.sentence_endings
-        ):
-            async for chunk in self.flush():
+        for segment in self._segmenter.push(text):
+            async for chunk in self._send_audio(segment):
                 yield chunk
 
     async def flush(self) -> AsyncIterator[bytes]:
-        if self._buffer:
-            async for chunk in self._send_audio(self._buffer):
+        for segment in self._segmenter.flush():
+            async for chunk in self._send_audio(segment):
                 yield chunk
-            self._buffer = ""
+
+    async def _synthesize(self, text: str) -> AsyncIterator[bytes]:
+        """
+        Yield the MP3 audio of each part gTTS requests (up to 100
+        characters of text) as soon as it has been downloaded, instead of
+        buffering the whole segment.
+        """
+        from gtts import gTTS  # deferred: only needed once a reply is spoken
+
+        parts = gTTS(text=text, lang=self.voice, slow=False).stream()
+        # Each part is a blocking HTTP request; keep them off the loop.
+        while (part := await asyncio.to_thread(next, parts, None)) is not None:
+            yield part
 
     async def _send_audio(self, text: str) -> AsyncIterator[bytes]:
-        tts = gTTS(text=text, lang=self.voice, slow=False)
-        buffer = io.BytesIO()
-        tts.write_to_fp(buffer)
-        buffer.seek(0)
-
-        while True:
-            chunk = buffer.read(self.chunk_size)
-            if not chunk:
-                break
-            yield chunk
+        index = 0
+        started = time.perf_counter()
+        async for audio in self._synthesize(text):
+            if self.on_speech is not None:
+                self.on_speech(text, index, len(audio), time.perf_counter() - started)
+            index += 1
+
+            # Chunks always end on a codec frame boundary so that the client
+            # can decode and play each one as soon as it arrives.
+            if self.response_format == "pcm16":
+                audio = await transcode_mp3(audio, "pcm16", self.sample_rate)
+                frames = iter_pcm16_frames(audio, self.sample_rate, self.frame_ms)
+            elif self.response_format == "opus":
+                audio = await transcode_mp3(audio, "opus", self.sample_rate)
+                frames = iter_ogg_pages(audio)
+            else:
+                frames = iter_mp3_frames(audio)
+
+            for chunk in group_frames(frames, self.chunk_size):
+                yield chunk
+            started = time.perf_counter()
 
     async def __aexit__(self, exc_type, exc_value, exc_tb):
         pass
@@ -2,6 +2,8 @@ import asyncio
 import aiosqlite
 from datetime import datetime
 
+from customer_transaction_db.schema import INDEXES, SEARCH_INDEXES, SEARCH_TABLES
+
 DB_PATH = "customer_transaction_db/transactions.db"
 
 USERS = ["Shivamani", "Mani", "Razak", "Nandhu", "Sai", "Aparna"]
@@ -50,14 +52,16 @@ SCHEMES = [
 ]
 
 
-async def reset_db() -> None:
-    db = await aiosqlite.connect(DB_PATH)
+async def reset_db(db_path: str = DB_PATH) -> None:
+    db = await aiosqlite.connect(db_path)
     db.row_factory = aiosqlite.Row
 
     # enable foreign key constraints
     await db.execute("PRAGMA foreign_keys = ON;")
 
     print("Dropping old tables if they exist...")
+    for index, _, _ in SEARCH_TABLES:
+        await db.execute(f"DROP TABLE IF EXISTS {index};")
     await db.execute("DROP TABLE IF EXISTS bank_schemes;")
     await db.execute("DROP TABLE IF EXISTS transactions;")
     await db.execute("DROP TABLE IF EXISTS accounts;")
@@ -99,6 +103,7 @@ async def reset_db() -> None:
             txn_type TEXT NOT NULL,            -- 'debit' or 'credit'
             merchant_name TEXT,
             category TEXT,
+            external_id TEXT,                  -- id assigned by the upstream feed, if any
             FOREIGN KEY (account_id) REFERENCES accounts(id) ON DELETE CASCADE
         );
         """
@@ -118,6 +123,10 @@ async def reset_db() -> None:
         """
     )
 
+    # Created before the rows are inserted, so the triggers index them.
+    for statement in INDEXES + SEARCH_INDEXES:
+        await db.execute(statement)
+
     # Helpful view for quick balance lookup
     await db.execute(
         """
@@ -1,32 +1,66 @@
+import asyncio
+import hmac
+from datetime import datetime
 from pathlib import Path
+from uuid import UUID
 from dotenv import load_dotenv
 load_dotenv()
 
+import api.startup  # starts the startup clock before the heavy imports below
+
 import logfire
-from fastapi import Depends, FastAPI, WebSocket
+from fastapi import Depends, FastAPI, HTTPException, Query, Request, Response, WebSocket
+from fastapi.responses import StreamingResponse
 from starlette.websockets import WebSocketDisconnect
-from groq import AsyncGroq
 from loguru import logger
 from psycopg import AsyncConnection
-from pydantic import UUID4
 from pydantic_ai import Agent
 
+from api.audio_protocol import AudioChannel, ProtocolError, Utterance
+from api.events import EventStream
+from api.outbound import OutboundQueue, SlowConsumerError
+from api.recorder import SessionRecorder
 from api.dependencies import (
+    ConversationRef,
     get_agent,
+    get_audio_channel,
     get_agent_dependencies,
+    get_model_router,
+    get_outbound_queue,
     get_conversation_id,
     get_db_conn,
-    get_groq_client,
+    get_memory_accountant,
+    get_session_registry,
+    get_transcriber,
     get_tts_handler,
 )
 from api.lifespan import app_lifespan as lifespan
 
-from convo_history_db.actions import get_conversation_history, store_message
-from nlp_processor.speech_to_text import transcribe_audio_data
+from config.settings import get_settings
+from convo_history_db.actions import store_message
+from convo_history_db.export import (
+    MEDIA_TYPES,
+    Checkpoint,
+    ExportError,
+    ExportQuery,
+    create_encoder,
+    stream_export,
+)
+from customer_transaction_db.ingest import FORMATS as INGEST_FORMATS, IngestError
+from nlp_processor.speech_to_text import Transcriber
 from nlp_processor.text_to_speech import TextToSpeech
 
 from ai_services.agent import Dependencies
+from ai_services.routing import ModelRouter
+from ai_services.speculation import Speculator, ToolActivity
 from ai_services.utils import format_messages_for_agent
+from session_state.memory import (
+    MEMORY_SHED_CLOSE_CODE,
+    MemoryAccountant,
+    SessionMemoryExceeded,
+)
+from session_state.registry import SessionRegistry
+from session_state.tokens import sign_session_token
 
 app = FastAPI(
     title="Finvox AI Banking Assistant",
@@ -42,38 +76,254 @@ async def health() -> dict[str, str]:
     return {"status": "ok"}
 
 
+@app.get("/ready")
+async def ready(request: Request, response: Response) -> dict:
+    """
+    Readiness probe: 503 until warm-up has finished, with the startup profile.
+    """
+    profile = request.app.state.startup_profile
+    if not profile.ready:
+        response.status_code = 503
+    return {"status": "ready" if profile.ready else "warming_up", **profile.as_dict()}
+
+
+@app.get("/metrics")
+async def metrics(request: Request) -> dict:
+    """
+    Runtime metrics, grouped by subsystem.
+    """
+    return {
+        "http": request.app.state.http_transport.snapshot(),
+        "speculation": request.app.state.speculation_stats.snapshot(),
+        "routing": request.app.state.model_router.snapshot(),
+        "outbound": request.app.state.outbound_metrics.snapshot(),
+        "ingest": request.app.state.transaction_writer.stats.snapshot(),
+        "memory": request.app.state.memory_accountant.snapshot(),
+        "stt": request.app.state.transcriber.snapshot(),
+        "single_flight": request.app.state.single_flight.snapshot(),
+    }
+
+
+@app.get("/debug/event_loop")
+async def debug_event_loop(request: Request, top: int = 10) -> dict:
+    """
+    Event loop lag histogram and the code most often found blocking it.
+    Enabled with LOOP_MONITOR_ENABLED.
+    """
+    monitor = request.app.state.loop_monitor
+    if monitor is None:
+        raise HTTPException(status_code=404, detail="The loop monitor is disabled.")
+    return monitor.snapshot(top=top)
+
+
+def _authorise(request: Request, token: str, action: str) -> None:
+    supplied = request.headers.get("authorization", "").removeprefix("Bearer ")
+    if not token or not hmac.compare_digest(supplied, token):
+        raise HTTPException(status_code=403, detail=f"{action} is not authorised.")
+
+
+@app.get("/export/messages")
+async def export_messages(
+    request: Request,
+    format: str = "ndjson",
+    start: datetime | None = None,
+    end: datetime | None = None,
+    conversation_id: list[UUID] = Query(default=[]),
+    after_timestamp: datetime | None = None,
+    after_id: int = 0,
+) -> StreamingResponse:
+    """
+    Stream messages in NDJSON, CSV or Parquet, read through COPY in pages.
+
+    An interrupted download resumes with `after_timestamp` and `after_id`
+    set to the timestamp and id of the last row received.
+    """
+    settings = get_settings()
+    _authorise(request, settings.export.api_token, "Export")
+
+    try:
+        create_encoder(format)
+    except ExportError as e:
+        raise HTTPException(status_code=400, detail=str(e)) from e
+
+    chunks = stream_export(
+        pool=request.state.pool,
+        query=ExportQuery(
+            start=start, end=end, conversation_ids=tuple(conversation_id)
+        ),
+        fmt=format,
+        checkpoint=Checkpoint(timestamp=after_timestamp, id=after_id),
+        page_rows=settings.export.page_rows,
+    )
+    return StreamingResponse(
+        chunks,
+        media_type=MEDIA_TYPES[format],
+        headers={
+            "Content-Disposition": f'attachment; filename="messages.{format}"'
+        },
+    )
+
+
+@app.post("/ingest/transactions")
+async def ingest_transactions(request: Request, format: str = "ndjson") -> dict:
+    """
+    Ingest an NDJSON or CSV transaction feed streamed in the request body.
+
+    Records are deduplicated on `external_id`, so a failed upload can be
+    retried as a whole. Invalid records are reported and skipped.
+    """
+    settings = get_settings()
+    _authorise(request, settings.ingest.api_token, "Ingestion")
+    if settings.banking.backend != "sqlite":
+        raise HTTPException(
+            status_code=409, detail="Ingestion writes to the SQLite backend only."
+        )
+    if format not in INGEST_FORMATS:
+        raise HTTPException(
+            status_code=400, detail=f"format must be one of {INGEST_FORMATS}"
+        )
+
+    try:
+        report = await request.state.transaction_writer.ingest(
+            request.stream(), format
+        )
+    except (IngestError, UnicodeDecodeError) as e:
+        raise HTTPException(status_code=400, detail=str(e)) from e
+    return report.as_dict()
+
+
 @app.websocket("/voice_stream")
 async def voice_to_voice(
     websocket: WebSocket,
-    conversation_id: UUID4 = Depends(get_conversation_id),
+    conversation: ConversationRef = Depends(get_conversation_id),
     db_conn: AsyncConnection = Depends(get_db_conn),
-    groq_client: AsyncGroq = Depends(get_groq_client),
+    transcriber: Transcriber = Depends(get_transcriber),
     agent: Agent[Dependencies] = Depends(get_agent),
     agent_deps: Dependencies = Depends(get_agent_dependencies),
     tts_handler: TextToSpeech = Depends(get_tts_handler),
+    audio_channel: AudioChannel = Depends(get_audio_channel),
+    session_registry: SessionRegistry = Depends(get_session_registry),
+    model_router: ModelRouter = Depends(get_model_router),
+    outbound: OutboundQueue = Depends(get_outbound_queue),
+    memory_accountant: MemoryAccountant = Depends(get_memory_accountant),
 ):
     await websocket.accept()
+    conversation_id = conversation.id
     logger.info(f"New websocket connection for conversation {conversation_id}")
 
+    # Clients opt in to resumption with `?resumable=1` and reconnect with
+    # `?session_token=<token>` from the "Session:" message; a rejected token
+    # starts a new conversation.
+    resuming = conversation.resumed
+    if resuming:
+        session = await session_registry.resume(db_conn, conversation_id)
+    else:
+        session = await session_registry.create(conversation_id)
+
+    settings = get_settings()
+
+    memory = memory_accountant.open(conversation_id)
+    memory.add_probe("history", session.memory_bytes)
+    memory.add_probe("inbound_audio", lambda: audio_channel.buffered_bytes)
+    memory.add_probe("outbound", lambda: outbound.queued_bytes)
+
+    # Stage timings are always logged; the turns are only written to a
+    # session file when recording is enabled.
+    recording_path = None
+    if settings.recorder.enabled:
+        recording_path = Path(settings.recorder.directory) / f"{conversation_id}.rec"
+    recorder = SessionRecorder(conversation_id, path=recording_path)
+    tts_handler.on_speech = recorder.speech
+
+    # Clients opt in to the JSON event protocol (api/events.py) with `?events=1`.
+    events = EventStream(outbound, enabled="events" in websocket.query_params)
+
+    if resuming or "resumable" in websocket.query_params:
+        token = sign_session_token(
+            conversation_id,
+            settings.session.secret_key,
+            settings.session.token_ttl_seconds,
+        )
+        await events.session(token)
+
+    speculator: Speculator | None = None
+    partial_transcriptions: set[asyncio.Task] = set()
+
+    if settings.speculation.enabled:
+        speculator = Speculator(
+            start_run=lambda prompt: model_router.start(
+                agent=agent,
+                user_prompt=prompt,
+                message_history=format_messages_for_agent(session.history),
+                deps=agent_deps,
+            ),
+            threshold=settings.speculation.similarity_threshold,
+            stats=websocket.state.speculation_stats,
+        )
+
+    async def transcribe_partial(partial: Utterance) -> None:
+        try:
+            text = await transcriber.transcribe(partial.audio, partial.file_name)
+        except Exception as e:
+            logger.warning(f"Interim transcription failed: {e}")
+            return
+        if speculator is not None:
+            speculator.on_partial(text)
+        if text.strip():
+            await events.partial_transcript(text.strip())
+
+    def on_partial(partial: Utterance) -> None:
+        if agent_deps.prefetcher is not None:
+            agent_deps.prefetcher.refresh()
+        task = asyncio.create_task(transcribe_partial(partial))
+        partial_transcriptions.add(task)
+        task.add_done_callback(partial_transcriptions.discard)
+
     try:
         while True:
-            incoming_audio_bytes = await websocket.receive_bytes()
+            utterance = await audio_channel.receive_utterance(
+                on_partial=(
+                    on_partial if speculator is not None or events.enabled else None
+                ),
+                partial_every_ms=settings.speculation.partial_every_ms,
+            )
+
+            # Interim results are moot once the final audio is here
+            for task in list(partial_transcriptions):
+                task.cancel()
 
-            logger.info(f"Received audio bytes: {len(incoming_audio_bytes)} bytes")
+            # Load the customer snapshot while the audio is transcribed
+            if agent_deps.prefetcher is not None:
+                agent_deps.prefetcher.refresh()
+
+            if audio_channel.negotiated is not None:
+                tts_handler.response_format = audio_channel.negotiated.outbound_codec
+                tts_handler.sample_rate = audio_channel.negotiated.sample_rate
+
+            memory_accountant.enforce(memory, session)
+
+            logger.info(f"Received audio bytes: {len(utterance.audio)} bytes")
             logger.info("Starting transcription process")
+            recorder.begin_turn(utterance.audio, utterance.file_name)
+            await events.begin_turn(len(utterance.audio))
 
-            transcription = await transcribe_audio_data(
-                audio_data=incoming_audio_bytes,
-                api_client=groq_client,
-                model_name="whisper-large-v3-turbo",
+            transcription = await transcriber.transcribe(
+                utterance.audio, utterance.file_name
             )
 
             logger.info(f"STT Transcription: '{transcription}'")
+            recorder.transcribed(transcription)
 
             if not transcription or not transcription.strip():
+                if speculator is not None:
+                    await speculator.cancel()
+                await events.no_speech()
                 continue
 
-            await websocket.send_text(f"Client: {transcription}")
+            await events.final_transcript(transcription)
+
+            # History up to, but excluding, this turn's prompt
+            agent_messages = format_messages_for_agent(session.history)
 
             # Store user message
             await store_message(
@@ -82,25 +332,13 @@ async def voice_to_voice(
                 sender="user",
                 content=transcription,
             )
-
-            conversation_history = await get_conversation_history(
-                conn=db_conn,
-                conversation_id=conversation_id,
-            )
+            await session_registry.append(session, "user", transcription)
 
             # Count ONLY user messages
-            try:
-                user_msg_count = len([
-                    m for m in conversation_history
-                    if m.get("sender") == "user"
-                ])
-            except Exception:
-                user_msg_count = len(conversation_history)
+            user_msg_count = session.user_message_count
 
             logger.info(f"User message count: {user_msg_count}")
 
-            agent_messages = format_messages_for_agent(conversation_history)
-
             normalized = transcription.strip().lower()
 
             # Greeting detection
@@ -113,19 +351,26 @@ async def voice_to_voice(
 
             # ------ FIXED: Removed startswith("thank") ------
             if is_first_user_turn and is_greeting:
+                if speculator is not None:
+                    await speculator.cancel()
+
                 greeting = (
                     "Hello Shivamani! I can help you with your banking information. "
                     "You can ask me to check your balance, show your recent transactions, "
                     "or tell you the latest schemes from SBI or HDFC."
                 )
 
+                await events.delta(greeting)
                 async with tts_handler:
                     async for audio_chunk in tts_handler.feed(text=greeting):
-                        await websocket.send_bytes(audio_chunk)
+                        await events.audio(audio_chunk)
+                        await audio_channel.send_audio(audio_chunk)
                     async for audio_chunk in tts_handler.flush():
-                        await websocket.send_bytes(audio_chunk)
+                        await events.audio(audio_chunk)
+                        await audio_channel.send_audio(audio_chunk)
+                await audio_channel.end_audio()
 
-                await websocket.send_text(f"Agent: {greeting}")
+                await events.reply(greeting)
 
                 await store_message(
                     conn=db_conn,
@@ -133,6 +378,8 @@ async def voice_to_voice(
                     sender="agent",
                     content=greeting,
                 )
+                await session_registry.append(session, "agent", greeting)
+                await recorder.end_turn(greeting)
 
                 continue
             # ------ END FIX ------
@@ -141,21 +388,39 @@ async def voice_to_voice(
 
             full_response_text = ""
 
+            # Settled only now: a turn answered without the agent above
+            # counts as a miss.
+            speculative_run = None
+            if speculator is not None:
+                speculative_run = await speculator.resolve(transcription)
+
+            # A speculative run has buffered its output so far; nothing was
+            # spoken before the final transcript confirmed it.
+            agent_run = speculative_run or model_router.start(
+                agent=agent,
+                user_prompt=transcription,
+                message_history=agent_messages,
+                deps=agent_deps,
+            )
+
             async with tts_handler:
-                async with agent.run_stream(
-                    user_prompt=transcription,
-                    message_history=agent_messages,
-                    deps=agent_deps,
-                ) as result:
-                    async for message in result.stream_text(delta=True):
-                        full_response_text += message
-                        async for audio_chunk in tts_handler.feed(text=message):
-                            await websocket.send_bytes(audio_chunk)
+                async for message in agent_run.events():
+                    if isinstance(message, ToolActivity):
+                        await events.tool(message)
+                        continue
+                    full_response_text += message
+                    recorder.delta(message)
+                    await events.delta(message)
+                    async for audio_chunk in tts_handler.feed(text=message):
+                        await events.audio(audio_chunk)
+                        await audio_channel.send_audio(audio_chunk)
 
                 async for audio_chunk in tts_handler.flush():
-                    await websocket.send_bytes(audio_chunk)
+                    await events.audio(audio_chunk)
+                    await audio_channel.send_audio(audio_chunk)
+            await audio_channel.end_audio()
 
-            await websocket.send_text(f"Agent: {full_response_text}")
+            await events.reply(full_response_text)
 
             # Store agent response
             await store_message(
@@ -164,8 +429,26 @@ async def voice_to_voice(
                 sender="agent",
                 content=full_response_text,
             )
+            await session_registry.append(session, "agent", full_response_text)
+            recorder.tools(agent_run.messages)
+            await recorder.end_turn(full_response_text)
 
     except WebSocketDisconnect:
         logger.info("Client disconnected")
+    except ProtocolError as e:
+        logger.warning(f"Closing websocket after protocol error: {e}")
+        await outbound.close(code=1003)
+    except SlowConsumerError as e:
+        logger.warning(f"Disconnected slow client {conversation_id}: {e}")
+    except SessionMemoryExceeded as e:
+        logger.warning(f"Shedding session: {e}")
+        await outbound.close(code=MEMORY_SHED_CLOSE_CODE)
     except Exception as e:
         logger.exception(f"Error in websocket: {e}")
+    finally:
+        memory_accountant.close(memory)
+        logger.info(f"Session memory: {memory.snapshot()}")
+        for task in list(partial_transcriptions):
+            task.cancel()
+        if speculator is not None:
+            await speculator.cancel()
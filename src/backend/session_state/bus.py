@@ -0,0 +1,163 @@
+import asyncio
+import json
+from abc import ABC, abstractmethod
+from collections import defaultdict
+from typing import Any, Awaitable, Callable
+from uuid import uuid4
+
+from loguru import logger
+from psycopg import AsyncConnection
+from psycopg_pool import AsyncConnectionPool
+
+# Channels for cross-worker cache coherence. Every worker that keeps a local
+# copy of shared data subscribes to the matching channel and drops its copy
+# when another worker announces a change.
+SESSIONS_CHANNEL = "finvox_sessions"
+TOOL_RESULTS_CHANNEL = "finvox_tool_results"
+AUDIO_CHANNEL = "finvox_audio"
+
+Handler = Callable[[dict[str, Any]], Awaitable[None]]
+
+
+class EventBus(ABC):
+    """
+    Publish/subscribe bus for cache invalidation events.
+
+    Every event carries the `origin` worker ID so that subscribers can
+    ignore their own announcements.
+    """
+
+    def __init__(self) -> None:
+        self.worker_id = uuid4().hex
+        self._handlers: dict[str, list[Handler]] = defaultdict(list)
+
+    async def open(self) -> None:
+        """Start delivering events."""
+
+    async def close(self) -> None:
+        """Stop delivering events."""
+
+    def subscribe(self, channel: str, handler: Handler) -> None:
+        """
+        Register a coroutine to be called for every event on `channel`.
+
+        Args:
+            channel: Channel name.
+            handler: Coroutine receiving the event payload.
+        """
+        self._handlers[channel].append(handler)
+
+    async def publish(self, channel: str, payload: dict[str, Any]) -> None:
+        """
+        Announce an event to every worker.
+
+        Args:
+            channel: Channel name.
+            payload: JSON-serialisable event body.
+        """
+        await self._publish(channel, {**payload, "origin": self.worker_id})
+
+    @abstractmethod
+    async def _publish(self, channel: str, event: dict[str, Any]) -> None:
+        ...
+
+    async def _dispatch(self, channel: str, event: dict[str, Any]) -> None:
+        for handler in self._handlers.get(channel, []):
+            try:
+                await handler(event)
+            except Exception as e:
+                logger.error(f"❌ ERROR in event handler for {channel}: {e}")
+
+
+class LocalEventBus(EventBus):
+    """
+    In-process bus for single-worker deployments and tests.
+    """
+
+    async def _publish(self, channel: str, event: dict[str, Any]) -> None:
+        await self._dispatch(channel, event)
+
+
+class PostgresEventBus(EventBus):
+    """
+    Bus on Postgres LISTEN/NOTIFY, shared by every worker and node.
+
+    When the listening connection drops it is reopened with exponential
+    backoff. Events sent meanwhile are lost, so after a reconnect every
+    subscriber gets an event without a key (`{"origin": None}`), meaning
+    that anything may have changed.
+
+    Args:
+        pool: Connection pool to the Postgres server.
+        channels: Channels listened to.
+        min_backoff_seconds: First delay before reconnecting.
+        max_backoff_seconds: Longest delay before reconnecting.
+    """
+
+    def __init__(
+        self,
+        pool: AsyncConnectionPool,
+        channels: tuple[str, ...] = (
+            SESSIONS_CHANNEL, TOOL_RESULTS_CHANNEL, AUDIO_CHANNEL,
+        ),
+        min_backoff_seconds: float = 0.5,
+        max_backoff_seconds: float = 30.0,
+    ) -> None:
+        super().__init__()
+        self.pool = pool
+        self.channels = channels
+        self.min_backoff = min_backoff_seconds
+        self.max_backoff = max_backoff_seconds
+        self.reconnects = 0
+        self._conn: AsyncConnection | None = None
+        self._listener: asyncio.Task | None = None
+
+    async def open(self) -> None:
+        await self._connect()
+        self._listener = asyncio.create_task(self._listen())
+
+    async def _connect(self) -> None:
+        # LISTEN needs a connection of its own for the lifetime of the bus.
+        conn = await AsyncConnection.connect(self.pool.conninfo, autocommit=True)
+        for channel in self.channels:
+            await conn.execute(f"LISTEN {channel};")
+        self._conn = conn
+
+    async def close(self) -> None:
+        if self._listener is not None:
+            self._listener.cancel()
+        if self._conn is not None:
+            await self._conn.close()
+
+    async def _publish(self, channel: str, event: dict[str, Any]) -> None:
+        async with self.pool.connection() as conn:
+            await conn.execute(
+                "SELECT pg_notify(%s, %s);", (channel, json.dumps(event))
+            )
+
+    async def _listen(self) -> None:
+        backoff = self.min_backoff
+        while True:
+            try:
+                if self._conn is None:
+                    await self._connect()
+                    self.reconnects += 1
+                    logger.info("Event bus reconnected")
+                    for channel in self.channels:
+                        await self._dispatch(channel, {"origin": None})
+                backoff = self.min_backoff
+                async for notify in self._conn.notifies():
+                    await self._dispatch(notify.channel, json.loads(notify.payload))
+                raise ConnectionError("LISTEN connection closed")
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"Event bus disconnected, retrying in {backoff:.1f}s: {e}")
+                if self._conn is not None:
+                    try:
+                        await self._conn.close()
+                    except Exception:
+                        pass
+                    self._conn = None
+                await asyncio.sleep(backoff)
+                backoff = min(backoff * 2, self.max_backoff)
@@ -0,0 +1,65 @@
+from psycopg_pool import AsyncConnectionPool
+
+from config.settings import Settings
+from session_state.bus import EventBus, LocalEventBus, PostgresEventBus
+from session_state.stores import (
+    PostgresSessionStore,
+    SessionStore,
+    SQLiteSessionStore,
+)
+
+
+def create_shared_session_store(
+    settings: Settings,
+    pool: AsyncConnectionPool,
+) -> SessionStore | None:
+    """
+    Creates the session store shared between workers.
+
+    Args:
+        settings: Application settings.
+        pool: Connection pool to the conversation history database.
+
+    Returns:
+        Shared session store, or None when sessions stay process-local.
+
+    Raises:
+        ValueError: If other workers could not see this worker's changes or
+            verify its session tokens: a shared store needs the Postgres bus,
+            or stale local copies would overwrite newer shared sessions, and
+            a configured SESSION_SECRET_KEY.
+    """
+    if settings.session.store == "memory":
+        return None
+    if settings.session.bus != "postgres":
+        raise ValueError(
+            f"SESSION_STORE={settings.session.store} needs SESSION_BUS=postgres"
+        )
+    if not settings.session.shared_secret:
+        raise ValueError(
+            f"SESSION_STORE={settings.session.store} needs SESSION_SECRET_KEY"
+        )
+    if settings.session.store == "postgres":
+        return PostgresSessionStore(pool=pool)
+    if settings.session.store == "sqlite":
+        return SQLiteSessionStore(path=settings.session.store_path)
+    raise ValueError(f"Unknown session store {settings.session.store!r}")
+
+
+def create_event_bus(
+    settings: Settings,
+    pool: AsyncConnectionPool,
+) -> EventBus:
+    """
+    Creates the cache invalidation bus.
+
+    Args:
+        settings: Application settings.
+        pool: Connection pool to the conversation history database.
+
+    Returns:
+        Event bus connecting the workers.
+    """
+    if settings.session.bus == "postgres":
+        return PostgresEventBus(pool=pool)
+    return LocalEventBus()
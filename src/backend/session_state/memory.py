@@ -0,0 +1,122 @@
+import weakref
+from typing import Callable
+
+from loguru import logger
+from pydantic import UUID4
+
+from session_state.stores import SessionState
+
+# Close code for sessions shed to protect the process ("Try Again Later").
+MEMORY_SHED_CLOSE_CODE = 1013
+
+
+class SessionMemoryExceeded(MemoryError):
+    """Raised when a session stays above the hard cap after compaction."""
+
+
+class SessionMemory:
+    """
+    Memory held by one live session, measured from its parts.
+
+    Each part registers a probe returning its current size in bytes, e.g.
+    the history, inbound audio being reassembled and queued outbound audio.
+
+    Args:
+        conversation_id: Conversation of the session.
+    """
+
+    def __init__(self, conversation_id: UUID4) -> None:
+        self.conversation_id = conversation_id
+        self.probes: dict[str, Callable[[], int]] = {}
+        self.peak_bytes = 0
+        self.compactions = 0
+
+    def add_probe(self, name: str, probe: Callable[[], int]) -> None:
+        self.probes[name] = probe
+
+    def measure(self) -> dict[str, int]:
+        usage = {name: probe() for name, probe in self.probes.items()}
+        self.peak_bytes = max(self.peak_bytes, sum(usage.values()))
+        return usage
+
+    def snapshot(self) -> dict:
+        usage = self.measure()
+        return {
+            "bytes": sum(usage.values()),
+            "peak_bytes": self.peak_bytes,
+            "compactions": self.compactions,
+            **{f"{name}_bytes": size for name, size in usage.items()},
+        }
+
+
+class MemoryAccountant:
+    """
+    Per-session memory accounting with caps for the live sessions of this
+    process.
+
+    Above `soft_cap_bytes` a session's history is compacted towards half
+    the soft cap. A session still above `hard_cap_bytes` afterwards is shed:
+    `enforce` raises `SessionMemoryExceeded` and the caller disconnects it.
+
+    Args:
+        soft_cap_bytes: Usage that triggers compaction.
+        hard_cap_bytes: Usage that triggers shedding.
+    """
+
+    def __init__(self, soft_cap_bytes: int, hard_cap_bytes: int) -> None:
+        self.soft_cap_bytes = soft_cap_bytes
+        self.hard_cap_bytes = hard_cap_bytes
+        self.compactions = 0
+        self.shed = 0
+        self._live: weakref.WeakSet[SessionMemory] = weakref.WeakSet()
+
+    def open(self, conversation_id: UUID4) -> SessionMemory:
+        memory = SessionMemory(conversation_id)
+        self._live.add(memory)
+        return memory
+
+    def close(self, memory: SessionMemory) -> None:
+        self._live.discard(memory)
+
+    def enforce(self, memory: SessionMemory, session: SessionState) -> None:
+        """
+        Apply the caps to a session.
+
+        Raises:
+            SessionMemoryExceeded: If the session must be disconnected.
+        """
+        usage = sum(memory.measure().values())
+        if usage > self.soft_cap_bytes:
+            history_bytes = session.memory_bytes()
+            target = max(0, history_bytes - (usage - self.soft_cap_bytes // 2))
+            dropped = session.compact(target)
+            if dropped:
+                memory.compactions += 1
+                self.compactions += 1
+                logger.info(
+                    f"Compacted session {session.conversation_id}: dropped "
+                    f"{dropped} messages at {usage} bytes"
+                )
+            usage = sum(memory.measure().values())
+
+        if usage > self.hard_cap_bytes:
+            self.shed += 1
+            raise SessionMemoryExceeded(
+                f"Session {session.conversation_id} holds {usage} bytes, "
+                f"above the {self.hard_cap_bytes} byte cap"
+            )
+
+    def snapshot(self, top: int = 10) -> dict:
+        sessions = [(memory, memory.snapshot()) for memory in list(self._live)]
+        sessions.sort(key=lambda item: item[1]["bytes"], reverse=True)
+        return {
+            "sessions": len(sessions),
+            "total_bytes": sum(usage["bytes"] for _, usage in sessions),
+            "soft_cap_bytes": self.soft_cap_bytes,
+            "hard_cap_bytes": self.hard_cap_bytes,
+            "compactions": self.compactions,
+            "shed": self.shed,
+            "largest": {
+                str(memory.conversation_id): usage for memory, usage in sessions[:top]
+            },
+        }
@@ -0,0 +1,127 @@
+from datetime import datetime, timedelta
+from typing import Any
+from uuid import UUID
+
+from loguru import logger
+from psycopg import AsyncConnection
+from pydantic import UUID4
+
+from convo_history_db.actions import get_conversation_history
+from session_state.bus import SESSIONS_CHANNEL, EventBus
+from session_state.stores import InMemorySessionStore, SessionState, SessionStore
+
+
+class SessionRegistry:
+    """
+    Two-tier registry of conversation state.
+
+    Sessions are served from a process-local LRU. When a shared store is
+    configured, every change is written through to it and announced on the
+    bus so that other workers drop their now stale local copy. Postgres
+    `messages` remains the source of truth for sessions no tier knows about.
+    """
+
+    def __init__(
+        self,
+        local: InMemorySessionStore,
+        bus: EventBus,
+        shared: SessionStore | None = None,
+        history_lookback: timedelta | None = None,
+    ) -> None:
+        self.local = local
+        self.history_lookback = history_lookback
+        self.shared = shared
+        self.bus = bus
+        bus.subscribe(SESSIONS_CHANNEL, self._on_invalidate)
+
+    def __len__(self) -> int:
+        return len(self.local)
+
+    async def create(self, conversation_id: UUID4) -> SessionState:
+        """
+        Register a brand-new conversation.
+
+        Args:
+            conversation_id: ID of the new conversation.
+
+        Returns:
+            Empty session state.
+        """
+        session = SessionState(conversation_id=conversation_id)
+        await self.local.put(session)
+        return session
+
+    async def get(self, conversation_id: UUID4) -> SessionState | None:
+        """
+        Return the session from the local tier, then the shared tier.
+
+        Args:
+            conversation_id: ID of the conversation.
+
+        Returns:
+            Session state or None if neither tier has it.
+        """
+        session = await self.local.get(conversation_id)
+        if session is None and self.shared is not None:
+            session = await self.shared.get(conversation_id)
+            if session is not None:
+                await self.local.put(session)
+        return session
+
+    async def resume(
+        self, conn: AsyncConnection, conversation_id: UUID4
+    ) -> SessionState:
+        """
+        Restore a conversation, from a warm tier when possible and Postgres
+        otherwise.
+
+        Args:
+            conn: Connection to the conversation history database.
+            conversation_id: ID of the conversation to resume.
+
+        Returns:
+            Session state holding the conversation so far.
+        """
+        session = await self.get(conversation_id)
+        if session is not None:
+            logger.info(f"Resumed warm session {conversation_id}")
+            return session
+
+        since = None
+        if self.history_lookback is not None:
+            since = datetime.now() - self.history_lookback
+        history = await get_conversation_history(
+            conn=conn, conversation_id=conversation_id, since=since
+        )
+        logger.info(
+            f"Rebuilt session {conversation_id} from {len(history)} stored messages"
+        )
+        session = SessionState(conversation_id=conversation_id, history=history)
+        await self.local.put(session)
+        return session
+
+    async def append(self, session: SessionState, sender: str, content: str) -> None:
+        """
+        Add a message to the session and propagate the change.
+
+        Args:
+            session: Session to update.
+            sender: Sender of the message. (e.g., "user" or "agent")
+            content: Content of the message.
+        """
+        session.append(sender, content)
+        if self.shared is None:
+            return
+        await self.shared.put(session)
+        await self.bus.publish(
+            SESSIONS_CHANNEL, {"conversation_id": str(session.conversation_id)}
+        )
+
+    async def _on_invalidate(self, event: dict[str, Any]) -> None:
+        if event["origin"] == self.bus.worker_id:
+            return
+        if "conversation_id" not in event:
+            # Announcements may have been missed; no local copy is trusted.
+            self.local.clear()
+            return
+        await self.local.discard(UUID(event["conversation_id"]))
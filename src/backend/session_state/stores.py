@@ -0,0 +1,299 @@
+import json
+import sys
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Mapping
+
+import aiosqlite
+from psycopg_pool import AsyncConnectionPool
+from pydantic import UUID4
+
+
+# Approximate size of a ModelRequest/ModelResponse with one text part,
+# measured with tracemalloc.
+MODEL_MESSAGE_BYTES = 480
+
+# Messages compaction always keeps, so that the model sees the last turn.
+MIN_KEPT_MESSAGES = 2
+
+
+class Message:
+    """
+    One message of a conversation.
+
+    Slotted, with the sender interned, so that a long call costs little
+    more than its text. `model_message` caches the agent's form of the
+    message so that it is built once rather than on every turn. Supports
+    `message["sender"]` like the dicts it replaces.
+    """
+
+    __slots__ = ("sender", "content", "model_message")
+
+    def __init__(self, sender: str, content: str) -> None:
+        self.sender = sys.intern(sender)
+        self.content = content
+        self.model_message: Any = None
+
+    @classmethod
+    def from_dict(cls, data: Mapping[str, str]) -> "Message":
+        return cls(data["sender"], data["content"])
+
+    def to_dict(self) -> dict[str, str]:
+        return {"sender": self.sender, "content": self.content}
+
+    @property
+    def nbytes(self) -> int:
+        size = sys.getsizeof(self) + sys.getsizeof(self.content)
+        if self.model_message is not None:
+            size += MODEL_MESSAGE_BYTES
+        return size
+
+    def __getitem__(self, key: str) -> str:
+        if key not in ("sender", "content"):
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def __eq__(self, other: object) -> bool:
+        if isinstance(other, Message):
+            return (self.sender, self.content) == (other.sender, other.content)
+        if isinstance(other, Mapping):
+            return self.to_dict() == dict(other)
+        return NotImplemented
+
+    __hash__ = None  # mutable, like the dicts it replaces
+
+    def __repr__(self) -> str:
+        return f"Message(sender={self.sender!r}, content={self.content!r})"
+
+
+@dataclass
+class SessionState:
+    """Warm per-conversation state kept between websocket connections."""
+
+    conversation_id: UUID4
+    history: list[Message] = field(default_factory=list)
+    last_seen: float = field(default_factory=time.monotonic)
+    # Counted separately so that compaction does not reset it.
+    user_message_count: int = field(default=0, init=False)
+    compacted_messages: int = field(default=0, init=False)
+
+    def __post_init__(self) -> None:
+        # Stores and the history database hand over plain dicts.
+        self.history = [
+            m if isinstance(m, Message) else Message.from_dict(m)
+            for m in self.history
+        ]
+        self.user_message_count = sum(1 for m in self.history if m.sender == "user")
+
+    def append(self, sender: str, content: str) -> None:
+        self.history.append(Message(sender, content))
+        if sender == "user":
+            self.user_message_count += 1
+        self.last_seen = time.monotonic()
+
+    def history_dicts(self) -> list[dict[str, str]]:
+        """History in the JSON form kept by the shared stores."""
+        return [m.to_dict() for m in self.history]
+
+    def memory_bytes(self) -> int:
+        """Approximate memory held by the history."""
+        return sys.getsizeof(self.history) + sum(m.nbytes for m in self.history)
+
+    def compact(self, max_bytes: int) -> int:
+        """
+        Drop the oldest messages until the history fits in `max_bytes`.
+
+        The latest MIN_KEPT_MESSAGES are always kept and the history still
+        starts with a user message. The history database keeps everything.
+
+        Returns:
+            Number of messages dropped.
+        """
+        sizes = [m.nbytes for m in self.history]
+        total = sum(sizes)
+        drop = 0
+        while total > max_bytes and len(self.history) - drop > MIN_KEPT_MESSAGES:
+            total -= sizes[drop]
+            drop += 1
+        while drop < len(self.history) - 1 and self.history[drop].sender != "user":
+            drop += 1
+        if drop:
+            del self.history[:drop]
+            self.compacted_messages += drop
+        return drop
+
+
+class SessionStore(ABC):
+    """Storage backend for session state."""
+
+    async def open(self) -> None:
+        """Prepare the backend for use."""
+
+    async def close(self) -> None:
+        """Release resources held by the backend."""
+
+    @abstractmethod
+    async def get(self, conversation_id: UUID4) -> SessionState | None:
+        """Return the stored session, or None if it is unknown."""
+
+    @abstractmethod
+    async def put(self, session: SessionState) -> None:
+        """Store the session, replacing any previous version."""
+
+    @abstractmethod
+    async def discard(self, conversation_id: UUID4) -> None:
+        """Forget the session if it is stored."""
+
+
+class InMemorySessionStore(SessionStore):
+    """
+    Process-local LRU of sessions with idle expiry.
+    """
+
+    def __init__(self, max_sessions: int, ttl_seconds: float) -> None:
+        self.max_sessions = max_sessions
+        self.ttl_seconds = ttl_seconds
+        self._sessions: OrderedDict[UUID4, SessionState] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+    async def get(self, conversation_id: UUID4) -> SessionState | None:
+        self._expire()
+        session = self._sessions.get(conversation_id)
+        if session is not None:
+            self._sessions.move_to_end(conversation_id)
+            session.last_seen = time.monotonic()
+        return session
+
+    async def put(self, session: SessionState) -> None:
+        self._sessions[session.conversation_id] = session
+        self._sessions.move_to_end(session.conversation_id)
+        while len(self._sessions) > self.max_sessions:
+            self._sessions.popitem(last=False)
+
+    async def discard(self, conversation_id: UUID4) -> None:
+        self._sessions.pop(conversation_id, None)
+
+    def clear(self) -> None:
+        self._sessions.clear()
+
+    def _expire(self) -> None:
+        cutoff = time.monotonic() - self.ttl_seconds
+        while self._sessions:
+            oldest = next(iter(self._sessions.values()))
+            if oldest.last_seen >= cutoff:
+                break
+            self._sessions.popitem(last=False)
+
+
+class SQLiteSessionStore(SessionStore):
+    """
+    Session store in a SQLite file shared by the workers of one host.
+    """
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self._db: aiosqlite.Connection | None = None
+
+    async def open(self) -> None:
+        self._db = await aiosqlite.connect(self.path)
+        await self._db.execute("PRAGMA journal_mode = WAL;")
+        await self._db.execute(
+            """
+            CREATE TABLE IF NOT EXISTS session_state (
+                conversation_id TEXT PRIMARY KEY,
+                history TEXT NOT NULL,
+                updated_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP
+            );
+            """
+        )
+        await self._db.commit()
+
+    async def close(self) -> None:
+        if self._db is not None:
+            await self._db.close()
+
+    async def get(self, conversation_id: UUID4) -> SessionState | None:
+        cursor = await self._db.execute(
+            "SELECT history FROM session_state WHERE conversation_id = ?;",
+            (str(conversation_id),),
+        )
+        row = await cursor.fetchone()
+        await cursor.close()
+        if row is None:
+            return None
+        return SessionState(conversation_id=conversation_id, history=json.loads(row[0]))
+
+    async def put(self, session: SessionState) -> None:
+        await self._db.execute(
+            """
+            INSERT INTO session_state (conversation_id, history)
+            VALUES (?, ?)
+            ON CONFLICT (conversation_id) DO UPDATE
+            SET history = excluded.history, updated_at = CURRENT_TIMESTAMP;
+            """,
+            (str(session.conversation_id), json.dumps(session.history_dicts())),
+        )
+        await self._db.commit()
+
+    async def discard(self, conversation_id: UUID4) -> None:
+        await self._db.execute(
+            "DELETE FROM session_state WHERE conversation_id = ?;",
+            (str(conversation_id),),
+        )
+        await self._db.commit()
+
+
+class PostgresSessionStore(SessionStore):
+    """
+    Session store in Postgres, shared by every worker and node.
+    """
+
+    def __init__(self, pool: AsyncConnectionPool) -> None:
+        self.pool = pool
+
+    async def open(self) -> None:
+        query = (
+            """
+            CREATE TABLE IF NOT EXISTS session_state (
+                conversation_id UUID PRIMARY KEY,
+                history JSONB NOT NULL,
+                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            );
+            """
+        )
+        async with self.pool.connection() as conn:
+            await conn.execute(query)
+
+    async def get(self, conversation_id: UUID4) -> SessionState | None:
+        async with self.pool.connection() as conn:
+            cursor = await conn.execute(
+                "SELECT history FROM session_state WHERE conversation_id = %s;",
+                (conversation_id,),
+            )
+            row = await cursor.fetchone()
+        if row is None:
+            return None
+        return SessionState(conversation_id=conversation_id, history=row[0])
+
+    async def put(self, session: SessionState) -> None:
+        query = (
+            "INSERT INTO session_state (conversation_id, history) "
+            "VALUES (%s, %s) "
+            "ON CONFLICT (conversation_id) DO UPDATE "
+            "SET history = EXCLUDED.history, updated_at = CURRENT_TIMESTAMP;"
+        )
+        async with self.pool.connection() as conn:
+            await conn.execute(
+                query, (session.conversation_id, json.dumps(session.history_dicts()))
+            )
+
+    async def discard(self, conversation_id: UUID4) -> None:
+        async with self.pool.connection() as conn:
+            await conn.execute(
+                "DELETE FROM session_state WHERE conversation_id = %s;",
+                (conversation_id,),
+            )
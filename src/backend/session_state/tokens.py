@@ -0,0 +1,71 @@
+import base64
+import hashlib
+import hmac
+import json
+import time
+from uuid import UUID
+
+from pydantic import UUID4
+
+
+def _b64encode(data: bytes) -> str:
+    return base64.urlsafe_b64encode(data).rstrip(b"=").decode("ascii")
+
+
+def _b64decode(data: str) -> bytes:
+    return base64.urlsafe_b64decode(data + "=" * (-len(data) % 4))
+
+
+def _signature(payload: str, secret_key: str) -> str:
+    digest = hmac.new(
+        secret_key.encode(), payload.encode("ascii"), hashlib.sha256
+    ).digest()
+    return _b64encode(digest)
+
+
+def sign_session_token(
+    conversation_id: UUID4,
+    secret_key: str,
+    ttl_seconds: int,
+) -> str:
+    """
+    Create a signed token that lets a client resume a conversation.
+
+    Args:
+        conversation_id: Conversation the token grants access to.
+        secret_key: HMAC key shared by every server instance.
+        ttl_seconds: Lifetime of the token.
+
+    Returns:
+        Token of the form `<payload>.<signature>`.
+    """
+    payload = _b64encode(
+        json.dumps(
+            {"cid": str(conversation_id), "exp": int(time.time()) + ttl_seconds},
+            separators=(",", ":"),
+        ).encode()
+    )
+    return f"{payload}.{_signature(payload, secret_key)}"
+
+
+def verify_session_token(token: str, secret_key: str) -> UUID4 | None:
+    """
+    Validate a session token.
+
+    Args:
+        token: Token presented by the client.
+        secret_key: HMAC key used to sign the token.
+
+    Returns:
+        The conversation ID, or None if the token is forged, malformed or expired.
+    """
+    try:
+        payload, signature = token.split(".", 1)
+        if not hmac.compare_digest(signature, _signature(payload, secret_key)):
+            return None
+        claims = json.loads(_b64decode(payload))
+        if claims["exp"] < time.time():
+            return None
+        return UUID(claims["cid"])
+    except (ValueError, KeyError, TypeError):
+        return None
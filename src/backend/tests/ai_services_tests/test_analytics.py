@@ -0,0 +1,107 @@
+from datetime import date
+
+import pytest
+
+from ai_services.analytics import AnalyticsEngine, TransactionColumns
+from session_state.bus import TOOL_RESULTS_CHANNEL, LocalEventBus
+
+
+def txn(id: int, txn_date: str, amount: float, merchant: str, category: str) -> dict:
+    return {
+        "id": id,
+        "txn_date": txn_date,
+        "amount": amount,
+        "merchant_name": merchant,
+        "category": category,
+    }
+
+
+@pytest.fixture
+def columns() -> TransactionColumns:
+    columns = TransactionColumns(capacity=2)
+    columns.append(
+        [
+            txn(1, "2026-08-03", -400.0, "Swiggy", "Food"),
+            txn(2, "2026-08-15", 50000.0, "Employer", "Salary"),
+            txn(3, "2026-09-02", -500.0, "Swiggy", "Food"),
+            txn(4, "2026-09-20", -450.0, "Zomato", "Food"),
+            txn(5, "2026-10-01", -420.0, "Swiggy", "Food"),
+            txn(6, "2026-10-05", -3000.0, "Zomato", "Food"),
+            txn(7, "2026-10-09", -1299.0, "Amazon", "Electronics"),
+        ]
+    )
+    return columns
+
+
+def test_columns_grow_and_encode(columns):
+    assert columns.size == 7
+    assert columns.last_id == 7
+    assert columns.categories.values == ["Food", "Salary", "Electronics"]
+    assert columns.category_codes.tolist() == [0, 1, 0, 0, 0, 0, 2]
+
+
+def test_spending_and_top_merchants(columns):
+    since = date(2026, 9, 1)
+
+    assert columns.spending_by_category(since) == {"Food": 4370.0, "Electronics": 1299.0}
+    assert columns.top_merchants(since, top_n=2) == [
+        {"merchant": "Zomato", "total_spent": 3450.0, "transactions": 2},
+        {"merchant": "Amazon", "total_spent": 1299.0, "transactions": 1},
+    ]
+
+
+def test_monthly_trend(columns):
+    trend = columns.monthly_trend(date(2026, 10, 19), months=3)
+
+    assert [month["month"] for month in trend] == ["2026-08", "2026-09", "2026-10"]
+    assert [month["spent"] for month in trend] == [400.0, 950.0, 4719.0]
+    assert trend[0]["received"] == 50000.0
+    assert trend[0]["change_percent"] is None
+    assert trend[1]["change_percent"] == 137.5
+
+
+def test_anomaly_scores_flag_outlier(columns):
+    anomalies = columns.anomaly_scores(date(2026, 10, 1), min_score=2.0, top_n=5)
+
+    assert [a["merchant"] for a in anomalies] == ["Zomato"]
+    assert anomalies[0]["amount"] == 3000.0
+    assert anomalies[0]["date"] == "2026-10-05"
+
+
+@pytest.mark.asyncio
+async def test_engine_extends_columns_after_invalidation(customer_db, banking_repository):
+    bus = LocalEventBus()
+    engine = AnalyticsEngine(bus=bus)
+
+    columns = await engine.columns(banking_repository, "shivamani")
+    loaded = columns.size
+    assert loaded > 0
+    assert await engine.columns(banking_repository, "Shivamani") is columns
+
+    await customer_db.execute(
+        "INSERT INTO transactions (account_id, txn_date, amount, txn_type, "
+        "merchant_name, category) VALUES (1, '2026-10-18', -99.0, 'debit', "
+        "'Uber', 'Travel');"
+    )
+    await bus.publish(TOOL_RESULTS_CHANNEL, {"customer_name": "Shivamani"})
+
+    columns = await engine.columns(banking_repository, "Shivamani")
+    assert columns.size == loaded + 1
+    assert columns.merchants.values[columns.merchant_codes[-1]] == "Uber"
+
+
+@pytest.mark.asyncio
+async def test_columns_match_the_sql_summaries(banking_repository):
+    engine = AnalyticsEngine(bus=LocalEventBus())
+    columns = await engine.columns(banking_repository, "Shivamani")
+    since = date(2000, 1, 1)
+
+    by_category = await banking_repository.spending_by_category("Shivamani", "2000-01-01")
+    assert columns.spending_by_category(since) == pytest.approx(by_category)
+
+    threshold, debits = columns.debits_above_average(since, multiplier=1.5)
+    average = await banking_repository.average_debit("Shivamani", "2000-01-01")
+    assert threshold == pytest.approx(average * 1.5)
+    rows = await banking_repository.debits_above("Shivamani", threshold, "2000-01-01")
+    assert debits == [dict(row) for row in rows]
+    assert debits, "The seed data has debits above 1.5x the average"
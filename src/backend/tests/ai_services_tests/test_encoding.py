@@ -0,0 +1,102 @@
+import pytest
+from unittest.mock import MagicMock
+
+from ai_services.encoding import compact_number, compact_table
+from ai_services.encoding_benchmark import run
+from ai_services.tools import (
+    get_bank_schemes,
+    get_merchant_spending,
+    get_recent_transactions,
+    get_transactions_page,
+)
+
+
+def make_ctx(repository, output_format="compact", max_rows=15) -> MagicMock:
+    ctx = MagicMock()
+    ctx.deps.prefetcher = None
+    ctx.deps.repository = repository
+    ctx.deps.settings.tools.max_page_size = 25
+    ctx.deps.settings.tools.output_format = output_format
+    ctx.deps.settings.tools.compact_max_rows = max_rows
+    ctx.deps.settings.tools.compact_max_chars = 40
+    return ctx
+
+
+def test_tables_name_columns_once_and_count_left_out_rows():
+    rows = [{"name": f"row {i}", "value": i * 1.5} for i in range(5)]
+
+    table = compact_table(
+        rows, {"n": "name", "v": "value"}, max_rows=2, more_hint="ask for more"
+    )
+
+    assert table == {
+        "columns": ["n", "v"],
+        "rows": [["row 0", 0], ["row 1", 1.5]],
+        "more": "3 more rows not shown; ask for more",
+    }
+    assert compact_number(1299.0) == 1299
+    assert compact_number(0.1 + 0.2) == 0.3
+
+
+@pytest.mark.asyncio
+async def test_compact_transactions_carry_totals_over_all_rows(banking_repository):
+    result = await get_recent_transactions(make_ctx(banking_repository, max_rows=3))
+
+    assert result["columns"] == ["date", "amount", "merchant", "category"]
+    assert result["rows"][0] == ["2025-02-10", -1299, "Amazon", "Electronics"]
+    assert len(result["rows"]) == 3
+    assert result["totals"] == {"count": 7, "debits": 8128, "credits": 0}
+    assert result["more"].startswith("4 more rows not shown")
+    assert result["currency"] == "INR"
+
+
+@pytest.mark.asyncio
+async def test_compact_pages_do_not_skip_rows(banking_repository):
+    ctx = make_ctx(banking_repository, max_rows=3)
+
+    first = await get_transactions_page(ctx, page_size=5)
+    second = await get_transactions_page(ctx, continuation_token=first["next_token"])
+
+    assert "more" not in first
+    merchants = [row[2] for row in first["rows"] + second["rows"]]
+    assert merchants == ["Amazon", "Swiggy", "Myntra", "Rapido", "Flipkart", "Dominos"]
+
+
+@pytest.mark.asyncio
+async def test_long_descriptions_are_cut(banking_repository):
+    result = await get_bank_schemes(make_ctx(banking_repository), bank_name="SBI")
+
+    assert result["columns"] == ["scheme", "rate_pct", "min_amount", "description"]
+    assert all(len(row[3]) <= 40 for row in result["rows"])
+    assert result["rows"][0][3].endswith("…")
+
+
+@pytest.mark.asyncio
+async def test_merchant_spending_answers_with_totals(banking_repository):
+    result = await get_merchant_spending(make_ctx(banking_repository), query="amazon flipkart")
+
+    assert result["columns"][:3] == ["merchant", "category", "spent"]
+    assert result["totals"] == {"spent": 2298, "received": 0, "count": 2}
+
+
+@pytest.mark.asyncio
+async def test_verbose_output_is_unchanged(banking_repository):
+    result = await get_recent_transactions(make_ctx(banking_repository, "verbose"), last_n=1)
+
+    assert result == [
+        {
+            "date": "2025-02-10",
+            "amount_inr": "₹1,299.00",
+            "direction": "debit",
+            "merchant": "Amazon",
+            "category": "Electronics",
+        }
+    ]
+
+
+@pytest.mark.asyncio
+async def test_benchmark_shows_compact_results_are_smaller():
+    results = await run(months=2, seed=1)
+
+    assert {row["call"] for row in results} >= {"recent_transactions 10", "bank_schemes SBI"}
+    assert all(row["compact_tokens"] < row["verbose_tokens"] for row in results)
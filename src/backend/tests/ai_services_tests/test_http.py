@@ -0,0 +1,53 @@
+import httpx
+import pytest
+
+from ai_services.http import PooledTransport
+
+
+class FlakyTransport(httpx.AsyncBaseTransport):
+    """Fails to connect `failures` times, then opens one connection and reuses it."""
+
+    def __init__(self, failures: int = 0) -> None:
+        self.failures = failures
+        self.connected = False
+
+    async def handle_async_request(self, request):
+        if self.failures:
+            self.failures -= 1
+            raise httpx.ConnectError("refused", request=request)
+        if not self.connected:
+            self.connected = True
+            await request.extensions["trace"]("connection.connect_tcp.started", {})
+        return httpx.Response(200, request=request)
+
+
+@pytest.mark.asyncio
+async def test_connection_reuse_is_counted_per_endpoint():
+    transport = PooledTransport(FlakyTransport())
+    async with httpx.AsyncClient(transport=transport) as client:
+        for _ in range(3):
+            await client.post("https://api.groq.com/openai/v1/audio/transcriptions")
+
+    stats = transport.snapshot()["POST api.groq.com/openai/v1/audio/transcriptions"]
+    assert stats == {"requests": 3, "new_connections": 1, "reused_connections": 2, "retries": 0}
+
+
+@pytest.mark.asyncio
+async def test_connect_errors_are_retried(mocker):
+    sleep = mocker.patch("ai_services.http.asyncio.sleep")
+    transport = PooledTransport(FlakyTransport(failures=2), retries=2, backoff=0.1)
+    async with httpx.AsyncClient(transport=transport) as client:
+        response = await client.get("https://api.groq.com/openai/v1/models")
+
+    assert response.status_code == 200
+    assert sleep.await_count == 2
+    assert all(0 <= call.args[0] <= 0.2 for call in sleep.await_args_list)
+
+
+@pytest.mark.asyncio
+async def test_retries_are_bounded(mocker):
+    mocker.patch("ai_services.http.asyncio.sleep")
+    transport = PooledTransport(FlakyTransport(failures=5), retries=1)
+    async with httpx.AsyncClient(transport=transport) as client:
+        with pytest.raises(httpx.ConnectError):
+            await client.get("https://api.groq.com/openai/v1/models")
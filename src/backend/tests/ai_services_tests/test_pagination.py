@@ -0,0 +1,76 @@
+import pytest
+from unittest.mock import MagicMock
+
+from ai_services.pagination import InvalidPageToken, PageToken
+from ai_services.tools import get_recent_transactions, get_transactions_page
+
+
+def make_ctx(repository, max_page_size: int = 25) -> MagicMock:
+    ctx = MagicMock()
+    ctx.deps.prefetcher = None
+    ctx.deps.repository = repository
+    ctx.deps.settings.tools.max_page_size = max_page_size
+    return ctx
+
+
+def test_page_token_round_trips_and_rejects_garbage():
+    token = PageToken("Shivamani", "2025-01-31", 42, start_date="2025-01-01")
+
+    assert PageToken.decode(token.encode()) == token
+    with pytest.raises(InvalidPageToken):
+        PageToken.decode("not a token")
+
+
+@pytest.mark.asyncio
+async def test_pages_cover_listing_without_gaps_or_repeats(banking_repository):
+    ctx = make_ctx(banking_repository)
+    everything = await get_transactions_page(ctx, page_size=25)
+    assert everything["next_token"] is None
+
+    pages, token = [], None
+    while True:
+        page = await get_transactions_page(ctx, page_size=4, continuation_token=token)
+        assert len(page["transactions"]) <= 4
+        pages.extend(page["transactions"])
+        token = page["next_token"]
+        if token is None:
+            break
+
+    assert pages == everything["transactions"]
+    dates = [txn["date"] for txn in pages]
+    assert dates == sorted(dates, reverse=True)
+
+
+@pytest.mark.asyncio
+async def test_continuation_keeps_date_filters(banking_repository):
+    ctx = make_ctx(banking_repository)
+    first = await get_transactions_page(
+        ctx, page_size=1, start_date="2025-02-01", end_date="2025-02-08"
+    )
+    assert first["next_token"] is not None
+    second = await get_transactions_page(
+        ctx, page_size=25, continuation_token=first["next_token"]
+    )
+
+    for txn in first["transactions"] + second["transactions"]:
+        assert "2025-02-01" <= txn["date"] <= "2025-02-08"
+    assert second["next_token"] is None
+
+
+@pytest.mark.asyncio
+async def test_page_sizes_are_capped(banking_repository):
+    ctx = make_ctx(banking_repository, max_page_size=3)
+
+    page = await get_transactions_page(ctx, page_size=100)
+    recent = await get_recent_transactions(ctx, last_n=100)
+
+    assert len(page["transactions"]) == 3
+    assert page["next_token"] is not None
+    assert len(recent) == 3
+
+
+@pytest.mark.asyncio
+async def test_invalid_token_is_reported(banking_repository):
+    result = await get_transactions_page(make_ctx(banking_repository), continuation_token="%%%")
+
+    assert "error" in result
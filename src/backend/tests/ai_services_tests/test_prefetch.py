@@ -0,0 +1,110 @@
+import asyncio
+
+import pytest
+from unittest.mock import MagicMock
+
+from ai_services.prefetch import PrefetchHub, SnapshotPrefetcher
+from ai_services.tools import get_account_balance, get_recent_transactions
+from session_state.bus import TOOL_RESULTS_CHANNEL, LocalEventBus
+
+
+def make_prefetcher(repository, **kwargs) -> SnapshotPrefetcher:
+    options = dict(max_age_seconds=60, transactions=5, summary_days=30)
+    options.update(kwargs)
+    return SnapshotPrefetcher(repository=repository, customer_name="Shivamani", **options)
+
+
+@pytest.mark.asyncio
+async def test_snapshot_is_loaded_in_background(banking_repository):
+    prefetcher = make_prefetcher(banking_repository)
+    prefetcher.refresh()
+
+    snapshot = await prefetcher.get("shivamani")
+
+    assert snapshot.balance["account_number"] == "SBI-100000"
+    assert len(snapshot.recent_transactions) == 5
+    assert snapshot.recent_transactions[0]["merchant_name"] == "Amazon"
+    assert "balance ₹" in snapshot.to_prompt()
+    assert await prefetcher.get("Razak") is None, "Other customers are not covered"
+
+
+@pytest.mark.asyncio
+async def test_tools_are_served_from_snapshot(banking_repository, mocker):
+    prefetcher = make_prefetcher(banking_repository)
+    prefetcher.refresh()
+    await prefetcher.get("Shivamani")
+    ctx = MagicMock()
+    ctx.deps.prefetcher = prefetcher
+    ctx.deps.repository = banking_repository
+    ctx.deps.settings.tools.max_page_size = 25
+    query = mocker.spy(banking_repository, "account_balance")
+
+    balance = await get_account_balance(ctx)
+    transactions = await get_recent_transactions(ctx, last_n=3)
+
+    query.assert_not_called()
+    assert balance["account_number"] == "SBI-100000"
+    assert [t["merchant"] for t in transactions] == ["Amazon", "Swiggy", "Myntra"]
+
+
+@pytest.mark.asyncio
+async def test_requests_beyond_snapshot_fall_back_to_database(banking_repository):
+    prefetcher = make_prefetcher(banking_repository, transactions=2)
+    prefetcher.refresh()
+    ctx = MagicMock()
+    ctx.deps.prefetcher = prefetcher
+    ctx.deps.repository = banking_repository
+    ctx.deps.settings.tools.max_page_size = 25
+
+    transactions = await get_recent_transactions(ctx, last_n=7)
+
+    assert len(transactions) == 7
+
+
+@pytest.mark.asyncio
+async def test_hub_invalidates_on_data_change(banking_repository):
+    bus = LocalEventBus()
+    hub = PrefetchHub(bus=bus, max_age_seconds=60, transactions=5, summary_days=30)
+    prefetcher = hub.create(banking_repository, "Shivamani")
+    prefetcher.refresh()
+    await prefetcher.get("Shivamani")
+
+    await bus.publish(TOOL_RESULTS_CHANNEL, {"customer_name": "shivamani"})
+
+    assert prefetcher.current() is None
+
+
+class SlowRepository:
+    """Every read takes a second."""
+
+    def __getattr__(self, name):
+        async def read(*args, **kwargs):
+            await asyncio.sleep(1)
+
+        return read
+
+
+@pytest.mark.asyncio
+async def test_invalidation_while_waiting_falls_back_to_database(banking_repository):
+    prefetcher = make_prefetcher(SlowRepository())
+    prefetcher.refresh()
+    waiting = asyncio.create_task(prefetcher.get("Shivamani"))
+    await asyncio.sleep(0)
+
+    prefetcher.invalidate()
+
+    assert await waiting is None
+
+
+@pytest.mark.asyncio
+async def test_cancelling_the_caller_still_cancels_get(banking_repository):
+    prefetcher = make_prefetcher(SlowRepository())
+    prefetcher.refresh()
+    waiting = asyncio.create_task(prefetcher.get("Shivamani"))
+    await asyncio.sleep(0)
+
+    waiting.cancel()
+
+    with pytest.raises(asyncio.CancelledError):
+        await waiting
+    prefetcher.invalidate()
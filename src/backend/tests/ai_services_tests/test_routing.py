@@ -0,0 +1,136 @@
+import asyncio
+
+import pytest
+from pydantic_ai import Agent
+from pydantic_ai.messages import ModelResponse, ToolReturnPart
+from pydantic_ai.models.function import DeltaToolCall, FunctionModel
+from pydantic_ai.models.test import TestModel
+
+from ai_services.routing import (
+    LARGE,
+    SMALL,
+    ModelRouter,
+    expected_tool_count,
+    score_turn,
+)
+from ai_services.speculation import ToolActivity
+
+
+async def failing_stream(messages, info):
+    raise RuntimeError("tool_use_failed")
+    yield ""
+
+
+async def unsure_after_tool_stream(messages, info):
+    if not any(
+        isinstance(part, ToolReturnPart) for message in messages for part in message.parts
+    ):
+        yield {0: DeltaToolCall(name="get_balance", json_args="{}", tool_call_id="call-1")}
+    else:
+        yield "I'm not sure what you mean, could you clarify?"
+
+
+def make_router(small_model, threshold: float = 0.5) -> ModelRouter:
+    return ModelRouter(
+        small_model=small_model,
+        large_model=TestModel(custom_output_text="Your balance is ₹1,000.00."),
+        threshold=threshold,
+    )
+
+
+async def run_turn(router: ModelRouter, prompt: str):
+    run = router.start(Agent(TestModel()), prompt, [], None)
+    text = "".join([delta async for delta in run.deltas()])
+    await asyncio.sleep(0)  # let the done callback record the turn
+    return run, text
+
+
+def test_simple_lookups_score_low_and_analysis_scores_high():
+    simple, tools = score_turn("What's my balance?", history_length=2)
+    assert simple < 0.5
+    assert tools == 1
+
+    complex_, tools = score_turn(
+        "Compare my spending this month with last month and explain why "
+        "food went up, then check for unusual transactions",
+        history_length=2,
+    )
+    assert complex_ >= 0.5
+    assert tools >= 3
+
+
+def test_tool_keywords_match_whole_words():
+    assert expected_tool_count("Stop, my accountant found that interesting") == 0
+    assert expected_tool_count("Show my recent transactions") == 1
+    assert expected_tool_count("Any FD schemes with good interest?") == 1
+    assert expected_tool_count("Unusual payments at my top merchants") == 3
+
+
+def test_router_disabled_always_uses_large_model():
+    router = make_router(TestModel())
+    router.enabled = False
+
+    assert router.route("What's my balance?", 0).tier == LARGE
+
+
+@pytest.mark.asyncio
+async def test_confident_small_model_answers_simple_turn():
+    router = make_router(TestModel(custom_output_text="Your balance is ₹500.00 today, Shivamani."))
+
+    run, text = await run_turn(router, "What's my balance?")
+
+    assert text == "Your balance is ₹500.00 today, Shivamani."
+    assert not run.escalated
+    assert router.snapshot()[SMALL]["turns"] == 1
+    assert router.snapshot()[LARGE]["turns"] == 0
+
+
+@pytest.mark.asyncio
+async def test_unsure_small_model_escalates():
+    router = make_router(TestModel(custom_output_text="I'm not sure what you mean."))
+
+    run, text = await run_turn(router, "What's my balance?")
+
+    assert text == "Your balance is ₹1,000.00."
+    assert run.escalated
+    assert router.snapshot()[SMALL]["escalations"] == 1
+
+
+@pytest.mark.asyncio
+async def test_failing_small_model_escalates():
+    router = make_router(FunctionModel(stream_function=failing_stream))
+
+    run, text = await run_turn(router, "What's my balance?")
+
+    assert text == "Your balance is ₹1,000.00."
+    assert run.escalated
+
+
+@pytest.mark.asyncio
+async def test_escalation_after_tool_call_reuses_its_result():
+    router = make_router(FunctionModel(stream_function=unsure_after_tool_stream))
+    agent = Agent(TestModel())
+    calls = []
+
+    @agent.tool_plain
+    def get_balance() -> str:
+        calls.append("get_balance")
+        return "₹1,000.00"
+
+    run = router.start(agent, "What's my balance?", [], None)
+    events = [event async for event in run.events()]
+
+    assert run.escalated
+    assert calls == ["get_balance"]
+    assert [e.phase for e in events if isinstance(e, ToolActivity)] == ["start", "end"]
+    assert "".join(e for e in events if isinstance(e, str)) == "Your balance is ₹1,000.00."
+    assert any(
+        isinstance(part, ToolReturnPart) for message in run.messages for part in message.parts
+    )
+    # The unsure reply was discarded but its tokens were spent.
+    kept = sum(
+        message.usage.total_tokens
+        for message in run.messages
+        if isinstance(message, ModelResponse)
+    )
+    assert run.total_tokens > kept
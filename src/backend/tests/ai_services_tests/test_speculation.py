@@ -0,0 +1,97 @@
+import asyncio
+
+import pytest
+from pydantic_ai import Agent
+from pydantic_ai.models.test import TestModel
+
+from ai_services.speculation import (
+    SpeculationStats,
+    Speculator,
+    StreamingAgentRun,
+    transcript_similarity,
+)
+
+
+class FakeRun:
+    def __init__(self, user_prompt: str) -> None:
+        self.user_prompt = user_prompt
+        self.cancelled = False
+
+    async def cancel(self) -> int:
+        self.cancelled = True
+        return 42
+
+
+def make_speculator(threshold: float = 0.8) -> tuple[Speculator, list[FakeRun]]:
+    runs: list[FakeRun] = []
+
+    def start_run(prompt: str) -> FakeRun:
+        runs.append(FakeRun(prompt))
+        return runs[-1]
+
+    return Speculator(start_run, threshold, SpeculationStats()), runs
+
+
+def test_transcript_similarity():
+    assert transcript_similarity("What is my balance", "what is my balance") == 1.0
+    assert transcript_similarity("What is my balance", "show my schemes") < 0.5
+
+
+@pytest.mark.asyncio
+async def test_stable_partial_starts_run_and_hits():
+    speculator, runs = make_speculator()
+
+    speculator.on_partial("What is my")
+    assert not runs, "A single partial is not stable yet"
+    speculator.on_partial("What is my balance")
+    speculator.on_partial("What is my balance")
+    speculator.on_partial("What is my balance today")
+
+    assert [run.user_prompt for run in runs] == ["What is my balance"]
+    assert await speculator.resolve("What is my balance?") is runs[0]
+    assert speculator.stats.snapshot() == {
+        "attempts": 1,
+        "hits": 1,
+        "misses": 0,
+        "hit_rate": 1.0,
+        "wasted_tokens": 0,
+    }
+
+
+@pytest.mark.asyncio
+async def test_diverging_final_transcript_cancels_run():
+    speculator, runs = make_speculator()
+    speculator.on_partial("Show my recent")
+    speculator.on_partial("Show my recent")
+
+    assert await speculator.resolve("Show my recent transactions at Amazon") is None
+    assert runs[0].cancelled
+    assert speculator.stats.misses == 1
+    assert speculator.stats.wasted_tokens == 42
+
+
+@pytest.mark.asyncio
+async def test_turn_answered_without_agent_is_a_miss():
+    speculator, runs = make_speculator()
+    speculator.on_partial("Hello")
+    speculator.on_partial("Hello")
+
+    await speculator.cancel()
+
+    assert runs[0].cancelled
+    assert speculator.stats.hits == 0
+    assert speculator.stats.misses == 1
+    assert speculator.stats.wasted_tokens == 42
+    assert await speculator.resolve("Hello") is None
+
+
+@pytest.mark.asyncio
+async def test_streaming_run_buffers_deltas_until_read():
+    agent = Agent(TestModel(custom_output_text="Your balance is fine."))
+    run = StreamingAgentRun(agent, "balance?", [], None).start()
+    await asyncio.sleep(0.05)
+
+    text = "".join([delta async for delta in run.deltas()])
+
+    assert text == "Your balance is fine."
+    assert run.total_tokens > 0
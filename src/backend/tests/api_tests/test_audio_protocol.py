@@ -0,0 +1,94 @@
+import io
+import json
+import wave
+
+import pytest
+from unittest.mock import AsyncMock
+
+from api.audio_protocol import (
+    HELLO_MAGIC,
+    AudioChannel,
+    Codec,
+    FrameType,
+    ProtocolError,
+    decode_frames,
+    encode_frame,
+    negotiate,
+)
+
+
+def test_frames_round_trip():
+    message = (
+        encode_frame(FrameType.AUDIO, Codec.PCM16, 0, b"abc")
+        + encode_frame(FrameType.END, Codec.PCM16, 1)
+    )
+    assert list(decode_frames(message)) == [
+        (FrameType.AUDIO, Codec.PCM16, 0, b"abc"),
+        (FrameType.END, Codec.PCM16, 1, b""),
+    ]
+
+
+def test_truncated_frame_is_rejected():
+    with pytest.raises(ProtocolError):
+        list(decode_frames(encode_frame(FrameType.AUDIO, Codec.MP3, 0, b"abc")[:-1]))
+
+
+def test_negotiate_picks_first_supported_codec():
+    negotiated = negotiate(
+        {"send": ["flac", "pcm16"], "receive": ["aac", "mp3"], "sample_rate": 16000}
+    )
+    assert negotiated.inbound_codec == "pcm16"
+    assert negotiated.outbound_codec == "mp3"
+    assert negotiated.sample_rate == 16000
+
+
+def test_negotiate_without_common_codec():
+    with pytest.raises(ProtocolError):
+        negotiate({"send": ["flac"], "receive": ["mp3"]})
+
+
+@pytest.mark.asyncio
+async def test_legacy_client_gets_raw_audio():
+    websocket = AsyncMock()
+    websocket.receive_bytes.return_value = b"RIFF...."
+    channel = AudioChannel(websocket)
+
+    utterance = await channel.receive_utterance()
+    await channel.send_audio(b"mp3")
+
+    assert utterance.audio == b"RIFF...."
+    assert channel.negotiated is None
+    websocket.send_bytes.assert_awaited_once_with(b"mp3")
+
+
+@pytest.mark.asyncio
+async def test_negotiated_pcm16_utterance_is_wrapped_in_wav():
+    hello = HELLO_MAGIC + json.dumps(
+        {"send": ["pcm16"], "receive": ["mp3"], "sample_rate": 16000}
+    ).encode()
+    websocket = AsyncMock()
+    websocket.receive_bytes.side_effect = [
+        hello,
+        encode_frame(FrameType.AUDIO, Codec.PCM16, 0, b"\x01\x00" * 4),
+        encode_frame(FrameType.AUDIO, Codec.PCM16, 1, b"\x02\x00" * 4)
+        + encode_frame(FrameType.END, Codec.PCM16, 2),
+    ]
+    channel = AudioChannel(websocket)
+
+    utterance = await channel.receive_utterance()
+
+    assert utterance.file_name == "audio.wav"
+    with wave.open(io.BytesIO(utterance.audio)) as wav:
+        assert wav.readframes(8) == b"\x01\x00" * 4 + b"\x02\x00" * 4
+
+    reply = websocket.send_bytes.await_args_list[0].args[0]
+    assert reply.startswith(HELLO_MAGIC)
+    assert json.loads(reply[len(HELLO_MAGIC):])["send"] == "pcm16"
+
+    await channel.send_audio(b"xyz")
+    await channel.end_audio()
+    sent = [call.args[0] for call in websocket.send_bytes.await_args_list[1:]]
+    assert list(decode_frames(b"".join(sent))) == [
+        (FrameType.AUDIO, Codec.MP3, 0, b"xyz"),
+        (FrameType.END, Codec.MP3, 1, b""),
+    ]
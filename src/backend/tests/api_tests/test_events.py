@@ -0,0 +1,101 @@
+import json
+
+import pytest
+from pydantic_ai import Agent
+from pydantic_ai.models.test import TestModel
+
+from ai_services.speculation import StreamingAgentRun, ToolActivity
+from api.events import EVENT_TYPES, EventStream
+
+
+class Outbound:
+    def __init__(self):
+        self.texts = []
+
+    async def send_text(self, data):
+        self.texts.append(data)
+
+
+def balance_agent() -> Agent:
+    agent = Agent(TestModel())
+
+    @agent.tool_plain
+    def get_account_balance(customer_name: str) -> str:
+        return "₹25,000.00"
+
+    return agent
+
+
+@pytest.mark.asyncio
+async def test_tool_activity_is_streamed_in_order_with_the_text():
+    run = StreamingAgentRun(balance_agent(), "balance?", [], deps=None).start()
+
+    items = [item async for item in run.events()]
+
+    start, end = items[0], items[1]
+    assert start.phase == "start" and start.name == "get_account_balance"
+    assert start.args == {"customer_name": "a"}
+    assert end.phase == "end" and end.call_id == start.call_id and end.ok
+    assert end.ms >= 0
+    assert "".join(item for item in items if isinstance(item, str)) == run.text
+
+
+@pytest.mark.asyncio
+async def test_events_carry_sequence_numbers_and_turn_times():
+    outbound = Outbound()
+    events = EventStream(outbound, enabled=True)
+
+    await events.session("token")
+    await events.begin_turn(3200)
+    await events.partial_transcript("what is")
+    await events.final_transcript("what is my balance")
+    await events.tool(ToolActivity("start", "get_account_balance", "c1", args={}))
+    await events.tool(ToolActivity("end", "get_account_balance", "c1", ms=4.2))
+    await events.delta("It is ")
+    await events.audio(b"\x00" * 10)
+    await events.reply("It is ₹500.")
+
+    sent = [json.loads(text) for text in outbound.texts]
+    assert [event["seq"] for event in sent] == list(range(9))
+    assert [event["type"] for event in sent] == [
+        "session", "turn_start", "transcript", "transcript",
+        "tool_start", "tool_end", "delta", "audio", "reply",
+    ]
+    assert {event["type"] for event in sent} <= set(EVENT_TYPES)
+    assert sent[0]["turn"] == 0 and sent[-1]["turn"] == 1
+    assert [event["final"] for event in sent[2:4]] == [False, True]
+    assert sent[7] == {**sent[7], "index": 0, "bytes": 10}
+    assert sent[-1]["audio_chunks"] == 1
+    assert all(event["turn_ms"] >= 0 and event["ts"] > 0 for event in sent)
+
+
+@pytest.mark.asyncio
+async def test_legacy_clients_get_the_text_messages():
+    outbound = Outbound()
+    events = EventStream(outbound, enabled=False)
+
+    await events.session("token")
+    await events.begin_turn(3200)
+    await events.no_speech()
+    await events.begin_turn(3200)
+    await events.final_transcript("hello")
+    await events.delta("Hi")
+    await events.reply("Hi there.")
+
+    assert outbound.texts == ["Session: token", "Client: hello", "Agent: Hi there."]
+
+
+@pytest.mark.asyncio
+async def test_a_turn_without_speech_is_closed():
+    outbound = Outbound()
+    events = EventStream(outbound, enabled=True)
+
+    await events.begin_turn(800)
+    await events.no_speech()
+
+    sent = [json.loads(text) for text in outbound.texts]
+    assert [(event["type"], event["text"]) for event in sent[1:]] == [
+        ("transcript", ""),
+        ("reply", ""),
+    ]
+    assert sent[1]["final"] and sent[2]["audio_chunks"] == 0
@@ -0,0 +1,52 @@
+import asyncio
+import time
+
+import pytest
+
+from api.loop_monitor import LagHistogram, LoopMonitor
+
+
+def block_loop(seconds: float) -> None:
+    time.sleep(seconds)
+
+
+def test_histogram_buckets_and_quantiles():
+    histogram = LagHistogram(buckets_ms=(1, 10, 100))
+    for lag_ms in (0.5, 0.7, 5, 50, 500):
+        histogram.record(lag_ms)
+
+    snapshot = histogram.snapshot()
+
+    assert snapshot["buckets"] == {"le_1ms": 2, "le_10ms": 1, "le_100ms": 1, "inf": 1}
+    assert snapshot["p50_ms"] == 10
+    assert snapshot["p99_ms"] == 500
+    assert snapshot["max_ms"] == 500
+
+
+@pytest.mark.asyncio
+async def test_blocking_call_is_captured_with_its_stack():
+    monitor = LoopMonitor(interval_ms=10, threshold_ms=50).start()
+    await asyncio.sleep(0.05)
+
+    block_loop(0.3)
+    await asyncio.sleep(0.05)
+    await monitor.stop()
+
+    snapshot = monitor.snapshot()
+    assert snapshot["lag"]["max_ms"] >= 200
+    offender = snapshot["top_offenders"][0]
+    assert "in block_loop" in offender["location"]
+    assert offender["count"] == 1
+    assert offender["max_ms"] >= 200
+    assert any("time.sleep" in line for line in offender["stack"])
+
+
+@pytest.mark.asyncio
+async def test_idle_loop_reports_no_offenders():
+    monitor = LoopMonitor(interval_ms=10, threshold_ms=100).start()
+    await asyncio.sleep(0.1)
+    await monitor.stop()
+
+    snapshot = monitor.snapshot()
+    assert snapshot["lag"]["samples"] > 0
+    assert snapshot["top_offenders"] == []
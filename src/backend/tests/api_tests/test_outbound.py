@@ -0,0 +1,114 @@
+import asyncio
+
+import pytest
+
+from api.outbound import (
+    BLOCK,
+    COALESCE,
+    DROP_AND_CLOSE,
+    SLOW_CONSUMER_CLOSE_CODE,
+    OutboundMetrics,
+    OutboundQueue,
+    SlowConsumerError,
+)
+
+
+class SlowWebSocket:
+    """Records sends; each send waits until the test releases it."""
+
+    def __init__(self, paused: bool = True) -> None:
+        self.sent: list = []
+        self.closed_with: int | None = None
+        self.gate = asyncio.Event()
+        if not paused:
+            self.gate.set()
+
+    async def send_bytes(self, data: bytes) -> None:
+        await self.gate.wait()
+        self.sent.append(data)
+
+    async def send_text(self, data: str) -> None:
+        await self.gate.wait()
+        self.sent.append(data)
+
+    async def close(self, code: int = 1000) -> None:
+        self.closed_with = code
+
+
+@pytest.mark.asyncio
+async def test_small_frames_are_batched_in_order():
+    websocket = SlowWebSocket()
+    outbound = OutboundQueue(websocket, batch_bytes=8).start()
+
+    for chunk in (b"aa", b"bb", b"cc", b"dddddd"):
+        await outbound.send_bytes(chunk)
+    await outbound.send_text("Agent: hi")
+    websocket.gate.set()
+    await outbound.flush()
+
+    assert websocket.sent == [b"aabbcc", b"dddddd", "Agent: hi"]
+    assert outbound.stats.messages == 5
+    assert outbound.stats.sends == 3
+    await outbound.aclose()
+
+
+@pytest.mark.asyncio
+async def test_block_policy_applies_backpressure():
+    websocket = SlowWebSocket()
+    outbound = OutboundQueue(websocket, policy=BLOCK, max_messages=2, batch_bytes=1).start()
+
+    await outbound.send_bytes(b"1")
+    await outbound.send_bytes(b"2")
+    await asyncio.sleep(0)  # the sender takes "1" and waits on the client
+    await outbound.send_bytes(b"3")
+    blocked = asyncio.create_task(outbound.send_bytes(b"4"))
+    await asyncio.sleep(0.01)
+    assert not blocked.done()
+
+    websocket.gate.set()
+    await blocked
+    await outbound.flush()
+
+    assert websocket.sent == [b"1", b"2", b"3", b"4"]
+    assert outbound.stats.blocked_ms > 0
+    await outbound.aclose()
+
+
+@pytest.mark.asyncio
+async def test_coalesce_policy_merges_into_tail():
+    websocket = SlowWebSocket()
+    outbound = OutboundQueue(websocket, policy=COALESCE, max_messages=1, batch_bytes=1).start()
+
+    await outbound.send_bytes(b"a")
+    await asyncio.sleep(0)
+    for chunk in (b"b", b"c", b"d"):
+        await outbound.send_bytes(chunk)
+    websocket.gate.set()
+    await outbound.flush()
+
+    assert websocket.sent == [b"a", b"bcd"]
+    assert outbound.stats.coalesced == 2
+    await outbound.aclose()
+
+
+@pytest.mark.asyncio
+async def test_drop_and_close_disconnects_slow_client():
+    websocket = SlowWebSocket()
+    metrics = OutboundMetrics()
+    outbound = OutboundQueue(websocket, policy=DROP_AND_CLOSE, max_messages=1).start()
+    metrics.track(outbound)
+
+    await outbound.send_bytes(b"a")
+    await asyncio.sleep(0)
+    await outbound.send_bytes(b"b")
+    with pytest.raises(SlowConsumerError):
+        await outbound.send_bytes(b"c")
+
+    assert websocket.closed_with == SLOW_CONSUMER_CLOSE_CODE
+    with pytest.raises(SlowConsumerError):
+        await outbound.send_text("Agent: too late")
+
+    await outbound.aclose()
+    metrics.release(outbound)
+    assert metrics.snapshot()["closed"]["slow_consumer_closes"] == 1
+    assert metrics.snapshot()["connections"] == 0
@@ -0,0 +1,99 @@
+import uuid
+
+import pytest
+from pydantic_ai import Agent
+from pydantic_ai.models.test import TestModel
+
+from ai_services.speculation import StreamingAgentRun
+from api.recorder import (
+    RecordingError,
+    SessionRecorder,
+    read_session,
+    tool_calls,
+)
+from api.replay import diff_timings, replay_session
+
+
+async def record_turn(recorder, transcript, deltas, speech_parts):
+    recorder.begin_turn(b"RIFF" + bytes(64), "utterance.wav")
+    recorder.transcribed(transcript)
+    for delta in deltas:
+        recorder.delta(delta)
+    for index, nbytes in enumerate(speech_parts):
+        recorder.speech("".join(deltas), index, nbytes, 0.01)
+    return await recorder.end_turn("".join(deltas))
+
+
+@pytest.mark.asyncio
+async def test_turns_are_appended_and_read_back(tmp_path):
+    path = tmp_path / "session.rec"
+    recorder = SessionRecorder(uuid.uuid4(), path=path)
+
+    timings = await record_turn(recorder, "what is my balance", ["Your ", "balance."], [800, 400])
+    await record_turn(recorder, "thanks", ["Welcome."], [417])
+
+    turns = read_session(path)
+    assert [turn.transcript for turn in turns] == ["what is my balance", "thanks"]
+    first = turns[0]
+    assert first.audio == b"RIFF" + bytes(64)
+    assert [text for _, text in first.deltas] == ["Your ", "balance."]
+    assert first.speech == [{"text": "Your balance.", "parts": [[800, 10.0], [400, 10.0]]}]
+    assert first.timings == timings
+    assert {"stt_ms", "first_delta_ms", "llm_ms", "first_audio_ms", "tts_ms", "turn_ms"} <= set(timings)
+
+
+@pytest.mark.asyncio
+async def test_a_truncated_last_turn_is_ignored(tmp_path):
+    path = tmp_path / "session.rec"
+    recorder = SessionRecorder(uuid.uuid4(), path=path)
+    await record_turn(recorder, "hello", ["Hi."], [417])
+    await record_turn(recorder, "balance", ["It is ₹500."], [417])
+
+    path.write_bytes(path.read_bytes()[:-10])
+
+    assert [turn.transcript for turn in read_session(path)] == ["hello"]
+
+
+def test_other_files_are_rejected(tmp_path):
+    path = tmp_path / "notes.txt"
+    path.write_text("not a recording")
+
+    with pytest.raises(RecordingError):
+        read_session(path)
+
+
+@pytest.mark.asyncio
+async def test_tool_calls_and_results_are_taken_from_the_run():
+    agent = Agent(TestModel())
+
+    @agent.tool_plain
+    def get_balance(customer_name: str) -> str:
+        return "₹25,000"
+
+    run = StreamingAgentRun(agent, "balance?", [], deps=None).start()
+    async for _ in run.deltas():
+        pass
+
+    [call] = tool_calls(run.messages)
+    assert call["name"] == "get_balance"
+    assert set(call["args"]) == {"customer_name"}
+    assert call["result"] == "₹25,000"
+    assert call["ms"] >= 0
+
+
+@pytest.mark.asyncio
+async def test_a_recording_replays_through_the_pipeline(tmp_path):
+    path = tmp_path / "session.rec"
+    recorder = SessionRecorder(uuid.uuid4(), path=path)
+    await record_turn(recorder, "hello", [], [417])
+    await record_turn(recorder, "what is my balance", ["Your balance ", "is ₹500."], [834])
+
+    results = await replay_session(path, speed=0)
+
+    assert len(results) == 2
+    recorded, replayed = results[1]
+    assert replayed["tts_ms"] >= 0
+    assert "first_delta_ms" in replayed and "first_audio_ms" in replayed
+    diff = diff_timings(recorded, replayed, speed=0)
+    assert diff["turn_ms"]["delta_ms"] == replayed["turn_ms"]
+    assert diff["stt_ms"]["recorded_ms"] == recorded["stt_ms"]
@@ -0,0 +1,28 @@
+import asyncio
+
+import pytest
+
+from api.startup import StartupProfile
+
+
+@pytest.mark.asyncio
+async def test_startup_profile_records_concurrent_stages():
+    profile = StartupProfile()
+
+    async def stage(value):
+        await asyncio.sleep(0.01)
+        return value
+
+    results = await asyncio.gather(
+        profile.timed("first", stage(1)),
+        profile.timed("second", stage(2)),
+    )
+    assert results == [1, 2]
+    assert not profile.as_dict()["ready"]
+
+    profile.mark_ready()
+
+    report = profile.as_dict()
+    assert report["ready"]
+    assert {"imports", "first", "second", "total"} <= set(report["stages_ms"])
+    assert report["stages_ms"]["first"] >= 10
@@ -1 +1,24 @@
-pytest_plugins = ["pytest_mock", "pytest_asyncio"]
\ No newline at end of file
+import aiosqlite
+import pytest_asyncio
+
+from customer_transaction_db.repository import SqliteBankingRepository
+from reset_db import reset_db
+
+pytest_plugins = ["pytest_mock", "pytest_asyncio"]
+
+
+@pytest_asyncio.fixture
+async def customer_db(tmp_path):
+    """A freshly seeded copy of the customer transaction database."""
+    db_path = str(tmp_path / "transactions.db")
+    await reset_db(db_path)
+    db = await aiosqlite.connect(db_path)
+    db.row_factory = aiosqlite.Row
+    yield db
+    await db.close()
+
+
+@pytest_asyncio.fixture
+async def banking_repository(customer_db):
+    """The seeded customer database behind the SQLite repository."""
+    return SqliteBankingRepository(customer_db)
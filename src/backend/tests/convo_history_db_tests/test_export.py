@@ -0,0 +1,145 @@
+import csv
+import io
+import json
+import os
+from contextlib import asynccontextmanager
+from datetime import datetime, timedelta
+from uuid import uuid4
+
+import pytest
+from psycopg import sql
+from psycopg_pool import AsyncConnectionPool
+
+from convo_history_db.actions import create_main_table
+from convo_history_db.partitions import partition_name
+from convo_history_db.export import (
+    Checkpoint,
+    ExportQuery,
+    _page_query,
+    _page_select,
+    export_to_path,
+    stream_export,
+)
+
+CONVERSATION = uuid4()
+START = datetime(2026, 10, 1, 9, 0)
+ROWS = [
+    (i, CONVERSATION, "user" if i % 2 else "agent", START + timedelta(seconds=i), f"message {i}, \"quoted\"")
+    for i in range(1, 8)
+]
+
+
+class FakePool:
+    @asynccontextmanager
+    async def connection(self):
+        yield None
+
+
+def fake_fetch_page(fail_after: int | None = None):
+    calls = []
+
+    async def fetch_page(conn, query, checkpoint, page_rows):
+        calls.append(checkpoint.id)
+        if fail_after is not None and len(calls) > fail_after:
+            raise ConnectionError("server closed the connection")
+        remaining = [row for row in ROWS if row[0] > checkpoint.id]
+        return remaining[:page_rows]
+
+    return fetch_page
+
+
+def test_page_query_uses_keyset_after_checkpoint():
+    query = ExportQuery(start=START, conversation_ids=(CONVERSATION,))
+    statement, params = _page_query(query, Checkpoint(timestamp=START, id=3), 500)
+
+    text = statement.as_string()
+    assert text.startswith("COPY (SELECT")
+    assert "timestamp >= %s AND (timestamp, id) > (%s, %s)" in text
+    assert "ORDER BY timestamp, id LIMIT 500" in text and "FORMAT BINARY" in text
+    assert params == [START, [CONVERSATION], START, START, 3]
+
+
+@pytest.mark.asyncio
+async def test_stream_export_ndjson(mocker):
+    mocker.patch("convo_history_db.export.fetch_page", fake_fetch_page())
+
+    chunks = [
+        chunk
+        async for chunk in stream_export(FakePool(), ExportQuery(), "ndjson", page_rows=3)
+    ]
+
+    records = [json.loads(line) for line in b"".join(chunks).splitlines()]
+    assert [record["id"] for record in records] == list(range(1, 8))
+    assert records[0]["conversation_id"] == str(CONVERSATION)
+    assert len(chunks) == 5, "header, three pages and footer"
+
+
+@pytest.mark.asyncio
+async def test_interrupted_csv_export_resumes(tmp_path, mocker):
+    output = tmp_path / "messages.csv"
+    checkpoint_path = tmp_path / "messages.checkpoint.json"
+
+    mocker.patch("convo_history_db.export.fetch_page", fake_fetch_page(fail_after=2))
+    with pytest.raises(ConnectionError):
+        await export_to_path(FakePool(), ExportQuery(), "csv", output, checkpoint_path, 2)
+    assert Checkpoint.from_json(checkpoint_path.read_text()).id == 4
+
+    mocker.patch("convo_history_db.export.fetch_page", fake_fetch_page())
+    checkpoint = await export_to_path(
+        FakePool(), ExportQuery(), "csv", output, checkpoint_path, 2
+    )
+
+    rows = list(csv.reader(io.StringIO(output.read_text())))
+    assert rows[0] == ["id", "conversation_id", "sender", "timestamp", "content"]
+    assert [int(row[0]) for row in rows[1:]] == list(range(1, 8))
+    assert rows[1][4] == 'message 1, "quoted"'
+    assert checkpoint.rows == 7
+
+
+@pytest.mark.asyncio
+async def test_parquet_export_writes_part_files(tmp_path, mocker):
+    pq = pytest.importorskip("pyarrow.parquet")
+    mocker.patch("convo_history_db.export.fetch_page", fake_fetch_page())
+
+    await export_to_path(
+        FakePool(), ExportQuery(), "parquet", tmp_path / "out", tmp_path / "cp.json", 4
+    )
+
+    table = pq.read_table(tmp_path / "out")
+    assert table.num_rows == 7
+    assert sorted(table.column("id").to_pylist()) == list(range(1, 8))
+
+
+@pytest.mark.asyncio
+async def test_page_query_walks_the_export_index_of_later_partitions_only():
+    """Needs TEST_POSTGRES_CONNINFO, like the banking repository tests."""
+    conninfo = os.getenv("TEST_POSTGRES_CONNINFO")
+    if not conninfo:
+        pytest.skip("TEST_POSTGRES_CONNINFO is not set")
+    schema = f"export_test_{uuid4().hex[:8]}"
+    pool = AsyncConnectionPool(
+        conninfo=conninfo, kwargs={"options": f"-c search_path={schema}"}, open=False
+    )
+    await pool.open()
+    try:
+        async with pool.connection() as conn:
+            await conn.execute(f"CREATE SCHEMA {schema};")
+        await create_main_table(pool, months_ahead=2)
+
+        now = datetime.now()
+        checkpoint = Checkpoint(timestamp=datetime(now.year, now.month, 1) + timedelta(days=40), id=1)
+        select, params = _page_select(ExportQuery(), checkpoint, 500)
+        async with pool.connection() as conn:
+            await conn.execute("SET enable_seqscan = off;")
+            cursor = await conn.execute(
+                sql.SQL("EXPLAIN (FORMAT JSON) {select}").format(select=select), params
+            )
+            plan = json.dumps((await cursor.fetchone())[0])
+    finally:
+        async with pool.connection() as conn:
+            await conn.execute(f"DROP SCHEMA {schema} CASCADE;")
+        await pool.close()
+
+    assert "timestamp_id_idx" in plan
+    assert '"Sort"' not in plan
+    assert partition_name(now.date()) not in plan, "Earlier partitions are pruned"
@@ -0,0 +1,141 @@
+import csv
+import gzip
+import os
+from datetime import date, datetime
+from uuid import uuid4
+
+import pytest
+from psycopg_pool import AsyncConnectionPool
+
+from convo_history_db.actions import create_main_table
+from convo_history_db.partitions import (
+    add_months,
+    apply_retention,
+    expired_partitions,
+    is_partitioned,
+    list_partitions,
+    partition_month,
+    partition_name,
+)
+
+
+def test_add_months_crosses_years():
+    assert add_months(date(2026, 11, 17), 2) == date(2027, 1, 1)
+    assert add_months(date(2026, 1, 31), -1) == date(2025, 12, 1)
+    assert add_months(date(2026, 10, 19), 0) == date(2026, 10, 1)
+
+
+def test_partition_names_round_trip():
+    assert partition_name(date(2026, 3, 9)) == "messages_y2026m03"
+    assert partition_month("messages_y2026m03") == date(2026, 3, 1)
+    assert partition_month("messages_default") is None
+
+
+def test_expired_partitions_keep_retention_window():
+    names = [partition_name(date(2026, month, 1)) for month in range(1, 13)]
+    names.append("messages_archive_import")
+
+    expired = expired_partitions(names, today=date(2026, 10, 19), retention_months=3)
+
+    assert expired == [partition_name(date(2026, month, 1)) for month in range(1, 8)]
+
+
+@pytest.mark.asyncio
+async def test_retention_disabled_touches_nothing(tmp_path):
+    archive_dir = tmp_path / "archive"
+
+    assert await apply_retention(None, retention_months=0, archive_dir=str(archive_dir)) == []
+    assert not archive_dir.exists()
+
+
+@pytest.mark.asyncio
+async def test_retention_without_archive_dir_touches_nothing():
+    assert await apply_retention(None, retention_months=3, archive_dir="") == []
+
+
+@pytest.mark.asyncio
+async def test_migrate_then_archive_expired_partition(tmp_path):
+    """Needs TEST_POSTGRES_CONNINFO, like the banking repository tests."""
+    conninfo = os.getenv("TEST_POSTGRES_CONNINFO")
+    if not conninfo:
+        pytest.skip("TEST_POSTGRES_CONNINFO is not set")
+    schema = f"partitions_test_{uuid4().hex[:8]}"
+    pool = AsyncConnectionPool(
+        conninfo=conninfo, kwargs={"options": f"-c search_path={schema}"}, open=False
+    )
+    await pool.open()
+    conversation = uuid4()
+    try:
+        async with pool.connection() as conn:
+            await conn.execute(f"CREATE SCHEMA {schema};")
+            # The plain table of earlier releases.
+            await conn.execute(
+                "CREATE TABLE messages ("
+                "id SERIAL PRIMARY KEY, conversation_id UUID NOT NULL, "
+                "sender VARCHAR(10) NOT NULL, "
+                "timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP, content TEXT NOT NULL);"
+            )
+            today = (await (await conn.execute("SELECT LOCALTIMESTAMP::date;")).fetchone())[0]
+            old_month = add_months(today, -3)
+            await conn.execute(
+                "INSERT INTO messages (conversation_id, sender, timestamp, content) "
+                "VALUES (%s, 'user', %s, 'old question'), "
+                "(%s, 'agent', %s, 'old answer'), "
+                "(%s, 'user', DEFAULT, 'new question');",
+                (
+                    conversation, datetime(old_month.year, old_month.month, 2),
+                    conversation, datetime(old_month.year, old_month.month, 2, 0, 1),
+                    conversation,
+                ),
+            )
+            # Leave a gap in the ids, as deleted rows do.
+            await conn.execute("DELETE FROM messages WHERE content = 'new question';")
+            await conn.execute(
+                "INSERT INTO messages (conversation_id, sender, content) "
+                "VALUES (%s, 'user', 'new question');",
+                (conversation,),
+            )
+
+        await create_main_table(pool, months_ahead=1)
+
+        async with pool.connection() as conn:
+            assert await is_partitioned(conn) is True
+            rows = await (
+                await conn.execute("SELECT id, content FROM messages ORDER BY id;")
+            ).fetchall()
+            assert rows == [(1, "old question"), (2, "old answer"), (4, "new question")]
+            await conn.execute(
+                "INSERT INTO messages (conversation_id, sender, content) "
+                "VALUES (%s, 'agent', 'new answer');",
+                (conversation,),
+            )
+            (next_id,) = await (
+                await conn.execute("SELECT MAX(id) FROM messages;")
+            ).fetchone()
+            assert next_id == 5, "The sequence continues after the migrated ids"
+
+        archived = await apply_retention(
+            pool, retention_months=2, archive_dir=str(tmp_path)
+        )
+
+        async with pool.connection() as conn:
+            partitions = await list_partitions(conn)
+            (remaining,) = await (
+                await conn.execute("SELECT COUNT(*) FROM messages;")
+            ).fetchone()
+    finally:
+        async with pool.connection() as conn:
+            await conn.execute(f"DROP SCHEMA {schema} CASCADE;")
+        await pool.close()
+
+    old_archive = tmp_path / f"{partition_name(old_month)}.csv.gz"
+    assert old_archive in archived
+    assert partition_name(old_month) not in partitions
+    assert partition_name(today) in partitions
+    assert remaining == 2
+    with gzip.open(old_archive, "rt", newline="") as archive:
+        records = list(csv.DictReader(archive))
+    assert [(record["id"], record["content"]) for record in records] == [
+        ("1", "old question"),
+        ("2", "old answer"),
+    ]
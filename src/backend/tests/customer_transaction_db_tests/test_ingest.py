@@ -0,0 +1,119 @@
+import json
+
+import pytest
+import pytest_asyncio
+
+from customer_transaction_db.ingest import (
+    IngestError,
+    InvalidRecord,
+    TransactionWriter,
+    parse_record,
+    parse_stream,
+)
+from session_state.bus import TOOL_RESULTS_CHANNEL, LocalEventBus
+
+SHIVAMANI = "SBI-100000"
+MANI = "HDFC-100001"
+
+
+async def chunked(data: bytes, size: int = 7):
+    for start in range(0, len(data), size):
+        yield data[start:start + size]
+
+
+def ndjson(*records: dict) -> bytes:
+    return b"".join(json.dumps(record).encode() + b"\n" for record in records)
+
+
+def txn(external_id: str, account_number: str = SHIVAMANI, **fields) -> dict:
+    record = {
+        "external_id": external_id,
+        "account_number": account_number,
+        "txn_date": "2025-03-01",
+        "amount": 250,
+        "txn_type": "debit",
+        "merchant_name": "Zomato",
+        "category": "Food",
+    }
+    record.update(fields)
+    return record
+
+
+@pytest_asyncio.fixture
+async def writer(customer_db, tmp_path):
+    bus = LocalEventBus()
+    writer = await TransactionWriter(
+        str(tmp_path / "transactions.db"), bus, batch_rows=2
+    ).start()
+    yield writer
+    await writer.aclose()
+
+
+def test_parse_record_normalises_sign_and_rejects_bad_fields():
+    assert parse_record(txn("a")).amount == -250
+    assert parse_record(txn("b", amount=-10, txn_type="")).txn_type == "debit"
+    assert parse_record(txn("c", amount="99.5", txn_type="CREDIT")).amount == 99.5
+
+    for bad in (txn("d", txn_date="01/03/2025"), txn("e", amount="x"), txn("")):
+        with pytest.raises(InvalidRecord):
+            parse_record(bad)
+
+
+@pytest.mark.asyncio
+async def test_csv_records_may_span_lines_and_chunks():
+    feed = (
+        b"external_id,account_number,txn_date,amount,merchant_name\r\n"
+        b'x1,SBI-100000,2025-03-01,-10,"Cafe ""Coffee"" Day"\r\n'
+        b'x2,SBI-100000,2025-03-02,-20,"Two\nlines"\r\n'
+        b"x3,SBI-100000,not-a-date,-30,Shop\n"
+    )
+
+    items = [item async for item in parse_stream(chunked(feed), "csv")]
+
+    assert [item.merchant_name for item in items[:2]] == ['Cafe "Coffee" Day', "Two\nlines"]
+    assert isinstance(items[2], InvalidRecord)
+    assert "line 5" in str(items[2])
+
+
+@pytest.mark.asyncio
+async def test_csv_without_required_columns_is_refused():
+    with pytest.raises(IngestError):
+        [item async for item in parse_stream(chunked(b"id,amount\n1,2\n"), "csv")]
+
+
+@pytest.mark.asyncio
+async def test_ingest_inserts_dedupes_and_rejects(writer, customer_db):
+    feed = ndjson(
+        txn("t1"), txn("t2", MANI), txn("t1"), txn("t3", "NOPE-1"),
+    ) + b"{not json}\n"
+
+    report = await writer.ingest(chunked(feed), "ndjson")
+
+    assert report.received == 5
+    assert report.inserted == 2
+    assert report.duplicates == 1
+    assert report.rejected == 2
+
+    again = await writer.ingest(chunked(ndjson(txn("t1"), txn("t2", MANI))), "ndjson")
+    assert again.inserted == 0 and again.duplicates == 2
+
+    cursor = await customer_db.execute(
+        "SELECT current_balance FROM account_balances WHERE account_number = ?;",
+        (SHIVAMANI,),
+    )
+    (balance,) = await cursor.fetchone()
+    assert balance == 25000 - 8128 - 250, "seeded debits plus the ingested one"
+
+
+@pytest.mark.asyncio
+async def test_writes_invalidate_affected_customers(writer):
+    events = []
+
+    async def record(event):
+        events.append(event)
+
+    writer.bus.subscribe(TOOL_RESULTS_CHANNEL, record)
+    await writer.ingest(chunked(ndjson(txn("t1"), txn("t2", MANI))), "ndjson")
+    await writer.ingest(chunked(ndjson(txn("t1"))), "ndjson")
+
+    assert sorted(event["customer_name"] for event in events) == ["Mani", "Shivamani"]
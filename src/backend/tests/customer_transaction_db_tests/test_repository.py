@@ -0,0 +1,144 @@
+"""
+Conformance tests run against every BankingRepository backend.
+
+The Postgres backend runs when TEST_POSTGRES_CONNINFO names a server where
+a throwaway schema may be created, e.g. "postgresql://user:pw@localhost/db".
+"""
+import os
+from uuid import uuid4
+
+import pytest
+import pytest_asyncio
+from psycopg_pool import AsyncConnectionPool
+
+from customer_transaction_db.postgres import PostgresBankingRepository, copy_from_sqlite
+from customer_transaction_db.repository import BankingRepository, SqliteBankingRepository
+
+POSTGRES_CONNINFO = os.getenv("TEST_POSTGRES_CONNINFO")
+
+
+@pytest_asyncio.fixture(params=["sqlite", "postgres"])
+async def repository(request, customer_db):
+    if request.param == "sqlite":
+        yield SqliteBankingRepository(customer_db)
+        return
+
+    if not POSTGRES_CONNINFO:
+        pytest.skip("TEST_POSTGRES_CONNINFO is not set")
+    schema = f"banking_test_{uuid4().hex[:8]}"
+    pool = AsyncConnectionPool(conninfo=POSTGRES_CONNINFO, open=False)
+    await pool.open()
+    try:
+        await copy_from_sqlite(pool, customer_db, schema=schema)
+        yield PostgresBankingRepository(pool, schema=schema)
+    finally:
+        async with pool.connection() as conn:
+            await conn.execute(f"DROP SCHEMA {schema} CASCADE;")
+        await pool.close()
+
+
+@pytest.mark.asyncio
+async def test_implements_protocol(repository):
+    assert isinstance(repository, BankingRepository)
+    await repository.open()
+    await repository.ping()
+
+
+@pytest.mark.asyncio
+async def test_account_balance(repository):
+    row = await repository.account_balance("SHIVAMANI")
+
+    assert row["account_number"] == "SBI-100000"
+    assert row["bank_name"] == "SBI"
+    assert row["currency"] == "INR"
+    assert row["current_balance"] == pytest.approx(25000 - 8128)
+    assert await repository.account_balance("Nobody") is None
+
+
+@pytest.mark.asyncio
+async def test_recent_transactions_are_newest_first(repository):
+    rows = await repository.recent_transactions("shivamani", 3)
+
+    assert [row["merchant_name"] for row in rows] == ["Amazon", "Swiggy", "Myntra"]
+    assert rows[0]["txn_date"] == "2025-02-10"
+    assert rows[0]["amount"] == pytest.approx(-1299.0)
+    assert rows[0]["txn_type"] == "debit"
+
+
+@pytest.mark.asyncio
+async def test_spending_aggregates(repository):
+    by_category = await repository.spending_by_category("Shivamani", "2025-02-01")
+    average = await repository.average_debit("Shivamani", "2025-02-01")
+    above = await repository.debits_above("Shivamani", 1000, "2025-02-01")
+
+    assert by_category == pytest.approx(
+        {"Electronics": 1299.0, "Food": 450.0, "Shopping": 3200.0, "Travel": 80.0}
+    )
+    assert average == pytest.approx((1299 + 450 + 3200 + 80) / 4)
+    assert sorted(row["merchant_name"] for row in above) == ["Amazon", "Myntra"]
+    assert await repository.average_debit("Shivamani", "2030-01-01") == 0
+
+
+@pytest.mark.asyncio
+async def test_bank_schemes(repository):
+    rows = await repository.bank_schemes("hdfc")
+
+    assert {row["scheme_name"] for row in rows} == {
+        "HDFC SavingsMax Account", "HDFC Fixed Deposit – Regular",
+    }
+    assert any(row["interest_rate"] is None for row in rows)
+
+
+@pytest.mark.asyncio
+async def test_transactions_after_and_pages(repository):
+    everything = await repository.transactions_after("Shivamani", 0)
+    ids = [row["id"] for row in everything]
+    assert ids == sorted(ids) and len(ids) == 7
+    assert len(await repository.transactions_after("Shivamani", ids[3])) == 3
+
+    first = await repository.transactions_page("Shivamani", 2, start_date="2024-12-01")
+    second = await repository.transactions_page(
+        "Shivamani", 10,
+        before=(first[-1]["txn_date"], first[-1]["id"]),
+        start_date="2024-12-01",
+        end_date="2025-02-08",
+    )
+
+    assert [row["txn_date"] for row in first] == ["2025-02-10", "2025-02-08"]
+    assert [row["txn_date"] for row in second] == [
+        "2025-02-05", "2025-02-02", "2024-12-20", "2024-12-18",
+    ]
+
+
+@pytest.mark.asyncio
+async def test_search_transactions_ranks_merchants_first(repository):
+    rows = await repository.search_transactions("Shivamani", "Swiggy orders", 5)
+
+    assert [row["merchant_name"] for row in rows] == ["Swiggy"]
+    assert rows[0]["amount"] == -450
+    assert await repository.search_transactions("Shivamani", "the", 5) == []
+    assert await repository.search_transactions(
+        "Shivamani", "swiggy", 5, since="2025-02-09"
+    ) == []
+
+
+@pytest.mark.asyncio
+async def test_merchant_spending_aggregates_matches(repository):
+    rows = await repository.merchant_spending("Shivamani", "amazon flipkart")
+
+    totals = {row["merchant_name"]: row for row in rows}
+    assert set(totals) == {"Amazon", "Flipkart"}
+    assert totals["Amazon"]["spent"] == 1299
+    assert totals["Amazon"]["transactions"] == 1
+    assert totals["Amazon"]["first_date"] == totals["Amazon"]["last_date"] == "2025-02-10"
+    assert totals["Flipkart"]["received"] == 0
+
+
+@pytest.mark.asyncio
+async def test_search_bank_schemes(repository):
+    rows = await repository.search_bank_schemes("senior citizens", 5)
+    assert [row["scheme_name"] for row in rows] == ["SBI Senior Citizen Savings"]
+    assert rows[0]["bank_name"] == "SBI"
+
+    deposits = await repository.search_bank_schemes("deposit", 5, bank_name="hdfc")
+    assert [row["scheme_name"] for row in deposits] == ["HDFC Fixed Deposit – Regular"]
@@ -0,0 +1,41 @@
+import pytest
+
+from customer_transaction_db.schema import ensure_schema
+from customer_transaction_db.search import fts5_query, search_terms, tsquery
+
+
+def test_search_terms_drop_stopwords_and_plurals():
+    terms = search_terms("How much did I spend on Swiggy orders, and the bus?")
+
+    assert terms == ["spend", "swiggy", "order", "bus"]
+    assert fts5_query(["swiggy", "order"]) == '"swiggy"* OR "order"*'
+    assert tsquery(["swiggy", "order"]) == "swiggy:* | order:*"
+
+
+@pytest.mark.asyncio
+async def test_writes_keep_the_index_in_sync(customer_db, banking_repository):
+    await customer_db.execute(
+        "INSERT INTO transactions (account_id, txn_date, amount, txn_type, merchant_name, category) "
+        "SELECT account_id, '2025-03-01', -250, 'debit', 'Zomato', 'Food' FROM transactions LIMIT 1;"
+    )
+    await customer_db.execute(
+        "UPDATE transactions SET merchant_name = 'Swiggy Instamart' WHERE merchant_name = 'Swiggy';"
+    )
+    await customer_db.execute("DELETE FROM transactions WHERE merchant_name = 'Rapido';")
+
+    food = await banking_repository.search_transactions("Shivamani", "food", 10)
+    assert {row["merchant_name"] for row in food} == {"Zomato", "Swiggy Instamart"}
+    assert await banking_repository.search_transactions("Shivamani", "instamart", 10)
+    assert await banking_repository.search_transactions("Shivamani", "rapido", 10) == []
+
+
+@pytest.mark.asyncio
+async def test_missing_indexes_are_built_from_existing_rows(customer_db, banking_repository):
+    await customer_db.execute("DROP TABLE transactions_fts;")
+    await customer_db.execute("DROP TABLE bank_schemes_fts;")
+
+    await ensure_schema(customer_db)
+
+    rows = await banking_repository.search_transactions("Shivamani", "myntra", 10)
+    assert [row["merchant_name"] for row in rows] == ["Myntra"]
+    assert await banking_repository.search_bank_schemes("savingsmax", 5)
@@ -0,0 +1,99 @@
+import asyncio
+
+import pytest
+
+from customer_transaction_db.repository import BankingRepository
+from customer_transaction_db.singleflight import SingleFlight, SingleFlightRepository
+from session_state.bus import TOOL_RESULTS_CHANNEL, LocalEventBus
+
+
+class SlowRepository:
+    """Counts reads of bank schemes and balances, each taking a while."""
+
+    def __init__(self, repository, delay=0.02):
+        self.repository = repository
+        self.delay = delay
+        self.reads = 0
+
+    async def bank_schemes(self, bank_name):
+        self.reads += 1
+        await asyncio.sleep(self.delay)
+        return await self.repository.bank_schemes(bank_name)
+
+    async def account_balance(self, customer_name):
+        self.reads += 1
+        await asyncio.sleep(self.delay)
+        if customer_name == "broken":
+            raise ConnectionError("database is gone")
+        return await self.repository.account_balance(customer_name)
+
+
+@pytest.mark.asyncio
+async def test_identical_concurrent_reads_run_once(banking_repository):
+    slow = SlowRepository(banking_repository)
+    flight = SingleFlight()
+    repository = SingleFlightRepository(slow, flight)
+
+    results = await asyncio.gather(
+        *(repository.bank_schemes(name) for name in ("SBI", "sbi", "SBI", "HDFC"))
+    )
+
+    assert slow.reads == 2
+    assert results[0] is results[1] is results[2]
+    assert len(results[3]) == 2
+    snapshot = flight.snapshot()
+    assert snapshot["calls"] == 4 and snapshot["executions"] == 2
+    assert snapshot["keys"]["bank_schemes:sbi"] == {
+        **snapshot["keys"]["bank_schemes:sbi"],
+        "calls": 3, "coalesced": 2, "max_waiters": 3,
+    }
+    assert snapshot["in_flight"] == 0
+
+    # Nothing is cached once the flight landed.
+    await repository.bank_schemes("SBI")
+    assert slow.reads == 3
+
+
+@pytest.mark.asyncio
+async def test_errors_reach_every_waiter_and_cancelled_waiters_do_not_stop_others(
+    banking_repository,
+):
+    slow = SlowRepository(banking_repository)
+    flight = SingleFlight()
+    repository = SingleFlightRepository(slow, flight)
+
+    failures = await asyncio.gather(
+        repository.account_balance("broken"),
+        repository.account_balance("broken"),
+        return_exceptions=True,
+    )
+    assert all(isinstance(error, ConnectionError) for error in failures)
+    assert flight.totals.errors == 1
+
+    first = asyncio.create_task(repository.account_balance("Shivamani"))
+    second = asyncio.create_task(repository.account_balance("Shivamani"))
+    await asyncio.sleep(0)
+    first.cancel()
+    assert (await second)["bank_name"] == "SBI"
+    assert slow.reads == 2
+
+
+@pytest.mark.asyncio
+async def test_a_change_detaches_the_customers_reads_in_flight(banking_repository):
+    bus = LocalEventBus()
+    slow = SlowRepository(banking_repository)
+    flight = SingleFlight(bus=bus)
+    repository = SingleFlightRepository(slow, flight)
+
+    before = asyncio.create_task(repository.account_balance("Shivamani"))
+    await asyncio.sleep(0)
+    await bus.publish(TOOL_RESULTS_CHANNEL, {"customer_name": "SHIVAMANI"})
+    after = asyncio.create_task(repository.account_balance("Shivamani"))
+    await asyncio.gather(before, after)
+
+    assert slow.reads == 2
+    assert flight.detached == 1
+
+
+def test_wrapper_implements_protocol(banking_repository):
+    assert isinstance(SingleFlightRepository(banking_repository, SingleFlight()), BankingRepository)
@@ -0,0 +1,53 @@
+import io
+import wave
+
+from nlp_processor.audio_codecs import (
+    group_frames,
+    iter_mp3_frames,
+    iter_ogg_pages,
+    iter_pcm16_frames,
+    pcm16_to_wav,
+)
+
+# MPEG2 Layer III, 32 kbps, 24 kHz, no padding -> 72 * 32000 / 24000 = 96 bytes
+MP3_FRAME = bytes([0xFF, 0xF3, 0x44, 0xC4]) + b"\x00" * 92
+
+
+def test_pcm16_to_wav():
+    pcm = b"\x01\x00" * 160
+    with wave.open(io.BytesIO(pcm16_to_wav(pcm, 16000))) as wav:
+        assert wav.getframerate() == 16000
+        assert wav.getsampwidth() == 2
+        assert wav.readframes(wav.getnframes()) == pcm
+
+
+def test_iter_mp3_frames_splits_on_frame_boundaries():
+    frames = list(iter_mp3_frames(MP3_FRAME * 3))
+    assert frames == [MP3_FRAME] * 3, "Each MP3 frame should be yielded separately"
+
+
+def test_iter_mp3_frames_keeps_id3_tag_with_first_frame():
+    tag = b"ID3\x04\x00\x00\x00\x00\x00\x02ab"
+    frames = list(iter_mp3_frames(tag + MP3_FRAME * 2))
+    assert frames == [tag + MP3_FRAME, MP3_FRAME]
+
+
+def test_iter_mp3_frames_yields_unparseable_tail():
+    frames = list(iter_mp3_frames(MP3_FRAME + b"garbage"))
+    assert frames == [MP3_FRAME, b"garbage"]
+
+
+def test_iter_ogg_pages():
+    page = b"OggS" + b"\x00" * 22 + bytes([2, 3, 1]) + b"abcd"
+    assert list(iter_ogg_pages(page * 2)) == [page, page]
+
+
+def test_iter_pcm16_frames():
+    # 20 ms of mono 16 kHz PCM16 is 640 bytes
+    frames = list(iter_pcm16_frames(b"\x00" * 1000, 16000, frame_ms=20))
+    assert [len(f) for f in frames] == [640, 360]
+
+
+def test_group_frames_never_splits_a_frame():
+    chunks = list(group_frames([b"a" * 40, b"b" * 40, b"c" * 40, b"d" * 200], 100))
+    assert chunks == [b"a" * 40 + b"b" * 40, b"c" * 40, b"d" * 200]
@@ -0,0 +1,119 @@
+import asyncio
+
+import groq
+import httpx
+import pytest
+
+from nlp_processor.hedging import Hedger, RetryBudget, retry_after_seconds
+
+
+def rate_limited(retry_after: str) -> groq.RateLimitError:
+    request = httpx.Request("POST", "https://api.groq.com/openai/v1/audio/transcriptions")
+    response = httpx.Response(429, headers={"retry-after": retry_after}, request=request)
+    return groq.RateLimitError("rate limited", response=response, body=None)
+
+
+class Upstream:
+    """Answers with the scripted delay or error of each successive request."""
+
+    def __init__(self, *script):
+        self.script = list(script)
+        self.calls = 0
+        self.cancelled = 0
+
+    async def request(self):
+        outcome = self.script[min(self.calls, len(self.script) - 1)]
+        self.calls += 1
+        number = self.calls
+        if isinstance(outcome, Exception):
+            raise outcome
+        try:
+            await asyncio.sleep(outcome)
+        except asyncio.CancelledError:
+            self.cancelled += 1
+            raise
+        return f"answer {number}"
+
+
+@pytest.mark.asyncio
+async def test_a_straggler_is_hedged_and_the_loser_cancelled():
+    upstream = Upstream(5.0, 0.01)
+    hedger = Hedger(initial_delay_ms=20)
+
+    assert await hedger.call(upstream.request) == "answer 2"
+    await asyncio.sleep(0)
+
+    assert upstream.calls == 2
+    assert upstream.cancelled == 1
+    snapshot = hedger.snapshot()
+    assert snapshot["hedges"] == 1
+    assert snapshot["win_rate"] == 1.0
+
+
+@pytest.mark.asyncio
+async def test_the_hedge_delay_follows_the_observed_quantile():
+    hedger = Hedger(quantile=0.95, min_samples=20, initial_delay_ms=1500)
+    assert hedger.hedge_delay() == 1.5
+
+    for ms in range(1, 101):
+        hedger.latency.record(ms / 1000)
+
+    assert hedger.hedge_delay() == pytest.approx(0.095, abs=0.001)
+
+
+@pytest.mark.asyncio
+async def test_hedges_stop_when_the_budget_is_spent():
+    hedger = Hedger(initial_delay_ms=10, budget=RetryBudget(ratio=0, max_tokens=1))
+
+    await hedger.call(Upstream(0.05, 0.05).request)
+    upstream = Upstream(0.05)
+    await hedger.call(upstream.request)
+
+    assert upstream.calls == 1
+    assert hedger.stats.hedges == 1
+    assert hedger.stats.budget_exhausted == 1
+
+
+@pytest.mark.asyncio
+async def test_rate_limited_requests_are_retried_after_the_requested_delay():
+    upstream = Upstream(rate_limited("0.05"), 0)
+    hedger = Hedger()
+    loop = asyncio.get_running_loop()
+
+    started = loop.time()
+    assert await hedger.call(upstream.request) == "answer 2"
+
+    assert loop.time() - started >= 0.05
+    assert hedger.stats.retries == 1
+    assert hedger.stats.rate_limited == 1
+
+
+@pytest.mark.asyncio
+async def test_a_long_retry_after_fails_fast():
+    upstream = Upstream(rate_limited("120"))
+    hedger = Hedger(max_retry_after_seconds=1)
+
+    with pytest.raises(groq.RateLimitError):
+        await hedger.call(upstream.request)
+    assert upstream.calls == 1
+
+
+@pytest.mark.asyncio
+async def test_client_errors_are_not_retried():
+    request = httpx.Request("POST", "https://api.groq.com")
+    error = groq.BadRequestError(
+        "bad audio", response=httpx.Response(400, request=request), body=None
+    )
+    upstream = Upstream(error)
+    hedger = Hedger()
+
+    with pytest.raises(groq.BadRequestError):
+        await hedger.call(upstream.request)
+    assert upstream.calls == 1
+    assert hedger.stats.failures == 1
+
+
+def test_retry_after_accepts_http_dates():
+    assert retry_after_seconds(rate_limited("Wed, 21 Oct 2015 07:28:00 GMT")) == 0
+    assert retry_after_seconds(rate_limited("2")) == 2
+    assert retry_after_seconds(ValueError()) is None
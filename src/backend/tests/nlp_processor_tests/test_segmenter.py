@@ -0,0 +1,67 @@
+import pytest
+
+from nlp_processor.segmenter import TextSegmenter
+
+
+def segment(text: str, step: int = 3, **kwargs) -> list[str]:
+    segmenter = TextSegmenter(**kwargs)
+    chunks = []
+    for i in range(0, len(text), step):
+        chunks += segmenter.push(text[i:i + step])
+    return chunks + segmenter.flush()
+
+
+@pytest.mark.parametrize("step", [1, 2, 7, 1000])
+def test_amounts_and_abbreviations_are_not_split(step):
+    text = (
+        "Sure! Your balance is ₹1,23,456.78 as of 10:30 a.m. today. "
+        "Rs. 500 was paid to Mr. S. Kumar, e.g. for rent."
+    )
+
+    assert segment(text, step) == [
+        "Sure!",
+        "Your balance is ₹1,23,456.78 as of 10:30 a.m. today. "
+        "Rs. 500 was paid to Mr. S. Kumar, e.g. for rent.",
+    ]
+
+
+def test_first_chunk_is_short_then_sentences_are_merged():
+    text = (
+        "Your recent spending looks normal. You spent ₹450.00 at Swiggy. "
+        "You also spent ₹1,299.00 at Amazon. Food was your largest category. "
+        "Nothing unusual stood out."
+    )
+
+    chunks = segment(text, min_chunk_chars=60)
+
+    assert chunks == [
+        "Your recent spending looks normal.",
+        "You spent ₹450.00 at Swiggy. You also spent ₹1,299.00 at Amazon.",
+        "Food was your largest category. Nothing unusual stood out.",
+    ]
+
+
+def test_long_first_sentence_is_cut_at_a_clause():
+    text = "Over the last month you spent most on food, shopping and travel, with Swiggy first"
+
+    chunks = segment(text, first_chunk_chars=45)
+
+    assert chunks[0] == "Over the last month you spent most on food,"
+    assert "".join(chunks).replace(" ", "") == text.replace(" ", "")
+
+
+def test_oversized_text_without_boundaries_is_cut_at_spaces():
+    text = " ".join(["amount"] * 100)
+
+    chunks = segment(text, first_chunk_chars=20, max_chunk_chars=50)
+
+    assert all(len(chunk) <= 50 for chunk in chunks)
+    assert " ".join(chunks) == text
+
+
+def test_list_markers_and_flush_reset():
+    segmenter = TextSegmenter()
+
+    assert segmenter.push("1. Amazon ₹1,299.00\n2.") == ["1. Amazon ₹1,299.00"]
+    assert segmenter.flush() == ["2."]
+    assert segmenter.push("Done. ") == ["Done."], "The next reply starts short again"
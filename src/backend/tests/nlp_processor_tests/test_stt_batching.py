@@ -0,0 +1,123 @@
+import asyncio
+
+import numpy as np
+import pytest
+
+from nlp_processor.audio_codecs import pcm16_to_wav
+from nlp_processor.stt_batching import (
+    SAMPLE_RATE,
+    BatchingTranscriber,
+    decode_audio,
+    pad_batch,
+)
+
+
+def load_counting_engine(model_name):
+    # Loaded in the worker process: reports the batch each utterance was in.
+    def transcribe(batch, lengths):
+        return [f"{length} samples, batch of {len(batch)}" for length in lengths]
+
+    return transcribe
+
+
+def load_slow_engine(model_name):
+    import time
+
+    def transcribe(batch, lengths):
+        time.sleep(1)
+        return ["too late"] * len(batch)
+
+    return transcribe
+
+
+def utterance(samples: int) -> bytes:
+    return pcm16_to_wav(np.full(samples, 1000, dtype="<i2").tobytes(), SAMPLE_RATE)
+
+
+def test_wav_is_decoded_to_float_samples():
+    audio = decode_audio(utterance(160), "utterance.wav")
+
+    assert audio.dtype == np.float32
+    assert len(audio) == 160
+    assert audio[0] == pytest.approx(1000 / 32768)
+
+
+def test_batches_are_zero_padded_to_the_longest_utterance():
+    batch, lengths = pad_batch([np.ones(3, np.float32), np.ones(5, np.float32)])
+
+    assert batch.shape == (2, 5)
+    assert lengths.tolist() == [3, 5]
+    assert batch[0].tolist() == [1, 1, 1, 0, 0]
+
+
+@pytest.mark.asyncio
+async def test_concurrent_utterances_share_one_inference():
+    transcriber = BatchingTranscriber(
+        engine=f"{__name__}:load_counting_engine",
+        model_name="test",
+        window_ms=200,
+        max_batch=4,
+    )
+    await transcriber.start()
+    try:
+        texts = await asyncio.gather(
+            *(
+                transcriber.transcribe(utterance(samples), "utterance.wav")
+                for samples in (100, 200, 300, 400, 500)
+            )
+        )
+    finally:
+        await transcriber.aclose()
+
+    # Each caller gets its own text back; the fifth waits for the next batch.
+    assert texts == [
+        "100 samples, batch of 4",
+        "200 samples, batch of 4",
+        "300 samples, batch of 4",
+        "400 samples, batch of 4",
+        "500 samples, batch of 1",
+    ]
+    snapshot = transcriber.snapshot()
+    assert snapshot["batches"] == 2
+    assert snapshot["largest_batch"] == 4
+
+
+@pytest.mark.asyncio
+async def test_an_undecodable_utterance_fails_alone():
+    transcriber = BatchingTranscriber(
+        engine=f"{__name__}:load_counting_engine",
+        model_name="test",
+        window_ms=200,
+        max_batch=2,
+    )
+    await transcriber.start()
+    try:
+        good, bad = await asyncio.gather(
+            transcriber.transcribe(utterance(100), "utterance.wav"),
+            transcriber.transcribe(b"not audio", "utterance.webm"),
+            return_exceptions=True,
+        )
+    finally:
+        await transcriber.aclose()
+
+    assert good == "100 samples, batch of 1"
+    assert isinstance(bad, ValueError)
+
+
+@pytest.mark.asyncio
+async def test_closing_cancels_utterances_in_and_waiting_for_a_batch():
+    transcriber = BatchingTranscriber(
+        engine=f"{__name__}:load_slow_engine", model_name="test", max_batch=1
+    )
+    await transcriber.start()
+    running = asyncio.create_task(transcriber.transcribe(utterance(100), "a.wav"))
+    waiting = asyncio.create_task(transcriber.transcribe(utterance(100), "b.wav"))
+    while transcriber.stats.batches < 1 or not transcriber._queue.empty():
+        await asyncio.sleep(0.01)
+
+    await transcriber.aclose()
+
+    results = await asyncio.wait_for(
+        asyncio.gather(running, waiting, return_exceptions=True), timeout=5
+    )
+    assert all(isinstance(result, asyncio.CancelledError) for result in results)
@@ -0,0 +1,33 @@
+import pytest
+
+from nlp_processor.text_to_speech import TextToSpeech
+
+# MPEG-1 Layer III, 128 kbps, 44.1 kHz: 417-byte frames.
+FRAME = bytes([0xFF, 0xFB, 0x90, 0x64]) + bytes(413)
+
+
+class FakeGTTS:
+    parts_served = 0
+
+    def __init__(self, text, lang, slow):
+        self.text = text
+
+    def stream(self):
+        for _ in range(3):
+            FakeGTTS.parts_served += 1
+            yield FRAME * 2
+
+
+@pytest.mark.asyncio
+async def test_audio_is_streamed_part_by_part(mocker):
+    mocker.patch("gtts.gTTS", FakeGTTS)
+    FakeGTTS.parts_served = 0
+    tts = TextToSpeech(chunk_size=len(FRAME) * 2)
+
+    chunks = []
+    async for chunk in tts._send_audio("Your balance is ₹500."):
+        # Each part is framed and sent before the next one is requested.
+        assert FakeGTTS.parts_served == len(chunks) + 1
+        chunks.append(chunk)
+
+    assert chunks == [FRAME * 2] * 3
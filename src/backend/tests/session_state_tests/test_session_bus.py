@@ -0,0 +1,96 @@
+import asyncio
+from types import SimpleNamespace
+from uuid import uuid4
+
+import psycopg
+import pytest
+
+from config.settings import SessionConfig
+from session_state.bus import SESSIONS_CHANNEL, PostgresEventBus
+from session_state.factories import create_shared_session_store
+from session_state.registry import SessionRegistry
+from session_state.stores import InMemorySessionStore, SessionState
+
+
+class FakeConnection:
+    """LISTEN connection delivering `payloads`, then failing or idling."""
+
+    def __init__(self, payloads, fail):
+        self.payloads = payloads
+        self.fail = fail
+        self.closed = False
+
+    async def execute(self, statement):
+        pass
+
+    async def notifies(self):
+        for payload in self.payloads:
+            yield SimpleNamespace(channel=SESSIONS_CHANNEL, payload=payload)
+        if self.fail:
+            raise psycopg.OperationalError("server closed the connection")
+        await asyncio.Event().wait()
+
+    async def close(self):
+        self.closed = True
+
+
+@pytest.mark.asyncio
+async def test_listener_reconnects_and_announces_missed_events(mocker):
+    first = FakeConnection(['{"conversation_id": "a", "origin": "w"}'], fail=True)
+    second = FakeConnection(['{"conversation_id": "b", "origin": "w"}'], fail=False)
+    mocker.patch(
+        "session_state.bus.AsyncConnection.connect", side_effect=[first, second]
+    )
+    bus = PostgresEventBus(pool=SimpleNamespace(conninfo=""), min_backoff_seconds=0.01)
+    received = []
+
+    async def handler(event):
+        received.append(event)
+
+    bus.subscribe(SESSIONS_CHANNEL, handler)
+    await bus.open()
+    for _ in range(50):
+        if len(received) == 3:
+            break
+        await asyncio.sleep(0.01)
+    await bus.close()
+
+    assert received == [
+        {"conversation_id": "a", "origin": "w"},
+        {"origin": None},
+        {"conversation_id": "b", "origin": "w"},
+    ]
+    assert first.closed and bus.reconnects == 1
+
+
+@pytest.mark.asyncio
+async def test_a_keyless_event_drops_every_local_session():
+    bus = PostgresEventBus(pool=SimpleNamespace(conninfo=""))
+    registry = SessionRegistry(
+        local=InMemorySessionStore(max_sessions=10, ttl_seconds=60), bus=bus
+    )
+    await registry.local.put(SessionState(conversation_id=uuid4()))
+
+    await bus._dispatch(SESSIONS_CHANNEL, {"origin": None})
+
+    assert len(registry) == 0
+
+
+@pytest.mark.parametrize(
+    "session, error",
+    [
+        (dict(store="sqlite", bus="local", secret_key="k"), "SESSION_BUS=postgres"),
+        (dict(store="postgres", bus="postgres", secret_key=""), "SESSION_SECRET_KEY"),
+    ],
+)
+def test_shared_stores_need_the_postgres_bus_and_a_shared_key(session, error):
+    settings = SimpleNamespace(session=SessionConfig(**session))
+
+    with pytest.raises(ValueError, match=error):
+        create_shared_session_store(settings=settings, pool=None)
+
+
+def test_sessions_may_stay_local_without_either():
+    settings = SimpleNamespace(session=SessionConfig(store="memory", bus="local", secret_key=""))
+
+    assert create_shared_session_store(settings=settings, pool=None) is None
@@ -0,0 +1,89 @@
+import sys
+from uuid import uuid4
+
+import pytest
+
+from ai_services.utils import format_messages_for_agent
+from session_state.memory import MemoryAccountant, SessionMemoryExceeded
+from session_state.stores import Message, SessionState
+
+
+def make_session(turns: int, size: int = 1000) -> SessionState:
+    session = SessionState(conversation_id=uuid4())
+    for i in range(turns):
+        session.append("user", f"question {i} " + "x" * size)
+        session.append("agent", f"answer {i} " + "y" * size)
+    return session
+
+
+def test_messages_are_slotted_and_compatible_with_dicts():
+    message = Message("agent", "Your balance is ₹500.")
+
+    assert not hasattr(message, "__dict__")
+    assert message.sender is sys.intern("agent")
+    assert message["content"] == "Your balance is ₹500."
+    assert message == {"sender": "agent", "content": "Your balance is ₹500."}
+    assert sys.getsizeof(message) < sys.getsizeof(message.to_dict())
+
+
+def test_session_from_stored_dicts_counts_user_messages():
+    session = SessionState(
+        conversation_id=uuid4(),
+        history=[{"sender": "user", "content": "hi"}, {"sender": "agent", "content": "hello"}],
+    )
+
+    assert all(isinstance(m, Message) for m in session.history)
+    assert session.user_message_count == 1
+    assert session.history_dicts()[1] == {"sender": "agent", "content": "hello"}
+
+
+def test_agent_messages_are_built_once():
+    session = make_session(2, size=10)
+
+    first = format_messages_for_agent(session.history)
+    second = format_messages_for_agent(session.history)
+
+    assert len(first) == 4
+    assert all(a is b for a, b in zip(first, second))
+
+
+def test_compaction_drops_oldest_turns_and_keeps_user_first():
+    session = make_session(10)
+
+    dropped = session.compact(max_bytes=5000)
+
+    assert dropped > 0
+    assert session.history[0].sender == "user"
+    assert session.history[-1]["content"].startswith("answer 9")
+    assert session.memory_bytes() <= 5000 + sys.getsizeof(session.history)
+    assert session.user_message_count == 10, "compaction keeps the turn count"
+
+
+def test_accountant_compacts_above_soft_cap():
+    accountant = MemoryAccountant(soft_cap_bytes=20_000, hard_cap_bytes=100_000)
+    session = make_session(20)
+    memory = accountant.open(session.conversation_id)
+    memory.add_probe("history", session.memory_bytes)
+
+    accountant.enforce(memory, session)
+
+    assert session.memory_bytes() <= 10_000 + sys.getsizeof(session.history)
+    snapshot = accountant.snapshot()
+    assert snapshot["compactions"] == 1
+    assert snapshot["sessions"] == 1
+    assert snapshot["largest"][str(session.conversation_id)]["history_bytes"] > 0
+
+
+def test_accountant_sheds_session_it_cannot_compact():
+    accountant = MemoryAccountant(soft_cap_bytes=1000, hard_cap_bytes=5000)
+    session = make_session(1)
+    memory = accountant.open(session.conversation_id)
+    memory.add_probe("history", session.memory_bytes)
+    memory.add_probe("inbound_audio", lambda: 10_000)
+
+    with pytest.raises(SessionMemoryExceeded):
+        accountant.enforce(memory, session)
+
+    accountant.close(memory)
+    assert accountant.snapshot()["shed"] == 1
+    assert accountant.snapshot()["sessions"] == 0
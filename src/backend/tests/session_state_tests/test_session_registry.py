@@ -0,0 +1,67 @@
+import pytest
+from uuid import uuid4
+
+from session_state.bus import LocalEventBus
+from session_state.registry import SessionRegistry
+from session_state.stores import InMemorySessionStore, SQLiteSessionStore
+
+
+def make_registry(shared=None, bus=None) -> SessionRegistry:
+    return SessionRegistry(
+        local=InMemorySessionStore(max_sessions=10, ttl_seconds=60),
+        shared=shared,
+        bus=bus or LocalEventBus(),
+    )
+
+
+@pytest.mark.asyncio
+async def test_warm_session_is_resumed_without_database(mocker):
+    registry = make_registry()
+    conversation_id = uuid4()
+    session = await registry.create(conversation_id)
+    await registry.append(session, "user", "hello")
+    history = mocker.patch("session_state.registry.get_conversation_history")
+
+    session = await registry.resume(conn=None, conversation_id=conversation_id)
+
+    assert session.history == [{"sender": "user", "content": "hello"}]
+    history.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_cold_session_is_rebuilt_from_database(mocker):
+    registry = make_registry()
+    stored = [{"sender": "user", "content": "hi"}, {"sender": "agent", "content": "hello"}]
+    mocker.patch(
+        "session_state.registry.get_conversation_history", return_value=stored
+    )
+
+    session = await registry.resume(conn=None, conversation_id=uuid4())
+
+    assert session.history == stored
+    assert session.user_message_count == 1
+
+
+@pytest.mark.asyncio
+async def test_session_moves_between_workers_through_shared_store(tmp_path, mocker):
+    shared = SQLiteSessionStore(path=str(tmp_path / "sessions.db"))
+    await shared.open()
+    bus_a, bus_b = LocalEventBus(), LocalEventBus()
+    bus_b._handlers = bus_a._handlers  # one bus, two workers
+    worker_a = make_registry(shared=shared, bus=bus_a)
+    worker_b = make_registry(shared=shared, bus=bus_b)
+    history = mocker.patch("session_state.registry.get_conversation_history")
+    conversation_id = uuid4()
+
+    session_a = await worker_a.create(conversation_id)
+    await worker_a.append(session_a, "user", "balance?")
+
+    # The client reconnects to worker B and keeps talking there
+    session_b = await worker_b.resume(conn=None, conversation_id=conversation_id)
+    await worker_b.append(session_b, "agent", "₹100.00")
+
+    # Worker A's local copy was invalidated, so it sees B's reply
+    session_a = await worker_a.resume(conn=None, conversation_id=conversation_id)
+    assert [m["content"] for m in session_a.history] == ["balance?", "₹100.00"]
+    history.assert_not_called()
+    await shared.close()
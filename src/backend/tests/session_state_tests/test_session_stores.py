@@ -0,0 +1,44 @@
+import pytest
+from uuid import uuid4
+
+from session_state.stores import InMemorySessionStore, SessionState, SQLiteSessionStore
+
+
+@pytest.mark.asyncio
+async def test_least_recently_used_session_is_evicted():
+    store = InMemorySessionStore(max_sessions=2, ttl_seconds=60)
+    first, second, third = uuid4(), uuid4(), uuid4()
+    await store.put(SessionState(conversation_id=first))
+    await store.put(SessionState(conversation_id=second))
+    await store.get(first)
+    await store.put(SessionState(conversation_id=third))
+
+    assert await store.get(second) is None
+    assert await store.get(first) is not None
+    assert len(store) == 2
+
+
+@pytest.mark.asyncio
+async def test_idle_session_expires():
+    store = InMemorySessionStore(max_sessions=10, ttl_seconds=0)
+    session = SessionState(conversation_id=uuid4())
+    session.last_seen -= 1
+    await store.put(session)
+
+    assert await store.get(session.conversation_id) is None
+
+
+@pytest.mark.asyncio
+async def test_sqlite_store_round_trip(tmp_path):
+    store = SQLiteSessionStore(path=str(tmp_path / "sessions.db"))
+    await store.open()
+    session = SessionState(conversation_id=uuid4())
+    session.append("user", "hi")
+
+    await store.put(session)
+    loaded = await store.get(session.conversation_id)
+    await store.discard(session.conversation_id)
+
+    assert loaded.history == [{"sender": "user", "content": "hi"}]
+    assert await store.get(session.conversation_id) is None
+    await store.close()
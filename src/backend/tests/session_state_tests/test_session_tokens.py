@@ -0,0 +1,45 @@
+from types import SimpleNamespace
+from uuid import uuid4
+
+import pytest
+
+from api.dependencies import get_conversation_id
+from config.settings import get_settings
+from session_state.tokens import sign_session_token, verify_session_token
+
+
+def test_token_round_trip():
+    conversation_id = uuid4()
+    token = sign_session_token(conversation_id, "secret", ttl_seconds=60)
+    assert verify_session_token(token, "secret") == conversation_id
+
+
+def test_token_with_wrong_key_is_rejected():
+    token = sign_session_token(uuid4(), "secret", ttl_seconds=60)
+    assert verify_session_token(token, "other-secret") is None
+
+
+def test_expired_token_is_rejected():
+    token = sign_session_token(uuid4(), "secret", ttl_seconds=-1)
+    assert verify_session_token(token, "secret") is None
+
+
+def test_malformed_token_is_rejected():
+    assert verify_session_token("not-a-token", "secret") is None
+    assert verify_session_token("abc.def", "secret") is None
+
+
+@pytest.mark.asyncio
+async def test_only_a_verified_token_resumes():
+    conversation_id = uuid4()
+    token = sign_session_token(
+        conversation_id, get_settings().session.secret_key, ttl_seconds=60
+    )
+
+    valid = await get_conversation_id(SimpleNamespace(query_params={"session_token": token}))
+    forged = await get_conversation_id(
+        SimpleNamespace(query_params={"session_token": token + "x"})
+    )
+
+    assert valid == (conversation_id, True)
+    assert forged.id != conversation_id and not forged.resumed